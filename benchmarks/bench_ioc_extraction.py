@@ -0,0 +1,80 @@
+# benchmarks/bench_ioc_extraction.py
+"""
+Benchmark throughput IOCExtractor.extract (event/detik) pada log jaringan sintetis.
+
+Contoh:
+    python benchmarks/bench_ioc_extraction.py --events 1000000 --unique-urls 20000
+"""
+import os
+import sys
+import time
+import random
+import argparse
+
+# Tambahkan path root proyek ke sys.path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+import core.ioc_extractor as ioc_extractor
+from core.ioc_extractor import IOCExtractor
+
+PATH_SUFFIXES = ["/index.html", "/static/app.js", "/img/logo.png", "/api/collect", "/download/setup.exe",
+                 "/files/report%20final.docm", "/archive.zip", "/track?id=123"]
+
+
+def build_synthetic_events(event_count, unique_url_count, seed=1337):
+    """Membuat event request/response sintetis; URL diambil dengan distribusi miring seperti log nyata."""
+    rng = random.Random(seed)
+    hosts = [f"cdn{i}.example{i % 97}.com" for i in range(max(1, unique_url_count // 20))]
+    hosts += [f"10.0.{i // 256}.{i % 256}" for i in range(max(1, unique_url_count // 200))]
+    urls = [f"https://{rng.choice(hosts)}{rng.choice(PATH_SUFFIXES)}?v={i}" for i in range(unique_url_count)]
+
+    events = []
+    for i in range(event_count):
+        # Distribusi Pareto: sebagian kecil URL (tracker, aset umum) mendominasi lalu lintas
+        url = urls[min(int(rng.paretovariate(1.2)) - 1, unique_url_count - 1)] if i % 4 else rng.choice(urls)
+        if i % 2:
+            events.append({"type": "response", "url": url, "status": 200, "timestamp": i})
+        else:
+            events.append({"type": "request", "url": url, "method": "POST" if i % 10 == 0 else "GET",
+                           "post_data": "a=1" if i % 10 == 0 else None, "timestamp": i})
+    return events
+
+
+def run_once(events, use_cache=True):
+    original = ioc_extractor._parse_url_facts
+    if not use_cache:
+        # Bandingkan dengan perilaku tanpa memoization: parsing ulang setiap URL
+        ioc_extractor._parse_url_facts = ioc_extractor._compute_url_facts
+    else:
+        ioc_extractor._parse_url_facts.cache_clear()
+    try:
+        start = time.perf_counter()
+        IOCExtractor(events).extract()
+        return time.perf_counter() - start
+    finally:
+        ioc_extractor._parse_url_facts = original
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark ekstraksi IOC pada log jaringan sintetis.")
+    parser.add_argument("--events", type=int, default=1_000_000, help="Jumlah event sintetis (default: 1.000.000).")
+    parser.add_argument("--unique-urls", type=int, default=20_000, help="Jumlah URL unik dalam log (default: 20.000).")
+    parser.add_argument("--repeat", type=int, default=3, help="Jumlah pengulangan; hasil terbaik yang dilaporkan.")
+    args = parser.parse_args(argv)
+
+    # Matikan log INFO dari extractor agar tidak ikut terukur
+    ioc_extractor.logger.setLevel("WARNING")
+
+    print(f"Membuat {args.events:,} event sintetis ({args.unique_urls:,} URL unik)...")
+    events = build_synthetic_events(args.events, args.unique_urls)
+
+    for label, use_cache in (("tanpa cache", False), ("dengan cache LRU", True)):
+        best = min(run_once(events, use_cache) for _ in range(args.repeat))
+        print(f"{label:>18}: {best:.3f} detik, {args.events / best:,.0f} event/detik")
+    print(f"Statistik cache: {ioc_extractor._parse_url_facts.cache_info()}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
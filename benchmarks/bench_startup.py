@@ -0,0 +1,96 @@
+# benchmarks/bench_startup.py
+"""
+Benchmark waktu startup CLI: biaya `import main` (diukur dengan `python -X importtime`) dan waktu
+`python main.py --help`. Keluar dengan kode 1 jika impor melebihi anggaran atau jika modul berat
+(Playwright, Jinja2, requests, numpy) ikut termuat, sehingga bisa dipakai sebagai penjaga di CI.
+
+Contoh:
+    python benchmarks/bench_startup.py --budget-ms 60 --top 15
+"""
+import os
+import sys
+import time
+import argparse
+import subprocess
+
+# Tambahkan path root proyek ke sys.path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+# Modul yang hanya boleh dimuat saat tahap yang membutuhkannya berjalan
+HEAVY_MODULES = ("playwright", "jinja2", "requests", "numpy")
+
+
+def parse_importtime(stderr_text):
+    """
+    Mengurai keluaran `-X importtime` menjadi list (modul, self_us, cumulative_us, kedalaman).
+    Kedalaman 0 berarti modul diimpor langsung oleh perintah yang diukur.
+    """
+    entries = []
+    for line in stderr_text.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        stripped = name.lstrip()
+        entries.append((stripped.rstrip(), int(self_us), int(cumulative_us), (len(name) - len(stripped) - 1) // 2))
+    return entries
+
+
+def module_subtree(entries, root="main"):
+    """Entri yang diimpor (langsung atau tidak) oleh root, termasuk root; keluaran importtime berurutan post-order."""
+    for index, entry in enumerate(entries):
+        if entry[0] == root and entry[3] == 0:
+            start = index
+            while start > 0 and entries[start - 1][3] > 0:
+                start -= 1
+            return entries[start:index + 1]
+    return []
+
+
+def measure_import(module="main"):
+    """Menjalankan `import <module>` di interpreter baru; mengembalikan (entri importtime, modul berat yang termuat)."""
+    probe = f"import sys, {module}; print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", probe], cwd=project_root,
+                            capture_output=True, text=True, check=True)
+    loaded_heavy = [name for name in result.stdout.strip().split(",") if name]
+    return parse_importtime(result.stderr), loaded_heavy
+
+
+def measure_help():
+    """Waktu dinding (detik) untuk `python main.py --help`."""
+    start = time.perf_counter()
+    subprocess.run([sys.executable, os.path.join(project_root, "main.py"), "--help"], cwd=project_root,
+                   capture_output=True, check=True)
+    return time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark waktu startup CLI (import main dan --help).")
+    parser.add_argument("--budget-ms", type=float, default=60.0, help="Anggaran waktu kumulatif `import main` dalam ms (default: 60).")
+    parser.add_argument("--top", type=int, default=10, help="Jumlah modul termahal yang ditampilkan (default: 10).")
+    parser.add_argument("--repeat", type=int, default=5, help="Jumlah pengulangan; hasil terbaik yang dilaporkan.")
+    args = parser.parse_args(argv)
+
+    runs = [(module_subtree(entries), loaded_heavy) for entries, loaded_heavy in (measure_import() for _ in range(args.repeat))]
+    entries, loaded_heavy = min(runs, key=lambda run: run[0][-1][2] if run[0] else float("inf"))
+    main_us = entries[-1][2] if entries else 0
+    help_seconds = min(measure_help() for _ in range(args.repeat))
+
+    print(f"import main     : {main_us / 1000:.1f} ms (anggaran {args.budget_ms:.0f} ms)")
+    print(f"main.py --help  : {help_seconds * 1000:.0f} ms")
+    print("Modul termahal di bawah main (kumulatif, self):")
+    for name, self_us, cumulative_us, depth in sorted(entries, key=lambda e: e[2], reverse=True)[:args.top]:
+        print(f"  {cumulative_us / 1000:8.1f} ms  {self_us / 1000:6.1f} ms  {'  ' * depth}{name}")
+
+    failed = False
+    if loaded_heavy:
+        print(f"GAGAL: modul berat termuat saat startup: {', '.join(loaded_heavy)}")
+        failed = True
+    if main_us / 1000 > args.budget_ms:
+        print(f"GAGAL: import main melebihi anggaran ({main_us / 1000:.1f} ms > {args.budget_ms:.0f} ms)")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
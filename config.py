@@ -11,18 +11,123 @@ NETWORK_LOG_DIR = "output/network_logs"
 HTML_REPORT_DIR = "output/html_reports" # BARIS BARU
 
 DEFAULT_SCREENSHOT_FILENAME = "capture.png"
-DEFAULT_NETWORK_LOG_FILENAME = "network_activity.json"
+DEFAULT_NETWORK_LOG_FILENAME = "network_activity.ndjson" # Log jaringan NDJSON: satu event per baris, ditulis dan dibaca secara streaming
+NETWORK_LOG_FORMAT = "ndjson" # "ndjson" (default) atau "json" (JSON ber-indent, hanya untuk debug)
+NETWORK_LOG_DEBUG_FILENAME = "network_activity.json" # Nama file format "json"; juga dikenali saat membaca log lama
+NETWORK_LOG_COMPRESSION = "" # "" (tanpa kompresi), "gzip", atau "zstd" (butuh paket zstandard; jatuh ke gzip jika tidak terpasang)
+NETWORK_LOG_COMPRESSION_LEVEL = 3 # Level kompresi gzip/zstd (level rendah jauh lebih cepat dengan rasio yang masih baik untuk log)
+NETWORK_LOG_WRITE_BATCH = 1000 # Jumlah baris event yang ditampung sebelum ditulis ke file
 DEFAULT_HTML_REPORT_FILENAME = "analysis_report.html" # BARIS BARU
+REPORT_MAX_ROWS_PER_SECTION = 5000 # Baris maksimum per tabel laporan HTML; sisanya ditulis ke file JSON pendamping (0 = tanpa batas)
+REPORT_OVERFLOW_FILE_SUFFIX = "_overflow.json" # Akhiran file pendamping, mis. <prefix>network_rows_overflow.json
+REPORT_STREAM_BUFFER_CHARS = 262144 # Karakter hasil render yang ditampung sebelum ditulis ke file laporan
+REPORT_LAZY_TABLE_MIN_ROWS = 500 # Tabel aktivitas jaringan dengan baris lebih dari ini disematkan sebagai data island dan dirender per halaman di browser
+REPORT_LAZY_TABLE_MAX_ROWS = 100000 # Batas baris tabel lazy; sisanya ke file JSON pendamping (0 = tanpa batas)
+REPORT_LAZY_TABLE_PAGE_SIZE = 100 # Baris per halaman tabel lazy
+REPORT_LAZY_TABLE_COMPRESS = True # Kompres data island dengan gzip+base64 (didekode browser lewat DecompressionStream)
+REPORT_TEMPLATE_CACHE_DIR = "output/.template_cache" # Cache bytecode template Jinja2 lintas proses ("" = nonaktif)
+REPORT_TEMPLATE_AUTO_RELOAD = False # True: periksa perubahan file template setiap render (berguna saat mengedit template)
+
+# Reprocess log jaringan tersimpan (tanpa browser)
+REPROCESS_REPORT_DIR = "output/html_reports/reprocessed" # Laporan hasil reprocess, terpisah dari laporan asli
+REPROCESS_MAX_WORKERS = 0 # Jumlah proses worker (0 = jumlah core CPU)
+REPROCESS_TASKS_PER_WORKER = 2 # Batas kelompok log yang antre per worker (membatasi memori saat direktori sangat besar)
+REPROCESS_BATCH_SIZE = 8 # Log per tugas worker; skor domain satu kelompok dihitung dalam satu panggilan tervektorisasi
+
+# Pipeline batch bertahap (--batch): jumlah thread worker per tahap dan kapasitas antrean di antaranya
+PIPELINE_CAPTURE_WORKERS = 2 # Browser paralel (tiap worker menjalankan instance Playwright sendiri)
+PIPELINE_EXTRACT_WORKERS = 1 # Ekstraksi IOC dan skor domain
+PIPELINE_EXTRACT_BATCH_SIZE = 4 # Job yang sudah antre diberi skor domain dalam satu panggilan tervektorisasi (efektif dibatasi PIPELINE_QUEUE_SIZE)
+PIPELINE_ENRICH_WORKERS = 4 # Threat intel (menunggu I/O jaringan; kuota tetap diatur rate limiter provider)
+PIPELINE_RENDER_WORKERS = 2 # Render laporan HTML
+PIPELINE_PERSIST_WORKERS = 1 # Log jaringan, IOC store, event store
+PIPELINE_QUEUE_SIZE = 4 # Job maksimum yang antre di antara dua tahap (backpressure ke tahap sebelumnya)
+
+# Dashboard agregat untuk batch analisis
+AGGREGATE_REPORT_DIR = "output/html_reports" # Direktori dashboard batch (tautan drill-down dibuat relatif terhadap direktori ini)
+AGGREGATE_REPORT_FILENAME = "batch_dashboard.html" # Akhiran nama file dashboard, mis. batch_20250101-120000_batch_dashboard.html
+AGGREGATE_REPORT_TOP_N = 50 # Jumlah entri teratas per indeks (domain, IP, ekstensi, fungsi JS, indikator intel)
+AGGREGATE_REPORT_MAX_LINKS = 10 # Tautan drill-down ke laporan per analisis yang disimpan per entri indeks
+
+# Pengaturan Ekstraksi IOC
+IOC_URL_CACHE_SIZE = 65536 # Jumlah maksimum URL unik yang hasil parsing-nya di-cache (LRU)
+IOC_RULES_ENABLED = True # Evaluasi aturan deklaratif dari IOC_RULES_FILE
+IOC_RULES_FILE = "rules/ioc_rules.json" # Path relatif terhadap root proyek, atau path absolut
+IOC_RULES_MAX_SCAN_CHARS = 65536 # Batas karakter body POST yang dipindai aturan
+POST_SCAN_ENABLED = True # Dekode dan pindai body POST untuk kredensial, kartu, email dan fingerprint
+POST_SCAN_MAX_BYTES = 65536 # Batas byte yang dipindai per payload POST
+POST_SCAN_TIME_BUDGET_MS = 50 # Batas waktu pemindaian per payload POST (milidetik)
+POST_SCAN_MAX_DECODE_DEPTH = 3 # Kedalaman dekode bertingkat maksimum (mis. base64 -> JSON -> form)
+POST_SCAN_MAX_FINDINGS = 50 # Jumlah temuan maksimum per payload
+POST_SCAN_REDACT = True # Samarkan nilai sensitif (password, nomor kartu) di laporan
+PUBLIC_SUFFIX_LIST_FILE = "data/public_suffix_list.dat" # Salinan https://publicsuffix.org/list/public_suffix_list.dat
+DOMAIN_SCORING_ENABLED = True # Hitung skor risiko lokal (entropi, n-gram, kemiripan DGA) untuk setiap domain
+DOMAIN_SCORING_MAX_LABEL_LENGTH = 64 # Karakter maksimum per hostname yang dinilai (sisanya dipotong)
+DOMAIN_RISK_MEDIUM_THRESHOLD = 0.5 # Skor risiko lokal (0-1) untuk level "medium"
+DOMAIN_RISK_HIGH_THRESHOLD = 0.75 # Skor risiko lokal (0-1) untuk level "high"
+PUBLIC_SUFFIX_INCLUDE_PRIVATE = True # Sertakan bagian PRIVATE (mis. github.io, blogspot.com) agar subdomain milik pihak berbeda tidak digabung
+RESPONSE_HASH_ENABLED = True # Hitung sha256 body berkas (skrip, lampiran, unduhan) sebagai indikator "hash" untuk threat intel
+RESPONSE_HASH_RESOURCE_TYPES = ["script", "other"] # Tipe resource Playwright yang body-nya di-hash (lampiran Content-Disposition selalu di-hash)
+RESPONSE_HASH_MAX_BYTES = 20 * 1024 * 1024 # Body/berkas yang lebih besar dari ini tidak di-hash
+
+# Indeks IOC lintas analisis
+IOC_STORE_ENABLED = True # Catat setiap analisis ke indeks SQLite untuk pencarian "pernah terlihat"
+IOC_STORE_PATH = "output/ioc_store.sqlite3" # Path relatif terhadap root proyek, atau path absolut
+
+# Cache Hasil Analisis
+RESULT_CACHE_ENABLED = True # URL yang sama (dengan opsi analisis sama) dalam TTL langsung mengembalikan laporan sebelumnya tanpa browser; lewati dengan --force
+RESULT_CACHE_PATH = "output/result_cache.sqlite3" # Path relatif terhadap root proyek, atau path absolut
+RESULT_CACHE_TTL_SECONDS = 900 # Umur maksimum entri cache (15 menit)
+RESULT_CACHE_MAX_ENTRIES = 1000 # Jika terlampaui, entri yang paling lama tidak diakses (LRU) dibuang
+
+# Ledger Batch (resume setelah crash/reboot)
+BATCH_LEDGER_PATH = "output/batch_ledger.sqlite3" # State per URL (pending/running/done/failed) untuk setiap file --batch
+BATCH_MAX_ATTEMPTS = 3 # Percobaan maksimum per URL lintas run, termasuk run yang terhenti saat URL sedang diproses
+
+# Antrean Job Bersama (multi-host: --enqueue di satu host, --worker di setiap host sandbox)
+JOB_QUEUE_BACKEND = "sqlite" # Backend antrean; "sqlite" = satu file yang bisa diletakkan di mount bersama (NFS/SMB)
+JOB_QUEUE_PATH = "output/job_queue.sqlite3" # Path relatif terhadap root proyek, atau path absolut di mount bersama (bisa diganti dengan --queue)
+JOB_QUEUE_JOURNAL_MODE = "DELETE" # "DELETE" aman untuk mount bersama; "WAL" lebih cepat tetapi hanya jika semua worker di host yang sama
+JOB_QUEUE_LEASE_SECONDS = 300 # Visibility timeout: job milik worker yang mati terlihat lagi setelah ini (diperpanjang heartbeat selama berjalan)
+JOB_QUEUE_MAX_ATTEMPTS = 3 # Setelah percobaan ini habis, job dipindahkan ke dead-letter
+JOB_QUEUE_RETRY_BACKOFF_SECONDS = 30 # Jeda sebelum percobaan ulang pertama; berlipat dua setiap percobaan
+JOB_QUEUE_POLL_SECONDS = 2 # Jeda worker saat antrean kosong
+
+# Penjadwalan sopan per host (--batch dan --worker): mencegah rate limit/blokir dari situs target
+SCHEDULER_MAX_PER_HOST = 1 # Kunjungan browser bersamaan maksimum ke satu hostname (di antrean bersama: lintas semua host worker)
+SCHEDULER_MIN_INTERVAL_SECONDS = 2.0 # Jeda minimum sebelum kunjungan berikutnya ke hostname yang sama (dari mulai dan dari selesainya kunjungan sebelumnya)
+SCHEDULER_DEFAULT_LANE = "bulk" # Jalur prioritas default --enqueue dan --batch; job "urgent" (analis) selalu diambil sebelum "bulk"
+
+# Event store kolumnar lintas analisis (untuk kueri analitik, mis. p95 waktu respons per domain)
+EVENT_STORE_ENABLED = True # Tambahkan event jaringan, panggilan JS dinamis dan cookies setiap analisis ke event store
+EVENT_STORE_DIR = "output/event_store" # Dipartisi per tabel dan tanggal: <tabel>/date=YYYY-MM-DD/<run_id>.*
+EVENT_STORE_BACKEND = "auto" # "auto" (Parquet jika pyarrow terpasang), "parquet", atau "columns" (satu file JSON gzip per kolom)
+EVENT_STORE_MAX_VALUE_CHARS = 4096 # Panjang maksimum nilai teks (URL, argumen JS, nilai cookie) yang disimpan (0 = tanpa batas)
 
 # Setting API Virustotal
 VIRUSTOTAL_API_KEY = ""
 THREAT_INTEL_ENABLED = True # Set ke False untuk menonaktifkan pemeriksaan ke VirusTotal
 VIRUSTOTAL_REQUEST_DELAY = 16 # Detik, untuk mematuhi batasan API key gratis (4 permintaan/menit)
+THREAT_INTEL_PROVIDERS = ["virustotal"] # Provider aktif, lihat core/intel_providers.py. Pilihan: "virustotal", "local_file", "offline_index"
+LOCAL_INTEL_FILE = "" # Path file JSON untuk provider "local_file" (berguna untuk pengujian offline)
+OFFLINE_INTEL_INDEX = "" # Path indeks feed massal hasil `python core/offline_intel.py compile ...` untuk provider "offline_index"
+OFFLINE_INTEL_COMPILE_CHUNK_SIZE = 1000000 # Entri per run pengurutan saat kompilasi feed (membatasi RAM)
+THREAT_INTEL_MAX_WORKERS = 4 # Jumlah maksimum thread lookup paralel per provider
+THREAT_INTEL_CACHE_TTL = 3600 # Detik, masa berlaku cache hasil per provider
+THREAT_INTEL_CACHE_MAX_ENTRIES = 10000
+THREAT_INTEL_DEFERRED = False # True: laporan ditulis segera dengan penanda "pending", threat intel berjalan di latar belakang
+THREAT_INTEL_RERENDER_INTERVAL_SECONDS = 5 # Mode latar belakang: jeda minimum antar render ulang laporan saat hasil masuk (render final selalu dilakukan)
+THREAT_INTEL_PER_REGISTRABLE_DOMAIN = False # True: lookup domain per eTLD+1 (mis. example.co.uk), bukan per hostname
+THREAT_INTEL_MIN_DOMAIN_RISK = 0.0 # Domain dengan skor risiko lokal di bawah nilai ini tidak dikirim ke provider (0 = periksa semua)
+THREAT_INTEL_EARLY_LOOKUP = True # Mulai lookup domain/IP baru selama halaman masih dimuat (mode blocking)
+THREAT_INTEL_EARLY_MIN_DOMAIN_RISK = 0.5 # Lookup awal hanya untuk domain dengan skor risiko lokal minimal ini; sisanya diperiksa setelah capture sesuai urutan skor
+DEFAULT_THREAT_INTEL_FILENAME = "threat_intel.json" # File JSON hasil threat intel, berdampingan dengan laporan HTML
 
 # Pengaturan Logging
 LOG_LEVEL = "INFO"  # Pilihan: "DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"
 LOG_FILE = "app_activity.log" # File log utama aplikasi
 LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+LOG_FILE_FORMAT = "text" # "text" (LOG_FORMAT) atau "json" (JSON lines per record dengan job_id, proses dan thread; cocok untuk run multi-worker)
 
 # Target URL default untuk analisis (bisa di-override dari argumen CLI nantinya)
 DEFAULT_TARGET_URL = "https://jsonplaceholder.typicode.com/todos/1"
@@ -0,0 +1,230 @@
+# core/aggregate_report.py
+import os
+import sys
+import time
+import heapq
+from collections import Counter
+from jinja2 import exceptions as JinjaExceptions
+
+# Tambahkan path root proyek ke sys.path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+import config
+from utils.logger_config import setup_logger
+from core.intel_providers import is_ip_address
+from core.report_generator import HTMLReportGenerator, encode_data_island, get_template_environment
+
+logger = setup_logger(__name__, config.LOG_LEVEL, config.LOG_FILE)
+
+# Urutan keparahan verdict intel (indeks lebih besar = lebih parah)
+VERDICT_SEVERITY = ("clean", "error", "suspicious", "malicious")
+
+# Indeks ringkasan di dashboard: (kunci, judul, label kolom entri)
+AGGREGATE_INDEXES = (
+    ("domains", "Domain Teratas", "Domain"),
+    ("ips", "IP yang Dihubungi", "Alamat IP"),
+    ("harmful_extensions", "Ekstensi Berpotensi Berbahaya", "Ekstensi"),
+    ("dynamic_js", "Eksekusi JS Dinamis", "Fungsi"),
+    ("intel_indicators", "Verdict Threat Intel (Malicious/Suspicious)", "Indikator"),
+)
+
+
+def intel_verdict(report):
+    """Menyederhanakan laporan threat intel menjadi satu verdict: malicious, suspicious, error, atau clean."""
+    if "error" in report:
+        return "error"
+    if (report.get("malicious") or 0) > 0:
+        return "malicious"
+    if (report.get("suspicious") or 0) > 0:
+        return "suspicious"
+    return "clean"
+
+
+def summarize_analysis(analysis_data, html_report_path=None):
+    """
+    Ringkasan kecil satu analisis untuk dashboard batch: hanya hitungan dan indikator, tanpa event jaringan.
+    Aman dikirim antar proses (dipakai worker reprocess) dan dibuang setelah dimasukkan ke AggregateReportBuilder.
+    """
+    extracted_iocs = analysis_data.get("extracted_iocs") or {}
+    hosts = extracted_iocs.get("unique_domains") or []
+    intel_verdicts = {}
+    for report in analysis_data.get("virustotal_reports") or []:
+        indicator = report.get("indicator") or report.get("domain")
+        if indicator:
+            intel_verdicts[indicator] = {
+                "verdict": intel_verdict(report),
+                "malicious": report.get("malicious") or 0,
+                "suspicious": report.get("suspicious") or 0,
+            }
+    return {
+        "target_url": analysis_data.get("target_url"),
+        "analysis_timestamp": analysis_data.get("analysis_timestamp"),
+        "html_report_path": html_report_path,
+        "domains": [host for host in hosts if not is_ip_address(host)],
+        "ips": [host for host in hosts if is_ip_address(host)],
+        "harmful_extensions": dict(Counter(item.get("extension") for item in extracted_iocs.get("potentially_harmful_urls") or [])),
+        "dynamic_js": dict(Counter(call.get("function_name") or "unknown" for call in analysis_data.get("dynamic_js_calls") or [])),
+        "intel_verdicts": intel_verdicts,
+        "rule_matches": len(extracted_iocs.get("rule_matches") or []),
+        "error": None,
+    }
+
+
+class _IndexEntry:
+    """Satu entri indeks: jumlah analisis, jumlah kemunculan, dan nomor analisis untuk drill-down (dibatasi)."""
+    __slots__ = ("analyses", "hits", "links")
+
+    def __init__(self):
+        self.analyses = 0
+        self.hits = 0
+        self.links = []
+
+    def add(self, analysis_no, hits, max_links):
+        self.analyses += 1
+        self.hits += hits
+        if len(self.links) < max_links:
+            self.links.append(analysis_no)
+
+
+class AggregateReportBuilder:
+    """
+    Membangun dashboard agregat untuk satu batch analisis secara inkremental. Setiap ringkasan
+    (summarize_analysis) langsung dilipat ke indeks Counter dan satu baris ringkas per analisis;
+    data analisis lengkap tidak pernah ditampung. Dashboard dirender streaming lewat write().
+    """
+
+    def __init__(self, output_dir=None, top_n=None, max_links=None, template_dir="templates"):
+        output_dir = output_dir if output_dir else config.AGGREGATE_REPORT_DIR
+        self.output_dir = output_dir if os.path.isabs(output_dir) else os.path.join(project_root, output_dir)
+        self.top_n = top_n if top_n is not None else config.AGGREGATE_REPORT_TOP_N
+        self.max_links = max_links if max_links is not None else config.AGGREGATE_REPORT_MAX_LINKS
+        self.template_dir = os.path.join(project_root, template_dir)
+        self.started_at = time.strftime("%Y-%m-%d %H:%M:%S")
+        # Baris ringkas per analisis: [No., Waktu, Target, Laporan, Domain, IP, Ekstensi berbahaya, JS dinamis, Malicious, Temuan aturan, Error]
+        self.analysis_rows = []
+        self.indexes = {key: {} for key, _, _ in AGGREGATE_INDEXES}
+        self.intel_details = {}
+        self.verdict_totals = Counter()
+        self.failed = 0
+
+    def _report_link(self, report_path):
+        if not report_path:
+            return ""
+        try:
+            return os.path.relpath(report_path, self.output_dir).replace(os.sep, "/")
+        except ValueError: # Drive berbeda (Windows): tautan relatif tidak mungkin
+            return report_path.replace(os.sep, "/")
+
+    def _index(self, key, analysis_no, counts):
+        index = self.indexes[key]
+        for value, hits in counts.items():
+            entry = index.get(value)
+            if entry is None:
+                entry = index[value] = _IndexEntry()
+            entry.add(analysis_no, hits, self.max_links)
+
+    def add_analysis(self, summary):
+        """Memasukkan ringkasan satu analisis (hasil summarize_analysis, boleh berisi 'error')."""
+        analysis_no = len(self.analysis_rows) + 1
+        if summary.get("error"):
+            self.failed += 1
+            self.analysis_rows.append([analysis_no, summary.get("analysis_timestamp") or "", summary.get("target_url") or "",
+                                       self._report_link(summary.get("html_report_path")), 0, 0, 0, 0, 0, 0, summary["error"]])
+            return
+
+        domains = summary.get("domains") or []
+        ips = summary.get("ips") or []
+        harmful_extensions = summary.get("harmful_extensions") or {}
+        dynamic_js = summary.get("dynamic_js") or {}
+        intel_verdicts = summary.get("intel_verdicts") or {}
+
+        self._index("domains", analysis_no, dict.fromkeys(domains, 1))
+        self._index("ips", analysis_no, dict.fromkeys(ips, 1))
+        self._index("harmful_extensions", analysis_no, harmful_extensions)
+        self._index("dynamic_js", analysis_no, dynamic_js)
+
+        flagged = {}
+        for indicator, detail in intel_verdicts.items():
+            verdict = detail.get("verdict", "clean")
+            self.verdict_totals[verdict] += 1
+            if verdict not in ("malicious", "suspicious"):
+                continue
+            flagged[indicator] = 1
+            known = self.intel_details.get(indicator)
+            if known is None or VERDICT_SEVERITY.index(verdict) > VERDICT_SEVERITY.index(known["verdict"]):
+                self.intel_details[indicator] = dict(detail)
+        self._index("intel_indicators", analysis_no, flagged)
+
+        malicious_count = sum(1 for detail in intel_verdicts.values() if detail.get("verdict") == "malicious")
+        self.analysis_rows.append([
+            analysis_no, summary.get("analysis_timestamp") or "", summary.get("target_url") or "",
+            self._report_link(summary.get("html_report_path")), len(domains), len(ips),
+            sum(harmful_extensions.values()), sum(dynamic_js.values()), malicious_count,
+            summary.get("rule_matches") or 0, "",
+        ])
+
+    def _top_entries(self, key):
+        index = self.indexes[key]
+        if key == "intel_indicators":
+            rank = lambda item: (VERDICT_SEVERITY.index(self.intel_details[item[0]]["verdict"]), item[1].analyses, item[1].hits)
+        else:
+            rank = lambda item: (item[1].analyses, item[1].hits)
+        rows = []
+        for value, entry in heapq.nlargest(self.top_n, index.items(), key=rank):
+            row = {
+                "value": value,
+                "analyses": entry.analyses,
+                "hits": entry.hits,
+                "links": [{"no": no, "target": self.analysis_rows[no - 1][2], "href": self.analysis_rows[no - 1][3]} for no in entry.links],
+            }
+            if key == "intel_indicators":
+                row["intel"] = self.intel_details[value]
+            rows.append(row)
+        return rows
+
+    def build_view(self):
+        """Menyiapkan data dashboard: indeks top-N dengan tautan drill-down dan tabel analisis sebagai data island."""
+        analyses_data = encode_data_island(self.analysis_rows)
+        analyses_data["page_size"] = config.REPORT_LAZY_TABLE_PAGE_SIZE
+        return {
+            "started_at": self.started_at,
+            "generated_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "counts": {
+                "analyses": len(self.analysis_rows),
+                "failed": self.failed,
+                "domains": len(self.indexes["domains"]),
+                "ips": len(self.indexes["ips"]),
+                "harmful_hits": sum(entry.hits for entry in self.indexes["harmful_extensions"].values()),
+                "dynamic_js_calls": sum(entry.hits for entry in self.indexes["dynamic_js"].values()),
+                "analyses_with_malicious": sum(1 for row in self.analysis_rows if row[8]),
+            },
+            "verdict_totals": dict(self.verdict_totals),
+            "top_n": self.top_n,
+            "sections": [
+                {"key": key, "title": title, "label": label, "total": len(self.indexes[key]), "rows": self._top_entries(key)}
+                for key, title, label in AGGREGATE_INDEXES
+            ],
+            "analyses_data": analyses_data,
+        }
+
+    def write(self, report_filepath=None):
+        """Merender dashboard secara streaming. Mengembalikan path dashboard atau None jika gagal."""
+        if report_filepath is None:
+            report_filepath = os.path.join(self.output_dir, f"batch_{time.strftime('%Y%m%d-%H%M%S')}_{config.AGGREGATE_REPORT_FILENAME}")
+        template_name = "aggregate_report_template.html"
+        try:
+            template = get_template_environment(self.template_dir).get_template(template_name)
+            os.makedirs(os.path.dirname(report_filepath), exist_ok=True)
+            with open(report_filepath, "w", encoding="utf-8") as f:
+                HTMLReportGenerator._write_stream(template.generate(view=self.build_view()), f)
+        except JinjaExceptions.TemplateNotFound as e:
+            logger.error(f"Template file tidak ditemukan: {e}. Pastikan file '{template_name}' ada di direktori '{self.template_dir}'.", exc_info=True)
+            return None
+        except Exception as e:
+            logger.error(f"Gagal menghasilkan dashboard batch: {e}", exc_info=True)
+            return None
+        logger.info(f"Dashboard batch ({len(self.analysis_rows)} analisis) berhasil dibuat: {report_filepath}")
+        return report_filepath
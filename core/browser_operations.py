@@ -2,6 +2,7 @@
 import os
 import time
 import json 
+import hashlib
 from playwright.sync_api import sync_playwright, Error as PlaywrightError
 
 # Impor konfigurasi dan logger
@@ -18,8 +19,10 @@ from utils.logger_config import setup_logger
 logger = setup_logger(__name__, config.LOG_LEVEL, config.LOG_FILE)
 
 class BrowserAutomation:
-    def __init__(self, target_url, browser_type=None, headless_mode=None):
+    def __init__(self, target_url, browser_type=None, headless_mode=None, event_listener=None):
         self.target_url = target_url
+        # Callable opsional yang menerima setiap event jaringan segera setelah dicatat (mis. IncrementalIOCExtractor)
+        self.event_listener = event_listener
         self.browser_type = browser_type if browser_type is not None else config.BROWSER_TYPE
         self.headless_mode = headless_mode if headless_mode is not None else config.HEADLESS_MODE
         
@@ -53,6 +56,7 @@ class BrowserAutomation:
                 request_info["post_data"] = request.post_data_buffer.hex() if request.post_data_buffer else None
                 request_info["post_data_format"] = "hex_buffer"
         self.network_data.append(request_info)
+        self._notify_listener(request_info)
         logger.debug(f"Request: {request.method} {request.url}")
 
 
@@ -66,9 +70,68 @@ class BrowserAutomation:
             "status_text": response.status_text,
             "headers": dict(response.headers),
         }
+        body_sha256 = self._response_sha256(response, response_info["headers"])
+        if body_sha256:
+            response_info["sha256"] = body_sha256
         self.network_data.append(response_info)
+        self._notify_listener(response_info)
         logger.debug(f"Response: {response.status} {response.url}")
 
+    def _response_sha256(self, response, headers):
+        """
+        sha256 body respons berkas (tipe resource di RESPONSE_HASH_RESOURCE_TYPES atau lampiran), agar hash
+        berkas bisa dicek ke threat intel. None untuk respons lain, body yang tidak tersedia atau terlalu besar.
+        """
+        if not config.RESPONSE_HASH_ENABLED or not isinstance(response.status, int) or not 200 <= response.status < 300:
+            return None
+        is_attachment = "attachment" in headers.get("content-disposition", "").lower()
+        if response.request.resource_type not in config.RESPONSE_HASH_RESOURCE_TYPES and not is_attachment:
+            return None
+        try:
+            if int(headers.get("content-length", 0)) > config.RESPONSE_HASH_MAX_BYTES:
+                return None
+        except ValueError:
+            pass
+        try:
+            body = response.body()
+        except PlaywrightError as e:
+            logger.debug(f"Body respons tidak tersedia untuk di-hash: {response.url} - {e}")
+            return None
+        if len(body) > config.RESPONSE_HASH_MAX_BYTES:
+            return None
+        return hashlib.sha256(body).hexdigest()
+
+    def _handle_download(self, download):
+        """Mencatat unduhan yang dipicu halaman sebagai event 'download' beserta sha256 berkasnya."""
+        download_info = {
+            "timestamp": time.time(),
+            "type": "download",
+            "url": download.url,
+            "suggested_filename": download.suggested_filename,
+        }
+        try:
+            file_path = download.path()
+            if file_path and os.path.getsize(file_path) <= config.RESPONSE_HASH_MAX_BYTES:
+                digest = hashlib.sha256()
+                with open(file_path, "rb") as f:
+                    for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                        digest.update(chunk)
+                download_info["sha256"] = digest.hexdigest()
+        except (PlaywrightError, OSError) as e:
+            logger.warning(f"Gagal menghitung hash unduhan {download.url}: {e}")
+        self.network_data.append(download_info)
+        self._notify_listener(download_info)
+        logger.info(f"Unduhan: {download.url} (sha256: {download_info.get('sha256', '-')})")
+
+    def _notify_listener(self, event_info):
+        if self.event_listener is None:
+            return
+        try:
+            self.event_listener(event_info)
+        except Exception as e:
+            # Kegagalan listener tidak boleh mengganggu pencatatan jaringan
+            logger.error(f"Event listener gagal memproses event {event_info.get('type')} {event_info.get('url')}: {e}", exc_info=True)
+
     def _get_storage_data(self):
         if not self.page:
             logger.warning("Halaman tidak tersedia untuk mengambil data storage.")
@@ -163,6 +226,7 @@ class BrowserAutomation:
 
             logger.debug("Browser berhasil diluncurkan.")
             self.context = self.browser_instance.new_context(
+                accept_downloads=True, # Berkas unduhan di-hash (lihat _handle_download) lalu dibuang bersama konteks
                 user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36 Sandbox/1.0"
             )
             logger.debug("Konteks browser dibuat.")
@@ -249,6 +313,7 @@ class BrowserAutomation:
 
             self.page.on("request", self._handle_request)
             self.page.on("response", self._handle_response)
+            self.page.on("download", self._handle_download)
             logger.info("Event listener jaringan didaftarkan.")
 
             logger.info(f"Menavigasi ke {self.target_url}...")
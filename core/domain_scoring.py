@@ -0,0 +1,231 @@
+# core/domain_scoring.py
+import os
+
+import numpy as np
+
+# Impor konfigurasi dan logger
+import sys
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+import config
+from utils.logger_config import setup_logger
+from core.public_suffix import get_public_suffix_index
+
+logger = setup_logger(__name__, config.LOG_LEVEL, config.LOG_FILE)
+
+# Alfabet hostname: a-z, 0-9, '-', lainnya. Indeks -1 dipakai sebagai padding.
+_ALPHABET = "abcdefghijklmnopqrstuvwxyz0123456789-"
+_OTHER_INDEX = len(_ALPHABET)
+_ALPHABET_SIZE = len(_ALPHABET) + 1
+_PAD = -1
+_CHAR_TO_INDEX = np.full(256, _OTHER_INDEX, dtype=np.int16)
+for _i, _c in enumerate(_ALPHABET):
+    _CHAR_TO_INDEX[ord(_c)] = _i
+
+_VOWELS = set("aeiou")
+_IS_DIGIT = np.array([c.isdigit() for c in _ALPHABET] + [False])
+_IS_CONSONANT = np.array([c.isalpha() and c not in _VOWELS for c in _ALPHABET] + [False])
+
+# Korpus kecil label domain/kata umum yang jinak untuk melatih model bigram karakter.
+# Tidak perlu lengkap: tujuannya membedakan label yang "terbaca" dari rangkaian karakter acak (DGA).
+_BENIGN_CORPUS = (
+    "google youtube facebook twitter instagram linkedin wikipedia amazon apple microsoft windows office "
+    "live outlook yahoo bing baidu netflix spotify github gitlab stackoverflow reddit pinterest tumblr "
+    "wordpress blogger medium cloudflare akamai fastly jsdelivr unpkg jquery bootstrap fonts googleapis "
+    "gstatic doubleclick analytics tagmanager adservice adsystem static images media content cdn assets "
+    "api login account accounts secure mail news shop store support help docs developer developers cloud "
+    "services service update updates download downloads portal online bank banking payment payments pay "
+    "checkout cart search maps drive photos video videos music play games game sport sports weather travel "
+    "booking hotel hotels flights airline health insurance market marketing business finance trading crypto "
+    "exchange wallet tokopedia shopee bukalapak traveloka gojek grab detik kompas tribunnews liputan okezone "
+    "kumparan tempo bca mandiri bri bni telkom indihome telkomsel indosat xl government education university "
+    "school college library research science technology digital network internet server hosting domain "
+    "website web site page home index main portal community forum chat social friends family people world "
+    "global international national local city country state public private express mobile phone tablet "
+    "computer software hardware security privacy policy terms about contact company group solutions systems "
+    "partners center central north south east west asia europe america africa indonesia jakarta bandung "
+    "surabaya medan bali yogyakarta semarang makassar tracking pixel beacon collector metrics telemetry events "
+    "notifications push stream streaming live broadcast player embed widget widgets plugin plugins theme "
+    "themes template templates gallery photo picture upload uploads file files share sharing storage backup "
+    "translate dictionary calendar office365 onedrive sharepoint teams zoom skype slack discord telegram "
+    "whatsapp signal viber line wechat tiktok snapchat twitch steam epic origin battle xbox playstation nintendo"
+).split()
+
+
+def _encode(names, max_length):
+    """Mengubah daftar string menjadi matriks indeks karakter (N x L) dengan padding -1."""
+    matrix = np.full((len(names), max_length), _PAD, dtype=np.int16)
+    if not names:
+        return matrix
+    joined = "".join(name[:max_length].ljust(max_length, "\0") for name in names)
+    codes = np.frombuffer(joined.encode("latin-1", errors="replace"), dtype=np.uint8).reshape(len(names), max_length)
+    matrix[:] = _CHAR_TO_INDEX[codes]
+    # '\0' (padding) dan '.' (batas label) tidak dihitung sebagai karakter maupun bigram
+    matrix[(codes == 0) | (codes == ord("."))] = _PAD
+    return matrix
+
+
+def _train_bigram_log_probs(corpus):
+    """Log-probabilitas bigram P(b|a) dengan add-one smoothing, sebagai matriks (A x A)."""
+    counts = np.ones((_ALPHABET_SIZE, _ALPHABET_SIZE), dtype=np.float64)
+    encoded = _encode(list(corpus), max(len(w) for w in corpus))
+    first, second = encoded[:, :-1], encoded[:, 1:]
+    valid = (first != _PAD) & (second != _PAD)
+    np.add.at(counts, (first[valid], second[valid]), 1)
+    return np.log2(counts / counts.sum(axis=1, keepdims=True))
+
+
+_BIGRAM_LOG_PROBS = _train_bigram_log_probs(_BENIGN_CORPUS)
+
+
+class DomainRiskScorer:
+    """
+    Menghitung skor risiko lokal (0-1) untuk banyak domain sekaligus secara tervektorisasi:
+    entropi Shannon, rasio konsonan/digit, panjang, dan kemiripan bigram karakter terhadap label jinak.
+    Fitur dihitung pada bagian hostname di kiri public suffix (mis. 'x8f2k.track' dari 'x8f2k.track.example.co.uk').
+    """
+    # Bobot regresi logistik yang disetel manual: nilai positif menaikkan risiko
+    WEIGHTS = {
+        "entropy": 0.9,
+        "digit_ratio": 3.0,
+        "consonant_ratio": 3.5,
+        "length": 0.05,
+        "bigram_surprise": 0.9,
+    }
+    BIAS = -11.0
+
+    def __init__(self, max_length=None):
+        self.max_length = max_length or config.DOMAIN_SCORING_MAX_LABEL_LENGTH
+        self._suffix_index = get_public_suffix_index()
+
+    def _scoring_name(self, host):
+        host = host.lower().rstrip(".")
+        if self._suffix_index is not None:
+            labels = host.split(".")
+            suffix_length = self._suffix_index.public_suffix_length(labels)
+            if len(labels) > suffix_length:
+                labels = labels[:-suffix_length]
+        else:
+            labels = host.split(".")[:-1] or [host]
+        # 'www' tidak membawa informasi
+        return ".".join(label for label in labels if label != "www")
+
+    def features(self, domains):
+        """Mengembalikan dict nama fitur -> array NumPy (panjang N) untuk daftar domain."""
+        names = [self._scoring_name(d) for d in domains]
+        encoded = _encode(names, self.max_length)
+        mask = encoded != _PAD
+        lengths = mask.sum(axis=1) # panjang tanpa titik
+        safe_lengths = np.maximum(lengths, 1)
+
+        # Histogram karakter per baris: offset indeks per baris lalu bincount sekali
+        rows = np.repeat(np.arange(len(names)), mask.sum(axis=1))
+        counts = np.bincount(rows * _ALPHABET_SIZE + encoded[mask], minlength=len(names) * _ALPHABET_SIZE)
+        counts = counts.reshape(len(names), _ALPHABET_SIZE).astype(np.float64)
+        probs = counts / safe_lengths[:, None]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            entropy = -np.where(probs > 0, probs * np.log2(probs), 0.0).sum(axis=1)
+
+        digit_ratio = counts[:, _IS_DIGIT].sum(axis=1) / safe_lengths
+        consonant_ratio = counts[:, _IS_CONSONANT].sum(axis=1) / safe_lengths
+
+        first, second = encoded[:, :-1], encoded[:, 1:]
+        pair_mask = (first != _PAD) & (second != _PAD)
+        pair_log_probs = np.where(pair_mask, _BIGRAM_LOG_PROBS[np.maximum(first, 0), np.maximum(second, 0)], 0.0)
+        pair_counts = pair_mask.sum(axis=1)
+        bigram_surprise = np.where(pair_counts > 0, -pair_log_probs.sum(axis=1) / np.maximum(pair_counts, 1), 0.0)
+
+        return {
+            "length": lengths.astype(np.float64),
+            "entropy": entropy,
+            "digit_ratio": digit_ratio,
+            "consonant_ratio": consonant_ratio,
+            "bigram_surprise": bigram_surprise,
+        }
+
+    def score(self, domains):
+        """Mengembalikan (skor array, dict fitur). Skor dalam rentang 0-1; label sangat pendek diberi bobot lebih kecil."""
+        features = self.features(domains)
+        logits = np.full(len(domains), self.BIAS, dtype=np.float64)
+        for name, weight in self.WEIGHTS.items():
+            logits += weight * features[name]
+        scores = 1.0 / (1.0 + np.exp(-logits))
+        # Label 1-3 karakter tidak punya cukup informasi statistik
+        scores *= np.clip(features["length"] / 4.0, 0.0, 1.0)
+        return scores, features
+
+
+def risk_level(score):
+    if score >= config.DOMAIN_RISK_HIGH_THRESHOLD:
+        return "high"
+    if score >= config.DOMAIN_RISK_MEDIUM_THRESHOLD:
+        return "medium"
+    return "low"
+
+
+def score_domains(domains, scorer=None):
+    """
+    Menilai daftar domain (alamat IP dilewati) dan mengembalikan dict domain -> ringkasan skor dan fitur.
+    """
+    from core.intel_providers import is_ip_address # impor lokal: intel_providers tidak perlu NumPy
+    unique = [d for d in dict.fromkeys(domains) if d and not is_ip_address(d)]
+    if not unique:
+        return {}
+    scorer = scorer or DomainRiskScorer()
+    scores, features = scorer.score(unique)
+    results = {}
+    for i, domain in enumerate(unique):
+        score = round(float(scores[i]), 3)
+        results[domain] = {
+            "score": score,
+            "level": risk_level(score),
+            "entropy": round(float(features["entropy"][i]), 3),
+            "digit_ratio": round(float(features["digit_ratio"][i]), 3),
+            "consonant_ratio": round(float(features["consonant_ratio"][i]), 3),
+            "length": int(features["length"][i]),
+            "bigram_surprise": round(float(features["bigram_surprise"][i]), 3),
+        }
+    return results
+
+
+def annotate_domain_risk(extracted_iocs_list, scorer=None):
+    """
+    Menilai semua domain dari satu batch analisis dalam satu panggilan tervektorisasi, lalu menulis
+    hasilnya ke extracted_iocs["domain_risk_scores"] masing-masing analisis. Pipeline batch memanggilnya
+    per kelompok job di tahap extract, reprocess per kelompok log di setiap worker.
+    """
+    all_domains = []
+    for extracted_iocs in extracted_iocs_list:
+        if extracted_iocs:
+            all_domains.extend(extracted_iocs.get("unique_domains", []))
+    scores = score_domains(all_domains, scorer=scorer)
+    for extracted_iocs in extracted_iocs_list:
+        if extracted_iocs is None:
+            continue
+        extracted_iocs["domain_risk_scores"] = {d: scores[d] for d in extracted_iocs.get("unique_domains", []) if d in scores}
+    high_risk = sum(1 for s in scores.values() if s["level"] == "high")
+    logger.info(f"Skor risiko dihitung untuk {len(scores)} domain dari {len(extracted_iocs_list)} analisis ({high_risk} berisiko tinggi).")
+    return scores
+
+
+def prioritize_by_risk(domains, risk_scores, min_score=None, registrable_map=None):
+    """
+    Mengurutkan domain dari skor risiko tertinggi untuk antrean threat intel; domain di bawah min_score dibuang.
+    Jika registrable_map diberikan (lookup per eTLD+1), skor domain terdaftar = skor tertinggi dari host-nya.
+    Domain tanpa skor dipertahankan di depan karena tidak bisa dinilai secara lokal.
+    """
+    min_score = config.THREAT_INTEL_MIN_DOMAIN_RISK if min_score is None else min_score
+    scores = {}
+    for host, details in risk_scores.items():
+        key = registrable_map.get(host, host) if registrable_map else host
+        scores[key] = max(scores.get(key, 0.0), details["score"])
+    unscored = [d for d in domains if d not in scores]
+    scored = [d for d in domains if d in scores and scores[d] >= min_score]
+    scored.sort(key=lambda d: -scores[d])
+    skipped = len(domains) - len(unscored) - len(scored)
+    if skipped:
+        logger.info(f"{skipped} domain dengan skor risiko di bawah {min_score} tidak dikirim ke provider threat intel.")
+    return unscored + scored
@@ -0,0 +1,247 @@
+# core/event_store.py
+import os
+import sys
+import gzip
+import json
+import time
+import uuid
+import shutil
+from collections import defaultdict, deque
+from urllib.parse import urlparse
+
+try:
+    import pyarrow # Opsional: penyimpanan Parquet
+    import pyarrow.parquet as pyarrow_parquet
+except ImportError:
+    pyarrow = None
+    pyarrow_parquet = None
+
+# Tambahkan path root proyek ke sys.path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+import config
+from utils.logger_config import setup_logger
+from core.intel_providers import is_ip_address
+
+logger = setup_logger(__name__, config.LOG_LEVEL, config.LOG_FILE)
+
+TABLE_NETWORK = "network_requests"
+TABLE_DYNAMIC_JS = "dynamic_js_calls"
+TABLE_COOKIES = "cookies"
+
+_RUN_COLUMNS = ("run_id", "target_url", "analyzed_at")
+TABLE_COLUMNS = {
+    TABLE_NETWORK: _RUN_COLUMNS + ("timestamp", "method", "url", "domain", "resource_type", "status",
+                                   "response_time_ms", "is_direct_ip", "has_post_data"),
+    TABLE_DYNAMIC_JS: _RUN_COLUMNS + ("timestamp", "function_name", "arguments", "source_url"),
+    TABLE_COOKIES: _RUN_COLUMNS + ("name", "value", "domain", "path", "expires", "http_only", "secure", "same_site"),
+}
+
+BACKEND_PARQUET = "parquet"
+BACKEND_COLUMNS = "columns"
+PARQUET_SUFFIX = ".parquet"
+COLUMNS_SUFFIX = ".columns" # Direktori chunk: satu file <kolom>.json.gz per kolom
+PARTITION_PREFIX = "date="
+
+
+def _truncate(value):
+    limit = config.EVENT_STORE_MAX_VALUE_CHARS
+    if isinstance(value, str) and limit and len(value) > limit:
+        return value[:limit]
+    return value
+
+
+def network_request_rows(network_events):
+    """
+    Satu baris per request, digabung dengan respons pertama untuk URL yang sama (FIFO per URL)
+    sehingga status dan waktu respons bisa langsung dikueri per domain.
+    """
+    rows = []
+    waiting = defaultdict(deque)
+    for event in network_events:
+        event_type = event.get("type")
+        url = event.get("url") or ""
+        if event_type == "request":
+            hostname = urlparse(url).hostname or ""
+            row = {
+                "timestamp": event.get("timestamp"),
+                "method": event.get("method"),
+                "url": _truncate(url),
+                "domain": hostname,
+                "resource_type": event.get("resource_type"),
+                "status": None,
+                "response_time_ms": None,
+                "is_direct_ip": is_ip_address(hostname),
+                "has_post_data": event.get("post_data") is not None,
+            }
+            rows.append(row)
+            waiting[url].append(row)
+        elif event_type == "response" and waiting.get(url):
+            row = waiting[url].popleft()
+            row["status"] = event.get("status")
+            if row["timestamp"] is not None and event.get("timestamp") is not None:
+                row["response_time_ms"] = round((event["timestamp"] - row["timestamp"]) * 1000, 3)
+    return rows
+
+
+def dynamic_js_rows(dynamic_js_calls):
+    return [{
+        "timestamp": call.get("timestamp"),
+        "function_name": call.get("function_name"),
+        "arguments": _truncate(call.get("arguments")),
+        "source_url": call.get("source_url"),
+    } for call in dynamic_js_calls]
+
+
+def cookie_rows(cookies):
+    return [{
+        "name": cookie.get("name"),
+        "value": _truncate(cookie.get("value")),
+        "domain": cookie.get("domain"),
+        "path": cookie.get("path"),
+        "expires": cookie.get("expires"),
+        "http_only": cookie.get("httpOnly"),
+        "secure": cookie.get("secure"),
+        "same_site": cookie.get("sameSite"),
+    } for cookie in cookies if "error" not in cookie]
+
+
+def resolve_backend(backend=None):
+    """Backend efektif: "auto" memakai Parquet jika pyarrow terpasang, selain itu chunk kolom JSON terkompresi."""
+    backend = backend or config.EVENT_STORE_BACKEND
+    if backend == "auto":
+        return BACKEND_PARQUET if pyarrow is not None else BACKEND_COLUMNS
+    if backend == BACKEND_PARQUET and pyarrow is None:
+        logger.warning("Paket 'pyarrow' tidak terpasang; event store memakai format chunk kolom.")
+        return BACKEND_COLUMNS
+    if backend not in (BACKEND_PARQUET, BACKEND_COLUMNS):
+        raise ValueError(f"Backend event store tidak dikenal: {backend}")
+    return backend
+
+
+class EventStore:
+    """
+    Penyimpanan kolumnar untuk event lintas analisis. Setiap analisis menambah satu chunk per tabel
+    di <store>/<tabel>/date=YYYY-MM-DD/; kueri hanya membuka partisi tanggal dan kolom yang diminta.
+    """
+
+    def __init__(self, store_dir=None, backend=None):
+        store_dir = store_dir if store_dir else config.EVENT_STORE_DIR
+        self.store_dir = store_dir if os.path.isabs(store_dir) else os.path.join(project_root, store_dir)
+        self.backend = resolve_backend(backend)
+
+    # --- Penulisan ---
+
+    def append_run(self, target_url, analyzed_at=None, network_events=(), dynamic_js_calls=(), cookies=(), run_id=None):
+        """Menambahkan event satu analisis ke store. Mengembalikan run_id."""
+        analyzed_at = analyzed_at or time.strftime("%Y-%m-%d %H:%M:%S")
+        run_id = run_id or f"{time.strftime('%Y%m%d-%H%M%S')}_{uuid.uuid4().hex[:8]}"
+        run_values = {"run_id": run_id, "target_url": target_url, "analyzed_at": analyzed_at}
+        tables = {
+            TABLE_NETWORK: network_request_rows(network_events or []),
+            TABLE_DYNAMIC_JS: dynamic_js_rows(dynamic_js_calls or []),
+            TABLE_COOKIES: cookie_rows(cookies or []),
+        }
+        for table, rows in tables.items():
+            if not rows:
+                continue
+            columns = {column: [run_values[column]] * len(rows) if column in run_values else [row.get(column) for row in rows]
+                       for column in TABLE_COLUMNS[table]}
+            self._write_chunk(table, analyzed_at[:10], run_id, columns)
+        logger.info(f"Event analisis {run_id} disimpan ke event store ({', '.join(f'{t}: {len(r)}' for t, r in tables.items())}).")
+        return run_id
+
+    def _write_chunk(self, table, date, run_id, columns):
+        partition_dir = os.path.join(self.store_dir, table, f"{PARTITION_PREFIX}{date}")
+        os.makedirs(partition_dir, exist_ok=True)
+        if self.backend == BACKEND_PARQUET:
+            path = os.path.join(partition_dir, f"{run_id}{PARQUET_SUFFIX}")
+            pyarrow_parquet.write_table(pyarrow.table(columns), path + ".tmp", compression="zstd")
+            os.replace(path + ".tmp", path)
+            return
+        # Chunk ditulis ke direktori sementara lalu di-rename agar pembaca tidak melihat chunk setengah jadi
+        path = os.path.join(partition_dir, f"{run_id}{COLUMNS_SUFFIX}")
+        tmp_path = path + ".tmp"
+        os.makedirs(tmp_path, exist_ok=True)
+        try:
+            for column, values in columns.items():
+                with gzip.open(os.path.join(tmp_path, f"{column}.json.gz"), "wt", encoding="utf-8", compresslevel=5) as f:
+                    json.dump(values, f, separators=(",", ":"), default=str)
+            os.rename(tmp_path, path)
+        except BaseException:
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            raise
+
+    # --- Kueri ---
+
+    def partitions(self, table, start_date=None, end_date=None):
+        """Direktori partisi tabel dalam rentang tanggal (YYYY-MM-DD, inklusif), terurut."""
+        table_dir = os.path.join(self.store_dir, table)
+        if not os.path.isdir(table_dir):
+            return []
+        selected = []
+        for name in sorted(os.listdir(table_dir)):
+            if not name.startswith(PARTITION_PREFIX):
+                continue
+            date = name[len(PARTITION_PREFIX):]
+            if (start_date and date < start_date) or (end_date and date > end_date):
+                continue
+            selected.append(os.path.join(table_dir, name))
+        return selected
+
+    def _read_chunk(self, path, columns):
+        if path.endswith(PARQUET_SUFFIX):
+            if pyarrow_parquet is None:
+                raise ValueError(f"Chunk {os.path.basename(path)} berformat Parquet, tetapi paket 'pyarrow' tidak terpasang.")
+            schema_names = set(pyarrow_parquet.read_schema(path).names)
+            data = pyarrow_parquet.read_table(path, columns=[c for c in columns if c in schema_names]).to_pydict()
+        else:
+            data = {}
+            for column in columns:
+                column_path = os.path.join(path, f"{column}.json.gz")
+                if os.path.exists(column_path):
+                    with gzip.open(column_path, "rt", encoding="utf-8") as f:
+                        data[column] = json.load(f)
+        row_count = max((len(values) for values in data.values()), default=0)
+        return {column: data.get(column, [None] * row_count) for column in columns}
+
+    def query(self, table, columns=None, start_date=None, end_date=None, where=None):
+        """
+        Mengembalikan dict kolom -> list nilai untuk tabel.
+        :param columns: Kolom yang dibutuhkan (default semua); hanya kolom ini (plus kolom filter) yang dibaca.
+        :param where: Filter {kolom: nilai} atau {kolom: callable(nilai) -> bool}.
+        """
+        if table not in TABLE_COLUMNS:
+            raise ValueError(f"Tabel event store tidak dikenal: {table}")
+        columns = list(columns or TABLE_COLUMNS[table])
+        where = where or {}
+        read_columns = columns + [column for column in where if column not in columns]
+        result = {column: [] for column in columns}
+        for partition_dir in self.partitions(table, start_date, end_date):
+            for name in sorted(os.listdir(partition_dir)):
+                if not (name.endswith(PARQUET_SUFFIX) or name.endswith(COLUMNS_SUFFIX)):
+                    continue # Termasuk chunk .tmp yang sedang ditulis
+                chunk = self._read_chunk(os.path.join(partition_dir, name), read_columns)
+                row_count = len(chunk[read_columns[0]]) if read_columns else 0
+                keep = range(row_count)
+                for column, expected in where.items():
+                    values = chunk[column]
+                    test = expected if callable(expected) else (lambda value, expected=expected: value == expected)
+                    keep = [i for i in keep if test(values[i])]
+                for column in columns:
+                    values = chunk[column]
+                    result[column].extend(values if len(keep) == row_count else [values[i] for i in keep])
+        return result
+
+    def percentile_by(self, table, group_column, value_column, q=95, start_date=None, end_date=None, where=None):
+        """Persentil value_column per group_column, mis. p95 response_time_ms per domain."""
+        import numpy as np # Impor malas: hanya kueri agregat yang butuh numpy
+        data = self.query(table, [group_column, value_column], start_date, end_date, where)
+        groups = defaultdict(list)
+        for group, value in zip(data[group_column], data[value_column]):
+            if value is not None:
+                groups[group].append(value)
+        return {group: float(np.percentile(values, q)) for group, values in groups.items()}
@@ -0,0 +1,235 @@
+# core/intel_enrichment.py
+import os
+import time
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Impor konfigurasi dan logger
+import sys
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+import config
+from utils.logger_config import setup_logger
+from core.intel_providers import IOC_TYPE_DOMAIN, IOC_TYPE_IP
+
+logger = setup_logger(__name__, config.LOG_LEVEL, config.LOG_FILE)
+
+# Status enrichment di analysis_data['intel_status'] dan file JSON threat intel
+INTEL_STATUS_PENDING = "pending"
+INTEL_STATUS_COMPLETE = "complete"
+INTEL_STATUS_STOPPED = "stopped" # Dihentikan sebelum semua indikator diperiksa
+
+
+def get_intel_json_path(report_filepath):
+    """Mengembalikan path file JSON threat intel yang berdampingan dengan laporan HTML."""
+    report_dir = os.path.dirname(report_filepath)
+    report_prefix = os.path.basename(report_filepath)
+    if report_prefix.endswith(config.DEFAULT_HTML_REPORT_FILENAME):
+        report_prefix = report_prefix[:-len(config.DEFAULT_HTML_REPORT_FILENAME)]
+    else:
+        report_prefix = os.path.splitext(report_prefix)[0] + "_"
+    return os.path.join(report_dir, f"{report_prefix}{config.DEFAULT_THREAT_INTEL_FILENAME}")
+
+
+class BackgroundIntelEnricher:
+    """
+    Menjalankan pemeriksaan threat intelligence di thread latar belakang setelah laporan
+    pertama ditulis dengan penanda "pending". Hasil yang masuk memicu render ulang laporan HTML
+    dan file JSON threat intel paling sering sekali per rerender_interval detik, ditambah satu
+    render final setelah semua indikator diperiksa. Jika dihentikan lewat stop(), render final
+    memakai status "stopped" dan indikator yang belum diperiksa tetap tercantum.
+    """
+    def __init__(self, indicators, lookup_fn, report_generator, analysis_data, report_filepath,
+                 intel_json_path=None, request_delay=None, rerender_interval=None):
+        """
+        :param indicators: Daftar (tipe_ioc, nilai) yang akan diperiksa (domain, IP, URL, hash).
+        :param lookup_fn: Fungsi (tipe_ioc, nilai) -> dict laporan (atau None), mis. ThreatIntelAggregator.lookup.
+        :param report_generator: Instance HTMLReportGenerator untuk render ulang.
+        :param analysis_data: Dictionary data analisis yang dipakai untuk laporan (akan diperbarui).
+        :param report_filepath: Path laporan HTML yang sudah ditulis.
+        :param intel_json_path: Path file JSON threat intel. Default: berdampingan dengan laporan.
+        :param request_delay: Jeda antar permintaan (detik). Default dari config.
+        :param rerender_interval: Jeda minimum antar render ulang (detik). Default dari config.
+        """
+        self.indicators = [tuple(indicator) for indicator in indicators]
+        self.lookup_fn = lookup_fn
+        self.report_generator = report_generator
+        self.analysis_data = analysis_data
+        self.report_filepath = report_filepath
+        self.intel_json_path = intel_json_path if intel_json_path else get_intel_json_path(report_filepath)
+        self.request_delay = request_delay if request_delay is not None else config.VIRUSTOTAL_REQUEST_DELAY
+        self.rerender_interval = rerender_interval if rerender_interval is not None else config.THREAT_INTEL_RERENDER_INTERVAL_SECONDS
+
+        self.analysis_data.setdefault('virustotal_reports', [])
+        self.analysis_data['intel_pending_indicators'] = [value for _, value in self.indicators]
+        self.analysis_data['intel_status'] = INTEL_STATUS_PENDING
+
+        self._lock = threading.Lock()
+        self._last_render = time.monotonic() # Laporan awal baru saja ditulis oleh pemanggil
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    @property
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    @property
+    def pending_indicators(self):
+        with self._lock:
+            return list(self.analysis_data['intel_pending_indicators'])
+
+    def start(self):
+        """Menulis file JSON awal lalu memulai thread enrichment."""
+        if self.is_running:
+            logger.warning("Enrichment latar belakang sudah berjalan.")
+            return self
+        self._write_intel_json()
+        self._thread = threading.Thread(target=self._run, name="intel-enricher", daemon=False)
+        self._thread.start()
+        logger.info(f"Enrichment threat intel latar belakang dimulai untuk {len(self.indicators)} indikator.")
+        return self
+
+    def stop(self):
+        """Meminta thread berhenti setelah pemeriksaan yang sedang berjalan selesai."""
+        self._stop_event.set()
+
+    def wait(self, timeout=None):
+        """Menunggu thread enrichment selesai. Mengembalikan True jika sudah selesai."""
+        if self._thread is None:
+            return True
+        self._thread.join(timeout)
+        return not self._thread.is_alive()
+
+    def _run(self):
+        for i, (ioc_type, value) in enumerate(self.indicators):
+            if self._stop_event.is_set():
+                logger.info("Enrichment latar belakang dihentikan sebelum semua indikator diperiksa.")
+                break
+            try:
+                report = self.lookup_fn(ioc_type, value)
+            except Exception as e:
+                logger.error(f"Pemeriksaan threat intel untuk {ioc_type} '{value}' gagal: {e}", exc_info=True)
+                report = {"indicator": value, "indicator_type": ioc_type, "error": "Processing Error", "message": str(e)}
+                if ioc_type in (IOC_TYPE_DOMAIN, IOC_TYPE_IP):
+                    report["domain"] = value
+
+            with self._lock:
+                if report:
+                    self.analysis_data['virustotal_reports'].append(report)
+                if value in self.analysis_data['intel_pending_indicators']:
+                    self.analysis_data['intel_pending_indicators'].remove(value)
+            if time.monotonic() - self._last_render >= self.rerender_interval:
+                self._rerender()
+
+            if i < len(self.indicators) - 1 and self.request_delay:
+                # wait() agar stop() bisa memotong jeda
+                self._stop_event.wait(self.request_delay)
+
+        with self._lock:
+            if self._stop_event.is_set() and self.analysis_data['intel_pending_indicators']:
+                # Indikator sisa belum diperiksa: jangan dilaporkan seolah selesai
+                self.analysis_data['intel_status'] = INTEL_STATUS_STOPPED
+            else:
+                self.analysis_data['intel_pending_indicators'] = []
+                self.analysis_data['intel_status'] = INTEL_STATUS_COMPLETE
+        self._rerender()
+        if self.analysis_data['intel_status'] == INTEL_STATUS_STOPPED:
+            logger.warning(f"Enrichment threat intel dihentikan: {len(self.analysis_data['intel_pending_indicators'])} indikator belum diperiksa, "
+                           f"{len(self.analysis_data['virustotal_reports'])} laporan diterima.")
+        else:
+            logger.info(f"Enrichment threat intel selesai. {len(self.analysis_data['virustotal_reports'])} laporan diterima.")
+
+    def _rerender(self):
+        with self._lock:
+            self.report_generator.generate_report(self.analysis_data, report_filepath=self.report_filepath, rerender=True)
+            self._write_intel_json()
+            self._last_render = time.monotonic()
+
+    def _write_intel_json(self):
+        """Menulis status threat intel ke file JSON secara atomik (tulis ke file sementara lalu rename)."""
+        pending = self.analysis_data.get('intel_pending_indicators', [])
+        payload = {
+            "target_url": self.analysis_data.get('target_url'),
+            "status": self.analysis_data.get('intel_status', INTEL_STATUS_PENDING if pending else INTEL_STATUS_COMPLETE),
+            "updated_at": time.time(),
+            "pending_indicators": list(pending),
+            "virustotal_reports": list(self.analysis_data.get('virustotal_reports', [])),
+        }
+        tmp_path = f"{self.intel_json_path}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(payload, f, indent=4)
+            os.replace(tmp_path, self.intel_json_path)
+        except Exception as e:
+            logger.error(f"Gagal menulis file threat intel {self.intel_json_path}: {e}", exc_info=True)
+
+
+class EarlyIntelLookup:
+    """
+    Memulai lookup threat intel untuk domain/IP segera saat pertama kali terlihat selama capture
+    (dipakai sebagai callback on_new_domain IncrementalIOCExtractor). Setelah capture selesai,
+    collect() menggabungkan hasil awal dengan lookup untuk indikator yang belum diperiksa.
+    """
+    def __init__(self, aggregator, classify_fn, max_workers=None):
+        """
+        :param aggregator: Instance ThreatIntelAggregator.
+        :param classify_fn: Fungsi host -> tipe IOC (mis. "domain" atau "ip").
+        :param max_workers: Jumlah thread lookup awal. Default dari config.THREAT_INTEL_MAX_WORKERS.
+        """
+        self.aggregator = aggregator
+        self.classify_fn = classify_fn
+        self._executor = ThreadPoolExecutor(max_workers=max_workers or config.THREAT_INTEL_MAX_WORKERS,
+                                            thread_name_prefix="intel-early")
+        self._futures = {}
+        self._lock = threading.Lock()
+
+    def submit(self, host):
+        key = (self.classify_fn(host), host)
+        with self._lock:
+            if key in self._futures:
+                return
+            logger.debug(f"Lookup threat intel awal dimulai untuk {key[0]} '{host}'.")
+            self._futures[key] = self._executor.submit(self.aggregator.lookup, *key)
+
+    __call__ = submit
+
+    @property
+    def submitted_count(self):
+        return len(self._futures)
+
+    def collect(self, indicators):
+        """
+        :param indicators: Dictionary {tipe_ioc: [nilai, ...]} hasil collect_indicators.
+        :return: List record gabungan dengan urutan yang sama seperti lookup_indicators.
+        """
+        with self._lock:
+            futures = dict(self._futures)
+        remaining = {ioc_type: [v for v in values if (ioc_type, v) not in futures]
+                     for ioc_type, values in indicators.items()}
+        logger.info(f"{len(futures)} lookup threat intel sudah dimulai selama capture; "
+                    f"{sum(len(v) for v in remaining.values())} indikator tersisa diperiksa sekarang.")
+        remaining_results = {(r.get("indicator_type"), r.get("indicator")): r
+                             for r in self.aggregator.lookup_indicators(remaining)}
+
+        results = []
+        for ioc_type, values in indicators.items():
+            for value in values:
+                key = (ioc_type, value)
+                if key in futures:
+                    try:
+                        record = futures[key].result()
+                    except Exception as e:
+                        logger.error(f"Lookup threat intel awal gagal untuk '{value}': {e}", exc_info=True)
+                        record = None
+                else:
+                    record = remaining_results.get(key)
+                if record:
+                    results.append(record)
+        return results
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait, cancel_futures=not wait)
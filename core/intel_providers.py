@@ -0,0 +1,413 @@
+# core/intel_providers.py
+import os
+import time
+import json
+import ipaddress
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+# Impor konfigurasi dan logger
+import sys
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+import config
+from utils.logger_config import setup_logger
+from core.offline_intel import open_offline_index
+
+logger = setup_logger(__name__, config.LOG_LEVEL, config.LOG_FILE)
+
+IOC_TYPE_DOMAIN = "domain"
+IOC_TYPE_URL = "url"
+IOC_TYPE_IP = "ip"
+IOC_TYPE_HASH = "hash"
+SUPPORTED_IOC_TYPES = (IOC_TYPE_DOMAIN, IOC_TYPE_URL, IOC_TYPE_IP, IOC_TYPE_HASH)
+
+# Field numerik yang digabung (diambil nilai maksimum) saat beberapa provider memberi hasil
+VERDICT_FIELDS = ("malicious", "suspicious", "harmless", "undetected")
+
+PROVIDER_REGISTRY = {}
+
+
+def register_provider(name):
+    """Decorator untuk mendaftarkan kelas provider threat intel dengan nama tertentu."""
+    def decorator(provider_cls):
+        provider_cls.name = name
+        PROVIDER_REGISTRY[name] = provider_cls
+        return provider_cls
+    return decorator
+
+
+def create_provider(name, **kwargs):
+    """Membuat instance provider dari registry. Melempar ValueError jika nama tidak dikenal."""
+    provider_cls = PROVIDER_REGISTRY.get(name)
+    if provider_cls is None:
+        raise ValueError(f"Provider threat intel tidak dikenal: {name}. Tersedia: {', '.join(sorted(PROVIDER_REGISTRY))}")
+    return provider_cls(**kwargs)
+
+
+def is_ip_address(value):
+    try:
+        ipaddress.ip_address(value)
+        return True
+    except (ValueError, TypeError):
+        return False
+
+
+def collect_indicators(extracted_iocs, per_registrable_domain=False):
+    """
+    Mengumpulkan indikator dari hasil IOCExtractor, dikelompokkan per tipe.
+    Jika per_registrable_domain=True, hostname digantikan domain terdaftarnya (eTLD+1) sehingga
+    ratusan subdomain acak cukup diperiksa sekali. Alamat IP tetap diperiksa per alamat.
+    :return: Dictionary {tipe_ioc: [nilai, ...]} tanpa duplikat, urutan dipertahankan.
+    """
+    indicators = {ioc_type: [] for ioc_type in SUPPORTED_IOC_TYPES}
+    if not extracted_iocs:
+        return indicators
+    registrable_map = (extracted_iocs.get("registrable_domain_map") or {}) if per_registrable_domain else {}
+    for host in extracted_iocs.get("unique_domains", []):
+        if is_ip_address(host):
+            indicators[IOC_TYPE_IP].append(host)
+        else:
+            indicators[IOC_TYPE_DOMAIN].append(registrable_map.get(host, host))
+    for item in extracted_iocs.get("potentially_harmful_urls", []):
+        if item.get("url"):
+            indicators[IOC_TYPE_URL].append(item["url"])
+    indicators[IOC_TYPE_HASH].extend(extracted_iocs.get("file_hashes", []))
+    return {ioc_type: list(dict.fromkeys(values)) for ioc_type, values in indicators.items()}
+
+
+class RateLimiter:
+    """
+    Pembatas laju sederhana: menjamin jeda minimum antar panggilan, aman untuk multi-thread.
+    Setiap pemanggil memesan slot waktu di bawah lock lalu tidur di luar lock.
+    """
+    def __init__(self, min_interval=0):
+        self.min_interval = max(0.0, float(min_interval or 0))
+        self._lock = threading.Lock()
+        self._next_allowed = 0.0
+
+    def wait(self):
+        if not self.min_interval:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_allowed)
+            self._next_allowed = slot + self.min_interval
+        delay = slot - now
+        if delay > 0:
+            time.sleep(delay)
+        return delay
+
+
+class TTLCache:
+    """Cache LRU berukuran terbatas dengan masa berlaku (TTL) per entri, aman untuk multi-thread."""
+    def __init__(self, ttl=None, max_entries=None):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            stored_at, value = entry
+            if self.ttl is not None and time.monotonic() - stored_at > self.ttl:
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic(), value)
+            self._data.move_to_end(key)
+            if self.max_entries is not None:
+                while len(self._data) > self.max_entries:
+                    self._data.popitem(last=False)
+
+    def __len__(self):
+        return len(self._data)
+
+
+class ThreatIntelProvider(ABC):
+    """
+    Kelas dasar provider threat intel. Subclass cukup mengimplementasikan _lookup();
+    validasi tipe, cache, dan pembatasan laju ditangani di lookup().
+    """
+    name = "base"
+    supported_types = ()
+    default_min_interval = 0
+    max_concurrency = None # None: ikuti max_workers aggregator
+
+    def __init__(self, min_interval=None, cache_ttl=None, cache_max_entries=None):
+        self.rate_limiter = RateLimiter(self.default_min_interval if min_interval is None else min_interval)
+        self.cache = TTLCache(
+            ttl=cache_ttl if cache_ttl is not None else config.THREAT_INTEL_CACHE_TTL,
+            max_entries=cache_max_entries if cache_max_entries is not None else config.THREAT_INTEL_CACHE_MAX_ENTRIES
+        )
+
+    def is_available(self):
+        """Provider yang tidak tersedia (mis. tanpa API key) dilewati oleh aggregator."""
+        return True
+
+    def supports(self, ioc_type):
+        return ioc_type in self.supported_types
+
+    def lookup(self, ioc_type, value):
+        """
+        Memeriksa satu indikator.
+        :return: Dictionary laporan (dengan key indicator, indicator_type, provider) atau None jika tidak ada data.
+        """
+        if not self.supports(ioc_type):
+            return None
+        cache_key = (ioc_type, value)
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            logger.debug(f"[{self.name}] Cache hit untuk {ioc_type} '{value}'.")
+            return dict(cached)
+
+        self.rate_limiter.wait()
+        record = self._lookup(ioc_type, value)
+        if record is None:
+            return None
+        record = dict(record)
+        record.setdefault("indicator", value)
+        record.setdefault("indicator_type", ioc_type)
+        record["provider"] = self.name
+        if "error" not in record:
+            # Error (mis. 429) tidak di-cache agar bisa dicoba lagi
+            self.cache.set(cache_key, record)
+        return record
+
+    @abstractmethod
+    def _lookup(self, ioc_type, value):
+        """Pemeriksaan ke sumber intel tanpa cache; dict laporan atau None jika tidak ada data."""
+
+
+@register_provider("virustotal")
+class VirusTotalProvider(ThreatIntelProvider):
+    """Provider berbasis VirusTotalAnalyzer (API v3) untuk domain, URL, IP, dan hash file."""
+    supported_types = SUPPORTED_IOC_TYPES
+    max_concurrency = 1 # Permintaan sudah diserialkan oleh rate limiter
+
+    def __init__(self, api_key=None, min_interval=None, **kwargs):
+        super().__init__(min_interval=config.VIRUSTOTAL_REQUEST_DELAY if min_interval is None else min_interval, **kwargs)
+        from core.threat_intelligence import VirusTotalAnalyzer # Impor malas: memuat 'requests' hanya saat provider dipakai
+        self.analyzer = VirusTotalAnalyzer(api_key=api_key)
+
+    def is_available(self):
+        return bool(self.analyzer.api_key)
+
+    def _lookup(self, ioc_type, value):
+        if ioc_type == IOC_TYPE_DOMAIN:
+            return self.analyzer.get_domain_report(value)
+        if ioc_type == IOC_TYPE_IP:
+            return self.analyzer.get_ip_report(value)
+        if ioc_type == IOC_TYPE_URL:
+            return self.analyzer.get_url_report(value)
+        if ioc_type == IOC_TYPE_HASH:
+            return self.analyzer.get_file_report(value)
+        return None
+
+
+@register_provider("local_file")
+class LocalFileIntelProvider(ThreatIntelProvider):
+    """
+    Provider offline berbasis file JSON, berguna untuk pengujian tanpa akses jaringan.
+    Format file: {"domain": {"evil.com": {"malicious": 5, ...}}, "url": {...}, "ip": {...}, "hash": {...}}
+    Indikator yang tidak ada di file dianggap tidak diketahui (lookup mengembalikan None).
+    """
+    supported_types = SUPPORTED_IOC_TYPES
+
+    def __init__(self, path=None, **kwargs):
+        super().__init__(**kwargs)
+        self.path = path if path else config.LOCAL_INTEL_FILE
+        self.entries = {ioc_type: {} for ioc_type in SUPPORTED_IOC_TYPES}
+        if self.path and os.path.exists(self.path):
+            self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.error(f"Gagal memuat file intel lokal {self.path}: {e}", exc_info=True)
+            return
+        for ioc_type in SUPPORTED_IOC_TYPES:
+            for value, verdict in (data.get(ioc_type) or {}).items():
+                key = value.lower() if ioc_type in (IOC_TYPE_DOMAIN, IOC_TYPE_HASH) else value
+                self.entries[ioc_type][key] = verdict if isinstance(verdict, dict) else {"malicious": 1, "note": str(verdict)}
+        logger.info(f"File intel lokal dimuat: {self.path} ({sum(len(v) for v in self.entries.values())} indikator).")
+
+    def is_available(self):
+        return any(self.entries.values())
+
+    def _lookup(self, ioc_type, value):
+        key = value.lower() if ioc_type in (IOC_TYPE_DOMAIN, IOC_TYPE_HASH) else value
+        verdict = self.entries.get(ioc_type, {}).get(key)
+        if verdict is None:
+            return None
+        record = {field: verdict.get(field, 0) for field in VERDICT_FIELDS}
+        record.update({k: v for k, v in verdict.items() if k not in VERDICT_FIELDS})
+        record.setdefault("total_engines", sum(record[field] for field in VERDICT_FIELDS))
+        if ioc_type in (IOC_TYPE_DOMAIN, IOC_TYPE_IP):
+            record["domain"] = value
+        return record
+
+
+@register_provider("offline_index")
+class OfflineIndexProvider(ThreatIntelProvider):
+    """
+    Provider untuk sandbox air-gapped: mencari indikator di indeks feed massal yang dipetakan
+    ke memori (lihat core/offline_intel.py). Setiap entri feed dianggap berbahaya; label feed
+    (mis. "phishing") disertakan di record. Lookup sudah O(log n) sehingga cache dinonaktifkan.
+    """
+    supported_types = SUPPORTED_IOC_TYPES
+
+    def __init__(self, path=None, **kwargs):
+        kwargs.setdefault("cache_max_entries", 0)
+        super().__init__(**kwargs)
+        self.path = path if path else config.OFFLINE_INTEL_INDEX
+        self.index = None
+        if self.path and os.path.exists(self.path):
+            try:
+                self.index = open_offline_index(self.path)
+            except ValueError as e:
+                logger.error(str(e))
+
+    def is_available(self):
+        return self.index is not None
+
+    def _lookup(self, ioc_type, value):
+        hit = self.index.lookup(ioc_type, value)
+        if hit is None:
+            return None
+        record = {"malicious": 1, "suspicious": 0, "harmless": 0, "undetected": 0, "total_engines": 1,
+                  "label": hit.get("label", "")}
+        if ioc_type in (IOC_TYPE_DOMAIN, IOC_TYPE_IP):
+            record["domain"] = value
+        return record
+
+
+def merge_records(ioc_type, value, records):
+    """
+    Menggabungkan laporan beberapa provider untuk satu indikator menjadi satu record bergaya
+    virustotal_reports. Nilai verdict diambil maksimumnya; laporan per provider disimpan di "provider_reports".
+    """
+    merged = {"indicator": value, "indicator_type": ioc_type}
+    if ioc_type in (IOC_TYPE_DOMAIN, IOC_TYPE_IP):
+        # Template mencocokkan laporan dengan daftar unique_domains lewat key "domain"
+        merged["domain"] = value
+    ok_records = [r for r in records if "error" not in r]
+    merged["sources"] = [r.get("provider") for r in records]
+    merged["provider_reports"] = records
+    if not ok_records:
+        merged["error"] = "; ".join(str(r.get("error")) for r in records)
+        merged["message"] = "; ".join(str(r.get("message", "")) for r in records)
+        return merged
+    for field in VERDICT_FIELDS:
+        merged[field] = max(int(r.get(field) or 0) for r in ok_records)
+    merged["total_engines"] = sum(int(r.get("total_engines") or 0) for r in ok_records)
+    for r in ok_records:
+        for key in ("link_to_report", "last_analysis_date", "reputation"):
+            if merged.get(key) is None and r.get(key) is not None:
+                merged[key] = r[key]
+    return merged
+
+
+class ThreatIntelAggregator:
+    """
+    Menjalankan lookup ke semua provider secara paralel (fan-out) dan menggabungkan hasilnya.
+    Pembatasan laju tetap per provider, sehingga provider lambat tidak menahan provider lain.
+    """
+    def __init__(self, providers, max_workers=None):
+        self.providers = list(providers)
+        self.max_workers = max_workers if max_workers else config.THREAT_INTEL_MAX_WORKERS
+
+    @property
+    def provider_names(self):
+        return [p.name for p in self.providers]
+
+    def _lookup_single(self, provider, ioc_type, value):
+        try:
+            return provider.lookup(ioc_type, value)
+        except Exception as e:
+            logger.error(f"Provider '{provider.name}' gagal memeriksa {ioc_type} '{value}': {e}", exc_info=True)
+            return {"indicator": value, "indicator_type": ioc_type, "provider": provider.name,
+                    "error": "Processing Error", "message": str(e)}
+
+    def lookup(self, ioc_type, value):
+        """Memeriksa satu indikator ke semua provider. Mengembalikan record gabungan atau None."""
+        results = self.lookup_indicators({ioc_type: [value]})
+        return results[0] if results else None
+
+    def lookup_indicators(self, indicators):
+        """
+        :param indicators: Dictionary {tipe_ioc: [nilai, ...]}.
+        :return: List record gabungan, satu per indikator yang memiliki data dari minimal satu provider.
+        """
+        tasks_per_provider = OrderedDict((provider, []) for provider in self.providers)
+        keys = []
+        for ioc_type, values in indicators.items():
+            for value in values:
+                keys.append((ioc_type, value))
+                for provider in self.providers:
+                    if provider.supports(ioc_type):
+                        tasks_per_provider[provider].append((ioc_type, value))
+        total_tasks = sum(len(tasks) for tasks in tasks_per_provider.values())
+        if not total_tasks:
+            return []
+
+        logger.info(f"Menjalankan {total_tasks} pemeriksaan threat intel ke {len(self.providers)} provider secara paralel...")
+        # Satu pool per provider: provider yang dibatasi lajunya (mis. VirusTotal) tidak memblokir provider lain
+        executors = []
+        grouped = OrderedDict((key, []) for key in keys)
+        try:
+            futures = []
+            for provider, tasks in tasks_per_provider.items():
+                if not tasks:
+                    continue
+                workers = max(1, min(provider.max_concurrency or self.max_workers, self.max_workers, len(tasks)))
+                executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"intel-{provider.name}")
+                executors.append(executor)
+                for ioc_type, value in tasks:
+                    futures.append(((ioc_type, value), executor.submit(self._lookup_single, provider, ioc_type, value)))
+            for key, future in futures:
+                record = future.result()
+                if record:
+                    grouped[key].append(record)
+        finally:
+            for executor in executors:
+                executor.shutdown(wait=True)
+
+        return [merge_records(ioc_type, value, records)
+                for (ioc_type, value), records in grouped.items() if records]
+
+
+def build_intel_aggregator(provider_names=None, max_workers=None):
+    """
+    Membuat aggregator dari daftar nama provider (default: config.THREAT_INTEL_PROVIDERS).
+    Provider yang tidak tersedia dilewati. Mengembalikan None jika tidak ada provider yang aktif.
+    """
+    names = provider_names if provider_names is not None else config.THREAT_INTEL_PROVIDERS
+    providers = []
+    for name in names:
+        try:
+            provider = create_provider(name)
+        except ValueError as e:
+            logger.error(str(e))
+            continue
+        if provider.is_available():
+            providers.append(provider)
+        else:
+            logger.warning(f"Provider threat intel '{name}' tidak tersedia (konfigurasi belum lengkap), dilewati.")
+    if not providers:
+        return None
+    return ThreatIntelAggregator(providers, max_workers=max_workers)
@@ -3,6 +3,7 @@ import os
 import re
 import time 
 from urllib.parse import urlparse, unquote
+from functools import lru_cache
 
 # Impor konfigurasi dan logger
 import sys
@@ -13,6 +14,9 @@ if project_root not in sys.path:
 
 import config 
 from utils.logger_config import setup_logger
+from core.ioc_rules import get_default_rule_engine
+from core.public_suffix import registrable_domain
+from core.post_data_scanner import PostDataScanner
 
 logger = setup_logger(__name__, config.LOG_LEVEL, config.LOG_FILE)
 
@@ -22,107 +26,208 @@ POTENTIALLY_HARMFUL_EXTENSIONS = [
     '.docm', '.xlsm', '.pptm', '.dotm', 
     '.scr', 
 ]
+_HARMFUL_EXTENSION_SET = frozenset(POTENTIALLY_HARMFUL_EXTENSIONS)
+
+# Pola regex untuk IPv4 yang juga memeriksa rentang nilai (0-255), dikompilasi sekali saat impor.
+# Oktet: (25[0-5]|2[0-4][0-9]|1[0-9]{2}|[1-9]?[0-9])
+_OCTET_PATTERN = r"(25[0-5]|2[0-4][0-9]|1[0-9]{2}|[1-9]?[0-9])"
+IPV4_PATTERN = re.compile(rf"^{_OCTET_PATTERN}\.{_OCTET_PATTERN}\.{_OCTET_PATTERN}\.{_OCTET_PATTERN}$")
+
+
+def _is_ipv4(hostname_or_ip):
+    # Untuk IPv6 (mis. '::1'), regex ini tidak akan cocok, yang mana benar karena ini bukan IPv4.
+    return bool(hostname_or_ip) and IPV4_PATTERN.match(hostname_or_ip) is not None
+
+
+def _compute_url_facts(url_string):
+    """
+    Menghitung fakta yang dibutuhkan ekstraksi dari satu URL: (hostname, ekstensi berbahaya atau None, apakah IPv4).
+    Pemeriksaan ekstensi memakai path dari URL yang sudah di-unquote; jika URL tidak mengandung '%',
+    hasil unquote identik sehingga hasil urlparse pertama dipakai ulang.
+    """
+    hostname = None
+    parsed_url = None
+    try:
+        parsed_url = urlparse(url_string)
+        # hostname akan mengembalikan None jika tidak ada, atau string domain/IP (IPv6 tanpa kurung siku)
+        hostname = parsed_url.hostname
+    except Exception as e:
+        logger.warning(f"Tidak dapat mem-parsing domain dari URL: {url_string} - Error: {e}")
+
+    harmful_ext = None
+    try:
+        if '%' in url_string or parsed_url is None:
+            path = urlparse(unquote(url_string)).path
+        else:
+            path = parsed_url.path
+        ext = os.path.splitext(path)[1].lower()
+        if ext in _HARMFUL_EXTENSION_SET:
+            harmful_ext = ext
+    except Exception as e:
+        logger.warning(f"Error saat memeriksa ekstensi berbahaya untuk URL: {url_string} - Error: {e}")
+
+    return hostname, harmful_ext, _is_ipv4(hostname)
+
+
+# Cache LRU terbatas: log jaringan besar mengulang URL yang sama berkali-kali (tracker, aset statis)
+_parse_url_facts = lru_cache(maxsize=config.IOC_URL_CACHE_SIZE)(_compute_url_facts)
+
 
 class IOCExtractor:
-    def __init__(self, network_events):
+    def __init__(self, network_events=None, rule_engine=None):
         self.network_events = network_events if network_events else []
+        # Gunakan aturan bawaan (config.IOC_RULES_FILE) jika engine tidak diberikan secara eksplisit
+        if rule_engine is None and config.IOC_RULES_ENABLED:
+            rule_engine = get_default_rule_engine()
+        self.rule_engine = rule_engine
+        self.post_scanner = PostDataScanner() if config.POST_SCAN_ENABLED else None
         self.extracted_iocs = {
-            "unique_domains": set(),
+            "unique_domains": [],
             "potentially_harmful_urls": [],
             "post_requests": [],
             "direct_ip_requests": [],
+            "rule_matches": [],
+            "registrable_domains": [],
+            "registrable_domain_map": {},
+            "file_hashes": [],
         }
+        # State berjalan, agar event bisa diproses satu per satu (lihat IncrementalIOCExtractor)
+        self._unique_domains = set()
+        self._rule_findings = {}
+        self._registrable_rollups = {} # eTLD+1 -> {"hosts": set, "request_count": int}
+        self._registrable_map = {} # hostname -> eTLD+1
+        self._file_hashes = {} # sha256 body respons/unduhan (lihat BrowserAutomation), urutan pertama terlihat
+        self.events_processed = 0
         logger.debug("IOCExtractor diinisialisasi.")
 
     def _get_domain_from_url(self, url_string):
-        try:
-            if not url_string: # Tambahkan pengecekan untuk input None atau string kosong
-                return None
-            parsed_url = urlparse(url_string)
-            # hostname akan mengembalikan None jika tidak ada, atau string domain/IP
-            # Untuk IPv6, ia akan mengembalikan '[::1]' termasuk kurung siku
-            return parsed_url.hostname 
-        except Exception as e:
-            logger.warning(f"Tidak dapat mem-parsing domain dari URL: {url_string} - Error: {e}")
+        if not url_string: # Tambahkan pengecekan untuk input None atau string kosong
             return None
+        return _parse_url_facts(url_string)[0]
 
     def _check_harmful_extension(self, url_string):
-        try:
-            if not url_string: return False, None # Tambah pengecekan
-            decoded_url = unquote(url_string)
-            path = urlparse(decoded_url).path
-            _, ext = os.path.splitext(path) # Ambil ekstensi
-            if ext.lower() in POTENTIALLY_HARMFUL_EXTENSIONS:
-                return True, ext.lower()
-        except Exception as e:
-            logger.warning(f"Error saat memeriksa ekstensi berbahaya untuk URL: {url_string} - Error: {e}")
-        return False, None
+        if not url_string: return False, None # Tambah pengecekan
+        harmful_ext = _parse_url_facts(url_string)[1]
+        return (True, harmful_ext) if harmful_ext else (False, None)
 
     def _is_ip_address(self, hostname_or_ip):
-        if not hostname_or_ip:
-            return False
-        # Pola regex untuk IPv4 yang juga memeriksa rentang nilai (0-255)
-        # Ini lebih kompleks tapi lebih akurat.
-        # Oktet: (25[0-5]|2[0-4][0-9]|1[0-9]{2}|[1-9]?[0-9])
-        octet_pattern = r"(25[0-5]|2[0-4][0-9]|1[0-9]{2}|[1-9]?[0-9])"
-        ip_pattern = re.compile(rf"^{octet_pattern}\.{octet_pattern}\.{octet_pattern}\.{octet_pattern}$")
-        
-        # Untuk IPv6, validasinya jauh lebih kompleks dan biasanya menggunakan pustaka khusus.
-        # Untuk saat ini, kita fokus pada IPv4. Jika hostname_or_ip adalah IPv6 valid (mis. '[::1]'),
-        # regex ini tidak akan cocok, yang mana benar karena ini bukan IPv4.
-        return bool(ip_pattern.match(hostname_or_ip))
+        return _is_ipv4(hostname_or_ip)
+
+    def _on_new_domain(self, domain):
+        """Hook untuk subclass; dipanggil sekali untuk setiap domain/IP yang baru pertama kali terlihat."""
+        pass
+
+    def process_event(self, event):
+        """Memperbarui state IOC berjalan dengan satu event jaringan."""
+        self.events_processed += 1
+        rule_engine = self.rule_engine
+        url = event.get("url")
+        if event.get("sha256"):
+            self._file_hashes.setdefault(event["sha256"].lower(), None)
+        if event.get("type") != "request" or not url:
+            # Respons tetap dievaluasi untuk aturan header
+            if rule_engine is not None and event.get("headers"):
+                rule_engine.record_event(self._rule_findings, event)
+            return
+
+        method = event.get("method", "").upper()
+        domain, harmful_ext, is_ip = _parse_url_facts(url)
+        if rule_engine is not None:
+            rule_engine.record_event(self._rule_findings, event, domain)
+
+        if domain:
+            if domain not in self._unique_domains:
+                self._unique_domains.add(domain)
+                # Host yang merupakan public suffix itu sendiri (mis. 'localhost') digabung ke dirinya sendiri
+                registrable = registrable_domain(domain) or domain
+                self._registrable_map[domain] = registrable
+                rollup = self._registrable_rollups.setdefault(registrable, {"hosts": set(), "request_count": 0})
+                rollup["hosts"].add(domain)
+                self._on_new_domain(domain)
+            self._registrable_rollups[self._registrable_map[domain]]["request_count"] += 1
+            if is_ip: # Hanya cek jika domain itu sendiri adalah IP
+                self.extracted_iocs["direct_ip_requests"].append({
+                    "url": url,
+                    "method": method,
+                    "timestamp": event.get("timestamp")
+                })
+
+        if harmful_ext:
+            self.extracted_iocs["potentially_harmful_urls"].append({
+                "url": url,
+                "extension": harmful_ext,
+                "method": method,
+                "timestamp": event.get("timestamp")
+            })
+
+        if method == "POST":
+            post_entry = {
+                "url": url,
+                "timestamp": event.get("timestamp"),
+                "post_data_summary": "Available" if event.get("post_data") or event.get("post_data_format") else "Not available"
+            }
+            if self.post_scanner is not None and event.get("post_data") is not None:
+                scan_result = self.post_scanner.scan(event.get("post_data"), event.get("post_data_format"))
+                post_entry["post_data_findings"] = scan_result["findings"]
+                post_entry["post_data_scan"] = {key: scan_result[key] for key in ("decoded_as", "bytes_scanned", "truncated", "timed_out")}
+            self.extracted_iocs["post_requests"].append(post_entry)
+
+    def finalize(self):
+        """Menyusun hasil akhir dari state berjalan. Aman dipanggil berulang kali."""
+        self.extracted_iocs["unique_domains"] = sorted(self._unique_domains)
+        self.extracted_iocs["registrable_domains"] = sorted(
+            ({"domain": registrable, "host_count": len(rollup["hosts"]), "request_count": rollup["request_count"],
+              "hosts": sorted(rollup["hosts"])} for registrable, rollup in self._registrable_rollups.items()),
+            key=lambda item: (-item["host_count"], item["domain"])
+        )
+        self.extracted_iocs["registrable_domain_map"] = dict(self._registrable_map)
+        self.extracted_iocs["file_hashes"] = list(self._file_hashes)
+        if self.rule_engine is not None:
+            self.extracted_iocs["rule_matches"] = self.rule_engine.sorted_findings(self._rule_findings)
+
+        logger.info(f"Ekstraksi IOC selesai. Ditemukan {len(self.extracted_iocs['unique_domains'])} domain unik "
+                    f"dari {len(self.extracted_iocs['registrable_domains'])} domain terdaftar (eTLD+1).")
+        logger.info(f"Ditemukan {len(self.extracted_iocs['potentially_harmful_urls'])} URL berpotensi berbahaya.")
+        sensitive_posts = sum(1 for item in self.extracted_iocs["post_requests"] if item.get("post_data_findings"))
+        logger.info(f"Ditemukan {len(self.extracted_iocs['post_requests'])} permintaan POST ({sensitive_posts} memuat data sensitif).")
+        logger.info(f"Ditemukan {len(self.extracted_iocs['direct_ip_requests'])} permintaan ke IP langsung.")
+        logger.info(f"Ditemukan {len(self.extracted_iocs['file_hashes'])} hash berkas dari body respons/unduhan.")
+        logger.info(f"Ditemukan {len(self.extracted_iocs['rule_matches'])} kecocokan aturan IOC.")
+        return self.extracted_iocs
 
     def extract(self):
         if not self.network_events:
             logger.info("Tidak ada event jaringan untuk diekstrak IOC-nya.")
-            # Pastikan unique_domains selalu list
-            self.extracted_iocs["unique_domains"] = []
             return self.extracted_iocs
 
         logger.info(f"Memulai ekstraksi IOC dari {len(self.network_events)} event jaringan...")
-
+        # Satu lintasan atas semua event
+        process_event = self.process_event
         for event in self.network_events:
-            if event.get("type") == "request": 
-                url = event.get("url")
-                method = event.get("method", "").upper()
-
-                if not url:
-                    continue
-
-                domain = self._get_domain_from_url(url)
-                if domain:
-                    self.extracted_iocs["unique_domains"].add(domain)
-                    if self._is_ip_address(domain): # Hanya cek jika domain itu sendiri adalah IP
-                        self.extracted_iocs["direct_ip_requests"].append({
-                            "url": url,
-                            "method": method,
-                            "timestamp": event.get("timestamp")
-                        })
-                
-                is_harmful, ext = self._check_harmful_extension(url)
-                if is_harmful:
-                    self.extracted_iocs["potentially_harmful_urls"].append({
-                        "url": url,
-                        "extension": ext,
-                        "method": method,
-                        "timestamp": event.get("timestamp")
-                    })
-
-                if method == "POST":
-                    self.extracted_iocs["post_requests"].append({
-                        "url": url,
-                        "timestamp": event.get("timestamp"),
-                        "post_data_summary": "Available" if event.get("post_data") or event.get("post_data_format") else "Not available"
-                    })
-        
-        self.extracted_iocs["unique_domains"] = sorted(list(self.extracted_iocs["unique_domains"]))
-        
-        logger.info(f"Ekstraksi IOC selesai. Ditemukan {len(self.extracted_iocs['unique_domains'])} domain unik.")
-        logger.info(f"Ditemukan {len(self.extracted_iocs['potentially_harmful_urls'])} URL berpotensi berbahaya.")
-        logger.info(f"Ditemukan {len(self.extracted_iocs['post_requests'])} permintaan POST.")
-        logger.info(f"Ditemukan {len(self.extracted_iocs['direct_ip_requests'])} permintaan ke IP langsung.")
-        
-        return self.extracted_iocs
+            process_event(event)
+        return self.finalize()
+
+
+class IncrementalIOCExtractor(IOCExtractor):
+    """
+    Extractor yang menerima event satu per satu selama capture berlangsung (dipasang sebagai
+    event_listener pada BrowserAutomation). IOC akhir tersedia lewat finalize() tanpa lintasan kedua.
+    """
+    def __init__(self, on_new_domain=None, rule_engine=None):
+        super().__init__(network_events=None, rule_engine=rule_engine)
+        self.on_new_domain = on_new_domain
+
+    def __call__(self, event):
+        self.process_event(event)
+
+    def _on_new_domain(self, domain):
+        if self.on_new_domain is None:
+            return
+        try:
+            self.on_new_domain(domain)
+        except Exception as e:
+            # Callback (mis. lookup threat intel awal) tidak boleh menghentikan ekstraksi
+            logger.error(f"Callback domain baru gagal untuk '{domain}': {e}", exc_info=True)
 
 # ... (Bagian if __name__ == '__main__': tetap sama) ...
 if __name__ == '__main__':
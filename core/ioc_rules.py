@@ -0,0 +1,347 @@
+# core/ioc_rules.py
+import os
+import json
+from collections import deque
+from functools import lru_cache
+
+# Impor konfigurasi dan logger
+import sys
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+import config
+from utils.logger_config import setup_logger
+
+logger = setup_logger(__name__, config.LOG_LEVEL, config.LOG_FILE)
+
+# Target yang didukung oleh file aturan dan jenis pencocokan yang boleh dipakai per target
+RULE_TARGET_URL = "url"
+RULE_TARGET_DOMAIN = "domain"
+RULE_TARGET_HEADER = "header"
+RULE_TARGET_RESOURCE_TYPE = "resource_type"
+RULE_TARGET_POST_BODY = "post_body"
+
+MATCH_SUBSTRING = "substring"
+MATCH_EXACT = "exact"
+MATCH_SUFFIX = "suffix"
+
+ALLOWED_MATCH_TYPES = {
+    RULE_TARGET_URL: (MATCH_SUBSTRING, MATCH_EXACT),
+    RULE_TARGET_DOMAIN: (MATCH_SUFFIX, MATCH_EXACT),
+    RULE_TARGET_HEADER: (MATCH_SUBSTRING, MATCH_EXACT),
+    RULE_TARGET_RESOURCE_TYPE: (MATCH_EXACT,),
+    RULE_TARGET_POST_BODY: (MATCH_SUBSTRING,),
+}
+SEVERITY_LEVELS = ("low", "medium", "high", "critical")
+
+
+class AhoCorasickAutomaton:
+    """
+    Automaton multi-pola Aho-Corasick. Setelah dikompilasi, pencarian berjalan dalam satu lintasan
+    atas teks sehingga biaya per teks tidak bergantung pada jumlah pola.
+    """
+    def __init__(self):
+        self._goto = [{}]
+        self._fail = [0]
+        self._outputs = [[]] # per state: daftar (panjang_pola, payload)
+        self._compiled = False
+
+    def add(self, pattern, payload):
+        if not pattern:
+            return
+        state = 0
+        for char in pattern:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._outputs.append([])
+            state = next_state
+        self._outputs[state].append((len(pattern), payload))
+        self._compiled = False
+
+    def compile(self):
+        # BFS untuk tautan kegagalan; output state digabung dengan output state kegagalannya
+        queue = deque(self._goto[0].values())
+        for state in queue:
+            self._fail[state] = 0
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                candidate = self._goto[fallback].get(char, 0)
+                self._fail[next_state] = candidate if candidate != next_state else 0
+                self._outputs[next_state] = self._outputs[next_state] + self._outputs[self._fail[next_state]]
+        self._compiled = True
+        return self
+
+    def __len__(self):
+        return len(self._goto)
+
+    def search(self, text):
+        """Mengembalikan daftar (payload, teks_cocok) untuk setiap kemunculan pola dalam teks."""
+        if not self._compiled:
+            self.compile()
+        goto, fail, outputs = self._goto, self._fail, self._outputs
+        state = 0
+        results = []
+        for index, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if outputs[state]:
+                for length, payload in outputs[state]:
+                    results.append((payload, text[index - length + 1:index + 1]))
+        return results
+
+
+class DomainSuffixTrie:
+    """Trie label domain terbalik: pola 'evil.com' cocok dengan 'evil.com' dan 'a.evil.com', tapi tidak 'notevil.com'."""
+    _TERMINAL = "\0"
+
+    def __init__(self):
+        self._root = {}
+
+    def add(self, suffix, payload):
+        labels = [label for label in suffix.lower().strip(".").split(".") if label and label != "*"]
+        if not labels:
+            return
+        node = self._root
+        for label in reversed(labels):
+            node = node.setdefault(label, {})
+        node.setdefault(self._TERMINAL, []).append((".".join(labels), payload))
+
+    def search(self, domain):
+        results = []
+        node = self._root
+        for label in reversed(domain.lower().rstrip(".").split(".")):
+            node = node.get(label)
+            if node is None:
+                break
+            for suffix, payload in node.get(self._TERMINAL, ()):
+                results.append((payload, suffix))
+        return results
+
+
+class ExactValueSet:
+    """Pencocokan nilai persis melalui dict (hash), O(1) per nilai."""
+    def __init__(self):
+        self._values = {}
+
+    def add(self, value, payload):
+        self._values.setdefault(value, []).append(payload)
+
+    def search(self, value):
+        return [(payload, value) for payload in self._values.get(value, ())]
+
+
+def _normalize_pattern(target, pattern):
+    pattern = str(pattern).strip()
+    if target == RULE_TARGET_DOMAIN:
+        return pattern.lower().strip(".")
+    return pattern.lower()
+
+
+def _stringify_post_body(post_data, post_data_format=None, max_chars=None):
+    """
+    Body POST sebagai teks untuk pencocokan. Body raw/multipart/teks disimpan browser_operations sebagai
+    string hex (post_data_format "hex_buffer") dan didekode dulu, sama seperti di post_data_scanner.
+    """
+    if post_data is None:
+        return ""
+    if post_data_format == "hex_buffer" and isinstance(post_data, str):
+        hex_text = post_data[:max_chars * 2] if max_chars else post_data
+        try:
+            return bytes.fromhex(hex_text[:len(hex_text) - len(hex_text) % 2]).decode("utf-8", errors="replace")
+        except ValueError:
+            return post_data
+    if isinstance(post_data, (dict, list)):
+        return json.dumps(post_data, ensure_ascii=False)
+    if isinstance(post_data, bytes):
+        return post_data.decode("utf-8", errors="replace")
+    return str(post_data)
+
+
+class IOCRuleEngine:
+    """
+    Mengompilasi aturan deklaratif (lihat rules/ioc_rules.json) menjadi matcher per target:
+    automaton Aho-Corasick untuk substring, suffix trie untuk domain, dan set hash untuk nilai persis.
+    """
+    def __init__(self, rules):
+        self.rules = []
+        self._matchers = {} # (target, match_type) -> matcher
+        for raw_rule in rules:
+            self._add_rule(raw_rule)
+        for matcher in self._matchers.values():
+            if isinstance(matcher, AhoCorasickAutomaton):
+                matcher.compile()
+        # Hasil per URL/host unik di-cache karena log jaringan mengulang nilai yang sama berkali-kali
+        self._match_url_cached = lru_cache(maxsize=config.IOC_URL_CACHE_SIZE)(self._match_url)
+        self._match_domain_cached = lru_cache(maxsize=config.IOC_URL_CACHE_SIZE)(self._match_domain)
+        logger.info(f"{len(self.rules)} aturan IOC dikompilasi menjadi {len(self._matchers)} matcher.")
+
+    @classmethod
+    def from_file(cls, rules_path):
+        with open(rules_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        rules = data.get("rules", []) if isinstance(data, dict) else data
+        return cls(rules)
+
+    def _add_rule(self, raw_rule):
+        rule_id = raw_rule.get("id")
+        target = raw_rule.get("target")
+        match_type = raw_rule.get("match", ALLOWED_MATCH_TYPES.get(target, (MATCH_SUBSTRING,))[0])
+        if not rule_id or target not in ALLOWED_MATCH_TYPES:
+            raise ValueError(f"Aturan IOC tidak valid (id/target): {raw_rule}")
+        if match_type not in ALLOWED_MATCH_TYPES[target]:
+            raise ValueError(f"Jenis pencocokan '{match_type}' tidak didukung untuk target '{target}' (aturan {rule_id}).")
+        severity = raw_rule.get("severity", "medium")
+        if severity not in SEVERITY_LEVELS:
+            raise ValueError(f"Severity '{severity}' tidak valid untuk aturan {rule_id}.")
+
+        rule = {
+            "id": rule_id,
+            "description": raw_rule.get("description", ""),
+            "severity": severity,
+            "target": target,
+            "match": match_type,
+            "header": raw_rule.get("header", "").lower() or None,
+        }
+        rule_index = len(self.rules)
+        self.rules.append(rule)
+
+        key = (target, match_type)
+        matcher = self._matchers.get(key)
+        if matcher is None:
+            if match_type == MATCH_SUBSTRING:
+                matcher = AhoCorasickAutomaton()
+            elif match_type == MATCH_SUFFIX:
+                matcher = DomainSuffixTrie()
+            else:
+                matcher = ExactValueSet()
+            self._matchers[key] = matcher
+        for pattern in raw_rule.get("patterns", []):
+            normalized = _normalize_pattern(target, pattern)
+            if normalized:
+                matcher.add(normalized, rule_index)
+
+    def _search(self, target, value):
+        hits = []
+        for match_type in ALLOWED_MATCH_TYPES[target]:
+            matcher = self._matchers.get((target, match_type))
+            if matcher is not None:
+                hits.extend(matcher.search(value))
+        return hits
+
+    def _match_url(self, url):
+        return tuple(self._search(RULE_TARGET_URL, url.lower()))
+
+    def _match_domain(self, domain):
+        return tuple(self._search(RULE_TARGET_DOMAIN, domain.lower()))
+
+    def match_event(self, event, domain=None):
+        """Mengembalikan daftar (rule_index, target, teks_cocok) untuk satu event jaringan."""
+        hits = []
+        is_request = event.get("type") == "request"
+        url = event.get("url")
+        if is_request and url:
+            hits.extend((rule_index, RULE_TARGET_URL, matched) for rule_index, matched in self._match_url_cached(url))
+        if is_request and domain:
+            hits.extend((rule_index, RULE_TARGET_DOMAIN, matched) for rule_index, matched in self._match_domain_cached(domain))
+        resource_type = event.get("resource_type")
+        if is_request and resource_type:
+            hits.extend((rule_index, RULE_TARGET_RESOURCE_TYPE, matched)
+                        for rule_index, matched in self._search(RULE_TARGET_RESOURCE_TYPE, resource_type.lower()))
+        if is_request and event.get("post_data") is not None:
+            body = _stringify_post_body(event.get("post_data"), event.get("post_data_format"),
+                                        config.IOC_RULES_MAX_SCAN_CHARS)[:config.IOC_RULES_MAX_SCAN_CHARS].lower()
+            hits.extend((rule_index, RULE_TARGET_POST_BODY, matched)
+                        for rule_index, matched in self._search(RULE_TARGET_POST_BODY, body))
+        headers = event.get("headers")
+        if headers and ((RULE_TARGET_HEADER, MATCH_SUBSTRING) in self._matchers or (RULE_TARGET_HEADER, MATCH_EXACT) in self._matchers):
+            for name, value in headers.items():
+                name = str(name).lower()
+                for rule_index, matched in self._search(RULE_TARGET_HEADER, str(value).lower()):
+                    rule_header = self.rules[rule_index]["header"]
+                    if rule_header is None or rule_header == name:
+                        hits.append((rule_index, RULE_TARGET_HEADER, f"{name}: {matched}"))
+        return hits
+
+    def record_event(self, findings, event, domain=None):
+        """
+        Mencocokkan satu event dan menggabungkan hasilnya ke `findings` (dict) secara unik per
+        (aturan, URL, teks cocok), lengkap dengan jumlah kemunculan dan timestamp pertama.
+        """
+        url = event.get("url")
+        for rule_index, target, matched in self.match_event(event, domain):
+            key = (rule_index, url, matched)
+            finding = findings.get(key)
+            if finding is None:
+                rule = self.rules[rule_index]
+                findings[key] = {
+                    "rule_id": rule["id"],
+                    "description": rule["description"],
+                    "severity": rule["severity"],
+                    "target": target,
+                    "matched": matched,
+                    "url": url,
+                    "event_type": event.get("type"),
+                    "timestamp": event.get("timestamp"),
+                    "count": 1,
+                }
+            else:
+                finding["count"] += 1
+
+    @staticmethod
+    def sorted_findings(findings):
+        """Mengurutkan temuan dari severity tertinggi."""
+        severity_rank = {level: rank for rank, level in enumerate(SEVERITY_LEVELS)}
+        return sorted(findings.values(), key=lambda f: (-severity_rank[f["severity"]], f["rule_id"], f["url"] or ""))
+
+    def evaluate(self, events, domain_resolver=None):
+        """Mengevaluasi semua event; `domain_resolver(url)` dipakai untuk aturan domain."""
+        findings = {}
+        for event in events:
+            url = event.get("url")
+            self.record_event(findings, event, domain_resolver(url) if (domain_resolver and url) else None)
+        return self.sorted_findings(findings)
+
+
+def _resolve_rules_path(rules_path):
+    if not rules_path:
+        return None
+    if os.path.isabs(rules_path):
+        return rules_path
+    return os.path.join(project_root, rules_path)
+
+
+_DEFAULT_ENGINES = {}
+
+def get_default_rule_engine(rules_path=None):
+    """
+    Memuat dan mengompilasi file aturan sekali per proses (di-cache berdasarkan path dan mtime).
+    Mengembalikan None jika file aturan tidak dikonfigurasi, tidak ada, atau tidak valid.
+    """
+    path = _resolve_rules_path(rules_path if rules_path is not None else config.IOC_RULES_FILE)
+    if not path or not os.path.exists(path):
+        if path:
+            logger.warning(f"File aturan IOC tidak ditemukan: {path}. Evaluasi aturan dilewati.")
+        return None
+    mtime = os.path.getmtime(path)
+    cached = _DEFAULT_ENGINES.get(path)
+    if cached and cached[0] == mtime:
+        return cached[1]
+    try:
+        engine = IOCRuleEngine.from_file(path)
+    except (ValueError, json.JSONDecodeError) as e:
+        logger.error(f"Gagal memuat file aturan IOC {path}: {e}")
+        return None
+    _DEFAULT_ENGINES[path] = (mtime, engine)
+    return engine
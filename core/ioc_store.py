@@ -0,0 +1,231 @@
+# core/ioc_store.py
+import os
+import time
+import sqlite3
+import threading
+
+# Impor konfigurasi dan logger
+import sys
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+import config
+from utils.logger_config import setup_logger
+from core.intel_providers import is_ip_address, IOC_TYPE_DOMAIN, IOC_TYPE_IP, IOC_TYPE_URL, IOC_TYPE_HASH
+
+logger = setup_logger(__name__, config.LOG_LEVEL, config.LOG_FILE)
+
+IOC_TYPE_REGISTRABLE_DOMAIN = "registrable_domain"
+
+# Batas jumlah parameter per klausa IN (SQLite default lama: 999)
+_SQL_CHUNK_SIZE = 500
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS analyses (
+    id INTEGER PRIMARY KEY,
+    target_url TEXT NOT NULL,
+    analyzed_at TEXT,
+    report_path TEXT,
+    network_log_path TEXT,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS indicators (
+    id INTEGER PRIMARY KEY,
+    value TEXT NOT NULL,
+    ioc_type TEXT NOT NULL
+);
+-- (value, ioc_type): melayani pencarian per nilai saja maupun per (nilai, tipe)
+CREATE UNIQUE INDEX IF NOT EXISTS idx_indicators_value_type ON indicators(value, ioc_type);
+CREATE TABLE IF NOT EXISTS sightings (
+    indicator_id INTEGER NOT NULL REFERENCES indicators(id),
+    analysis_id INTEGER NOT NULL REFERENCES analyses(id),
+    hit_count INTEGER NOT NULL DEFAULT 1,
+    PRIMARY KEY (indicator_id, analysis_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_sightings_analysis ON sightings(analysis_id);
+"""
+
+
+def _chunks(values, size=_SQL_CHUNK_SIZE):
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+def _host_type(host):
+    return IOC_TYPE_IP if is_ip_address(host) else IOC_TYPE_DOMAIN
+
+
+def collect_store_indicators(extracted_iocs, network_events=None):
+    """
+    Mengumpulkan indikator yang disimpan per analisis: {(tipe, nilai): jumlah_kemunculan}.
+    URL diambil dari semua event request (jika diberikan) dan dari hasil IOC.
+    """
+    counts = {}
+
+    def add(ioc_type, value, amount=1):
+        if value:
+            key = (ioc_type, value)
+            counts[key] = counts.get(key, 0) + amount
+
+    extracted_iocs = extracted_iocs or {}
+    for host in extracted_iocs.get("unique_domains", []):
+        add(_host_type(host), host.lower())
+    for rollup in extracted_iocs.get("registrable_domains", []):
+        if not is_ip_address(rollup["domain"]):
+            add(IOC_TYPE_REGISTRABLE_DOMAIN, rollup["domain"].lower(), rollup.get("request_count", 1))
+    for file_hash in extracted_iocs.get("file_hashes", []):
+        add(IOC_TYPE_HASH, file_hash.lower())
+    if network_events:
+        for event in network_events:
+            if event.get("type") == "request":
+                add(IOC_TYPE_URL, event.get("url"))
+    else:
+        for section in ("potentially_harmful_urls", "post_requests", "direct_ip_requests"):
+            for item in extracted_iocs.get(section, []):
+                add(IOC_TYPE_URL, item.get("url"))
+    return counts
+
+
+class IOCStore:
+    """
+    Indeks IOC persisten lintas analisis berbasis SQLite. Setiap analisis dicatat sekali; setiap
+    indikator (domain, IP, URL, hash) disimpan unik dan dihubungkan ke analisis lewat tabel sightings.
+    """
+    def __init__(self, db_path=None):
+        path = db_path if db_path else config.IOC_STORE_PATH
+        self.db_path = path if os.path.isabs(path) or path == ":memory:" else os.path.join(project_root, path)
+        if self.db_path != ":memory:":
+            os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        self._conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute("PRAGMA foreign_keys=ON")
+            self._conn.executescript(_SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _indicator_ids(self, cursor, keys):
+        """Memastikan indikator ada dan mengembalikan {(tipe, nilai): id}."""
+        cursor.executemany("INSERT OR IGNORE INTO indicators(value, ioc_type) VALUES (?, ?)",
+                           [(value, ioc_type) for ioc_type, value in keys])
+        ids = {}
+        by_type = {}
+        for ioc_type, value in keys:
+            by_type.setdefault(ioc_type, []).append(value)
+        for ioc_type, values in by_type.items():
+            for chunk in _chunks(values):
+                placeholders = ",".join("?" * len(chunk))
+                rows = cursor.execute(
+                    f"SELECT id, value FROM indicators WHERE ioc_type = ? AND value IN ({placeholders})",
+                    [ioc_type, *chunk]
+                )
+                for indicator_id, value in rows:
+                    ids[(ioc_type, value)] = indicator_id
+        return ids
+
+    def record_analysis(self, target_url, extracted_iocs, network_events=None, analyzed_at=None,
+                        report_path=None, network_log_path=None):
+        """Mencatat satu analisis beserta semua indikatornya dalam satu transaksi. Mengembalikan id analisis."""
+        counts = collect_store_indicators(extracted_iocs, network_events)
+        with self._lock, self._conn:
+            cursor = self._conn.cursor()
+            cursor.execute(
+                "INSERT INTO analyses(target_url, analyzed_at, report_path, network_log_path, created_at) VALUES (?, ?, ?, ?, ?)",
+                (target_url, analyzed_at, report_path, network_log_path, time.time())
+            )
+            analysis_id = cursor.lastrowid
+            ids = self._indicator_ids(cursor, list(counts))
+            cursor.executemany(
+                "INSERT INTO sightings(indicator_id, analysis_id, hit_count) VALUES (?, ?, ?) "
+                "ON CONFLICT(indicator_id, analysis_id) DO UPDATE SET hit_count = hit_count + excluded.hit_count",
+                [(ids[key], analysis_id, amount) for key, amount in counts.items()]
+            )
+        logger.info(f"Analisis #{analysis_id} dicatat di IOC store ({len(counts)} indikator).")
+        return analysis_id
+
+    def count_analyses(self, ioc_type, values, exclude_analysis_id=None):
+        """Mengembalikan {nilai: jumlah analisis berbeda yang memuat indikator tersebut} (nilai 0 tidak disertakan)."""
+        values = list(dict.fromkeys(v for v in values if v))
+        result = {}
+        with self._lock:
+            for chunk in _chunks(values):
+                placeholders = ",".join("?" * len(chunk))
+                params = [ioc_type, *chunk]
+                exclude_clause = ""
+                if exclude_analysis_id is not None:
+                    exclude_clause = " AND s.analysis_id != ?"
+                    params.append(exclude_analysis_id)
+                rows = self._conn.execute(
+                    f"SELECT i.value, COUNT(s.analysis_id) FROM indicators i "
+                    f"JOIN sightings s ON s.indicator_id = i.id "
+                    f"WHERE i.ioc_type = ? AND i.value IN ({placeholders}){exclude_clause} GROUP BY i.value",
+                    params
+                )
+                result.update(rows)
+        return result
+
+    def prior_sightings(self, extracted_iocs, exclude_analysis_id=None):
+        """
+        Menghitung berapa analisis sebelumnya yang memuat setiap domain/IP/URL dari hasil IOC saat ini.
+        :return: Dictionary {nilai: jumlah_analisis} untuk laporan.
+        """
+        extracted_iocs = extracted_iocs or {}
+        hosts = extracted_iocs.get("unique_domains", [])
+        urls = [item.get("url") for section in ("potentially_harmful_urls", "post_requests", "direct_ip_requests")
+                for item in extracted_iocs.get(section, [])]
+        history = {}
+        history.update(self.count_analyses(IOC_TYPE_DOMAIN, [h.lower() for h in hosts if not is_ip_address(h)], exclude_analysis_id))
+        history.update(self.count_analyses(IOC_TYPE_IP, [h for h in hosts if is_ip_address(h)], exclude_analysis_id))
+        history.update(self.count_analyses(IOC_TYPE_URL, urls, exclude_analysis_id))
+        return history
+
+    def find_analyses(self, value, ioc_type=None, limit=50):
+        """
+        Mencari analisis yang memuat nilai IOC tertentu, terbaru lebih dulu, satu baris per analisis.
+        Nilai yang tercatat dengan beberapa tipe di analisis yang sama (mis. host yang juga domain
+        terdaftarnya) digabung: ioc_type berisi tipe-tipenya dipisah koma, hit_count yang tertinggi.
+        """
+        value = value.strip()
+        if ioc_type in (IOC_TYPE_DOMAIN, IOC_TYPE_REGISTRABLE_DOMAIN, IOC_TYPE_HASH):
+            value = value.lower()
+        query = ("SELECT a.id, a.target_url, a.analyzed_at, a.report_path, a.network_log_path, "
+                 "GROUP_CONCAT(i.ioc_type), MAX(s.hit_count) "
+                 "FROM indicators i JOIN sightings s ON s.indicator_id = i.id JOIN analyses a ON a.id = s.analysis_id "
+                 "WHERE i.value = ?")
+        params = [value]
+        if ioc_type:
+            query += " AND i.ioc_type = ?"
+            params.append(ioc_type)
+        query += " GROUP BY a.id ORDER BY a.id DESC LIMIT ?"
+        params.append(limit)
+        columns = ("analysis_id", "target_url", "analyzed_at", "report_path", "network_log_path", "ioc_type", "hit_count")
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+            if not rows and ioc_type is None and value != value.lower():
+                rows = self._conn.execute(query, [value.lower(), limit]).fetchall()
+        results = []
+        for row in rows:
+            result = dict(zip(columns, row))
+            result["ioc_type"] = ", ".join(sorted(result["ioc_type"].split(",")))
+            results.append(result)
+        return results
+
+    def stats(self):
+        with self._lock:
+            return {
+                "analyses": self._conn.execute("SELECT COUNT(*) FROM analyses").fetchone()[0],
+                "indicators": self._conn.execute("SELECT COUNT(*) FROM indicators").fetchone()[0],
+                "sightings": self._conn.execute("SELECT COUNT(*) FROM sightings").fetchone()[0],
+            }
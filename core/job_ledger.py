@@ -0,0 +1,180 @@
+# core/job_ledger.py
+import os
+import sys
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+
+# Tambahkan path root proyek ke sys.path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+import config
+from utils.logger_config import setup_logger
+
+logger = setup_logger(__name__, config.LOG_LEVEL, config.LOG_FILE)
+
+STATE_PENDING = "pending"
+STATE_RUNNING = "running"
+STATE_DONE = "done"
+STATE_FAILED = "failed"
+
+# last_error untuk job yang masih "running" saat run sebelumnya crash atau diinterupsi
+INTERRUPTED_ERROR = "Terhenti di tengah run sebelumnya (crash/interupsi)."
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS batches (
+    batch_id TEXT PRIMARY KEY,
+    batch_file TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS jobs (
+    batch_id TEXT NOT NULL REFERENCES batches(batch_id),
+    target_url TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    state TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT,
+    html_report_path TEXT,
+    network_log_path TEXT,
+    screenshot_path TEXT,
+    summary TEXT,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (batch_id, target_url)
+) WITHOUT ROWID;
+-- Urutan asli file batch untuk memilih job yang bisa dijalankan dan menyusun dashboard
+CREATE INDEX IF NOT EXISTS idx_jobs_batch_position ON jobs(batch_id, position);
+"""
+
+_RESULT_COLUMNS = ("target_url", "state", "attempts", "last_error", "html_report_path",
+                   "network_log_path", "screenshot_path", "summary")
+
+
+def batch_id_for_file(batch_file):
+    """ID batch stabil untuk file batch (path absolut), sehingga menjalankan ulang file yang sama melanjutkan progresnya."""
+    return hashlib.sha256(os.path.abspath(batch_file).encode("utf-8")).hexdigest()[:16]
+
+
+class JobLedger:
+    """
+    Ledger job batch yang tahan crash, berbasis SQLite. Setiap URL punya state pending -> running ->
+    done/failed beserta path hasilnya; setiap transisi di-commit dalam transaksinya sendiri, sehingga
+    run ulang hanya mengerjakan URL yang belum selesai dan mengulang kegagalan selama jatah percobaan masih ada.
+    """
+    def __init__(self, db_path=None, max_attempts=None):
+        path = db_path if db_path else config.BATCH_LEDGER_PATH
+        self.db_path = path if os.path.isabs(path) or path == ":memory:" else os.path.join(project_root, path)
+        self.max_attempts = config.BATCH_MAX_ATTEMPTS if max_attempts is None else max_attempts
+        if self.db_path != ":memory:":
+            os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        self._conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute("PRAGMA foreign_keys=ON")
+            self._conn.executescript(_SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def start_batch(self, batch_file, urls, restart=False):
+        """
+        Menyelaraskan ledger dengan isi file batch dan mengembalikan batch_id. URL baru ditambahkan sebagai
+        pending, URL yang sudah dihapus dari file dibuang, dan job yang masih "running" (run sebelumnya
+        terhenti) dicatat sebagai failed; percobaannya tetap dihitung sehingga jatah max_attempts berlaku dan
+        URL yang membuat proses crash tidak diulang tanpa batas. restart=True menghapus seluruh progres sebelumnya.
+        """
+        batch_id = batch_id_for_file(batch_file)
+        now = time.time()
+        with self._lock, self._conn:
+            cursor = self._conn.cursor()
+            cursor.execute(
+                "INSERT INTO batches(batch_id, batch_file, created_at, updated_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(batch_id) DO UPDATE SET updated_at = excluded.updated_at",
+                (batch_id, os.path.abspath(batch_file), now, now)
+            )
+            if restart:
+                cursor.execute("DELETE FROM jobs WHERE batch_id = ?", (batch_id,))
+            cursor.execute("CREATE TEMP TABLE IF NOT EXISTS batch_urls (target_url TEXT PRIMARY KEY, position INTEGER NOT NULL)")
+            cursor.execute("DELETE FROM batch_urls")
+            cursor.executemany("INSERT OR IGNORE INTO batch_urls(target_url, position) VALUES (?, ?)",
+                               ((url, position) for position, url in enumerate(urls)))
+            cursor.execute("DELETE FROM jobs WHERE batch_id = ? AND target_url NOT IN (SELECT target_url FROM batch_urls)",
+                           (batch_id,))
+            cursor.execute(
+                "INSERT INTO jobs(batch_id, target_url, position, state, updated_at) "
+                "SELECT ?, target_url, position, ?, ? FROM batch_urls WHERE 1 "
+                "ON CONFLICT(batch_id, target_url) DO UPDATE SET position = excluded.position",
+                (batch_id, STATE_PENDING, now)
+            )
+            recovered = cursor.execute(
+                "UPDATE jobs SET state = ?, last_error = ?, updated_at = ? WHERE batch_id = ? AND state = ?",
+                (STATE_FAILED, INTERRUPTED_ERROR, now, batch_id, STATE_RUNNING)
+            ).rowcount
+            cursor.execute("DELETE FROM batch_urls")
+        if recovered:
+            logger.warning(f"{recovered} job batch terhenti di tengah run sebelumnya; diulang selama jatah percobaan masih ada.")
+        return batch_id
+
+    def runnable(self, batch_id):
+        """URL yang perlu dijalankan (pending, atau failed dengan sisa percobaan), sesuai urutan file batch."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT target_url FROM jobs WHERE batch_id = ? AND (state = ? OR (state = ? AND attempts < ?)) "
+                "ORDER BY position",
+                (batch_id, STATE_PENDING, STATE_FAILED, self.max_attempts)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def _update(self, sql, params):
+        with self._lock, self._conn:
+            self._conn.execute(sql, params)
+
+    def mark_running(self, batch_id, target_url):
+        self._update("UPDATE jobs SET state = ?, attempts = attempts + 1, updated_at = ? WHERE batch_id = ? AND target_url = ?",
+                     (STATE_RUNNING, time.time(), batch_id, target_url))
+
+    def mark_done(self, batch_id, target_url, result):
+        """Mencatat job selesai beserta path hasil dan ringkasan (dict hasil pipeline atau entri cache)."""
+        self._update(
+            "UPDATE jobs SET state = ?, last_error = NULL, html_report_path = ?, network_log_path = ?, screenshot_path = ?, "
+            "summary = ?, updated_at = ? WHERE batch_id = ? AND target_url = ?",
+            (STATE_DONE, result.get("html_report_path"), result.get("network_log_path"), result.get("screenshot_path"),
+             json.dumps(result.get("summary"), default=str), time.time(), batch_id, target_url)
+        )
+
+    def mark_failed(self, batch_id, target_url, error):
+        self._update("UPDATE jobs SET state = ?, last_error = ?, updated_at = ? WHERE batch_id = ? AND target_url = ?",
+                     (STATE_FAILED, str(error), time.time(), batch_id, target_url))
+
+    def results(self, batch_id):
+        """Semua job batch sesuai urutan file, sebagai dict (summary sudah di-decode)."""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {', '.join(_RESULT_COLUMNS)} FROM jobs WHERE batch_id = ? ORDER BY position", (batch_id,)
+            ).fetchall()
+        results = []
+        for row in rows:
+            job = dict(zip(_RESULT_COLUMNS, row))
+            job["summary"] = json.loads(job["summary"]) if job["summary"] else None
+            results.append(job)
+        return results
+
+    def counts(self, batch_id):
+        """Jumlah job per state, mis. {"done": 10, "failed": 1}."""
+        with self._lock:
+            rows = self._conn.execute("SELECT state, COUNT(*) FROM jobs WHERE batch_id = ? GROUP BY state", (batch_id,))
+            return dict(rows.fetchall())
@@ -0,0 +1,523 @@
+# core/job_queue.py
+import os
+import sys
+import json
+import time
+import uuid
+import socket
+import getpass
+import sqlite3
+import threading
+import contextlib
+from abc import ABC, abstractmethod
+
+# Tambahkan path root proyek ke sys.path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+import config
+from utils.logger_config import setup_logger, log_context
+from core.scheduler import LANES, host_key, lane_rank
+
+logger = setup_logger(__name__, config.LOG_LEVEL, config.LOG_FILE)
+
+STATE_QUEUED = "queued"
+STATE_LEASED = "leased"
+STATE_DONE = "done"
+STATE_DEAD = "dead"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY,
+    queue TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    state TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    available_at REAL NOT NULL,
+    lease_token TEXT,
+    lease_expires_at REAL,
+    worker_id TEXT,
+    last_error TEXT,
+    result TEXT,
+    host TEXT,
+    lane INTEGER NOT NULL DEFAULT 1,
+    submitter TEXT NOT NULL DEFAULT '',
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+-- Status kesopanan dan giliran per host target serta per pengirim; served_seq naik setiap kali dilayani,
+-- sehingga urutan served_seq terkecil adalah giliran round-robin berikutnya
+CREATE TABLE IF NOT EXISTS hosts (
+    queue TEXT NOT NULL,
+    host TEXT NOT NULL,
+    next_allowed_at REAL NOT NULL,
+    served_seq INTEGER NOT NULL,
+    PRIMARY KEY (queue, host)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS submitters (
+    queue TEXT NOT NULL,
+    submitter TEXT NOT NULL,
+    served_seq INTEGER NOT NULL,
+    PRIMARY KEY (queue, submitter)
+) WITHOUT ROWID;
+-- Job siap diambil (urut waktu tersedia) dan lease kedaluwarsa yang harus terlihat lagi
+CREATE INDEX IF NOT EXISTS idx_jobs_ready ON jobs(queue, state, available_at);
+CREATE INDEX IF NOT EXISTS idx_jobs_lease ON jobs(queue, state, lease_expires_at);
+CREATE INDEX IF NOT EXISTS idx_hosts_turn ON hosts(queue, served_seq);
+CREATE INDEX IF NOT EXISTS idx_submitters_turn ON submitters(queue, served_seq);
+"""
+
+# Dibuat setelah migrasi kolom karena memakai kolom baru
+_SCHEDULE_INDEX = "CREATE INDEX IF NOT EXISTS idx_jobs_schedule ON jobs(queue, state, lane, submitter, host, id)"
+
+# Kolom yang ditambahkan setelah versi awal skema (file antrean lama dimigrasi saat dibuka)
+_ADDED_JOB_COLUMNS = (
+    ("host", "host TEXT"),
+    ("lane", "lane INTEGER NOT NULL DEFAULT 1"),
+    ("submitter", "submitter TEXT NOT NULL DEFAULT ''"),
+)
+
+# Pemilihan job berikutnya dilakukan bertahap lewat indeks (tanpa mengurutkan seluruh antrean):
+# jalur prioritas -> pengirim yang paling lama tidak dilayani -> host yang paling lama tidak dilayani dan
+# sedang boleh dikunjungi (di bawah batas kunjungan bersamaan dan sudah lewat jedanya) -> job tertua.
+# INDEXED BY: tanpa itu planner memilih idx_jobs_ready dan memindai semua job yang siap untuk setiap EXISTS.
+_BUSY_HOSTS_SQL = ("SELECT host FROM jobs WHERE queue = :queue AND state = :leased AND host IS NOT NULL "
+                   "GROUP BY host HAVING COUNT(*) >= :max_per_host")
+
+_LANE_SUBMITTERS_SQL = """
+SELECT s.submitter FROM submitters s
+WHERE s.queue = :queue AND EXISTS (
+    SELECT 1 FROM jobs j INDEXED BY idx_jobs_schedule WHERE j.queue = s.queue AND j.state = :queued AND j.lane = :lane
+    AND j.submitter = s.submitter AND j.available_at <= :now)
+ORDER BY s.served_seq
+"""
+
+_NEXT_HOST_SQL = f"""
+SELECT h.host FROM hosts h
+WHERE h.queue = :queue AND h.next_allowed_at <= :now AND h.host NOT IN ({_BUSY_HOSTS_SQL}) AND EXISTS (
+    SELECT 1 FROM jobs j INDEXED BY idx_jobs_schedule WHERE j.queue = h.queue AND j.state = :queued AND j.lane = :lane
+    AND j.submitter = :submitter AND j.host = h.host AND j.available_at <= :now)
+ORDER BY h.served_seq
+LIMIT 1
+"""
+
+_NEXT_JOB_SQL = """
+SELECT id, payload, attempts FROM jobs
+WHERE queue = :queue AND state = :queued AND lane = :lane AND submitter = :submitter AND host IS :host AND available_at <= :now
+ORDER BY id
+LIMIT 1
+"""
+
+
+def default_worker_id():
+    return f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident() % 10000}"
+
+
+def default_submitter():
+    """Nama pengirim job untuk keadilan antar pengirim (user OS yang menjalankan --enqueue)."""
+    try:
+        return getpass.getuser()
+    except (KeyError, OSError):
+        return "unknown"
+
+
+class JobQueue(ABC):
+    """
+    Antarmuka antrean job tahan lama untuk worker di banyak host. Job diambil dengan lease: selama lease
+    berlaku job tidak terlihat oleh worker lain (visibility timeout). Lease yang kedaluwarsa (worker mati)
+    membuat job terlihat lagi; job yang gagal diulang dengan backoff sampai max_attempts, lalu masuk dead-letter.
+    Job berupa dict: id, payload, attempts, lease_token. Job "urgent" diambil sebelum "bulk"; di dalam satu
+    jalur, pengirim dan host target dilayani bergiliran dengan batas kunjungan bersamaan dan jeda per host.
+    """
+
+    @abstractmethod
+    def enqueue(self, payload, max_attempts=None, delay_seconds=0, lane=None, submitter=None):
+        ...
+
+    @abstractmethod
+    def lease(self, worker_id, lease_seconds=None):
+        """Mengambil satu job yang siap, atau None jika antrean kosong."""
+
+    @abstractmethod
+    def extend_lease(self, job, lease_seconds=None):
+        """Memperpanjang lease job yang masih dipegang; False jika lease sudah hilang."""
+
+    @abstractmethod
+    def ack(self, job, result=None):
+        """Menandai job selesai; False jika lease sudah hilang (job mungkin sedang dikerjakan worker lain)."""
+
+    @abstractmethod
+    def fail(self, job, error, retry_delay=None):
+        """Mengembalikan job untuk diulang (dengan backoff) atau memindahkannya ke dead-letter."""
+
+    @abstractmethod
+    def ready(self):
+        """Jumlah job yang siap diambil (termasuk yang sedang tertahan batas per host)."""
+
+    @abstractmethod
+    def dead_letters(self, limit=100):
+        ...
+
+    @abstractmethod
+    def requeue_dead(self, job_id=None):
+        """Mengantrekan ulang job dead-letter (semua jika job_id None) dengan jatah percobaan baru."""
+
+    @abstractmethod
+    def stats(self):
+        ...
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class SQLiteJobQueue(JobQueue):
+    """
+    Backend JobQueue berupa satu file SQLite yang bisa diletakkan di mount bersama (NFS/SMB) dan dipakai
+    beberapa host sekaligus tanpa broker. Setiap pengambilan/perubahan state berjalan dalam transaksi
+    BEGIN IMMEDIATE, sehingga satu job tidak pernah di-lease dua worker sekaligus. Mode journal default
+    "DELETE" karena WAL membutuhkan shared memory di host yang sama; jam antar host harus tersinkron (NTP).
+    Batas per host (max_per_host, min_interval_seconds) berlaku untuk semua worker yang memakai file yang sama.
+    """
+
+    def __init__(self, db_path=None, queue_name="analysis", journal_mode=None, clock=time.time,
+                 max_per_host=None, min_interval_seconds=None):
+        path = db_path if db_path else config.JOB_QUEUE_PATH
+        self.db_path = path if os.path.isabs(path) or path == ":memory:" else os.path.join(project_root, path)
+        self.queue_name = queue_name
+        self.max_per_host = config.SCHEDULER_MAX_PER_HOST if max_per_host is None else max_per_host
+        self.min_interval_seconds = config.SCHEDULER_MIN_INTERVAL_SECONDS if min_interval_seconds is None else min_interval_seconds
+        self._clock = clock
+        if self.db_path != ":memory:":
+            os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        # isolation_level=None: transaksi diatur manual agar BEGIN IMMEDIATE bisa dipakai
+        self._conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute(f"PRAGMA journal_mode={journal_mode or config.JOB_QUEUE_JOURNAL_MODE}")
+            self._conn.execute("PRAGMA synchronous=FULL")
+            self._conn.executescript(_SCHEMA)
+            self._conn.execute("BEGIN IMMEDIATE") # Host lain bisa membuka file yang sama bersamaan
+            try:
+                self._migrate()
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def _migrate(self):
+        """Menambahkan kolom penjadwalan ke file antrean lama dan mengisi host/pengirim job yang belum selesai."""
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+        missing = [definition for name, definition in _ADDED_JOB_COLUMNS if name not in columns]
+        for definition in missing:
+            self._conn.execute(f"ALTER TABLE jobs ADD COLUMN {definition}")
+        if missing:
+            rows = self._conn.execute("SELECT id, queue, payload FROM jobs WHERE state IN (?, ?)", (STATE_QUEUED, STATE_LEASED)).fetchall()
+            for job_id, queue_name, payload in rows:
+                host = host_key(json.loads(payload).get("target_url", ""))
+                if host is not None:
+                    self._conn.execute("UPDATE jobs SET host = ? WHERE id = ?", (host, job_id))
+                    self._conn.execute("INSERT OR IGNORE INTO hosts(queue, host, next_allowed_at, served_seq) VALUES (?, ?, 0, 0)",
+                                       (queue_name, host))
+            self._conn.execute("INSERT OR IGNORE INTO submitters(queue, submitter, served_seq) "
+                               "SELECT DISTINCT queue, submitter, 0 FROM jobs")
+        self._conn.execute(_SCHEDULE_INDEX)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    @contextlib.contextmanager
+    def _transaction(self):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    _INSERT_SQL = ("INSERT INTO jobs(queue, payload, state, max_attempts, available_at, host, lane, submitter, created_at, updated_at) "
+                   "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)")
+
+    def _job_rows(self, payloads, max_attempts, available_at, lane, submitter, now):
+        rank = lane_rank(lane or config.SCHEDULER_DEFAULT_LANE)
+        max_attempts = max_attempts or config.JOB_QUEUE_MAX_ATTEMPTS
+        return [(self.queue_name, json.dumps(payload, default=str), STATE_QUEUED, max_attempts, available_at,
+                 host_key(payload.get("target_url", "")), rank, submitter, now, now) for payload in payloads]
+
+    def _register_turns(self, conn, submitter, rows):
+        """Pengirim dan host yang baru muncul mendapat giliran paling awal (served_seq 0)."""
+        conn.execute("INSERT OR IGNORE INTO submitters(queue, submitter, served_seq) VALUES (?, ?, 0)", (self.queue_name, submitter))
+        conn.executemany("INSERT OR IGNORE INTO hosts(queue, host, next_allowed_at, served_seq) VALUES (?, ?, 0, 0)",
+                         ((self.queue_name, host) for host in {row[5] for row in rows} if host is not None))
+
+    def enqueue(self, payload, max_attempts=None, delay_seconds=0, lane=None, submitter=None):
+        now = self._clock()
+        submitter = submitter or default_submitter()
+        rows = self._job_rows([payload], max_attempts, now + delay_seconds, lane, submitter, now)
+        with self._transaction() as conn:
+            job_id = conn.execute(self._INSERT_SQL, rows[0]).lastrowid
+            self._register_turns(conn, submitter, rows)
+            return job_id
+
+    def enqueue_many(self, payloads, max_attempts=None, lane=None, submitter=None):
+        """Memasukkan banyak job dalam satu transaksi. Mengembalikan jumlah job."""
+        now = self._clock()
+        submitter = submitter or default_submitter()
+        rows = self._job_rows(payloads, max_attempts, now, lane, submitter, now)
+        with self._transaction() as conn:
+            conn.executemany(self._INSERT_SQL, rows)
+            self._register_turns(conn, submitter, rows)
+        return len(rows)
+
+    def _reclaim_expired(self, conn, now):
+        """Mengembalikan job dengan lease kedaluwarsa (worker mati/tersendat) ke antrean, atau ke dead-letter."""
+        expired = conn.execute(
+            "SELECT id, attempts, max_attempts, worker_id FROM jobs WHERE queue = ? AND state = ? AND lease_expires_at <= ?",
+            (self.queue_name, STATE_LEASED, now)
+        ).fetchall()
+        for job_id, attempts, max_attempts, previous_worker in expired:
+            error = f"Lease kedaluwarsa di worker {previous_worker}"
+            if attempts >= max_attempts:
+                # Percobaan terakhir: jangan diulang tanpa batas
+                conn.execute("UPDATE jobs SET state = ?, lease_token = NULL, last_error = ?, updated_at = ? WHERE id = ?",
+                             (STATE_DEAD, error, now, job_id))
+                logger.warning(f"Job #{job_id} dipindahkan ke dead-letter: lease kedaluwarsa di percobaan terakhir.")
+                continue
+            conn.execute("UPDATE jobs SET state = ?, lease_token = NULL, last_error = ?, available_at = ?, updated_at = ? WHERE id = ?",
+                         (STATE_QUEUED, error, now, now, job_id))
+            logger.warning(f"Lease job #{job_id} milik {previous_worker} kedaluwarsa; job dikembalikan ke antrean.")
+
+    def _next_job(self, conn, now):
+        """Job berikutnya sesuai jalur, giliran pengirim/host dan batas per host; None jika tidak ada yang boleh diambil."""
+        params = {"queue": self.queue_name, "queued": STATE_QUEUED, "leased": STATE_LEASED, "now": now,
+                  "max_per_host": self.max_per_host}
+        for rank in range(len(LANES)):
+            params["lane"] = rank
+            for (submitter,) in conn.execute(_LANE_SUBMITTERS_SQL, params).fetchall():
+                params["submitter"] = submitter
+                host = None # Job tanpa host (tanpa target_url) tidak dikenai batas per host
+                row = conn.execute(_NEXT_JOB_SQL, {**params, "host": None}).fetchone()
+                if row is None:
+                    host_row = conn.execute(_NEXT_HOST_SQL, params).fetchone()
+                    if host_row is None:
+                        continue
+                    host = host_row[0]
+                    row = conn.execute(_NEXT_JOB_SQL, {**params, "host": host}).fetchone()
+                return (*row, host, submitter)
+        return None
+
+    def _take_turn(self, conn, table, column, value):
+        """Memindahkan giliran pengirim/host ke belakang (served_seq terbesar + 1)."""
+        conn.execute(f"UPDATE {table} SET served_seq = (SELECT MAX(served_seq) + 1 FROM {table} WHERE queue = ?) "
+                     f"WHERE queue = ? AND {column} = ?", (self.queue_name, self.queue_name, value))
+
+    def lease(self, worker_id, lease_seconds=None):
+        lease_seconds = lease_seconds or config.JOB_QUEUE_LEASE_SECONDS
+        now = self._clock()
+        with self._transaction() as conn:
+            self._reclaim_expired(conn, now)
+            row = self._next_job(conn, now)
+            if row is None:
+                return None
+            job_id, payload, attempts, host, submitter = row
+            token = uuid.uuid4().hex
+            conn.execute(
+                "UPDATE jobs SET state = ?, attempts = attempts + 1, lease_token = ?, lease_expires_at = ?, "
+                "worker_id = ?, updated_at = ? WHERE id = ?",
+                (STATE_LEASED, token, now + lease_seconds, worker_id, now, job_id)
+            )
+            self._take_turn(conn, "submitters", "submitter", submitter)
+            if host is not None:
+                self._take_turn(conn, "hosts", "host", host)
+                conn.execute("UPDATE hosts SET next_allowed_at = ? WHERE queue = ? AND host = ?",
+                             (now + self.min_interval_seconds, self.queue_name, host))
+            return {"id": job_id, "payload": json.loads(payload), "attempts": attempts + 1, "lease_token": token}
+
+    def _release_host(self, conn, job_id, now):
+        """Kunjungan selesai: jeda host target dihitung ulang dari sekarang."""
+        conn.execute(
+            "UPDATE hosts SET next_allowed_at = MAX(next_allowed_at, ?) WHERE queue = ? AND host = (SELECT host FROM jobs WHERE id = ?)",
+            (now + self.min_interval_seconds, self.queue_name, job_id)
+        )
+
+    def _update_leased(self, job, sql, params, release=False):
+        with self._transaction() as conn:
+            cursor = conn.execute(f"{sql} WHERE id = ? AND state = ? AND lease_token = ?",
+                                  (*params, job["id"], STATE_LEASED, job["lease_token"]))
+            if cursor.rowcount == 1 and release:
+                self._release_host(conn, job["id"], self._clock())
+            return cursor.rowcount == 1
+
+    def extend_lease(self, job, lease_seconds=None):
+        now = self._clock()
+        return self._update_leased(job, "UPDATE jobs SET lease_expires_at = ?, updated_at = ?",
+                                   (now + (lease_seconds or config.JOB_QUEUE_LEASE_SECONDS), now))
+
+    def ack(self, job, result=None):
+        return self._update_leased(job, "UPDATE jobs SET state = ?, lease_token = NULL, last_error = NULL, result = ?, updated_at = ?",
+                                   (STATE_DONE, json.dumps(result, default=str), self._clock()), release=True)
+
+    def fail(self, job, error, retry_delay=None):
+        now = self._clock()
+        with self._transaction() as conn:
+            row = conn.execute("SELECT attempts, max_attempts FROM jobs WHERE id = ? AND state = ? AND lease_token = ?",
+                               (job["id"], STATE_LEASED, job["lease_token"])).fetchone()
+            if row is None:
+                return False
+            attempts, max_attempts = row
+            self._release_host(conn, job["id"], now)
+            if attempts >= max_attempts:
+                conn.execute("UPDATE jobs SET state = ?, lease_token = NULL, last_error = ?, updated_at = ? WHERE id = ?",
+                             (STATE_DEAD, str(error), now, job["id"]))
+                logger.warning(f"Job #{job['id']} dipindahkan ke dead-letter setelah {attempts} percobaan: {error}")
+                return True
+            if retry_delay is None:
+                retry_delay = config.JOB_QUEUE_RETRY_BACKOFF_SECONDS * (2 ** (attempts - 1)) # Backoff eksponensial
+            conn.execute("UPDATE jobs SET state = ?, lease_token = NULL, last_error = ?, available_at = ?, updated_at = ? WHERE id = ?",
+                         (STATE_QUEUED, str(error), now + retry_delay, now, job["id"]))
+            return True
+
+    def ready(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM jobs WHERE queue = ? AND state = ? AND available_at <= ?",
+                                      (self.queue_name, STATE_QUEUED, self._clock())).fetchone()[0]
+
+    def dead_letters(self, limit=100):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, payload, attempts, worker_id, last_error, updated_at FROM jobs WHERE queue = ? AND state = ? "
+                "ORDER BY updated_at DESC LIMIT ?", (self.queue_name, STATE_DEAD, limit)
+            ).fetchall()
+        return [{"id": row[0], "payload": json.loads(row[1]), "attempts": row[2], "worker_id": row[3],
+                 "last_error": row[4], "updated_at": row[5]} for row in rows]
+
+    def requeue_dead(self, job_id=None):
+        now = self._clock()
+        with self._transaction() as conn:
+            sql = "UPDATE jobs SET state = ?, attempts = 0, available_at = ?, updated_at = ? WHERE queue = ? AND state = ?"
+            params = [STATE_QUEUED, now, now, self.queue_name, STATE_DEAD]
+            if job_id is not None:
+                sql += " AND id = ?"
+                params.append(job_id)
+            return conn.execute(sql, params).rowcount
+
+    def result(self, job_id):
+        with self._lock:
+            row = self._conn.execute("SELECT state, result, last_error FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        return {"state": row[0], "result": json.loads(row[1]) if row[1] else None, "last_error": row[2]}
+
+    def stats(self):
+        with self._lock:
+            rows = self._conn.execute("SELECT state, COUNT(*) FROM jobs WHERE queue = ? GROUP BY state", (self.queue_name,))
+            return dict(rows.fetchall())
+
+
+def open_job_queue(db_path=None, queue_name="analysis"):
+    """Membuka antrean job sesuai config.JOB_QUEUE_BACKEND (saat ini: "sqlite")."""
+    backend = config.JOB_QUEUE_BACKEND
+    if backend != "sqlite":
+        raise ValueError(f"Backend antrean job tidak dikenal: {backend}")
+    return SQLiteJobQueue(db_path, queue_name=queue_name)
+
+
+class QueueWorker:
+    """
+    Worker yang mengambil job dari JobQueue dan menjalankan handler(payload) -> hasil (dict kecil).
+    Selama handler berjalan, lease diperpanjang oleh thread heartbeat; exception dari handler membuat job
+    diulang atau masuk dead-letter sesuai jatah percobaan.
+    """
+
+    def __init__(self, job_queue, handler, worker_id=None, lease_seconds=None, poll_seconds=None):
+        self.job_queue = job_queue
+        self.handler = handler
+        self.worker_id = worker_id or default_worker_id()
+        self.lease_seconds = lease_seconds or config.JOB_QUEUE_LEASE_SECONDS
+        self.poll_seconds = config.JOB_QUEUE_POLL_SECONDS if poll_seconds is None else poll_seconds
+        self.processed = 0
+        self.failed = 0
+
+    def _heartbeat(self, job, done):
+        while not done.wait(self.lease_seconds / 3):
+            try:
+                if not self.job_queue.extend_lease(job, self.lease_seconds):
+                    logger.warning(f"Lease job #{job['id']} hilang; hasil worker {self.worker_id} tidak akan dicatat.")
+                    return
+            except sqlite3.Error as e:
+                logger.warning(f"Gagal memperpanjang lease job #{job['id']}: {e}")
+
+    def process_one(self):
+        """Mengambil dan menjalankan satu job. Mengembalikan False jika antrean sedang kosong."""
+        job = self.job_queue.lease(self.worker_id, self.lease_seconds)
+        if job is None:
+            return False
+        done = threading.Event()
+        heartbeat = threading.Thread(target=self._heartbeat, args=(job, done), name=f"lease-{job['id']}", daemon=True)
+        heartbeat.start()
+        try:
+            with log_context(f"queue-{job['id']}"):
+                logger.info(f"Worker {self.worker_id} menjalankan job #{job['id']} (percobaan {job['attempts']}).")
+                result = self.handler(job["payload"])
+        except KeyboardInterrupt:
+            done.set()
+            self._settle("fail", job, "Worker dihentikan", retry_delay=0)
+            raise
+        except Exception as e:
+            done.set()
+            logger.error(f"Job #{job['id']} gagal: {e}", exc_info=True)
+            self._settle("fail", job, f"{type(e).__name__}: {e}")
+            self.failed += 1
+            return True
+        finally:
+            done.set()
+            heartbeat.join()
+        if self._settle("ack", job, result) is False:
+            logger.warning(f"Job #{job['id']} selesai, tetapi lease sudah diambil alih worker lain; hasil diabaikan.")
+        self.processed += 1
+        return True
+
+    def _settle(self, action, job, *args, **kwargs):
+        """
+        Menjalankan ack/fail. Kesalahan antrean (mis. "database is locked" di disk bersama melewati timeout)
+        hanya dicatat: worker tetap berjalan dan job terlihat lagi setelah lease-nya kedaluwarsa.
+        """
+        try:
+            return getattr(self.job_queue, action)(job, *args, **kwargs)
+        except sqlite3.Error as e:
+            logger.error(f"Gagal mencatat hasil job #{job['id']} ke antrean ({action}): {e}; "
+                         f"job akan diulang setelah lease kedaluwarsa.")
+            return None
+
+    def run(self, max_jobs=None, drain=False, stop_event=None):
+        """
+        Loop worker. drain=True berhenti saat tidak ada job yang siap (job yang hanya tertahan batas per host
+        tetap ditunggu); max_jobs membatasi jumlah job.
+        Mengembalikan jumlah job yang diproses (berhasil maupun gagal).
+        """
+        handled = 0
+        while not (stop_event and stop_event.is_set()) and (max_jobs is None or handled < max_jobs):
+            try:
+                if self.process_one():
+                    handled += 1
+                    continue
+                if drain and not self.job_queue.ready():
+                    break # Sisa job hanya yang menunggu backoff atau sedang dikerjakan worker lain
+            except sqlite3.Error as e:
+                logger.warning(f"Antrean job tidak bisa diakses oleh worker {self.worker_id}: {e}; mencoba lagi.")
+            if stop_event:
+                stop_event.wait(self.poll_seconds)
+            else:
+                time.sleep(self.poll_seconds)
+        return handled
@@ -0,0 +1,212 @@
+# core/network_log.py
+import io
+import os
+import sys
+import gzip
+import json
+import time
+
+try:
+    import orjson # Opsional: encoder/decoder JSON yang jauh lebih cepat
+except ImportError:
+    orjson = None
+try:
+    import zstandard # Opsional: kompresi zstd
+except ImportError:
+    zstandard = None
+
+# Tambahkan path root proyek ke sys.path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+import config
+from utils.logger_config import setup_logger
+
+logger = setup_logger(__name__, config.LOG_LEVEL, config.LOG_FILE)
+
+NETWORK_LOG_FORMAT_NDJSON = "ndjson"
+NETWORK_LOG_FORMAT_JSON = "json"
+COMPRESSION_SUFFIXES = {"gzip": ".gz", "zstd": ".zst"}
+
+
+def network_log_suffixes():
+    """Semua akhiran nama file log jaringan yang dikenali (terpanjang lebih dulu), termasuk log JSON lama."""
+    suffixes = [config.DEFAULT_NETWORK_LOG_FILENAME + suffix for suffix in COMPRESSION_SUFFIXES.values()]
+    suffixes += [config.DEFAULT_NETWORK_LOG_FILENAME, config.NETWORK_LOG_DEBUG_FILENAME]
+    return tuple(sorted(suffixes, key=len, reverse=True))
+
+
+def match_network_log_suffix(filename):
+    """Mengembalikan akhiran log jaringan yang cocok dengan nama file, atau None jika bukan log jaringan."""
+    for suffix in network_log_suffixes():
+        if filename.endswith(suffix):
+            return suffix
+    return None
+
+
+def resolve_compression(compression=None):
+    """Kompresi efektif untuk penulisan: zstd jatuh ke gzip jika paket zstandard tidak terpasang."""
+    compression = config.NETWORK_LOG_COMPRESSION if compression is None else compression
+    if not compression:
+        return ""
+    if compression not in COMPRESSION_SUFFIXES:
+        raise ValueError(f"Kompresi log jaringan tidak dikenal: {compression}")
+    if compression == "zstd" and zstandard is None:
+        logger.warning("Paket 'zstandard' tidak terpasang; log jaringan dikompres dengan gzip.")
+        return "gzip"
+    return compression
+
+
+def network_log_filename(prefix, log_format=None, compression=None):
+    """Nama file log jaringan untuk prefix '{slug}_{timestamp}_' sesuai format dan kompresi."""
+    log_format = log_format or config.NETWORK_LOG_FORMAT
+    if log_format == NETWORK_LOG_FORMAT_JSON:
+        return f"{prefix}{config.NETWORK_LOG_DEBUG_FILENAME}" # Format debug selalu tanpa kompresi
+    compression = resolve_compression(compression)
+    return f"{prefix}{config.DEFAULT_NETWORK_LOG_FILENAME}{COMPRESSION_SUFFIXES.get(compression, '')}"
+
+
+def _encode_event(event):
+    if orjson is not None:
+        return orjson.dumps(event, default=str, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(event, ensure_ascii=False, separators=(',', ':'), default=str).encode('utf-8')
+
+
+def _decode(data):
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+
+def _open_binary(filepath, mode):
+    """Membuka file log dalam mode biner; kompresi ditentukan dari akhiran nama file."""
+    level = config.NETWORK_LOG_COMPRESSION_LEVEL
+    if filepath.endswith(COMPRESSION_SUFFIXES["gzip"]):
+        return gzip.open(filepath, mode, compresslevel=level) if "w" in mode else gzip.open(filepath, mode)
+    if filepath.endswith(COMPRESSION_SUFFIXES["zstd"]):
+        if zstandard is None:
+            raise ValueError(f"Log {os.path.basename(filepath)} dikompres zstd, tetapi paket 'zstandard' tidak terpasang.")
+        raw = open(filepath, mode)
+        if "w" in mode:
+            return zstandard.ZstdCompressor(level=level).stream_writer(raw, closefd=True)
+        return io.BufferedReader(zstandard.ZstdDecompressor().stream_reader(raw, closefd=True))
+    return open(filepath, mode)
+
+
+class NetworkLogWriter:
+    """
+    Penulis log jaringan NDJSON streaming: setiap event dikodekan menjadi satu baris saat diterima
+    dan ditulis per kelompok (NETWORK_LOG_WRITE_BATCH), sehingga daftar event tidak perlu utuh di memori.
+    """
+
+    def __init__(self, filepath, batch_size=None):
+        self.filepath = filepath
+        self.batch_size = batch_size or config.NETWORK_LOG_WRITE_BATCH
+        self.count = 0
+        self._pending = []
+        self._file = _open_binary(filepath, "wb")
+
+    def write(self, event):
+        self._pending.append(_encode_event(event))
+        self.count += 1
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def write_many(self, events):
+        for event in events:
+            self.write(event)
+
+    def flush(self):
+        if self._pending:
+            self._file.write(b"\n".join(self._pending) + b"\n")
+            self._pending = []
+
+    def close(self):
+        if self._file is None:
+            return
+        try:
+            self.flush()
+        finally:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def write_network_log(network_events, filepath, log_format=None):
+    """Menulis event ke filepath. Format "json" (ber-indent) hanya untuk debug. Mengembalikan jumlah event."""
+    if (log_format or config.NETWORK_LOG_FORMAT) == NETWORK_LOG_FORMAT_JSON:
+        with open(filepath, "w", encoding="utf-8") as f:
+            json.dump(network_events, f, indent=4, default=str)
+        return len(network_events)
+    with NetworkLogWriter(filepath) as writer:
+        writer.write_many(network_events)
+    return writer.count
+
+
+def save_target_network_log(network_events, target_url, log_dir=None):
+    """
+    Menyimpan log jaringan satu analisis sebagai '{slug}_{timestamp}_<nama log>' di log_dir.
+    Mengembalikan path file, atau None jika tidak ada event atau penulisan gagal.
+    """
+    if not network_events:
+        logger.info("Tidak ada data jaringan untuk disimpan.")
+        return None
+    log_dir = log_dir if log_dir else os.path.join(project_root, config.NETWORK_LOG_DIR)
+    try:
+        os.makedirs(log_dir, exist_ok=True)
+    except OSError as e:
+        logger.error(f"Gagal membuat direktori {log_dir}: {e}", exc_info=True)
+        return None
+    try:
+        url_slug = target_url.split('//')[-1].split('/')[0].replace('.', '_').replace(':', '_')
+    except Exception:
+        url_slug = "invalid_url"
+    timestamp_str = time.strftime("%Y%m%d-%H%M%S")
+    filepath = os.path.join(log_dir, network_log_filename(f"{url_slug}_{timestamp_str}_"))
+    duplicate = 1
+    while os.path.exists(filepath): # Analisis paralel ke host yang sama dalam detik yang sama
+        filepath = os.path.join(log_dir, network_log_filename(f"{url_slug}_{timestamp_str}-{duplicate}_"))
+        duplicate += 1
+    try:
+        event_count = write_network_log(network_events, filepath)
+        logger.info(f"Log jaringan ({event_count} event) berhasil disimpan ke: {filepath}")
+        return filepath
+    except (OSError, ValueError) as e:
+        logger.error(f"Gagal menyimpan log jaringan ke {filepath}: {e}", exc_info=True)
+        return None
+
+
+def iter_network_log(filepath):
+    """
+    Membaca log jaringan secara streaming, satu event per baris. Log lama berupa array JSON
+    (termasuk format debug "json") dikenali dari karakter pertamanya dan dibaca utuh.
+    """
+    with _open_binary(filepath, "rb") as f:
+        first_line = f.readline()
+        if first_line.lstrip().startswith(b"["):
+            yield from _decode(first_line + f.read())
+            return
+        line_number = 0
+        for line in _chain_first(first_line, f):
+            line_number += 1
+            if not line.strip():
+                continue
+            try:
+                yield _decode(line)
+            except ValueError as e:
+                raise ValueError(f"Baris {line_number} pada {os.path.basename(filepath)} bukan JSON valid: {e}") from e
+
+
+def _chain_first(first_line, file_obj):
+    yield first_line
+    yield from file_obj
+
+
+def read_network_log(filepath):
+    """Membaca seluruh event log jaringan sebagai list."""
+    return list(iter_network_log(filepath))
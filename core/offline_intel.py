@@ -0,0 +1,341 @@
+# core/offline_intel.py
+import os
+import io
+import gzip
+import mmap
+import json
+import heapq
+import struct
+import hashlib
+import argparse
+import tempfile
+import ipaddress
+import threading
+
+# Impor konfigurasi dan logger
+import sys
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+import config
+from utils.logger_config import setup_logger
+
+logger = setup_logger(__name__, config.LOG_LEVEL, config.LOG_FILE)
+
+# Format file indeks (semua offset dalam byte):
+#   Header  : magic, versi, ukuran record, jumlah record, offset record, offset label, panjang label
+#   Record  : hash blake2b 128-bit dari "tipe\0nilai", kode tipe, flag, id label -> 20 byte
+#   Label   : JSON list nama label (kategori feed), di akhir file
+# Record diurutkan berdasarkan hash sehingga lookup adalah binary search O(log n) langsung di atas mmap.
+# Nilai asli tidak disimpan, jadi indikator yang tidak ada di feed bisa salah dianggap cocok bila hash-nya
+# bertabrakan: peluangnya sekitar n / 2^128 per lookup (~3e-32 untuk 10 juta entri), dapat diabaikan.
+INDEX_MAGIC = b"WSBOINTL"
+INDEX_VERSION = 2
+HEADER_STRUCT = struct.Struct("<8sIIQQQQ")
+KEY_SIZE = 16
+RECORD_STRUCT = struct.Struct(f">{KEY_SIZE}sBBH")
+RECORD_SIZE = RECORD_STRUCT.size
+
+IOC_TYPE_CODES = {"domain": 1, "url": 2, "ip": 3, "hash": 4}
+IOC_CODE_TYPES = {code: ioc_type for ioc_type, code in IOC_TYPE_CODES.items()}
+HEX_DIGITS = frozenset("0123456789abcdef")
+
+
+def normalize_indicator(ioc_type, value):
+    """Menormalkan indikator agar nilai di feed dan nilai saat lookup menghasilkan hash yang sama."""
+    if value is None:
+        return None
+    value = value.strip()
+    if not value:
+        return None
+    if ioc_type == "domain":
+        return value.lower().rstrip(".")
+    if ioc_type == "hash":
+        return value.lower()
+    if ioc_type == "ip":
+        try:
+            return str(ipaddress.ip_address(value.strip("[]")))
+        except ValueError:
+            return None
+    return value
+
+
+def guess_ioc_type(value):
+    """Menebak tipe indikator untuk baris feed yang tidak mencantumkan tipe."""
+    if "://" in value:
+        return "url"
+    lowered = value.lower()
+    if len(lowered) in (32, 40, 64) and set(lowered) <= HEX_DIGITS:
+        return "hash"
+    try:
+        ipaddress.ip_address(value.strip("[]"))
+        return "ip"
+    except ValueError:
+        return "domain"
+
+
+def indicator_key(ioc_type, normalized_value):
+    return hashlib.blake2b(f"{ioc_type}\0{normalized_value}".encode("utf-8"), digest_size=KEY_SIZE).digest()
+
+
+def _open_feed(path):
+    if path.endswith(".gz"):
+        return io.TextIOWrapper(gzip.open(path, "rb"), encoding="utf-8", errors="replace")
+    return open(path, "r", encoding="utf-8", errors="replace")
+
+
+def iter_feed_entries(path):
+    """
+    Membaca feed baris per baris. Format yang didukung per baris:
+      nilai                -> tipe ditebak otomatis
+      tipe,nilai           -> tipe salah satu dari domain/url/ip/hash
+      tipe,nilai,label     -> label = kategori (mis. phishing, malware)
+    Baris kosong dan baris yang diawali '#' diabaikan.
+    """
+    with _open_feed(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            parts = [p.strip() for p in line.split(",", 2)]
+            if len(parts) >= 2 and parts[0].lower() in IOC_TYPE_CODES:
+                ioc_type, value = parts[0].lower(), parts[1]
+                label = parts[2] if len(parts) == 3 else ""
+            elif "://" in line:
+                # URL boleh mengandung koma, jadi baris tanpa tipe diperlakukan utuh
+                ioc_type, value, label = "url", line, ""
+            else:
+                value = parts[0]
+                ioc_type = guess_ioc_type(value)
+                label = parts[1] if len(parts) >= 2 else ""
+            normalized = normalize_indicator(ioc_type, value)
+            if normalized:
+                yield ioc_type, normalized, label
+
+
+def _write_run(records):
+    records.sort()
+    fd, run_path = tempfile.mkstemp(prefix="offline_intel_run_", suffix=".bin")
+    with os.fdopen(fd, "wb") as f:
+        f.write(b"".join(records))
+    return run_path
+
+
+def _iter_run(run_path):
+    with open(run_path, "rb") as f:
+        while True:
+            chunk = f.read(RECORD_SIZE * 4096)
+            if not chunk:
+                break
+            for offset in range(0, len(chunk), RECORD_SIZE):
+                yield chunk[offset:offset + RECORD_SIZE]
+
+
+def compile_feed(feed_paths, output_path, chunk_size=None):
+    """
+    Mengkompilasi satu atau beberapa feed menjadi file indeks terurut.
+    Kompilasi memakai external merge sort: potongan sebesar chunk_size diurutkan di memori,
+    ditulis sebagai run sementara, lalu digabung dengan heapq.merge, sehingga RAM tetap terbatas
+    untuk feed berisi puluhan juta entri. File akhir diganti secara atomik (os.replace),
+    jadi worker yang masih memetakan indeks lama tidak terganggu.
+    :return: Jumlah record unik di indeks.
+    """
+    if isinstance(feed_paths, str):
+        feed_paths = [feed_paths]
+    chunk_size = chunk_size if chunk_size else config.OFFLINE_INTEL_COMPILE_CHUNK_SIZE
+    labels = [""]
+    label_ids = {"": 0}
+    run_paths = []
+    buffer = []
+    total_in = 0
+    try:
+        for feed_path in feed_paths:
+            logger.info(f"Membaca feed intel offline: {feed_path}")
+            for ioc_type, normalized, label in iter_feed_entries(feed_path):
+                label_id = label_ids.get(label)
+                if label_id is None:
+                    if len(labels) >= 0xFFFF:
+                        label_id = 0
+                    else:
+                        label_id = label_ids[label] = len(labels)
+                        labels.append(label)
+                buffer.append(RECORD_STRUCT.pack(indicator_key(ioc_type, normalized), IOC_TYPE_CODES[ioc_type], 0, label_id))
+                total_in += 1
+                if len(buffer) >= chunk_size:
+                    run_paths.append(_write_run(buffer))
+                    buffer = []
+        if buffer:
+            run_paths.append(_write_run(buffer))
+            buffer = []
+
+        output_dir = os.path.dirname(os.path.abspath(output_path))
+        os.makedirs(output_dir, exist_ok=True)
+        tmp_output = f"{output_path}.tmp"
+        count = 0
+        with open(tmp_output, "wb") as out:
+            out.write(b"\0" * HEADER_STRUCT.size)
+            previous_identity = None
+            for record in heapq.merge(*[_iter_run(p) for p in run_paths]):
+                identity = record[:KEY_SIZE + 1] # hash + kode tipe; entri duplikat dengan label lain diabaikan
+                if identity == previous_identity:
+                    continue
+                previous_identity = identity
+                out.write(record)
+                count += 1
+            labels_offset = out.tell()
+            labels_blob = json.dumps(labels).encode("utf-8")
+            out.write(labels_blob)
+            out.seek(0)
+            out.write(HEADER_STRUCT.pack(INDEX_MAGIC, INDEX_VERSION, RECORD_SIZE, count,
+                                         HEADER_STRUCT.size, labels_offset, len(labels_blob)))
+        os.replace(tmp_output, output_path)
+    finally:
+        for run_path in run_paths:
+            try:
+                os.remove(run_path)
+            except OSError:
+                pass
+
+    logger.info(f"Indeks intel offline dikompilasi: {output_path} ({count} entri unik dari {total_in} baris, {len(run_paths)} run).")
+    return count
+
+
+class OfflineIntelIndex:
+    """
+    Indeks intel offline read-only yang dipetakan ke memori (mmap).
+    Membuka indeks hampir tanpa biaya karena data tidak dibaca ke RAM; halaman file dibagi
+    lewat page cache OS sehingga banyak proses worker dapat memakai indeks yang sama tanpa
+    menduplikasi memori. Objek bisa di-pickle (hanya path yang dikirim) untuk ProcessPoolExecutor.
+    mmap dan file ditutup oleh close() atau saat objek dibuang oleh pemakai terakhirnya.
+    """
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise ValueError(f"File indeks intel offline kosong: {path}")
+        try:
+            magic, version, record_size, count, records_offset, labels_offset, labels_length = HEADER_STRUCT.unpack_from(self._mm, 0)
+        except struct.error:
+            self.close()
+            raise ValueError(f"File indeks intel offline rusak atau terpotong: {path}")
+        if magic != INDEX_MAGIC or version != INDEX_VERSION or record_size != RECORD_SIZE:
+            self.close()
+            raise ValueError(f"Format file indeks intel offline tidak dikenal: {path}")
+        self.count = count
+        self._records_offset = records_offset
+        self.labels = json.loads(self._mm[labels_offset:labels_offset + labels_length].decode("utf-8"))
+
+    def __len__(self):
+        return self.count
+
+    def __contains__(self, item):
+        ioc_type, value = item
+        return self.lookup(ioc_type, value) is not None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def __getstate__(self):
+        return {"path": self.path}
+
+    def __setstate__(self, state):
+        self.__init__(state["path"])
+
+    def __del__(self):
+        self.close()
+
+    def close(self):
+        if getattr(self, "_mm", None) is not None:
+            self._mm.close()
+            self._mm = None
+        if getattr(self, "_file", None) is not None:
+            self._file.close()
+            self._file = None
+
+    def _key_at(self, position):
+        offset = self._records_offset + position * RECORD_SIZE
+        return self._mm[offset:offset + KEY_SIZE]
+
+    def lookup(self, ioc_type, value):
+        """
+        Mencari indikator di indeks dengan binary search.
+        :return: Dictionary {"indicator", "indicator_type", "label"} atau None jika tidak ada.
+        """
+        type_code = IOC_TYPE_CODES.get(ioc_type)
+        normalized = normalize_indicator(ioc_type, value)
+        if type_code is None or not normalized or not self.count:
+            return None
+        key = indicator_key(ioc_type, normalized)
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._key_at(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        # Indikator dengan hash sama tetapi tipe berbeda disimpan sebagai record terpisah
+        while lo < self.count:
+            record_key, record_type, _flags, label_id = RECORD_STRUCT.unpack_from(self._mm, self._records_offset + lo * RECORD_SIZE)
+            if record_key != key:
+                break
+            if record_type == type_code:
+                label = self.labels[label_id] if label_id < len(self.labels) else ""
+                return {"indicator": value, "indicator_type": ioc_type, "label": label}
+            lo += 1
+        return None
+
+
+_open_indexes = {}
+_open_indexes_lock = threading.Lock()
+
+
+def open_offline_index(path=None):
+    """
+    Mengembalikan instance OfflineIntelIndex bersama per proses untuk path tertentu.
+    Jika file indeks diganti (kompilasi ulang), instance baru dibuka otomatis; cache melepas instance
+    lama, yang mmap dan file-nya ditutup begitu pemakai terakhirnya (mis. provider lama) membuangnya.
+    """
+    path = os.path.abspath(path if path else config.OFFLINE_INTEL_INDEX)
+    mtime = os.path.getmtime(path)
+    with _open_indexes_lock:
+        cached = _open_indexes.get(path)
+        if cached and cached[0] == mtime:
+            return cached[1]
+        index = OfflineIntelIndex(path)
+        _open_indexes[path] = (mtime, index)
+        return index
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Kompilasi dan pencarian indeks threat intel offline.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    compile_parser = subparsers.add_parser("compile", help="Kompilasi feed (teks/CSV, boleh .gz) menjadi indeks mmap.")
+    compile_parser.add_argument("feeds", nargs="+", help="File feed masukan.")
+    compile_parser.add_argument("-o", "--output", default=config.OFFLINE_INTEL_INDEX or os.path.join(project_root, "output", "offline_intel.idx"), help="Path file indeks keluaran.")
+    compile_parser.add_argument("--chunk-size", type=int, default=None, help="Jumlah entri per run pengurutan di memori.")
+    lookup_parser = subparsers.add_parser("lookup", help="Cari satu indikator di indeks.")
+    lookup_parser.add_argument("value", help="Nilai indikator.")
+    lookup_parser.add_argument("--type", choices=sorted(IOC_TYPE_CODES), default=None, help="Tipe indikator (default: ditebak).")
+    lookup_parser.add_argument("-i", "--index", default=config.OFFLINE_INTEL_INDEX, help="Path file indeks.")
+    args = parser.parse_args(argv)
+
+    if args.command == "compile":
+        compile_feed(args.feeds, args.output, chunk_size=args.chunk_size)
+        return 0
+    ioc_type = args.type or guess_ioc_type(args.value)
+    with OfflineIntelIndex(args.index) as index:
+        result = index.lookup(ioc_type, args.value)
+    print(json.dumps(result) if result else f"Tidak ditemukan: {ioc_type} {args.value}")
+    return 0 if result else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,485 @@
+# core/pipeline.py
+import os
+import sys
+import time
+import uuid
+import queue
+import sqlite3
+import threading
+
+# Tambahkan path root proyek ke sys.path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+import config
+from utils.logger_config import setup_logger, log_context
+
+logger = setup_logger(__name__, config.LOG_LEVEL, config.LOG_FILE)
+
+# Penanda akhir aliran di setiap antrean
+_END = object()
+
+
+class PipelineStage:
+    """
+    Satu tahap pipeline: fungsi job -> job yang dijalankan oleh sejumlah thread worker. Jika batch_size > 1,
+    fungsi menerima list job (hingga batch_size job yang sudah antre, tanpa menunggu job tambahan) dan
+    mengembalikan list job; fungsi batch menandai sendiri job yang gagal dengan key 'error'.
+    """
+
+    def __init__(self, name, func, workers=1, batch_size=1):
+        if workers < 1:
+            raise ValueError(f"Tahap '{name}' membutuhkan minimal 1 worker.")
+        if batch_size < 1:
+            raise ValueError(f"Tahap '{name}' membutuhkan batch_size minimal 1.")
+        self.name = name
+        self.func = func
+        self.workers = workers
+        self.batch_size = batch_size
+
+
+class StagedPipeline:
+    """
+    Menjalankan job melalui tahap-tahap berurutan yang masing-masing punya thread worker sendiri,
+    dihubungkan antrean berukuran tetap. Tahap cepat tidak menunggu tahap lambat selama antrean
+    di antaranya belum penuh; jika penuh, tahap hulu tertahan (backpressure) sehingga jumlah job
+    di memori dibatasi (jumlah worker + kapasitas antrean). Job yang gagal di satu tahap diberi
+    key 'error' dan diteruskan tanpa diproses tahap berikutnya.
+    """
+
+    def __init__(self, stages, queue_size=None):
+        if not stages:
+            raise ValueError("Pipeline membutuhkan minimal satu tahap.")
+        self.stages = list(stages)
+        self.queue_size = queue_size or config.PIPELINE_QUEUE_SIZE
+        self.stats = {stage.name: {"processed": 0, "failed": 0, "busy_seconds": 0.0, "blocked_seconds": 0.0} for stage in self.stages}
+        self._stats_lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def _put(self, target_queue, item):
+        """put() yang bisa dibatalkan; mengembalikan lama waktu tertahan karena antrean penuh."""
+        start = time.perf_counter()
+        while not self._stop.is_set():
+            try:
+                target_queue.put(item, timeout=0.1)
+                break
+            except queue.Full:
+                continue
+        return time.perf_counter() - start
+
+    def _get(self, source_queue):
+        while not self._stop.is_set():
+            try:
+                return source_queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return _END
+
+    def _take(self, stage, in_queue):
+        """
+        Mengambil job berikutnya; tahap batch ikut mengambil job yang sudah antre hingga batch_size.
+        Mengembalikan (list job, True jika penanda akhir sudah terambil).
+        """
+        job = self._get(in_queue)
+        if job is _END:
+            return [], True
+        batch = [job]
+        while len(batch) < stage.batch_size:
+            try:
+                job = in_queue.get_nowait()
+            except queue.Empty:
+                break
+            if job is _END:
+                return batch, True
+            batch.append(job)
+        return batch, False
+
+    def _process(self, stage, jobs):
+        """Menjalankan fungsi tahap untuk job yang belum gagal; mengembalikan (job hasil, jumlah yang gagal)."""
+        if stage.batch_size > 1:
+            try:
+                jobs = stage.func(jobs)
+            except Exception as e:
+                logger.error(f"Tahap '{stage.name}' gagal untuk {len(jobs)} job: {e}", exc_info=True)
+                for job in jobs:
+                    job.setdefault("error", f"{stage.name}: {e}")
+            return jobs, sum(1 for job in jobs if job.get("error"))
+        job = jobs[0]
+        job_id = job.get("job_id")
+        try:
+            with log_context(job_id):
+                job = stage.func(job)
+            job.setdefault("job_id", job_id)
+        except Exception as e:
+            logger.error(f"Tahap '{stage.name}' gagal untuk {job.get('target_url')}: {e}", exc_info=True)
+            job["error"] = f"{stage.name}: {e}"
+            return [job], 1
+        return [job], 0
+
+    def _run_worker(self, stage, in_queue, out_queue, remaining):
+        stage_stats = self.stats[stage.name]
+        ended = False
+        while not ended:
+            batch, ended = self._take(stage, in_queue)
+            runnable = [job for job in batch if not job.get("error")]
+            done = [job for job in batch if job.get("error")]
+            if runnable:
+                start = time.perf_counter()
+                processed, failed = self._process(stage, runnable)
+                done.extend(processed)
+                with self._stats_lock:
+                    stage_stats["processed"] += len(runnable)
+                    stage_stats["failed"] += failed
+                    stage_stats["busy_seconds"] += time.perf_counter() - start
+            for job in done:
+                blocked = self._put(out_queue, job)
+                with self._stats_lock:
+                    stage_stats["blocked_seconds"] += blocked
+        # Worker terakhir tahap ini meneruskan penanda akhir ke tahap berikutnya
+        with self._stats_lock:
+            remaining[stage.name] -= 1
+            last_worker = remaining[stage.name] == 0
+        if last_worker:
+            next_workers = self._next_workers(stage)
+            for _ in range(next_workers):
+                self._put(out_queue, _END)
+
+    def _next_workers(self, stage):
+        index = self.stages.index(stage)
+        return self.stages[index + 1].workers if index + 1 < len(self.stages) else 1
+
+    def _feed(self, jobs, first_queue):
+        try:
+            for job in jobs:
+                if self._stop.is_set():
+                    return
+                job.setdefault("job_id", uuid.uuid4().hex[:12]) # Ditampilkan di log JSON lines (LOG_FILE_FORMAT)
+                self._put(first_queue, job)
+        except Exception as e:
+            logger.error(f"Gagal membaca job untuk pipeline: {e}", exc_info=True)
+        finally:
+            for _ in range(self.stages[0].workers):
+                self._put(first_queue, _END)
+
+    def run(self, jobs):
+        """
+        Menjalankan semua job (iterable dict, dibaca secara lazy) dan menghasilkan job yang selesai
+        sesuai urutan selesai. Menghentikan iterasi lebih awal akan menghentikan semua worker.
+        """
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in range(len(self.stages) + 1)]
+        remaining = {stage.name: stage.workers for stage in self.stages}
+        threads = [threading.Thread(target=self._feed, args=(jobs, queues[0]), name="pipeline-feed", daemon=True)]
+        for index, stage in enumerate(self.stages):
+            for worker_index in range(stage.workers):
+                threads.append(threading.Thread(
+                    target=self._run_worker, args=(stage, queues[index], queues[index + 1], remaining),
+                    name=f"pipeline-{stage.name}-{worker_index}", daemon=True
+                ))
+        for thread in threads:
+            thread.start()
+        try:
+            while True:
+                job = self._get(queues[-1])
+                if job is _END:
+                    break
+                yield job
+        finally:
+            self._stop.set()
+            for thread in threads:
+                thread.join(timeout=5)
+            self.log_stats()
+
+    def log_stats(self):
+        for name, stage_stats in self.stats.items():
+            logger.info(f"Tahap '{name}': {stage_stats['processed']} job ({stage_stats['failed']} gagal), "
+                        f"sibuk {stage_stats['busy_seconds']:.1f} dtk, tertahan antrean penuh {stage_stats['blocked_seconds']:.1f} dtk.")
+
+
+# --- Tahap-tahap analisis batch ---
+
+def reserve_report_path(target_url, report_dir=None):
+    """
+    Memesan path laporan unik '{slug}_{timestamp}_<nama laporan>' (O_EXCL), karena worker render
+    paralel bisa memproses host yang sama dalam detik yang sama.
+    """
+    report_dir = report_dir if report_dir else os.path.join(project_root, config.HTML_REPORT_DIR)
+    os.makedirs(report_dir, exist_ok=True)
+    url_slug = target_url.split('//')[-1].split('/')[0].replace('.', '_').replace(':', '_')
+    timestamp_str = time.strftime("%Y%m%d-%H%M%S")
+    duplicate = 0
+    while True:
+        suffix = f"-{duplicate}" if duplicate else ""
+        path = os.path.join(report_dir, f"{url_slug}_{timestamp_str}{suffix}_{config.DEFAULT_HTML_REPORT_FILENAME}")
+        try:
+            os.close(os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+            return path
+        except FileExistsError:
+            duplicate += 1
+
+
+class AnalysisStages:
+    """
+    Tahap-tahap satu analisis: capture (browser, ekstraksi IOC inkremental dan lookup intel awal)
+    -> extract (finalisasi IOC, skor domain) -> enrich (threat intel, riwayat IOC) -> render
+    (laporan HTML) -> persist (log jaringan, IOC store, event store). Dipakai pipeline batch
+    (build()) maupun analisis tunggal run_analysis_pipeline, yang memanggil tahap berurutan.
+    Modul berat (Playwright, Jinja2, numpy) baru dimuat saat tahapnya berjalan.
+    Jika job diambil dari HostScheduler, slot host-nya dilepas begitu kunjungan browser selesai.
+    """
+
+    def __init__(self, browser_type, headless_mode, threat_intel_enabled=False, per_registrable_domain=None,
+                 ioc_store_enabled=None, event_store_enabled=None, summarize=None, scheduler=None,
+                 deferred_intel=False, network_log_dir=None):
+        from core.intel_providers import build_intel_aggregator
+        self.browser_type = browser_type
+        self.headless_mode = headless_mode
+        self.per_registrable_domain = config.THREAT_INTEL_PER_REGISTRABLE_DOMAIN if per_registrable_domain is None else per_registrable_domain
+        self.ioc_store_enabled = config.IOC_STORE_ENABLED if ioc_store_enabled is None else ioc_store_enabled
+        self.event_store_enabled = config.EVENT_STORE_ENABLED if event_store_enabled is None else event_store_enabled
+        self.summarize = summarize
+        self.scheduler = scheduler
+        self.deferred_intel = deferred_intel
+        self.network_log_dir = network_log_dir
+        self.intel_aggregator = None
+        if threat_intel_enabled:
+            self.intel_aggregator = build_intel_aggregator()
+            if not self.intel_aggregator:
+                logger.warning("Threat intel diaktifkan tetapi tidak ada provider yang tersedia; tahap enrich dilewati.")
+
+    def build(self):
+        return [
+            PipelineStage("capture", self.capture, config.PIPELINE_CAPTURE_WORKERS),
+            PipelineStage("extract", self.extract_batch, config.PIPELINE_EXTRACT_WORKERS, config.PIPELINE_EXTRACT_BATCH_SIZE),
+            PipelineStage("enrich", self.enrich, config.PIPELINE_ENRICH_WORKERS),
+            PipelineStage("render", self._render_required, config.PIPELINE_RENDER_WORKERS),
+            PipelineStage("persist", self._persist_summary, config.PIPELINE_PERSIST_WORKERS),
+        ]
+
+    def _early_intel(self):
+        """EarlyIntelLookup per job (hanya mode blocking; mode deferred memeriksa semuanya setelah laporan pertama)."""
+        if not self.intel_aggregator or self.deferred_intel or not config.THREAT_INTEL_EARLY_LOOKUP:
+            return None
+        from core.intel_enrichment import EarlyIntelLookup
+        from core.intel_providers import is_ip_address, IOC_TYPE_DOMAIN, IOC_TYPE_IP
+        return EarlyIntelLookup(self.intel_aggregator, classify_fn=lambda host: IOC_TYPE_IP if is_ip_address(host) else IOC_TYPE_DOMAIN)
+
+    def _new_domain_callback(self, early_intel):
+        """
+        Callback on_new_domain untuk capture. Host baru dinilai DomainRiskScorer dan hanya yang skornya
+        minimal THREAT_INTEL_EARLY_MIN_DOMAIN_RISK (dan THREAT_INTEL_MIN_DOMAIN_RISK) di-lookup selama capture;
+        sisanya menunggu antrean prioritas setelah capture. Alamat IP tidak dinilai dan selalu di-lookup.
+        """
+        if early_intel is None:
+            return None
+        from core.intel_providers import is_ip_address
+        from core.public_suffix import registrable_domain
+        scorer = None
+        if config.DOMAIN_SCORING_ENABLED:
+            from core.domain_scoring import DomainRiskScorer
+            scorer = DomainRiskScorer()
+        min_score = max(config.THREAT_INTEL_MIN_DOMAIN_RISK, config.THREAT_INTEL_EARLY_MIN_DOMAIN_RISK)
+
+        def on_new_domain(host):
+            if is_ip_address(host):
+                early_intel.submit(host)
+                return
+            if scorer is not None:
+                score = round(float(scorer.score([host])[0][0]), 3) # Pembulatan sama dengan score_domains
+                if score < min_score:
+                    logger.debug(f"Lookup awal dilewati untuk '{host}' (skor risiko {score} < {min_score}).")
+                    return
+            early_intel.submit((registrable_domain(host) or host) if self.per_registrable_domain else host)
+        return on_new_domain
+
+    @staticmethod
+    def _shutdown_early_intel(job, wait=True):
+        early_intel = job.pop("_early_intel", None)
+        if early_intel:
+            early_intel.shutdown(wait=wait)
+
+    def capture(self, job):
+        from core.browser_operations import BrowserAutomation
+        from core.ioc_extractor import IncrementalIOCExtractor
+        early_intel = self._early_intel()
+        # IOC diekstrak secara inkremental selama capture, tanpa lintasan kedua atas log jaringan
+        ioc_extractor = IncrementalIOCExtractor(on_new_domain=self._new_domain_callback(early_intel))
+        job["_early_intel"], job["_ioc_extractor"] = early_intel, ioc_extractor
+        job["analysis_timestamp"] = time.strftime("%Y-%m-%d %H:%M:%S")
+        try:
+            automation = BrowserAutomation(target_url=job["target_url"], browser_type=self.browser_type,
+                                           headless_mode=self.headless_mode, event_listener=ioc_extractor)
+            (job["screenshot_path"], job["network_events"], job["local_storage"], job["session_storage"],
+             job["cookies"], job["dynamic_js_calls"]) = automation.analyze_page()
+        except BaseException:
+            self._shutdown_early_intel(job, wait=False)
+            raise
+        finally:
+            if self.scheduler:
+                self.scheduler.release(job)
+        return job
+
+    def extract(self, job):
+        self._extract_iocs(job)
+        self._score_domains([job])
+        return job
+
+    def extract_batch(self, jobs):
+        """
+        Tahap extract pipeline batch: IOC difinalisasi per job, lalu skor risiko domain semua job dalam
+        kelompok dihitung dalam satu panggilan tervektorisasi. Job yang gagal diberi key 'error'
+        tanpa menggagalkan job lain di kelompok yang sama.
+        """
+        extracted = []
+        for job in jobs:
+            with log_context(job.get("job_id")):
+                try:
+                    self._extract_iocs(job)
+                    extracted.append(job)
+                except Exception as e:
+                    logger.error(f"Tahap 'extract' gagal untuk {job.get('target_url')}: {e}", exc_info=True)
+                    job["error"] = f"extract: {e}"
+        self._score_domains(extracted)
+        return jobs
+
+    def _extract_iocs(self, job):
+        from core.ioc_extractor import IncrementalIOCExtractor
+        ioc_extractor = job.pop("_ioc_extractor", None) or IncrementalIOCExtractor()
+        network_events = job["network_events"] or []
+        extracted_iocs = {}
+        try:
+            if network_events:
+                # Event yang tidak sampai ke listener selama capture diproses sekarang
+                for event in network_events[ioc_extractor.events_processed:]:
+                    ioc_extractor.process_event(event)
+                extracted_iocs = ioc_extractor.finalize()
+            else:
+                logger.info("Tidak ada event jaringan, ekstraksi IOC dilewati.")
+        except BaseException:
+            self._shutdown_early_intel(job, wait=False)
+            raise
+        job["extracted_iocs"] = extracted_iocs
+
+    def _score_domains(self, jobs):
+        extracted_iocs_list = [job["extracted_iocs"] for job in jobs if job["extracted_iocs"]]
+        if not config.DOMAIN_SCORING_ENABLED or not extracted_iocs_list:
+            return
+        from core.domain_scoring import annotate_domain_risk
+        try:
+            annotate_domain_risk(extracted_iocs_list)
+        except BaseException:
+            for job in jobs:
+                self._shutdown_early_intel(job, wait=False)
+            raise
+
+    def enrich(self, job):
+        from core.intel_providers import collect_indicators, IOC_TYPE_DOMAIN
+        extracted_iocs = job["extracted_iocs"]
+        early_intel = job.get("_early_intel")
+        job["virustotal_reports"] = []
+        job["intel_deferred"] = []
+        try:
+            indicators = collect_indicators(extracted_iocs, per_registrable_domain=self.per_registrable_domain)
+            if extracted_iocs.get("domain_risk_scores"):
+                from core.domain_scoring import prioritize_by_risk
+                # Domain paling mencurigakan diperiksa lebih dulu (kuota API terbatas)
+                indicators[IOC_TYPE_DOMAIN] = prioritize_by_risk(
+                    indicators[IOC_TYPE_DOMAIN], extracted_iocs["domain_risk_scores"],
+                    registrable_map=extracted_iocs.get("registrable_domain_map") if self.per_registrable_domain else None
+                )
+            if self.intel_aggregator and any(indicators.values()):
+                if self.deferred_intel:
+                    job["intel_deferred"] = [(ioc_type, value) for ioc_type, values in indicators.items() for value in values]
+                    logger.info(f"Pemeriksaan threat intel untuk {len(job['intel_deferred'])} indikator ditunda ke latar belakang.")
+                else:
+                    logger.info(f"Memulai pemeriksaan threat intel dengan provider: {', '.join(self.intel_aggregator.provider_names)}...")
+                    if early_intel:
+                        job["virustotal_reports"] = early_intel.collect(indicators)
+                    else:
+                        job["virustotal_reports"] = self.intel_aggregator.lookup_indicators(indicators)
+                    logger.info(f"Pemeriksaan threat intel selesai. {len(job['virustotal_reports'])} laporan diterima.")
+        finally:
+            self._shutdown_early_intel(job)
+        # Riwayat lintas analisis: berapa analisis sebelumnya yang memuat domain/IP/URL yang sama
+        job["ioc_history"] = {}
+        if self.ioc_store_enabled and extracted_iocs:
+            from core.ioc_store import IOCStore
+            try:
+                with IOCStore() as ioc_store:
+                    job["ioc_history"] = ioc_store.prior_sightings(extracted_iocs)
+                logger.info(f"{len(job['ioc_history'])} indikator pernah terlihat di analisis sebelumnya.")
+            except sqlite3.Error as e:
+                logger.error(f"Gagal membaca IOC store: {e}", exc_info=True)
+        return job
+
+    def render(self, job):
+        """Menulis laporan HTML (html_report_path None jika gagal) dan memulai enrichment latar belakang jika ditunda."""
+        from core.report_generator import HTMLReportGenerator
+        analysis_data = {key: job.get(key) for key in (
+            'target_url', 'analysis_timestamp', 'screenshot_path', 'network_events', 'local_storage', 'session_storage',
+            'extracted_iocs', 'cookies', 'dynamic_js_calls', 'virustotal_reports', 'ioc_history')}
+        analysis_data['intel_pending_indicators'] = [value for _, value in job.get("intel_deferred") or []]
+        report_generator = HTMLReportGenerator()
+        job["html_report_path"] = report_generator.generate_report(
+            analysis_data, report_filepath=reserve_report_path(job["target_url"])
+        )
+        job["analysis_data"] = analysis_data
+        job["intel_enricher"] = job["threat_intel_path"] = None
+        if job.get("intel_deferred") and job["html_report_path"]:
+            from core.intel_enrichment import BackgroundIntelEnricher, get_intel_json_path
+            job["threat_intel_path"] = get_intel_json_path(job["html_report_path"])
+            job["intel_enricher"] = BackgroundIntelEnricher(
+                indicators=job["intel_deferred"],
+                lookup_fn=self.intel_aggregator.lookup,
+                report_generator=report_generator,
+                analysis_data=analysis_data,
+                report_filepath=job["html_report_path"],
+                intel_json_path=job["threat_intel_path"],
+                request_delay=0 # Jeda sudah diatur oleh rate limiter masing-masing provider
+            ).start()
+        return job
+
+    def _render_required(self, job):
+        job = self.render(job)
+        if job["html_report_path"] is None:
+            raise RuntimeError("Gagal membuat laporan HTML.")
+        return job
+
+    def persist(self, job):
+        from core.network_log import save_target_network_log
+        job["network_log_path"] = save_target_network_log(job["network_events"], job["target_url"], self.network_log_dir)
+        if self.ioc_store_enabled and job["extracted_iocs"]:
+            from core.ioc_store import IOCStore
+            try:
+                with IOCStore() as ioc_store:
+                    ioc_store.record_analysis(
+                        job["target_url"], job["extracted_iocs"], network_events=job["network_events"],
+                        analyzed_at=job["analysis_timestamp"], report_path=job["html_report_path"],
+                        network_log_path=job["network_log_path"]
+                    )
+            except sqlite3.Error as e:
+                logger.error(f"Gagal mencatat analisis ke IOC store: {e}", exc_info=True)
+        if self.event_store_enabled and (job["network_events"] or job["dynamic_js_calls"] or job["cookies"]):
+            from core.event_store import EventStore
+            try:
+                EventStore().append_run(
+                    job["target_url"], analyzed_at=job["analysis_timestamp"], network_events=job["network_events"],
+                    dynamic_js_calls=job["dynamic_js_calls"], cookies=job["cookies"]
+                )
+            except (OSError, ValueError) as e:
+                logger.error(f"Gagal menyimpan event ke event store: {e}", exc_info=True)
+        return job
+
+    def _persist_summary(self, job):
+        job = self.persist(job)
+        # Data besar dilepas di sini: hanya ringkasan yang keluar dari pipeline
+        summary = self.summarize(job) if self.summarize else None
+        return {
+            "target_url": job["target_url"],
+            "html_report_path": job["html_report_path"],
+            "network_log_path": job["network_log_path"],
+            "screenshot_path": job["screenshot_path"],
+            "summary": summary,
+            "error": None,
+        }
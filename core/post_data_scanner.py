@@ -0,0 +1,250 @@
+# core/post_data_scanner.py
+import os
+import re
+import json
+import time
+import base64
+import binascii
+from urllib.parse import parse_qsl
+
+# Impor konfigurasi dan logger
+import sys
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+import config
+from utils.logger_config import setup_logger
+
+logger = setup_logger(__name__, config.LOG_LEVEL, config.LOG_FILE)
+
+CATEGORY_CREDENTIAL = "credential"
+CATEGORY_CARD = "card_number"
+CATEGORY_EMAIL = "email"
+CATEGORY_FINGERPRINT = "fingerprint"
+
+# Satu regex gabungan untuk nilai, dikompilasi sekali. Grup bernama menentukan kategori temuan.
+_VALUE_PATTERN = re.compile(
+    r"(?P<email>\b[A-Za-z0-9._%+-]{1,64}@[A-Za-z0-9-]{1,63}(?:\.[A-Za-z0-9-]{1,63})*\.[A-Za-z]{2,24}\b)"
+    r"|(?P<card>(?<![\d-])\d(?:[ -]?\d){12,18}(?![\d-]))"
+    r"|(?P<canvas>data:image/(?:png|webp);base64,[A-Za-z0-9+/=]{64,})"
+)
+# Nama field yang menandakan kredensial atau data fingerprint perangkat
+_CREDENTIAL_KEY_PATTERN = re.compile(
+    r"(?:^|[_\-.\[])(?:pass(?:word|wd|phrase|code)?|pwd|pin|otp|mfa|2fa|secret|token|api[_-]?key|access[_-]?key|"
+    r"auth|session[_-]?id|cvv|cvc|cvv2|ssn)(?:$|[_\-.\]])",
+    re.IGNORECASE,
+)
+_FINGERPRINT_KEY_PATTERN = re.compile(
+    r"canvas|webgl|fingerprint|(?:^|[_\-.])fp(?:$|[_\-.])|audio[_-]?(?:hash|fp|ctx)|fonts|plugins|"
+    r"screen[_-]?(?:res|resolution|width|height)|hardware[_-]?concurrency|device[_-]?memory|timezone|touch[_-]?points",
+    re.IGNORECASE,
+)
+_BASE64_PATTERN = re.compile(r"^[A-Za-z0-9+/_-]{16,}={0,2}$")
+_HEX_ONLY_PATTERN = re.compile(r"^[0-9A-Fa-f]+$")
+_FORM_PATTERN = re.compile(r"^[\w.\-\[\]%]{1,128}=")
+
+
+def _luhn_valid(digits):
+    total = 0
+    for index, char in enumerate(reversed(digits)):
+        digit = ord(char) - 48
+        if index % 2 == 1:
+            digit *= 2
+            if digit > 9:
+                digit -= 9
+        total += digit
+    return total % 10 == 0
+
+
+def _mask(category, value):
+    if not config.POST_SCAN_REDACT:
+        return value
+    if category == CATEGORY_EMAIL:
+        local, _, domain = value.partition("@")
+        return f"{local[:1]}***@{domain}"
+    if category == CATEGORY_CARD:
+        return f"**** {value[-4:]}"
+    if category == CATEGORY_CREDENTIAL:
+        return f"<{len(value)} karakter>"
+    return value[:32] + ("..." if len(value) > 32 else "")
+
+
+def _is_mostly_printable(text):
+    if not text:
+        return False
+    printable = sum(1 for c in text[:256] if c.isprintable() or c in "\r\n\t")
+    return printable / min(len(text), 256) >= 0.9
+
+
+class _Budget:
+    def __init__(self, max_bytes, time_budget_ms):
+        self.max_bytes = max_bytes
+        self.deadline = time.perf_counter() + time_budget_ms / 1000.0
+        self.truncated = False
+        self.timed_out = False
+
+    def expired(self):
+        if not self.timed_out and time.perf_counter() > self.deadline:
+            self.timed_out = True
+        return self.timed_out
+
+
+class PostDataScanner:
+    """
+    Mendekode body POST (JSON, form-urlencoded, base64, buffer hex) lalu mendeteksi kredensial,
+    nomor kartu (tervalidasi Luhn), email dan blob fingerprint. Setiap payload dibatasi jumlah
+    byte dan waktu pemindaian sehingga unggahan besar tidak menahan pipeline.
+    """
+    def __init__(self, max_bytes=None, time_budget_ms=None, max_decode_depth=None, max_findings=None):
+        self.max_bytes = max_bytes if max_bytes is not None else config.POST_SCAN_MAX_BYTES
+        self.time_budget_ms = time_budget_ms if time_budget_ms is not None else config.POST_SCAN_TIME_BUDGET_MS
+        self.max_decode_depth = max_decode_depth if max_decode_depth is not None else config.POST_SCAN_MAX_DECODE_DEPTH
+        self.max_findings = max_findings if max_findings is not None else config.POST_SCAN_MAX_FINDINGS
+
+    def scan(self, post_data, post_data_format=None):
+        """
+        :param post_data: Nilai post_data dari event (dict/list hasil JSON, string, atau string hex).
+        :param post_data_format: "hex_buffer" jika post_data adalah buffer yang di-hex-kan.
+        :return: Dict berisi findings, decoded_as, bytes_scanned, truncated dan timed_out.
+        """
+        budget = _Budget(self.max_bytes, self.time_budget_ms)
+        result = {"findings": [], "decoded_as": [], "bytes_scanned": 0, "truncated": False, "timed_out": False}
+        seen = set()
+
+        if post_data_format == "hex_buffer" and isinstance(post_data, str):
+            hex_text = post_data[:self.max_bytes * 2]
+            budget.truncated = len(post_data) > len(hex_text)
+            try:
+                post_data = bytes.fromhex(hex_text[:len(hex_text) - len(hex_text) % 2]).decode("utf-8", errors="replace")
+                result["decoded_as"].append("hex")
+            except ValueError:
+                post_data = hex_text
+
+        self._scan_value(post_data, None, 0, budget, result, seen)
+        result["truncated"] = budget.truncated
+        result["timed_out"] = budget.timed_out
+        if budget.timed_out:
+            logger.warning(f"Pemindaian body POST dihentikan setelah {self.time_budget_ms} ms (batas waktu).")
+        return result
+
+    def _add_finding(self, result, seen, category, field, value):
+        key = (category, value)
+        if key in seen or len(result["findings"]) >= self.max_findings:
+            return
+        seen.add(key)
+        result["findings"].append({"category": category, "field": field, "sample": _mask(category, value)})
+
+    def _check_key(self, key, value, result, seen):
+        if not key or value in (None, ""):
+            return
+        text = value if isinstance(value, str) else json.dumps(value) if isinstance(value, (dict, list)) else str(value)
+        if _CREDENTIAL_KEY_PATTERN.search(key):
+            self._add_finding(result, seen, CATEGORY_CREDENTIAL, key, text)
+        elif _FINGERPRINT_KEY_PATTERN.search(key):
+            self._add_finding(result, seen, CATEGORY_FINGERPRINT, key, text)
+
+    def _scan_value(self, value, field, depth, budget, result, seen):
+        if budget.expired() or len(result["findings"]) >= self.max_findings:
+            return
+        if isinstance(value, dict):
+            for key, item in value.items():
+                if budget.expired():
+                    return
+                key = str(key)
+                self._check_key(key, item, result, seen)
+                self._scan_value(item, key, depth, budget, result, seen)
+            return
+        if isinstance(value, list):
+            for item in value:
+                if budget.expired():
+                    return
+                self._scan_value(item, field, depth, budget, result, seen)
+            return
+        if value is None or isinstance(value, bool):
+            return
+        if isinstance(value, bytes):
+            value = value.decode("utf-8", errors="replace")
+        text = str(value)
+
+        remaining = budget.max_bytes - result["bytes_scanned"]
+        if remaining <= 0:
+            budget.truncated = True
+            return
+        if len(text) > remaining:
+            text = text[:remaining]
+            budget.truncated = True
+        result["bytes_scanned"] += len(text)
+
+        # Teks yang berhasil didekode (JSON/form/base64) dipindai per field; selain itu dipindai apa adanya
+        if depth >= self.max_decode_depth or not self._decode_nested(text, field, depth, budget, result, seen):
+            self._match_text(text, field, budget, result, seen)
+
+    def _match_text(self, text, field, budget, result, seen):
+        for match in _VALUE_PATTERN.finditer(text):
+            if budget.expired() or len(result["findings"]) >= self.max_findings:
+                return
+            kind = match.lastgroup
+            matched = match.group(kind)
+            if kind == "email":
+                self._add_finding(result, seen, CATEGORY_EMAIL, field, matched)
+            elif kind == "card":
+                digits = re.sub(r"[ -]", "", matched)
+                if 13 <= len(digits) <= 19 and _luhn_valid(digits):
+                    self._add_finding(result, seen, CATEGORY_CARD, field, digits)
+            elif kind == "canvas":
+                self._add_finding(result, seen, CATEGORY_FINGERPRINT, field, matched)
+
+    def _decode_nested(self, text, field, depth, budget, result, seen):
+        """Mencoba mendekode satu lapis; mengembalikan True jika berhasil dan isinya sudah dipindai."""
+        stripped = text.strip()
+        if not stripped:
+            return False
+        # JSON
+        if stripped[0] in "{[":
+            try:
+                parsed = json.loads(stripped)
+            except ValueError:
+                parsed = None
+            if isinstance(parsed, (dict, list)):
+                self._mark_decoded(result, "json")
+                self._scan_value(parsed, field, depth + 1, budget, result, seen)
+                return True
+        # base64 / base64url (string angka/hex murni bukan kandidat: lebih mungkin nomor kartu atau hash)
+        if _BASE64_PATTERN.match(stripped) and not _HEX_ONLY_PATTERN.match(stripped):
+            padded = stripped + "=" * (-len(stripped) % 4)
+            try:
+                decoded = base64.b64decode(padded.replace("-", "+").replace("_", "/"), validate=True)
+            except (binascii.Error, ValueError):
+                decoded = None
+            decoded_text = decoded.decode("utf-8", errors="replace") if decoded else ""
+            if _is_mostly_printable(decoded_text):
+                self._mark_decoded(result, "base64")
+                self._scan_value(decoded_text, field, depth + 1, budget, result, seen)
+                return True
+        # form-urlencoded
+        if _FORM_PATTERN.match(stripped):
+            pairs = parse_qsl(stripped, keep_blank_values=False)
+            if pairs and all(key and " " not in key for key, _ in pairs):
+                self._mark_decoded(result, "form")
+                for key, item in pairs:
+                    if budget.expired():
+                        break
+                    self._check_key(key, item, result, seen)
+                    self._scan_value(item, key, depth + 1, budget, result, seen)
+                return True
+        return False
+
+    @staticmethod
+    def _mark_decoded(result, layer):
+        if layer not in result["decoded_as"]:
+            result["decoded_as"].append(layer)
+
+
+def summarize_findings(scan_result):
+    """Ringkasan kategori temuan untuk laporan, mis. {'credential': 2, 'email': 1}."""
+    summary = {}
+    for finding in scan_result.get("findings", []):
+        summary[finding["category"]] = summary.get(finding["category"], 0) + 1
+    return summary
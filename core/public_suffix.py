@@ -0,0 +1,169 @@
+# core/public_suffix.py
+import os
+import ipaddress
+from functools import lru_cache
+
+# Impor konfigurasi dan logger
+import sys
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+import config
+from utils.logger_config import setup_logger
+
+logger = setup_logger(__name__, config.LOG_LEVEL, config.LOG_FILE)
+
+_TERMINAL = "\0" # penanda node yang merupakan akhir aturan normal
+_EXCEPTION = "\1" # penanda node aturan pengecualian ("!www.ck")
+_WILDCARD = "*"
+_PRIVATE_SECTION_MARKER = "===BEGIN PRIVATE DOMAINS==="
+
+
+def _label_variants(label):
+    """Aturan IDN di daftar berbentuk Unicode; hostname dari browser berbentuk punycode. Simpan keduanya."""
+    variants = {label}
+    try:
+        variants.add(label.encode("idna").decode("ascii"))
+    except UnicodeError:
+        pass
+    return variants
+
+
+class PublicSuffixIndex:
+    """
+    Trie label terbalik yang dikompilasi dari Public Suffix List (https://publicsuffix.org/).
+    Mendukung aturan normal, wildcard (*.ck) dan pengecualian (!www.ck) sesuai algoritma resmi.
+    """
+    def __init__(self, rules):
+        self._root = {}
+        self.rule_count = 0
+        for rule in rules:
+            self._add_rule(rule)
+
+    @classmethod
+    def from_file(cls, path, include_private=True):
+        rules = []
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                if line.startswith("//"):
+                    if not include_private and _PRIVATE_SECTION_MARKER in line:
+                        break
+                    continue
+                # Aturan berakhir pada spasi pertama
+                rules.append(line.split()[0])
+        return cls(rules)
+
+    def _add_rule(self, rule):
+        rule = rule.strip().lower()
+        is_exception = rule.startswith("!")
+        if is_exception:
+            rule = rule[1:]
+        labels = [label for label in rule.split(".") if label]
+        if not labels:
+            return
+        nodes = [self._root]
+        for label in reversed(labels):
+            next_nodes = []
+            for node in nodes:
+                for variant in _label_variants(label):
+                    next_nodes.append(node.setdefault(variant, {}))
+            nodes = next_nodes
+        for node in nodes:
+            node[_EXCEPTION if is_exception else _TERMINAL] = True
+        self.rule_count += 1
+
+    def public_suffix_length(self, labels):
+        """Jumlah label (dari kanan) yang membentuk public suffix; aturan default '*' berarti minimal 1."""
+        suffix_length = 1
+        node = self._root
+        for depth, label in enumerate(reversed(labels), start=1):
+            child = node.get(label)
+            if child is not None:
+                if _EXCEPTION in child:
+                    # Pengecualian: public suffix adalah aturan tanpa label paling kiri
+                    return depth - 1
+                if _TERMINAL in child:
+                    suffix_length = depth
+                wildcard = node.get(_WILDCARD)
+                if wildcard is not None and _TERMINAL in wildcard:
+                    suffix_length = max(suffix_length, depth)
+                node = child
+                continue
+            wildcard = node.get(_WILDCARD)
+            if wildcard is not None and _TERMINAL in wildcard:
+                suffix_length = depth
+            break
+        return suffix_length
+
+    def public_suffix(self, host):
+        labels = _split_host(host)
+        if not labels:
+            return None
+        return ".".join(labels[-self.public_suffix_length(labels):])
+
+    def registrable_domain(self, host):
+        """
+        Mengembalikan eTLD+1 dari host (mis. 'a.b.example.co.uk' -> 'example.co.uk').
+        Alamat IP dikembalikan apa adanya; host yang merupakan public suffix itu sendiri menghasilkan None.
+        """
+        if not host:
+            return None
+        if _is_ip_literal(host):
+            return host
+        labels = _split_host(host)
+        if not labels:
+            return None
+        suffix_length = self.public_suffix_length(labels)
+        if len(labels) <= suffix_length:
+            return None
+        return ".".join(labels[-(suffix_length + 1):])
+
+
+def _split_host(host):
+    return [label for label in host.strip().lower().rstrip(".").split(".") if label] if host else []
+
+
+def _is_ip_literal(host):
+    try:
+        ipaddress.ip_address(host.strip("[]"))
+        return True
+    except ValueError:
+        return False
+
+
+def _resolve_list_path(path):
+    if os.path.isabs(path):
+        return path
+    return os.path.join(project_root, path)
+
+
+@lru_cache(maxsize=None)
+def _load_index(path, include_private):
+    index = PublicSuffixIndex.from_file(path, include_private=include_private)
+    logger.info(f"Public suffix list dimuat dari {path}: {index.rule_count} aturan.")
+    return index
+
+
+def get_public_suffix_index(path=None, include_private=None):
+    """Memuat dan mengompilasi daftar bawaan sekali per proses. Mengembalikan None jika file tidak ada."""
+    path = _resolve_list_path(path if path else config.PUBLIC_SUFFIX_LIST_FILE)
+    if include_private is None:
+        include_private = config.PUBLIC_SUFFIX_INCLUDE_PRIVATE
+    if not os.path.exists(path):
+        logger.warning(f"File public suffix list tidak ditemukan: {path}. Agregasi per domain terdaftar dinonaktifkan.")
+        return None
+    return _load_index(path, include_private)
+
+
+@lru_cache(maxsize=65536)
+def registrable_domain(host):
+    """Helper ber-cache untuk index bawaan. Jika daftar tidak tersedia, host dikembalikan apa adanya."""
+    index = get_public_suffix_index()
+    if index is None:
+        return host or None
+    return index.registrable_domain(host)
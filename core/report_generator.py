@@ -1,9 +1,13 @@
 # core/report_generator.py
 import os
 import sys
+import gzip
+import json
 import time
+import base64
 import shutil 
-from jinja2 import Environment, FileSystemLoader, select_autoescape, exceptions as JinjaExceptions
+import threading
+from jinja2 import Environment, FileSystemLoader, FileSystemBytecodeCache, select_autoescape, exceptions as JinjaExceptions
 
 # Tambahkan path root proyek ke sys.path
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -17,17 +21,123 @@ from utils.logger_config import setup_logger
 # Setup logger untuk modul ini
 logger = setup_logger(__name__, config.LOG_LEVEL, config.LOG_FILE)
 
+# Bagian laporan yang jumlah barisnya dibatasi REPORT_MAX_ROWS_PER_SECTION
+REPORT_ROW_SECTIONS = (
+    'network_rows', 'domain_rows', 'registrable_rows', 'harmful_url_rows', 'post_rows', 'direct_ip_rows',
+    'rule_match_rows', 'cookie_rows', 'dynamic_js_rows', 'local_storage_rows', 'session_storage_rows',
+)
+
+
+def encode_data_island(rows, compress=None):
+    """
+    Mengodekan baris tabel (list of list) sebagai data island untuk disematkan di laporan:
+    JSON ringkas yang dikompres gzip lalu base64, atau JSON biasa jika kompresi dinonaktifkan.
+    """
+    compress = config.REPORT_LAZY_TABLE_COMPRESS if compress is None else compress
+    payload = json.dumps(rows, separators=(',', ':'), ensure_ascii=False, default=str)
+    if compress:
+        compressed = gzip.compress(payload.encode('utf-8'), compresslevel=6, mtime=0)
+        return {'encoding': 'gzip+base64', 'payload': base64.b64encode(compressed).decode('ascii')}
+    # '</' di dalam string JSON akan menutup tag <script> lebih awal
+    return {'encoding': 'json', 'payload': payload.replace('</', '<\\/')}
+
+class _CappedRows:
+    """
+    Penampung baris satu bagian laporan. Hanya `limit` baris pertama yang disimpan di memori; begitu batas
+    terlampaui, file JSON pendamping dibuka, baris yang tersimpan ditulis ke sana, dan baris berikutnya
+    langsung dialirkan ke file tanpa ditampung. File pendamping berisi seluruh baris bagian tersebut.
+    """
+
+    def __init__(self, limit=0, overflow_path=None):
+        self.limit = limit if overflow_path else 0 # 0 = tanpa batas
+        self.overflow_path = overflow_path
+        self.rows = []
+        self.total = 0
+        self.overflowed = False
+        self._file = None
+
+    def append(self, row):
+        self.total += 1
+        if not self.limit or self.total <= self.limit:
+            self.rows.append(row)
+            return
+        if self._file is None:
+            self._file = open(self.overflow_path, 'w', encoding='utf-8')
+            self.overflowed = True
+            # Array JSON ditulis per baris: tanpa satu string besar dan tanpa ribuan write kecil
+            self._file.write('[')
+            for index, kept in enumerate(self.rows):
+                self._write(kept, index)
+        self._write(row, self.total - 1)
+
+    def extend(self, rows):
+        for row in rows:
+            self.append(row)
+
+    def _write(self, row, index):
+        self._file.write((',\n' if index else '\n') + json.dumps(row, ensure_ascii=False, default=str))
+
+    def close(self):
+        if self._file is not None:
+            self._file.write('\n]\n')
+            self._file.close()
+            self._file = None
+
+
+# Satu Environment Jinja2 per direktori template per proses: template dikompilasi sekali
+_template_environments = {}
+_template_environments_lock = threading.Lock()
+
+
+def _build_bytecode_cache():
+    if not config.REPORT_TEMPLATE_CACHE_DIR:
+        return None
+    cache_dir = config.REPORT_TEMPLATE_CACHE_DIR
+    if not os.path.isabs(cache_dir):
+        cache_dir = os.path.join(project_root, cache_dir)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+    except OSError as e:
+        logger.warning(f"Direktori cache bytecode template tidak bisa dibuat ({cache_dir}): {e}. Cache dinonaktifkan.")
+        return None
+    return FileSystemBytecodeCache(cache_dir)
+
+
+def get_template_environment(template_dir):
+    """
+    Mengembalikan Environment Jinja2 bersama untuk direktori template. Bytecode hasil kompilasi
+    disimpan di REPORT_TEMPLATE_CACHE_DIR sehingga proses baru (worker batch/reprocess) tidak
+    mengompilasi ulang; auto_reload mengikuti REPORT_TEMPLATE_AUTO_RELOAD.
+    """
+    template_dir = os.path.abspath(template_dir)
+    with _template_environments_lock:
+        env = _template_environments.get(template_dir)
+        if env is None:
+            env = Environment(
+                loader=FileSystemLoader(template_dir),
+                autoescape=select_autoescape(['html', 'xml']),
+                bytecode_cache=_build_bytecode_cache(),
+                auto_reload=config.REPORT_TEMPLATE_AUTO_RELOAD
+            )
+            env.filters['unixtimestampformat'] = HTMLReportGenerator.unixtimestampformat
+            _template_environments[template_dir] = env
+            logger.debug(f"Jinja2 Environment initialized with template directory: {template_dir}")
+        return env
+
+
+def clear_template_environments():
+    """Membuang Environment bersama (mis. setelah template diubah saat proses berjalan, atau di tes)."""
+    with _template_environments_lock:
+        _template_environments.clear()
+
+
 class HTMLReportGenerator:
     def __init__(self, template_dir="templates"):
         self.template_dir = os.path.join(project_root, template_dir)
-        self.env = Environment(
-            loader=FileSystemLoader(self.template_dir),
-            autoescape=select_autoescape(['html', 'xml'])
-        )
-        self.env.filters['unixtimestampformat'] = self.unixtimestampformat
-        logger.debug(f"Jinja2 Environment initialized with template directory: {self.template_dir}")
-
-    def unixtimestampformat(self, value, format="%Y-%m-%d %H:%M:%S"):
+        self.env = get_template_environment(self.template_dir)
+
+    @staticmethod
+    def unixtimestampformat(value, format="%Y-%m-%d %H:%M:%S"):
         """Filter Jinja2 untuk memformat timestamp Unix."""
         if isinstance(value, str):
             if value == "-1":
@@ -53,7 +163,165 @@ class HTMLReportGenerator:
             logger.warning(f"Gagal memformat timestamp: {value}, error: {e}")
             return str(value) 
 
-    def generate_report(self, analysis_data):
+    @staticmethod
+    def build_view_model(template_data, report_dir=None, report_prefix='', max_rows=None):
+        """
+        Menyiapkan baris-baris laporan di Python dengan indeks dict (satu lintasan per daftar),
+        sehingga template hanya melakukan iterasi. Menggantikan pencarian selectattr per baris
+        yang membuat waktu render kuadratik terhadap jumlah event.
+        Jika report_dir diberikan, jumlah baris per bagian dibatasi saat baris dibangun (lihat _CappedRows):
+        baris di atas batas langsung dialirkan ke file JSON pendamping dan ditautkan dari laporan (view['overflow']).
+        """
+        network_events = template_data.get('network_events') or []
+        extracted_iocs = template_data.get('extracted_iocs') or {}
+        intel_reports = template_data.get('virustotal_reports') or []
+        ioc_history = template_data.get('ioc_history') or {}
+        pending = set(template_data.get('intel_pending_indicators') or [])
+        local_storage = template_data.get('local_storage') or {}
+        session_storage = template_data.get('session_storage') or {}
+        cookies = template_data.get('cookies') or []
+        cookies_error = cookies[0].get('error') if len(cookies) == 1 and 'error' in cookies[0] else None
+
+        # Indeks: respons pertama per URL, laporan intel pertama per domain dan per indikator URL
+        response_by_url = {}
+        request_count = 0
+        for event in network_events:
+            if event.get('type') == 'response':
+                response_by_url.setdefault(event.get('url'), event)
+            elif event.get('type') == 'request':
+                request_count += 1
+        intel_by_domain = {}
+        intel_by_indicator = {}
+        for report in intel_reports:
+            if 'domain' in report:
+                intel_by_domain.setdefault(report['domain'], report)
+            if 'indicator' in report:
+                intel_by_indicator.setdefault(report['indicator'], report)
+
+        # Tabel besar dirender di browser dari data island, bukan sebagai ribuan elemen <tr>
+        lazy_sections = ['network_rows'] if request_count > config.REPORT_LAZY_TABLE_MIN_ROWS else []
+        max_rows = config.REPORT_MAX_ROWS_PER_SECTION if max_rows is None else max_rows
+        sections = {}
+        for section in REPORT_ROW_SECTIONS:
+            if report_dir is None:
+                sections[section] = _CappedRows()
+                continue
+            limit = config.REPORT_LAZY_TABLE_MAX_ROWS if section in lazy_sections else max_rows
+            overflow_filename = f"{report_prefix}{section}{config.REPORT_OVERFLOW_FILE_SUFFIX}"
+            sections[section] = _CappedRows(limit, os.path.join(report_dir, overflow_filename))
+
+        try:
+            network_rows = sections['network_rows']
+            for event in network_events:
+                if event.get('type') != 'request':
+                    continue
+                url = event.get('url') or ''
+                response = response_by_url.get(url)
+                network_rows.append({
+                    'index': network_rows.total + 1,
+                    'timestamp': event.get('timestamp'),
+                    'method': event.get('method'),
+                    'url': url,
+                    'url_display': url[:100] + ('...' if len(url) > 100 else ''),
+                    'status': response.get('status') if response else 'N/A',
+                    'resource_type': event.get('resource_type'),
+                    'domain': url.split('//')[-1].split('/')[0],
+                })
+
+            risk_scores = extracted_iocs.get('domain_risk_scores') or {}
+            registrable_map = extracted_iocs.get('registrable_domain_map') or {}
+            for domain in extracted_iocs.get('unique_domains') or []:
+                registrable = registrable_map.get(domain, domain)
+                intel = intel_by_domain.get(domain) or intel_by_domain.get(registrable)
+                sections['domain_rows'].append({
+                    'domain': domain,
+                    'risk': risk_scores.get(domain),
+                    'seen_before': ioc_history.get(domain),
+                    'intel': intel,
+                    'intel_label': ', '.join(intel['sources']) if intel and intel.get('sources') else 'VT',
+                    'intel_pending': intel is None and (domain in pending or registrable in pending),
+                })
+
+            sections['harmful_url_rows'].extend(
+                dict(item, intel=intel_by_indicator.get(item.get('url')), seen_before=ioc_history.get(item.get('url'), 0))
+                for item in extracted_iocs.get('potentially_harmful_urls') or []
+            )
+            sections['direct_ip_rows'].extend(
+                dict(item, seen_before=ioc_history.get(item.get('url'), 0))
+                for item in extracted_iocs.get('direct_ip_requests') or []
+            )
+            sections['registrable_rows'].extend(extracted_iocs.get('registrable_domains') or [])
+            sections['post_rows'].extend(extracted_iocs.get('post_requests') or [])
+            sections['rule_match_rows'].extend(extracted_iocs.get('rule_matches') or [])
+            sections['cookie_rows'].extend([] if cookies_error else cookies)
+            sections['dynamic_js_rows'].extend(template_data.get('dynamic_js_calls') or [])
+            sections['local_storage_rows'].extend([] if 'error' in local_storage else local_storage.items())
+            sections['session_storage_rows'].extend([] if 'error' in session_storage else session_storage.items())
+        finally:
+            for rows in sections.values():
+                rows.close()
+
+        view = {section: rows.rows for section, rows in sections.items()}
+        view['overflow'] = {}
+        for section, rows in sections.items():
+            if rows.overflowed:
+                overflow_filename = os.path.basename(rows.overflow_path)
+                view['overflow'][section] = {'total': rows.total, 'shown': rows.limit, 'file': overflow_filename}
+                logger.info(f"Bagian laporan '{section}' dibatasi {rows.limit} dari {rows.total} baris; data lengkap di {overflow_filename}.")
+        view.update({
+            'lazy_sections': lazy_sections,
+            'network_data': None,
+            'cookies_error': cookies_error,
+            'counts': {
+                'network_events': len(network_events),
+                'requests': network_rows.total,
+                'local_storage': len(local_storage) if 'error' not in local_storage else 0,
+                'session_storage': len(session_storage) if 'error' not in session_storage else 0,
+                'cookies': 0 if cookies_error else len(cookies),
+                'dynamic_js_calls': len(template_data.get('dynamic_js_calls') or []),
+                'unique_domains': sections['domain_rows'].total,
+                'potentially_harmful_urls': sections['harmful_url_rows'].total,
+                'post_requests': len(extracted_iocs.get('post_requests') or []),
+                'direct_ip_requests': sections['direct_ip_rows'].total,
+                'rule_matches': len(extracted_iocs.get('rule_matches') or []),
+            },
+        })
+        return view
+
+    def build_network_data_island(self, network_rows):
+        """Baris tabel jaringan sebagai data island; timestamp sudah diformat karena browser tidak punya filter Jinja."""
+        rows = [
+            [row['index'], self.unixtimestampformat(row['timestamp']), row['method'], row['url'],
+             row['status'], row['resource_type'], row['domain']]
+            for row in network_rows
+        ]
+        island = encode_data_island(rows)
+        island['page_size'] = config.REPORT_LAZY_TABLE_PAGE_SIZE
+        return island
+
+    @staticmethod
+    def _write_stream(chunks, file_obj, buffer_chars=None):
+        """Menulis potongan hasil template.generate() secara bertahap dengan buffer berukuran tetap."""
+        buffer_chars = buffer_chars or config.REPORT_STREAM_BUFFER_CHARS
+        buffer = []
+        buffered = 0
+        for chunk in chunks:
+            buffer.append(chunk)
+            buffered += len(chunk)
+            if buffered >= buffer_chars:
+                file_obj.write(''.join(buffer))
+                buffer = []
+                buffered = 0
+        file_obj.write(''.join(buffer))
+
+    def generate_report(self, analysis_data, report_filepath=None, rerender=False):
+        """
+        Merender laporan HTML dari data analisis.
+        :param report_filepath: Path laporan (mis. dari reserve_report_path). Jika tidak diberikan, path
+                                dibuat dari URL target dan waktu saat ini di HTML_REPORT_DIR.
+        :param rerender: True jika laporan di path tersebut sudah pernah ditulis (render ulang hasil
+                         threat intel): screenshot tidak disalin lagi dan log ditulis di level debug.
+        """
         try:
             template_name = "report_template.html" 
             template = self.env.get_template(template_name)
@@ -61,12 +329,18 @@ class HTMLReportGenerator:
             
             target_url = analysis_data.get('target_url', 'N/A') 
             
-            url_slug = target_url.split('//')[-1].split('/')[0].replace('.', '_').replace(':', '_')
-            timestamp_str = time.strftime("%Y%m%d-%H%M%S")
-            report_filename = f"{url_slug}_{timestamp_str}_{config.DEFAULT_HTML_REPORT_FILENAME}"
-            
-            report_dir_abs = os.path.join(project_root, config.HTML_REPORT_DIR)
-            report_filepath = os.path.join(report_dir_abs, report_filename)
+            is_rerender = rerender
+            if report_filepath is not None:
+                report_dir_abs = os.path.dirname(report_filepath)
+                report_prefix = os.path.basename(report_filepath)
+                if report_prefix.endswith(config.DEFAULT_HTML_REPORT_FILENAME):
+                    report_prefix = report_prefix[:-len(config.DEFAULT_HTML_REPORT_FILENAME)]
+            else:
+                url_slug = target_url.split('//')[-1].split('/')[0].replace('.', '_').replace(':', '_')
+                timestamp_str = time.strftime("%Y%m%d-%H%M%S")
+                report_prefix = f"{url_slug}_{timestamp_str}_"
+                report_dir_abs = os.path.join(project_root, config.HTML_REPORT_DIR)
+                report_filepath = os.path.join(report_dir_abs, f"{report_prefix}{config.DEFAULT_HTML_REPORT_FILENAME}")
 
             if not os.path.exists(report_dir_abs): 
                 os.makedirs(report_dir_abs)
@@ -79,11 +353,13 @@ class HTMLReportGenerator:
                 try:
                     base_screenshot_name = os.path.basename(str(original_screenshot_path))
             # --- AKHIR PERBAIKAN ---
-                    report_specific_screenshot_name = f"{url_slug}_{timestamp_str}_{base_screenshot_name}"
+                    report_specific_screenshot_name = f"{report_prefix}{base_screenshot_name}"
                     destination_screenshot_path = os.path.join(report_dir_abs, report_specific_screenshot_name)
-                    shutil.copy2(str(original_screenshot_path), destination_screenshot_path) # Pastikan path adalah string
+                    # Saat render ulang, screenshot sudah disalin pada render pertama
+                    if not (is_rerender and os.path.exists(destination_screenshot_path)):
+                        shutil.copy2(str(original_screenshot_path), destination_screenshot_path) # Pastikan path adalah string
+                        logger.info(f"Screenshot disalin ke: {destination_screenshot_path}")
                     screenshot_filename_for_report = report_specific_screenshot_name
-                    logger.info(f"Screenshot disalin ke: {destination_screenshot_path}")
                 except Exception as e:
                     logger.error(f"Gagal menyalin screenshot {original_screenshot_path} ke direktori laporan: {e}", exc_info=True)
                     screenshot_filename_for_report = None
@@ -103,15 +379,34 @@ class HTMLReportGenerator:
                 'extracted_iocs': analysis_data.get('extracted_iocs', {}),
                 'cookies': analysis_data.get('cookies', []),
                 'dynamic_js_calls': dynamic_js_calls_received,
-                'virustotal_reports': analysis_data.get('virustotal_reports', [])
+                'virustotal_reports': analysis_data.get('virustotal_reports', []),
+                'intel_pending_indicators': analysis_data.get('intel_pending_indicators', []),
+                'intel_status': analysis_data.get('intel_status'),
+                'ioc_history': analysis_data.get('ioc_history', {})
             }
 
-            rendered_html = template.render(template_data)
+            # File data pendamping ditulis lebih dulu agar tautannya sudah valid saat laporan tersedia
+            view = self.build_view_model(template_data, report_dir_abs, report_prefix)
+            if 'network_rows' in view['lazy_sections']:
+                view['network_data'] = self.build_network_data_island(view['network_rows'])
+            template_data['view'] = view
 
-            with open(report_filepath, 'w', encoding='utf-8') as f:
-                f.write(rendered_html)
+            # Dirender secara streaming: HTML lengkap tidak pernah ditampung sebagai satu string. Ditulis ke
+            # file sementara lalu di-rename, sehingga pembaca (render ulang saat intel masuk) tidak melihat file setengah jadi
+            tmp_filepath = f"{report_filepath}.tmp"
+            try:
+                with open(tmp_filepath, 'w', encoding='utf-8') as f:
+                    self._write_stream(template.generate(template_data), f)
+                os.replace(tmp_filepath, report_filepath)
+            except BaseException:
+                if os.path.exists(tmp_filepath):
+                    os.remove(tmp_filepath)
+                raise
             
-            logger.info(f"Laporan HTML berhasil dibuat: {report_filepath}")
+            if is_rerender:
+                logger.debug(f"Laporan HTML dirender ulang: {report_filepath}")
+            else:
+                logger.info(f"Laporan HTML berhasil dibuat: {report_filepath}")
             return report_filepath
 
         except JinjaExceptions.TemplateNotFound as e: 
@@ -0,0 +1,273 @@
+# core/reprocessor.py
+import os
+import time
+from itertools import islice
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+# Impor konfigurasi dan logger
+import sys
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+import config
+from utils.logger_config import setup_logger, log_context
+from core.ioc_extractor import IOCExtractor
+from core.intel_providers import build_intel_aggregator, collect_indicators, IOC_TYPE_DOMAIN
+from core.domain_scoring import annotate_domain_risk, prioritize_by_risk
+from core.report_generator import HTMLReportGenerator
+from core.aggregate_report import AggregateReportBuilder, summarize_analysis
+from core.network_log import match_network_log_suffix, read_network_log
+
+logger = setup_logger(__name__, config.LOG_LEVEL, config.LOG_FILE)
+
+# Aggregator threat intel per proses worker (cache provider dipakai ulang lintas log)
+_worker_aggregator = None
+
+
+def _resolve_dir(path):
+    return path if os.path.isabs(path) else os.path.join(project_root, path)
+
+
+def iter_network_logs(log_dir=None):
+    """
+    Menelusuri direktori log jaringan secara streaming (os.scandir) dan menghasilkan path setiap log.
+    Tidak membangun daftar lengkap di memori sehingga direktori berisi ribuan capture tetap ringan.
+    """
+    log_dir = _resolve_dir(log_dir if log_dir else config.NETWORK_LOG_DIR)
+    if not os.path.isdir(log_dir):
+        logger.warning(f"Direktori log jaringan tidak ditemukan: {log_dir}")
+        return
+    with os.scandir(log_dir) as entries:
+        for entry in entries:
+            if match_network_log_suffix(entry.name) and entry.is_file():
+                yield entry.path
+
+
+def load_network_log(log_path):
+    """Membaca log jaringan NDJSON (opsional gzip/zstd) atau log JSON lama."""
+    return read_network_log(log_path)
+
+
+def infer_target_url(network_events):
+    """Log jaringan tidak menyimpan URL target; gunakan request dokumen pertama (navigasi utama)."""
+    first_request_url = None
+    for event in network_events:
+        if event.get("type") != "request":
+            continue
+        if event.get("resource_type") == "document":
+            return event.get("url")
+        if first_request_url is None:
+            first_request_url = event.get("url")
+    return first_request_url
+
+
+def _log_prefix(log_path):
+    """'{slug}_{timestamp}_' dari nama file log, dipakai ulang untuk nama laporan hasil reprocess."""
+    name = os.path.basename(log_path)
+    suffix = match_network_log_suffix(name)
+    if suffix:
+        return name[:-len(suffix)]
+    return os.path.splitext(name)[0] + "_"
+
+
+def _analysis_timestamp(log_path):
+    """Waktu analisis asli dari nama file ('..._20250101-120000_...'), atau mtime file sebagai cadangan."""
+    parts = _log_prefix(log_path).rstrip("_").rsplit("_", 1)
+    if len(parts) == 2:
+        try:
+            return time.strftime("%Y-%m-%d %H:%M:%S", time.strptime(parts[1], "%Y%m%d-%H%M%S"))
+        except ValueError:
+            pass
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(os.path.getmtime(log_path)))
+
+
+def _get_worker_aggregator():
+    global _worker_aggregator
+    if _worker_aggregator is None:
+        _worker_aggregator = build_intel_aggregator()
+    return _worker_aggregator
+
+
+def reprocess_log(log_path, threat_intel_enabled=False, generate_report=True, report_dir=None):
+    """
+    Menjalankan ulang ekstraksi IOC, (opsional) threat intel, dan laporan HTML untuk satu log jaringan
+    tanpa membuka browser. Dirancang untuk dipanggil di proses worker: hanya ringkasan kecil yang dikembalikan.
+    Record log selama pemrosesan ditandai dengan nama file log sebagai job_id.
+    """
+    return reprocess_logs([log_path], threat_intel_enabled, generate_report, report_dir)[0]
+
+
+def reprocess_logs(log_paths, threat_intel_enabled=False, generate_report=True, report_dir=None):
+    """
+    Seperti reprocess_log untuk sekelompok log dalam satu worker: IOC diekstrak per log, skor risiko
+    domain seluruh kelompok dihitung dalam satu panggilan tervektorisasi, lalu threat intel dan laporan
+    dibuat per log. Mengembalikan ringkasan sesuai urutan log_paths.
+    Kegagalan tak terduga dicatat di summary["error"] log yang bersangkutan, tidak menghentikan kelompok.
+    """
+    extracted = []
+    for log_path in log_paths:
+        with log_context(os.path.basename(log_path)):
+            extracted.append(_extract_log(log_path))
+    if config.DOMAIN_SCORING_ENABLED:
+        scored = [(summary, extracted_iocs) for summary, _, extracted_iocs in extracted if extracted_iocs]
+        if scored:
+            try:
+                annotate_domain_risk([extracted_iocs for _, extracted_iocs in scored])
+            except Exception as e:
+                logger.error(f"Skor risiko domain gagal untuk {len(scored)} log: {e}", exc_info=True)
+                for summary, _ in scored:
+                    summary["error"] = f"Gagal menghitung skor risiko domain: {e}"
+    summaries = []
+    while extracted:
+        # Event jaringan tiap log dilepas begitu laporannya selesai
+        summary, network_events, extracted_iocs = extracted.pop(0)
+        if not summary["error"]:
+            with log_context(os.path.basename(summary["log_path"])):
+                try:
+                    _finish_log(summary, network_events, extracted_iocs, threat_intel_enabled, generate_report, report_dir)
+                except Exception as e:
+                    logger.error(f"Reprocess {summary['log_path']} gagal: {e}", exc_info=True)
+                    summary["error"] = f"Gagal memproses log: {e}"
+                    summary.pop("aggregate", None)
+        summaries.append(summary)
+    return summaries
+
+
+def _extract_log(log_path):
+    """Membaca log dan mengekstrak IOC; mengembalikan (ringkasan, event jaringan, extracted_iocs)."""
+    summary = {"log_path": log_path, "target_url": None, "event_count": 0, "unique_domains": 0,
+               "rule_matches": 0, "html_report_path": None, "error": None}
+    try:
+        network_events = load_network_log(log_path)
+    except Exception as e: # Termasuk error dekompresi gzip/zstd, bukan hanya OSError/ValueError
+        summary["error"] = f"Gagal membaca log: {e}"
+        return summary, None, None
+    if not isinstance(network_events, list):
+        summary["error"] = "Format log tidak dikenali (bukan daftar event)."
+        return summary, None, None
+
+    summary["target_url"] = infer_target_url(network_events) or "N/A"
+    summary["event_count"] = len(network_events)
+    try:
+        extracted_iocs = IOCExtractor(network_events).extract() if network_events else {}
+    except Exception as e:
+        logger.error(f"Ekstraksi IOC gagal untuk {log_path}: {e}", exc_info=True)
+        summary["error"] = f"Gagal mengekstrak IOC: {e}"
+        return summary, None, None
+    return summary, network_events, extracted_iocs
+
+
+def _finish_log(summary, network_events, extracted_iocs, threat_intel_enabled, generate_report, report_dir):
+    log_path = summary["log_path"]
+    summary["unique_domains"] = len(extracted_iocs.get("unique_domains", []))
+    summary["rule_matches"] = len(extracted_iocs.get("rule_matches", []))
+
+    virustotal_reports = []
+    if threat_intel_enabled and extracted_iocs:
+        intel_aggregator = _get_worker_aggregator()
+        if intel_aggregator:
+            # Opsi yang sama dengan tahap enrich pipeline agar hasil reprocess sebanding dengan analisis langsung
+            per_registrable_domain = config.THREAT_INTEL_PER_REGISTRABLE_DOMAIN
+            intel_indicators = collect_indicators(extracted_iocs, per_registrable_domain=per_registrable_domain)
+            if extracted_iocs.get("domain_risk_scores"):
+                intel_indicators[IOC_TYPE_DOMAIN] = prioritize_by_risk(
+                    intel_indicators[IOC_TYPE_DOMAIN], extracted_iocs["domain_risk_scores"],
+                    registrable_map=extracted_iocs.get("registrable_domain_map") if per_registrable_domain else None
+                )
+            virustotal_reports = intel_aggregator.lookup_indicators(intel_indicators)
+
+    analysis_data = {
+        'target_url': summary["target_url"],
+        'analysis_timestamp': _analysis_timestamp(log_path),
+        'screenshot_path': None,
+        'network_events': network_events,
+        'extracted_iocs': extracted_iocs,
+        'virustotal_reports': virustotal_reports,
+        'intel_pending_indicators': [],
+    }
+    if generate_report:
+        report_dir_abs = _resolve_dir(report_dir if report_dir else config.REPROCESS_REPORT_DIR)
+        report_filepath = os.path.join(report_dir_abs, f"{_log_prefix(log_path)}{config.DEFAULT_HTML_REPORT_FILENAME}")
+        summary["html_report_path"] = HTMLReportGenerator().generate_report(analysis_data, report_filepath=report_filepath)
+        if summary["html_report_path"] is None:
+            summary["error"] = "Gagal membuat laporan HTML."
+    # Ringkasan untuk dashboard batch dihitung di worker agar proses induk tidak menerima event jaringan
+    summary["aggregate"] = summarize_analysis(analysis_data, summary["html_report_path"])
+
+
+def _iter_chunks(items, size):
+    iterator = iter(items)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _default_workers(threat_intel_enabled):
+    workers = config.REPROCESS_MAX_WORKERS or os.cpu_count() or 1
+    # Kuota API VirusTotal berlaku per kunci, sedangkan rate limiter hanya berlaku per proses
+    if threat_intel_enabled and "virustotal" in config.THREAT_INTEL_PROVIDERS:
+        logger.info("Provider 'virustotal' aktif: reprocess dengan threat intel dijalankan dalam satu proses.")
+        return 1
+    return workers
+
+
+def reprocess_directory(log_dir=None, threat_intel_enabled=False, generate_report=True, report_dir=None, max_workers=None):
+    """
+    Memproses ulang semua log di direktori secara paralel lintas core (ProcessPoolExecutor).
+    Path log diambil secara streaming dan jumlah tugas yang sedang berjalan dibatasi, sehingga
+    memori tetap konstan berapa pun jumlah log. Menghasilkan ringkasan per log sesuai urutan selesai.
+    """
+    workers = max_workers or _default_workers(threat_intel_enabled)
+    max_in_flight = workers * config.REPROCESS_TASKS_PER_WORKER
+    # Log dikirim ke worker per kelompok agar skor domain dihitung tervektorisasi lintas log
+    log_chunks = _iter_chunks(iter_network_logs(log_dir), max(1, config.REPROCESS_BATCH_SIZE))
+    options = (threat_intel_enabled, generate_report, report_dir)
+    if generate_report:
+        # Dibuat sekali di sini agar worker paralel tidak berebut membuat direktori yang sama
+        os.makedirs(_resolve_dir(report_dir if report_dir else config.REPROCESS_REPORT_DIR), exist_ok=True)
+
+    if workers <= 1:
+        for log_chunk in log_chunks:
+            yield from reprocess_logs(log_chunk, *options)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = set()
+        for log_chunk in log_chunks:
+            pending.add(executor.submit(reprocess_logs, log_chunk, *options))
+            if len(pending) >= max_in_flight:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield from future.result()
+        for future in pending:
+            yield from future.result()
+
+
+def run_reprocess(log_dir=None, threat_intel_enabled=False, generate_report=True, report_dir=None, max_workers=None):
+    """
+    Menjalankan reprocess untuk seluruh direktori dan mencatat ringkasannya. Jika laporan dibuat,
+    dashboard batch ditulis di direktori laporan. Mengembalikan daftar ringkasan.
+    """
+    start = time.perf_counter()
+    results = []
+    dashboard = AggregateReportBuilder(output_dir=_resolve_dir(report_dir if report_dir else config.REPROCESS_REPORT_DIR)) if generate_report else None
+    for summary in reprocess_directory(log_dir, threat_intel_enabled, generate_report, report_dir, max_workers):
+        aggregate = summary.pop("aggregate", None)
+        if dashboard:
+            dashboard.add_analysis(aggregate or {"target_url": summary["target_url"] or summary["log_path"], "error": summary["error"]})
+        results.append(summary)
+        if summary["error"]:
+            logger.error(f"Reprocess {summary['log_path']} gagal: {summary['error']}")
+        else:
+            logger.info(f"Reprocess {os.path.basename(summary['log_path'])}: {summary['event_count']} event, "
+                        f"{summary['unique_domains']} domain, {summary['rule_matches']} temuan aturan.")
+    elapsed = time.perf_counter() - start
+    failed = sum(1 for summary in results if summary["error"])
+    logger.info(f"Reprocess selesai: {len(results)} log dalam {elapsed:.1f} detik ({failed} gagal).")
+    if dashboard and results:
+        dashboard.write()
+    return results
@@ -0,0 +1,159 @@
+# core/result_cache.py
+import os
+import sys
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+# Tambahkan path root proyek ke sys.path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+import config
+from utils.logger_config import setup_logger
+
+logger = setup_logger(__name__, config.LOG_LEVEL, config.LOG_FILE)
+
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    cache_key TEXT PRIMARY KEY,
+    target_url TEXT NOT NULL,
+    options TEXT NOT NULL,
+    result TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    last_access REAL NOT NULL,
+    hit_count INTEGER NOT NULL DEFAULT 0
+);
+-- Eviction LRU dan pembersihan TTL memindai berdasarkan waktu
+CREATE INDEX IF NOT EXISTS idx_results_last_access ON results(last_access);
+CREATE INDEX IF NOT EXISTS idx_results_created_at ON results(created_at);
+"""
+
+
+def normalize_url(url):
+    """
+    Bentuk kanonis URL untuk kunci cache: skema dan host huruf kecil, port default dan fragment dibuang,
+    path kosong menjadi '/', parameter query diurutkan. URL yang tidak bisa diurai dikembalikan apa adanya.
+    """
+    try:
+        parts = urlsplit(url.strip())
+        port = parts.port
+    except (ValueError, AttributeError):
+        return url
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").rstrip(".")
+    if ":" in host:
+        host = f"[{host}]" # IPv6
+    netloc = host if not port or port == _DEFAULT_PORTS.get(scheme) else f"{host}:{port}"
+    userinfo = parts.netloc.rpartition("@")[0]
+    if userinfo:
+        netloc = f"{userinfo}@{netloc}"
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((scheme, netloc, parts.path or "/", query, ""))
+
+
+def analysis_options(browser_type, headless_mode, threat_intel_enabled, per_registrable_domain=None):
+    """Opsi analisis yang memengaruhi hasil; dua submission hanya berbagi entri cache jika opsinya sama."""
+    if per_registrable_domain is None:
+        per_registrable_domain = config.THREAT_INTEL_PER_REGISTRABLE_DOMAIN
+    return {
+        "browser": browser_type,
+        "headless": bool(headless_mode),
+        "threat_intel": bool(threat_intel_enabled),
+        "per_registrable_domain": bool(per_registrable_domain),
+    }
+
+
+def cache_key(url, options):
+    payload = json.dumps({"url": normalize_url(url), "options": options}, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """
+    Cache hasil analisis berbasis SQLite, dikunci oleh URL ternormalisasi plus opsi analisis.
+    Entri kedaluwarsa setelah TTL; jika jumlah entri melebihi batas, entri yang paling lama tidak
+    diakses (LRU) dibuang. Entri yang laporannya sudah dihapus dari disk dianggap tidak ada.
+    """
+    def __init__(self, db_path=None, ttl_seconds=None, max_entries=None):
+        path = db_path if db_path else config.RESULT_CACHE_PATH
+        self.db_path = path if os.path.isabs(path) or path == ":memory:" else os.path.join(project_root, path)
+        self.ttl_seconds = config.RESULT_CACHE_TTL_SECONDS if ttl_seconds is None else ttl_seconds
+        self.max_entries = config.RESULT_CACHE_MAX_ENTRIES if max_entries is None else max_entries
+        if self.db_path != ":memory:":
+            os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        self._conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(_SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def get(self, url, options, now=None):
+        """Mengembalikan hasil tersimpan (dict) untuk url+options, atau None jika tidak ada/kedaluwarsa."""
+        now = time.time() if now is None else now
+        key = cache_key(url, options)
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT result, created_at, hit_count FROM results WHERE cache_key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            result_json, created_at, hit_count = row
+            result = json.loads(result_json)
+            report_path = result.get("html_report_path")
+            if now - created_at > self.ttl_seconds or (report_path and not os.path.exists(report_path)):
+                self._conn.execute("DELETE FROM results WHERE cache_key = ?", (key,))
+                return None
+            self._conn.execute(
+                "UPDATE results SET last_access = ?, hit_count = hit_count + 1 WHERE cache_key = ?", (now, key)
+            )
+        result.update(cached_at=created_at, age_seconds=round(now - created_at, 1), hit_count=hit_count + 1)
+        return result
+
+    def put(self, url, options, result, now=None):
+        """Menyimpan hasil analisis (harus bisa diserialisasi JSON), lalu menegakkan TTL dan batas entri."""
+        now = time.time() if now is None else now
+        result_json = json.dumps(result, default=str)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO results(cache_key, target_url, options, result, created_at, last_access, hit_count) "
+                "VALUES (?, ?, ?, ?, ?, ?, 0)",
+                (cache_key(url, options), normalize_url(url), json.dumps(options, sort_keys=True), result_json, now, now)
+            )
+            self._evict(now)
+
+    def _evict(self, now):
+        self._conn.execute("DELETE FROM results WHERE created_at < ?", (now - self.ttl_seconds,))
+        overflow = self._conn.execute("SELECT COUNT(*) FROM results").fetchone()[0] - self.max_entries
+        if overflow > 0:
+            self._conn.execute(
+                "DELETE FROM results WHERE cache_key IN (SELECT cache_key FROM results ORDER BY last_access LIMIT ?)",
+                (overflow,)
+            )
+            logger.debug(f"{overflow} entri cache hasil dibuang (LRU).")
+
+    def invalidate(self, url, options):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM results WHERE cache_key = ?", (cache_key(url, options),))
+
+    def count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
@@ -0,0 +1,169 @@
+# core/scheduler.py
+import os
+import sys
+import time
+import threading
+from collections import OrderedDict, deque
+from urllib.parse import urlsplit
+
+# Tambahkan path root proyek ke sys.path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+import config
+from utils.logger_config import setup_logger
+
+logger = setup_logger(__name__, config.LOG_LEVEL, config.LOG_FILE)
+
+# Jalur prioritas, dari yang paling didahulukan
+LANE_URGENT = "urgent"
+LANE_BULK = "bulk"
+LANES = (LANE_URGENT, LANE_BULK)
+
+
+def lane_rank(lane):
+    """Urutan jalur prioritas (0 = paling didahulukan); ValueError untuk jalur yang tidak dikenal."""
+    try:
+        return LANES.index(lane)
+    except ValueError:
+        raise ValueError(f"Jalur prioritas tidak dikenal: {lane} (pilihan: {', '.join(LANES)})") from None
+
+
+def host_key(url):
+    """Host yang dikenai batas kesopanan (hostname huruf kecil), atau None jika URL tidak punya host."""
+    try:
+        host = urlsplit(url).hostname
+    except (ValueError, AttributeError):
+        return None
+    return host.rstrip(".") if host else None
+
+
+class HostScheduler:
+    """
+    Penjadwal job batch di depan worker browser. Job dari host yang berbeda diambil bergiliran
+    (round-robin), sehingga ratusan URL dari satu host tidak memonopoli worker. Setiap host dibatasi
+    max_per_host kunjungan bersamaan dan jeda min_interval_seconds sebelum kunjungan berikutnya
+    (dihitung dari mulai maupun selesainya kunjungan sebelumnya). Worker memanggil release(job)
+    setelah kunjungan selesai. Job tanpa host (lihat host_key) tidak dibatasi. Job jalur "urgent" selalu
+    diambil sebelum "bulk" selama host-nya boleh dikunjungi; giliran host dihitung per jalur.
+    """
+
+    def __init__(self, max_per_host=None, min_interval_seconds=None):
+        self.max_per_host = config.SCHEDULER_MAX_PER_HOST if max_per_host is None else max_per_host
+        self.min_interval_seconds = config.SCHEDULER_MIN_INTERVAL_SECONDS if min_interval_seconds is None else min_interval_seconds
+        if self.max_per_host < 1:
+            raise ValueError("max_per_host minimal 1.")
+        self._lanes = [OrderedDict() for _ in LANES] # Per jalur: host -> deque job; urutan = giliran round-robin
+        self._active = {}
+        self._next_allowed = {}
+        self._leased = {} # id(job) -> host
+        self._pending = 0
+        self._closed = False
+        self._cancelled = False
+        self._cond = threading.Condition()
+
+    def submit(self, job, host=None, lane=None):
+        """
+        Menambahkan job (dict dengan 'target_url') pada jalur lane (default SCHEDULER_DEFAULT_LANE);
+        host default diambil dari target_url.
+        """
+        host = host if host is not None else host_key(job.get("target_url", ""))
+        rank = lane_rank(lane or config.SCHEDULER_DEFAULT_LANE)
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Scheduler sudah ditutup untuk job baru.")
+            self._lanes[rank].setdefault(host, deque()).append(job)
+            self._pending += 1
+            self._cond.notify()
+
+    def close(self):
+        """Tidak ada job baru lagi; acquire() mengembalikan None setelah semua job diambil."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def cancel(self):
+        """Membuang job yang belum diambil dan membangunkan semua pemanggil acquire()."""
+        with self._cond:
+            self._closed = self._cancelled = True
+            for hosts in self._lanes:
+                hosts.clear()
+            self._pending = 0
+            self._cond.notify_all()
+
+    def pending(self):
+        with self._cond:
+            return self._pending
+
+    def _host_ready(self, host, now):
+        if host is None:
+            return True
+        return self._active.get(host, 0) < self.max_per_host and self._next_allowed.get(host, 0) <= now
+
+    def _next_ready_in(self, now):
+        """Detik sampai host yang hanya tertahan jeda boleh dikunjungi lagi; None jika semua menunggu release()."""
+        waits = [self._next_allowed.get(host, 0) - now for hosts in self._lanes for host in hosts
+                 if self._active.get(host, 0) < self.max_per_host]
+        return max(0.0, min(waits)) if waits else None
+
+    def _pick(self, now):
+        for hosts in self._lanes:
+            for host in hosts:
+                if self._host_ready(host, now):
+                    jobs = hosts[host]
+                    job = jobs.popleft()
+                    if jobs:
+                        hosts.move_to_end(host) # Giliran host ini pindah ke belakang
+                    else:
+                        del hosts[host]
+                    self._pending -= 1
+                    return job, host
+        return None
+
+    def acquire(self, timeout=None):
+        """
+        Mengambil job berikutnya yang boleh dijalankan, menunggu jika semua host sedang penuh atau
+        dalam jeda. Mengembalikan None jika scheduler sudah ditutup dan kosong, dibatalkan, atau timeout habis.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while not self._cancelled:
+                now = time.monotonic()
+                picked = self._pick(now)
+                if picked:
+                    job, host = picked
+                    if host is not None:
+                        self._active[host] = self._active.get(host, 0) + 1
+                        self._next_allowed[host] = now + self.min_interval_seconds
+                        self._leased[id(job)] = host
+                    return job
+                if self._closed and not self._pending:
+                    return None
+                wait = self._next_ready_in(now)
+                if deadline is not None:
+                    remaining = deadline - now
+                    if remaining <= 0:
+                        return None
+                    wait = remaining if wait is None else min(wait, remaining)
+                self._cond.wait(wait)
+        return None
+
+    def release(self, job):
+        """Menandai kunjungan job selesai; membuka slot host dan memulai jeda berikutnya."""
+        with self._cond:
+            host = self._leased.pop(id(job), None)
+            if host is None:
+                return
+            self._active[host] -= 1
+            self._next_allowed[host] = max(self._next_allowed.get(host, 0), time.monotonic() + self.min_interval_seconds)
+            self._cond.notify_all()
+
+    def __iter__(self):
+        """Menghasilkan job sesuai jadwal sampai scheduler ditutup dan kosong (atau dibatalkan)."""
+        while True:
+            job = self.acquire()
+            if job is None:
+                return
+            yield job
@@ -3,6 +3,8 @@ import requests
 import time
 import os
 import json # Untuk json.JSONDecodeError jika diperlukan
+import base64
+import hashlib
 
 # Impor konfigurasi dan logger
 import sys
@@ -17,6 +19,9 @@ from utils.logger_config import setup_logger
 logger = setup_logger(__name__, config.LOG_LEVEL, config.LOG_FILE)
 
 VIRUSTOTAL_API_URL_DOMAIN_REPORT = "https://www.virustotal.com/api/v3/domains/"
+VIRUSTOTAL_API_URL_IP_REPORT = "https://www.virustotal.com/api/v3/ip_addresses/"
+VIRUSTOTAL_API_URL_URL_REPORT = "https://www.virustotal.com/api/v3/urls/"
+VIRUSTOTAL_API_URL_FILE_REPORT = "https://www.virustotal.com/api/v3/files/"
 
 class VirusTotalAnalyzer:
     def __init__(self, api_key=None):
@@ -38,15 +43,58 @@ class VirusTotalAnalyzer:
         :param domain: Domain yang akan diperiksa.
         :return: Dictionary berisi ringkasan laporan, atau None jika gagal atau API key tidak ada.
         """
+        return self._get_report(
+            api_url=f"{VIRUSTOTAL_API_URL_DOMAIN_REPORT}{domain}",
+            identity={"domain": domain},
+            label=f"domain '{domain}'",
+            link_to_report=f"https://www.virustotal.com/gui/domain/{domain}/detection"
+        )
+
+    def get_ip_report(self, ip_address):
+        """Mengambil laporan alamat IP dari VirusTotal."""
+        return self._get_report(
+            api_url=f"{VIRUSTOTAL_API_URL_IP_REPORT}{ip_address}",
+            identity={"indicator": ip_address, "indicator_type": "ip"},
+            label=f"IP '{ip_address}'",
+            link_to_report=f"https://www.virustotal.com/gui/ip-address/{ip_address}/detection"
+        )
+
+    def get_url_report(self, url):
+        """
+        Mengambil laporan URL dari VirusTotal.
+        ID URL pada API v3 adalah base64url dari URL tanpa padding '='.
+        """
+        url_id = base64.urlsafe_b64encode(url.encode()).decode().strip("=")
+        url_sha256 = hashlib.sha256(url.encode()).hexdigest()
+        return self._get_report(
+            api_url=f"{VIRUSTOTAL_API_URL_URL_REPORT}{url_id}",
+            identity={"indicator": url, "indicator_type": "url"},
+            label=f"URL '{url}'",
+            link_to_report=f"https://www.virustotal.com/gui/url/{url_sha256}/detection"
+        )
+
+    def get_file_report(self, file_hash):
+        """Mengambil laporan file (MD5/SHA1/SHA256) dari VirusTotal."""
+        return self._get_report(
+            api_url=f"{VIRUSTOTAL_API_URL_FILE_REPORT}{file_hash}",
+            identity={"indicator": file_hash, "indicator_type": "hash"},
+            label=f"hash '{file_hash}'",
+            link_to_report=f"https://www.virustotal.com/gui/file/{file_hash}/detection"
+        )
+
+    def _get_report(self, api_url, identity, label, link_to_report):
+        """
+        Meminta satu objek laporan dari API VirusTotal dan meringkasnya.
+        :param identity: Key identitas yang disertakan di setiap hasil (mis. {"domain": ...}).
+        """
         if not self.api_key:
-            logger.debug(f"Pemeriksaan VirusTotal untuk domain '{domain}' dilewati karena API key tidak ada.")
+            logger.debug(f"Pemeriksaan VirusTotal untuk {label} dilewati karena API key tidak ada.")
             return None
 
-        url = f"{VIRUSTOTAL_API_URL_DOMAIN_REPORT}{domain}"
-        logger.info(f"Meminta laporan VirusTotal untuk domain: {domain}")
+        logger.info(f"Meminta laporan VirusTotal untuk {label}")
         
         try:
-            response = requests.get(url, headers=self.headers)
+            response = requests.get(api_url, headers=self.headers)
             response.raise_for_status()  # Akan melempar HTTPError jika status code 4XX/5XX
 
             data = response.json()
@@ -55,8 +103,8 @@ class VirusTotalAnalyzer:
             last_analysis_stats = attributes.get("last_analysis_stats", {})
             total_votes = attributes.get("total_votes", {})
             
-            report_summary = {
-                "domain": domain,
+            report_summary = dict(identity)
+            report_summary.update({
                 "malicious": last_analysis_stats.get("malicious", 0),
                 "suspicious": last_analysis_stats.get("suspicious", 0),
                 "harmless": last_analysis_stats.get("harmless", 0),
@@ -66,9 +114,9 @@ class VirusTotalAnalyzer:
                 "total_votes_malicious": total_votes.get("malicious", 0),
                 "last_analysis_date": attributes.get("last_analysis_date"), 
                 "reputation": attributes.get("reputation"),
-                "link_to_report": f"https://www.virustotal.com/gui/domain/{domain}/detection"
-            }
-            logger.info(f"Laporan VirusTotal untuk '{domain}': Malicious={report_summary['malicious']}, Suspicious={report_summary['suspicious']}")
+                "link_to_report": link_to_report
+            })
+            logger.info(f"Laporan VirusTotal untuk {label}: Malicious={report_summary['malicious']}, Suspicious={report_summary['suspicious']}")
             return report_summary
 
         except requests.exceptions.HTTPError as http_err:
@@ -85,26 +133,26 @@ class VirusTotalAnalyzer:
                         elif isinstance(error_json["error"], str): 
                             error_message = error_json["error"]
             except json.JSONDecodeError: # Respons bukan JSON valid
-                logger.warning(f"Respons error dari VirusTotal untuk '{domain}' bukan JSON valid.")
+                logger.warning(f"Respons error dari VirusTotal untuk {label} bukan JSON valid.")
             except Exception as e_parse: # Error lain saat parsing
-                logger.warning(f"Error saat parsing JSON respons error dari VirusTotal untuk '{domain}': {e_parse}")
+                logger.warning(f"Error saat parsing JSON respons error dari VirusTotal untuk {label}: {e_parse}")
             # --- AKHIR PERUBAHAN ---
 
             if status_code == 401: 
                 logger.error(f"Error 401: API Key VirusTotal tidak valid atau tidak memiliki izin. Pesan: {error_message}")
             elif status_code == 429: 
-                logger.warning(f"Error 429: Batas permintaan API VirusTotal terlampaui untuk domain '{domain}'. Pesan: {error_message}")
+                logger.warning(f"Error 429: Batas permintaan API VirusTotal terlampaui untuk {label}. Pesan: {error_message}")
             else:
-                logger.error(f"HTTP error saat meminta laporan VirusTotal untuk '{domain}': {http_err} - Status: {status_code}, Pesan: {error_message}")
+                logger.error(f"HTTP error saat meminta laporan VirusTotal untuk {label}: {http_err} - Status: {status_code}, Pesan: {error_message}")
             
-            return {"domain": domain, "error": f"HTTP Error: {status_code}", "message": error_message}
+            return dict(identity, error=f"HTTP Error: {status_code}", message=error_message)
         
         except requests.exceptions.RequestException as req_err:
-            logger.error(f"Error koneksi saat meminta laporan VirusTotal untuk '{domain}': {req_err}")
-            return {"domain": domain, "error": "Connection Error", "message": str(req_err)}
+            logger.error(f"Error koneksi saat meminta laporan VirusTotal untuk {label}: {req_err}")
+            return dict(identity, error="Connection Error", message=str(req_err))
         except Exception as e:
-            logger.error(f"Error tak terduga saat memproses laporan VirusTotal untuk '{domain}': {e}", exc_info=True)
-            return {"domain": domain, "error": "Processing Error", "message": str(e)}
+            logger.error(f"Error tak terduga saat memproses laporan VirusTotal untuk {label}: {e}", exc_info=True)
+            return dict(identity, error="Processing Error", message=str(e))
 
 # ... (Bagian if __name__ == '__main__': tetap sama) ...
 if __name__ == '__main__':
@@ -1,6 +1,5 @@
 # main.py
 import os
-import json
 import time
 import argparse 
 import sys 
@@ -9,10 +8,10 @@ from urllib.parse import urlparse
 # Impor modul-modul yang sudah kita buat
 import config
 from utils.logger_config import setup_logger, ANSIColors
-from core.browser_operations import BrowserAutomation
-from core.report_generator import HTMLReportGenerator
-from core.ioc_extractor import IOCExtractor 
-from core.threat_intelligence import VirusTotalAnalyzer
+
+# Modul inti (Playwright, Jinja2, requests, numpy, ...) diimpor di dalam fungsi yang memakainya,
+# sehingga `--help`, `--query-ioc` dan `--reprocess` tidak membayar biaya impor tahap yang tidak berjalan.
+# Anggaran waktu startup dijaga oleh benchmarks/bench_startup.py dan tests/test_startup_imports.py.
 
 # Setup logger utama untuk aplikasi
 # Kita akan memindahkan inisialisasi logger utama ke dalam fungsi yang dipanggil
@@ -20,43 +19,9 @@ from core.threat_intelligence import VirusTotalAnalyzer
 # logger = setup_logger('websandbox_main', config.LOG_LEVEL, config.LOG_FILE) # Dipindahkan
 
 def get_main_logger():
-    """Fungsi untuk mendapatkan instance logger utama."""
+    """Fungsi untuk mendapatkan instance logger utama (murah dipanggil berulang; handler disiapkan sekali per proses)."""
     return setup_logger('websandbox_main', config.LOG_LEVEL, config.LOG_FILE)
 
-def save_network_log(network_data, target_url, project_root_path):
-    logger = get_main_logger() # Gunakan logger
-    if not network_data:
-        logger.info("Tidak ada data jaringan untuk disimpan.")
-        return None
-    # ... (sisa kode save_network_log tetap sama) ...
-    log_dir_path = os.path.join(project_root_path, config.NETWORK_LOG_DIR)
-    if not os.path.exists(log_dir_path):
-        try:
-            os.makedirs(log_dir_path)
-            logger.info(f"Direktori {log_dir_path} berhasil dibuat.")
-        except OSError as e:
-            logger.error(f"Gagal membuat direktori {log_dir_path}: {e}", exc_info=True)
-            return None
-    try:
-        url_slug = target_url.split('//')[-1].split('/')[0].replace('.', '_').replace(':', '_')
-    except Exception:
-        url_slug = "invalid_url"
-    timestamp_str = time.strftime("%Y%m%d-%H%M%S")
-    filename = f"{url_slug}_{timestamp_str}_{config.DEFAULT_NETWORK_LOG_FILENAME}"
-    filepath = os.path.join(log_dir_path, filename)
-    try:
-        with open(filepath, 'w') as f:
-            json.dump(network_data, f, indent=4)
-        logger.info(f"Log jaringan berhasil disimpan ke: {filepath}")
-        return filepath
-    except IOError as e:
-        logger.error(f"Gagal menyimpan log jaringan ke {filepath}: {e}", exc_info=True)
-        return None
-    except Exception as e:
-        logger.error(f"Terjadi error tak terduga saat menyimpan log jaringan: {e}", exc_info=True)
-        return None
-
-
 def ensure_url_scheme(url_string):
     logger = get_main_logger() # Gunakan logger
     if not url_string:
@@ -146,69 +111,35 @@ def print_banner():
     print(banner)
 
 # --- BARU: Fungsi Inti Analisis ---
-def run_analysis_pipeline(target_url, browser_type, headless_mode, threat_intel_enabled, project_root_path):
+def run_analysis_pipeline(target_url, browser_type, headless_mode, threat_intel_enabled, project_root_path,
+                          deferred_intel=False, per_registrable_domain=None, ioc_store_enabled=None,
+                          event_store_enabled=None):
     """
     Menjalankan alur kerja analisis inti.
     Mengembalikan dictionary berisi path ke file output dan data analisis.
+    Jika deferred_intel=True, laporan ditulis segera dan threat intel berjalan di latar belakang;
+    enricher dikembalikan di key "intel_enricher" agar pemanggil bisa menunggunya.
+    Jika per_registrable_domain=True, domain diperiksa per eTLD+1 (default dari config).
+    Jika ioc_store_enabled=True, hasil dicatat ke indeks IOC lintas analisis (default dari config).
+    Jika event_store_enabled=True, event ditambahkan ke event store kolumnar (default dari config).
     """
+    from core.pipeline import AnalysisStages
     logger = get_main_logger() # Pastikan logger diinisialisasi di sini
     logger.info(f"Memulai pipeline analisis untuk: {target_url}")
     logger.info(f"Browser: {browser_type}, Headless: {headless_mode}, Threat Intel: {threat_intel_enabled}")
 
-    automation = BrowserAutomation(
-        target_url=target_url,
-        browser_type=browser_type,
-        headless_mode=headless_mode
+    # Tahap yang sama dengan pipeline batch (--batch), dijalankan berurutan untuk satu URL
+    stages = AnalysisStages(
+        browser_type, headless_mode, threat_intel_enabled=threat_intel_enabled,
+        per_registrable_domain=per_registrable_domain, ioc_store_enabled=ioc_store_enabled,
+        event_store_enabled=event_store_enabled, deferred_intel=deferred_intel,
+        network_log_dir=os.path.join(project_root_path, config.NETWORK_LOG_DIR)
     )
-
-    analysis_timestamp_start = time.strftime("%Y-%m-%d %H:%M:%S")
-    screenshot_path, network_events, local_storage, session_storage, cookies, dynamic_js_calls = automation.analyze_page()
-    
-    extracted_iocs = {} 
-    if network_events:
-        logger.info("Memulai ekstraksi IOC dari data jaringan...")
-        ioc_extractor = IOCExtractor(network_events)
-        extracted_iocs = ioc_extractor.extract()
-        logger.info(f"Ekstraksi IOC selesai. {len(extracted_iocs.get('unique_domains', []))} domain unik ditemukan.")
-    else:
-        logger.info("Tidak ada event jaringan, ekstraksi IOC dilewati.")
-
-    virustotal_reports = []
-    if threat_intel_enabled and config.VIRUSTOTAL_API_KEY and extracted_iocs.get("unique_domains"):
-        logger.info("Memulai pemeriksaan reputasi domain dengan VirusTotal...")
-        vt_analyzer = VirusTotalAnalyzer()
-        unique_domains_to_check = extracted_iocs.get("unique_domains", [])
-        for i, domain in enumerate(unique_domains_to_check):
-            report = vt_analyzer.get_domain_report(domain)
-            if report:
-                virustotal_reports.append(report)
-            if i < len(unique_domains_to_check) - 1: 
-                logger.info(f"Menunggu {config.VIRUSTOTAL_REQUEST_DELAY} detik sebelum permintaan VirusTotal berikutnya...")
-                time.sleep(config.VIRUSTOTAL_REQUEST_DELAY)
-        logger.info(f"Pemeriksaan VirusTotal selesai. {len(virustotal_reports)} laporan diterima.")
-    elif not config.VIRUSTOTAL_API_KEY and threat_intel_enabled:
-        logger.warning("Pemeriksaan Threat Intelligence diaktifkan tetapi VIRUSTOTAL_API_KEY tidak diatur di config.py.")
-    else:
-        logger.info("Pemeriksaan Threat Intelligence (VirusTotal) dinonaktifkan atau tidak ada domain untuk diperiksa.")
-    
-    report_generator = HTMLReportGenerator() 
-    analysis_data_for_report = {
-        'target_url': target_url,
-        'analysis_timestamp': analysis_timestamp_start,
-        'screenshot_path': screenshot_path,
-        'network_events': network_events,
-        'local_storage': local_storage,        
-        'session_storage': session_storage,
-        'extracted_iocs': extracted_iocs,
-        'cookies': cookies,
-        'dynamic_js_calls': dynamic_js_calls,
-        'virustotal_reports': virustotal_reports 
-    }
-    html_report_path = report_generator.generate_report(analysis_data_for_report)
-
-    network_log_path = None
-    if network_events:
-        network_log_path = save_network_log(network_events, target_url, project_root_path)
+    job = {"target_url": target_url}
+    for stage in (stages.capture, stages.extract, stages.enrich, stages.render, stages.persist):
+        job = stage(job)
+    screenshot_path, network_log_path, html_report_path = job["screenshot_path"], job["network_log_path"], job["html_report_path"]
+    local_storage, session_storage, cookies, dynamic_js_calls = job["local_storage"], job["session_storage"], job["cookies"], job["dynamic_js_calls"]
 
     # Logging hasil (bisa dipindahkan ke luar jika fungsi ini hanya mengembalikan data)
     if screenshot_path: logger.info(f"Screenshot disimpan di: {screenshot_path}")
@@ -225,10 +156,254 @@ def run_analysis_pipeline(target_url, browser_type, headless_mode, threat_intel_
         "html_report_path": html_report_path,
         "screenshot_path": screenshot_path,
         "network_log_path": network_log_path,
-        "analysis_data": analysis_data_for_report # Mengembalikan semua data untuk verifikasi tes
+        "threat_intel_path": job["threat_intel_path"],
+        "intel_enricher": job["intel_enricher"],
+        "analysis_data": job["analysis_data"] # Mengembalikan semua data untuk verifikasi tes
     }
 # --- AKHIR FUNGSI BARU ---
 
+def query_ioc_history(value, limit=50):
+    """Menampilkan analisis sebelumnya yang memuat nilai IOC. Mengembalikan kode keluar (0 ditemukan, 1 tidak)."""
+    import sqlite3
+    from core.ioc_store import IOCStore
+    logger = get_main_logger()
+    try:
+        with IOCStore() as ioc_store:
+            start = time.perf_counter()
+            rows = ioc_store.find_analyses(value, limit=limit)
+            elapsed_ms = (time.perf_counter() - start) * 1000
+    except sqlite3.Error as e:
+        logger.error(f"Gagal membaca IOC store: {e}", exc_info=True)
+        return 1
+    if not rows:
+        print(f"'{value}' belum pernah terlihat di analisis mana pun ({elapsed_ms:.1f} ms).")
+        return 1
+    print(f"'{value}' terlihat di {len(rows)} analisis ({elapsed_ms:.1f} ms):")
+    for row in rows:
+        print(f"  #{row['analysis_id']} [{row['analyzed_at']}] {row['target_url']} ({row['ioc_type']}, {row['hit_count']}x)")
+        if row['report_path']:
+            print(f"      Laporan: {row['report_path']}")
+    return 0
+
+def open_result_cache():
+    """Membuka cache hasil analisis, atau None jika dinonaktifkan atau gagal dibuka (analisis tetap berjalan)."""
+    if not config.RESULT_CACHE_ENABLED:
+        return None
+    import sqlite3
+    from core.result_cache import ResultCache
+    try:
+        return ResultCache()
+    except (sqlite3.Error, OSError) as e:
+        get_main_logger().warning(f"Cache hasil analisis tidak bisa dibuka, analisis dijalankan tanpa cache: {e}")
+        return None
+
+def lookup_cached_result(result_cache, target_url, options):
+    """Hasil tersimpan untuk URL+opsi, atau None (kesalahan cache dianggap miss)."""
+    import sqlite3
+    if not result_cache:
+        return None
+    try:
+        return result_cache.get(target_url, options)
+    except (sqlite3.Error, ValueError) as e:
+        get_main_logger().warning(f"Gagal membaca cache hasil untuk {target_url}: {e}")
+        return None
+
+def store_cached_result(result_cache, target_url, options, entry):
+    import sqlite3
+    try:
+        result_cache.put(target_url, options, entry)
+    except sqlite3.Error as e:
+        get_main_logger().warning(f"Gagal menyimpan hasil {target_url} ke cache: {e}")
+
+def cache_entry(result, summary):
+    """Entri cache: path output analisis plus ringkasan kecil (format summarize_analysis) untuk dashboard batch."""
+    entry = {key: result.get(key) for key in ("html_report_path", "screenshot_path", "network_log_path", "threat_intel_path")}
+    entry["summary"] = summary
+    return entry
+
+def iter_batch_entries(batch_file, default_lane=None):
+    """
+    Membaca (url, jalur) dari file batch baris per baris; baris berbentuk "URL [urgent|bulk]" (baris
+    kosong dan komentar '#' dilewati). Jalur yang tidak ditulis atau tidak dikenal memakai default_lane.
+    """
+    from core.scheduler import LANES
+    default_lane = default_lane or config.SCHEDULER_DEFAULT_LANE
+    with open(batch_file, "r", encoding="utf-8") as f:
+        for line in f:
+            fields = line.split()
+            if not fields or fields[0].startswith("#"):
+                continue
+            lane = fields[1].lower() if len(fields) > 1 else default_lane
+            if lane not in LANES:
+                get_main_logger().warning(f"Jalur prioritas '{fields[1]}' untuk {fields[0]} tidak dikenal; memakai '{default_lane}'.")
+                lane = default_lane
+            yield fields[0], lane
+
+def iter_batch_urls(batch_file):
+    """Membaca URL dari file batch (lihat iter_batch_entries)."""
+    for url, _ in iter_batch_entries(batch_file):
+        yield url
+
+def run_batch(batch_file, browser_type, headless_mode, threat_intel_enabled,
+              per_registrable_domain=None, ioc_store_enabled=None, event_store_enabled=None, force=False,
+              restart=False, priority=None):
+    """
+    Menganalisis setiap URL di file batch melalui pipeline bertahap (capture -> extract -> enrich ->
+    render -> persist) dengan antrean terbatas, lalu menulis satu dashboard agregat. Browser tidak
+    menunggu render atau threat intel; yang keluar dari pipeline hanya ringkasan kecil per analisis.
+    URL dijadwalkan bergiliran antar host dengan batas kunjungan bersamaan dan jeda per host (SCHEDULER_*);
+    URL jalur "urgent" (ditandai di file batch, atau semua URL jika priority="urgent") diambil lebih dulu.
+    Progres per URL dicatat di ledger job: menjalankan ulang file yang sama melewati URL yang sudah
+    selesai dan mengulang yang gagal selama BATCH_MAX_ATTEMPTS belum habis (restart=True mulai dari awal).
+    URL yang masih ada di cache hasil tidak dianalisis ulang (kecuali force=True).
+    Mengembalikan path dashboard (None jika gagal).
+    """
+    from core.aggregate_report import AggregateReportBuilder, summarize_analysis
+    from core.pipeline import StagedPipeline, AnalysisStages
+    from core.result_cache import analysis_options
+    from core.job_ledger import JobLedger, STATE_DONE
+    from core.scheduler import HostScheduler
+    logger = get_main_logger()
+    ledger = JobLedger()
+    lanes = {ensure_url_scheme(url) or url: lane for url, lane in iter_batch_entries(batch_file, priority)}
+    batch_id = ledger.start_batch(batch_file, list(lanes), restart=restart)
+    runnable = ledger.runnable(batch_id)
+    previous = ledger.counts(batch_id)
+    logger.info(f"Batch {batch_id}: {len(runnable)} URL dijalankan, {previous.get(STATE_DONE, 0)} sudah selesai di run sebelumnya.")
+    result_cache = open_result_cache()
+    cache_options = analysis_options(browser_type, headless_mode, threat_intel_enabled, per_registrable_domain)
+
+    scheduler = HostScheduler()
+    for target_url in runnable:
+        cached = None if force else lookup_cached_result(result_cache, target_url, cache_options)
+        if cached and cached.get("summary"):
+            logger.info(f"{target_url}: memakai hasil cache ({cached['age_seconds']:.0f} dtk lalu).")
+            ledger.mark_done(batch_id, target_url, cached)
+            continue
+        scheduler.submit({"target_url": target_url}, lane=lanes.get(target_url))
+    scheduler.close()
+
+    def pending_jobs():
+        # Job keluar dari scheduler hanya saat host-nya boleh dikunjungi; slot dilepas oleh tahap capture
+        for job in scheduler:
+            ledger.mark_running(batch_id, job["target_url"])
+            yield job
+
+    stages = AnalysisStages(
+        browser_type, headless_mode, threat_intel_enabled=threat_intel_enabled,
+        per_registrable_domain=per_registrable_domain, ioc_store_enabled=ioc_store_enabled,
+        event_store_enabled=event_store_enabled,
+        summarize=lambda job: summarize_analysis(job, job["html_report_path"]), scheduler=scheduler
+    )
+    try:
+        for result in StagedPipeline(stages.build()).run(pending_jobs()):
+            if result.get("error"):
+                logger.error(f"Analisis batch untuk {result['target_url']} gagal: {result['error']}")
+                ledger.mark_failed(batch_id, result["target_url"], result["error"])
+                continue
+            ledger.mark_done(batch_id, result["target_url"], result)
+            if result_cache and result.get("html_report_path"):
+                store_cached_result(result_cache, result["target_url"], cache_options, cache_entry(result, result["summary"]))
+
+        # Dashboard disusun dari ledger, sehingga mencakup URL yang selesai di run sebelumnya
+        dashboard = AggregateReportBuilder()
+        for job in ledger.results(batch_id):
+            if job["state"] == STATE_DONE and job["summary"]:
+                dashboard.add_analysis(job["summary"])
+            else:
+                dashboard.add_analysis({"target_url": job["target_url"], "error": job["last_error"] or job["state"]})
+        counts = ledger.counts(batch_id)
+        logger.info(f"Batch {batch_id} selesai: " + ", ".join(f"{state}: {total}" for state, total in sorted(counts.items())))
+    finally:
+        scheduler.cancel()
+        ledger.close()
+        if result_cache:
+            result_cache.close()
+    return dashboard.write()
+
+def analyze_queued_job(payload):
+    """Handler worker antrean: menjalankan run_analysis_pipeline untuk satu payload dan mengembalikan path hasilnya."""
+    import socket
+    results = run_analysis_pipeline(
+        target_url=payload["target_url"],
+        browser_type=payload.get("browser") or config.BROWSER_TYPE,
+        headless_mode=payload.get("headless", config.HEADLESS_MODE),
+        threat_intel_enabled=payload.get("threat_intel", config.THREAT_INTEL_ENABLED),
+        project_root_path=os.path.dirname(os.path.abspath(__file__)),
+        per_registrable_domain=payload.get("per_registrable_domain")
+    )
+    if not results.get("html_report_path"):
+        raise RuntimeError("Analisis tidak menghasilkan laporan HTML.")
+    result = {key: results.get(key) for key in ("html_report_path", "screenshot_path", "network_log_path", "threat_intel_path")}
+    result["host"] = socket.gethostname() # Path hasil berada di host worker ini
+    return result
+
+def enqueue_batch(batch_file, options, queue_path=None, lane=None, submitter=None):
+    """
+    Memasukkan setiap URL di file batch (atau satu URL, jika batch_file bukan file) ke antrean job bersama
+    pada jalur prioritas lane ("urgent"/"bulk"; baris file batch boleh menulis jalurnya sendiri).
+    Mengembalikan jumlah job.
+    """
+    from core.job_queue import open_job_queue
+    lane = lane or config.SCHEDULER_DEFAULT_LANE
+    entries = iter_batch_entries(batch_file, lane) if os.path.isfile(batch_file) else [(batch_file, lane)]
+    by_lane = {}
+    for url, entry_lane in entries:
+        by_lane.setdefault(entry_lane, []).append({"target_url": ensure_url_scheme(url) or url, **options})
+    count = 0
+    with open_job_queue(queue_path) as job_queue:
+        for entry_lane, payloads in by_lane.items():
+            count += job_queue.enqueue_many(payloads, lane=entry_lane, submitter=submitter)
+    get_main_logger().info(f"{count} URL dari {batch_file} dimasukkan ke antrean job (jalur {lane or config.SCHEDULER_DEFAULT_LANE}).")
+    return count
+
+def run_queue_workers(queue_path=None, threads=1, drain=False):
+    """
+    Menjalankan worker antrean di host ini (satu koneksi antrean per thread). Kapasitas ditambah dengan
+    menjalankan perintah yang sama di host lain yang memakai file antrean yang sama.
+    Ctrl+C menghentikan pengambilan job baru; job yang sedang berjalan diselesaikan lebih dulu.
+    Mengembalikan (jumlah job diproses, jumlah job gagal).
+    """
+    import threading
+    from core.job_queue import open_job_queue, QueueWorker
+    logger = get_main_logger()
+    stop_event = threading.Event()
+    workers = []
+
+    def work():
+        with open_job_queue(queue_path) as job_queue:
+            worker = QueueWorker(job_queue, analyze_queued_job)
+            workers.append(worker)
+            worker.run(drain=drain, stop_event=stop_event)
+
+    worker_threads = [threading.Thread(target=work, name=f"queue-worker-{index}", daemon=True) for index in range(max(1, threads))]
+    for thread in worker_threads:
+        thread.start()
+    try:
+        for thread in worker_threads:
+            while thread.is_alive():
+                thread.join(timeout=0.5)
+    except KeyboardInterrupt:
+        logger.warning("Worker antrean dihentikan; menunggu job yang sedang berjalan selesai...")
+        stop_event.set()
+        for thread in worker_threads:
+            thread.join()
+    processed = sum(worker.processed for worker in workers)
+    failed = sum(worker.failed for worker in workers)
+    logger.info(f"Worker antrean selesai: {processed} job berhasil, {failed} gagal.")
+    return processed, failed
+
+def print_queue_status(queue_path=None, requeue_dead=False):
+    from core.job_queue import open_job_queue
+    with open_job_queue(queue_path) as job_queue:
+        if requeue_dead:
+            print(f"{job_queue.requeue_dead()} job dead-letter dimasukkan kembali ke antrean.")
+        stats = job_queue.stats()
+        print("Status antrean: " + (", ".join(f"{state}: {total}" for state, total in sorted(stats.items())) or "kosong"))
+        for job in job_queue.dead_letters(limit=20):
+            print(f"  [dead] #{job['id']} {job['payload'].get('target_url')} ({job['attempts']}x): {job['last_error']}")
+    return 0
+
 def main():
     logger = get_main_logger() # Inisialisasi logger utama di sini
     if sys.stdout.isatty(): 
@@ -245,10 +420,63 @@ def main():
     parser.add_argument("-i", "--interactive", action="store_true", help="Jalankan dalam mode interaktif untuk memasukkan parameter.")
     parser.add_argument("-b", "--browser", choices=['chromium', 'firefox', 'webkit'], default=None, help=f"Tipe browser yang digunakan (default dari config: {config.BROWSER_TYPE}).")
     parser.add_argument("--headless", choices=['true', 'false'], default=None, help=f"Jalankan browser dalam mode headless (default dari config: {'true' if config.HEADLESS_MODE else 'false'}).")
-    parser.add_argument("--no-threat-intel", action="store_false", dest="threat_intel", default=config.THREAT_INTEL_ENABLED, help="Nonaktifkan pemeriksaan threat intelligence (VirusTotal).")
+    parser.add_argument("--no-threat-intel", action="store_false", dest="threat_intel", default=config.THREAT_INTEL_ENABLED, help="Nonaktifkan pemeriksaan threat intelligence (provider di config.THREAT_INTEL_PROVIDERS).")
+    parser.add_argument("--deferred-intel", action="store_true", default=config.THREAT_INTEL_DEFERRED, help="Tulis laporan segera dan jalankan threat intelligence di latar belakang (laporan dirender ulang saat hasil masuk).")
+    parser.add_argument("--no-ioc-store", action="store_false", dest="ioc_store", default=config.IOC_STORE_ENABLED, help="Jangan catat analisis ini ke indeks IOC lintas analisis.")
+    parser.add_argument("--no-event-store", action="store_false", dest="event_store", default=config.EVENT_STORE_ENABLED, help="Jangan tambahkan event analisis ini ke event store kolumnar.")
+    parser.add_argument("--query-ioc", metavar="NILAI", default=None, help="Cari analisis sebelumnya yang memuat domain/IP/URL/hash ini, lalu keluar.")
+    parser.add_argument("--reprocess", nargs='?', const=config.NETWORK_LOG_DIR, default=None, metavar="DIR", help=f"Proses ulang log jaringan tersimpan tanpa browser (default: {config.NETWORK_LOG_DIR}), lalu keluar.")
+    parser.add_argument("--reprocess-intel", action="store_true", help="Sertakan pemeriksaan threat intel saat --reprocess.")
+    parser.add_argument("--workers", type=int, default=None, help="Jumlah proses worker untuk --reprocess (default: jumlah core CPU), atau jumlah thread worker untuk --worker (default: 1).")
+    parser.add_argument("--batch", metavar="FILE", default=None, help="Analisis setiap URL di FILE (satu per baris) dan buat dashboard batch, lalu keluar.")
+    parser.add_argument("--queue", metavar="PATH", default=None, help=f"File antrean job bersama (default dari config: {config.JOB_QUEUE_PATH}); letakkan di mount bersama untuk worker multi-host.")
+    parser.add_argument("--enqueue", metavar="FILE_ATAU_URL", default=None, help="Masukkan setiap URL di FILE (atau satu URL) ke antrean job bersama (dengan opsi browser/headless/threat intel saat ini), lalu keluar.")
+    parser.add_argument("--priority", choices=['urgent', 'bulk'], default=None, help=f"Jalur prioritas untuk --enqueue dan --batch (untuk baris file tanpa jalur); job 'urgent' diambil sebelum 'bulk' (default dari config: {config.SCHEDULER_DEFAULT_LANE}).")
+    parser.add_argument("--submitter", metavar="NAMA", default=None, help="Nama pengirim untuk --enqueue; worker melayani pengirim secara bergiliran (default: user OS).")
+    parser.add_argument("--worker", action="store_true", help="Jalankan worker yang mengambil dan menganalisis job dari antrean bersama.")
+    parser.add_argument("--drain", action="store_true", help="Dengan --worker: berhenti saat tidak ada job yang siap diambil.")
+    parser.add_argument("--queue-status", action="store_true", help="Tampilkan jumlah job per state dan dead-letter di antrean, lalu keluar.")
+    parser.add_argument("--requeue-dead", action="store_true", help="Masukkan kembali semua job dead-letter ke antrean, lalu keluar.")
+    parser.add_argument("--restart", action="store_true", help="Abaikan progres --batch sebelumnya untuk FILE dan jalankan semua URL dari awal.")
+    parser.add_argument("--force", action="store_true", help="Abaikan cache hasil analisis dan jalankan analisis baru (hasilnya tetap disimpan ke cache).")
+    parser.add_argument("--intel-per-registrable-domain", action="store_true", default=config.THREAT_INTEL_PER_REGISTRABLE_DOMAIN, help="Periksa threat intel sekali per domain terdaftar (eTLD+1), bukan per hostname.")
 
     args = parser.parse_args()
 
+    if args.query_ioc:
+        sys.exit(query_ioc_history(args.query_ioc))
+    if args.queue_status or args.requeue_dead:
+        sys.exit(print_queue_status(args.queue, requeue_dead=args.requeue_dead))
+    if args.enqueue:
+        from core.result_cache import analysis_options
+        options = analysis_options(
+            args.browser or config.BROWSER_TYPE,
+            config.HEADLESS_MODE if args.headless is None else args.headless == 'true',
+            args.threat_intel, args.intel_per_registrable_domain
+        )
+        sys.exit(0 if enqueue_batch(args.enqueue, options, args.queue, lane=args.priority, submitter=args.submitter) else 1)
+    if args.worker:
+        processed, failed = run_queue_workers(args.queue, threads=args.workers or 1, drain=args.drain)
+        sys.exit(1 if failed else 0)
+    if args.reprocess:
+        from core.reprocessor import run_reprocess
+        results = run_reprocess(log_dir=args.reprocess, threat_intel_enabled=args.reprocess_intel, max_workers=args.workers)
+        sys.exit(1 if any(summary["error"] for summary in results) else 0)
+    if args.batch:
+        dashboard_path = run_batch(
+            args.batch,
+            browser_type=args.browser or config.BROWSER_TYPE,
+            headless_mode=config.HEADLESS_MODE if args.headless is None else args.headless == 'true',
+            threat_intel_enabled=args.threat_intel,
+            per_registrable_domain=args.intel_per_registrable_domain,
+            ioc_store_enabled=args.ioc_store,
+            event_store_enabled=args.event_store,
+            force=args.force,
+            restart=args.restart,
+            priority=args.priority
+        )
+        sys.exit(0 if dashboard_path else 1)
+
     target_url_to_analyze = args.url
     browser_type_to_use = args.browser
     headless_mode_input = args.headless
@@ -325,16 +553,53 @@ def main():
         else: headless_mode_to_use = headless_mode_input == 'true'
         threat_intel_enabled_final = threat_intel_enabled_arg
     
+    from core.result_cache import analysis_options
+    cache_options = analysis_options(browser_type_to_use, headless_mode_to_use, threat_intel_enabled_final,
+                                     args.intel_per_registrable_domain)
+    result_cache = open_result_cache()
+    cached = None if args.force else lookup_cached_result(result_cache, target_url_to_analyze, cache_options)
+    if cached:
+        result_cache.close()
+        logger.info(f"Hasil cache untuk {target_url_to_analyze} ({cached['age_seconds']:.0f} dtk lalu, tanpa browser). Gunakan --force untuk analisis baru.")
+        logger.info(f"Laporan HTML: {cached['html_report_path']}")
+        if cached.get("network_log_path"): logger.info(f"Log jaringan: {cached['network_log_path']}")
+        if cached.get("screenshot_path"): logger.info(f"Screenshot: {cached['screenshot_path']}")
+        return
+
     # --- PERUBAHAN: Memanggil fungsi pipeline analisis ---
     analysis_results = run_analysis_pipeline(
         target_url=target_url_to_analyze,
         browser_type=browser_type_to_use,
         headless_mode=headless_mode_to_use,
         threat_intel_enabled=threat_intel_enabled_final,
-        project_root_path=project_root_path
+        project_root_path=project_root_path,
+        deferred_intel=args.deferred_intel,
+        per_registrable_domain=args.intel_per_registrable_domain,
+        ioc_store_enabled=args.ioc_store,
+        event_store_enabled=args.event_store
     )
     # --- AKHIR PERUBAHAN ---
 
+    intel_enricher = analysis_results.get("intel_enricher")
+    intel_complete = True
+    if intel_enricher:
+        logger.info(f"Laporan sudah bisa dibuka: {analysis_results.get('html_report_path')}")
+        logger.info(f"Menunggu enrichment threat intel latar belakang ({len(intel_enricher.pending_indicators)} indikator)...")
+        try:
+            intel_enricher.wait()
+        except KeyboardInterrupt:
+            logger.warning("Enrichment dihentikan oleh pengguna. Laporan berisi hasil yang sudah diterima.")
+            intel_enricher.stop()
+            intel_enricher.wait()
+            intel_complete = False
+
+    if result_cache:
+        if intel_complete and analysis_results.get("html_report_path"):
+            from core.aggregate_report import summarize_analysis
+            summary = summarize_analysis(analysis_results["analysis_data"], analysis_results["html_report_path"])
+            store_cached_result(result_cache, target_url_to_analyze, cache_options, cache_entry(analysis_results, summary))
+        result_cache.close()
+
     logger.info("="*50)
     logger.info("Analisis Web Sandbox Selesai (dari main.py)") # Diubah sedikit untuk membedakan
     logger.info("="*50)
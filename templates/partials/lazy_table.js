@@ -0,0 +1,141 @@
+// DecompressionStream belum tersedia di semua browser (mis. Safari < 16.4, Firefox < 113)
+function canDecodeDataIsland(element) {
+    return element.dataset.encoding === 'json' || 'DecompressionStream' in window;
+}
+// Membaca data island (JSON terkompresi gzip+base64 atau JSON biasa) yang disematkan di laporan
+async function loadDataIsland(elementId) {
+    const element = document.getElementById(elementId);
+    if (!element) return null;
+    const text = element.textContent.trim();
+    if (element.dataset.encoding === 'json') return JSON.parse(text);
+    if (!canDecodeDataIsland(element)) throw new Error('browser tidak mendukung DecompressionStream');
+    const bytes = Uint8Array.from(atob(text), c => c.charCodeAt(0));
+    const stream = new Blob([bytes]).stream().pipeThrough(new DecompressionStream('gzip'));
+    return JSON.parse(await new Response(stream).text());
+}
+// Tabel berhalaman: hanya baris di halaman aktif yang dibuat sebagai elemen DOM.
+// Atribut tabel: data-url-col = kolom berisi URL eksternal (hanya http/https yang dijadikan tautan),
+// data-link-col = kolom berisi path relatif ke laporan lain (tautan drill-down)
+function createLazyTable(tableId, rows, pageSize) {
+    const table = document.getElementById(tableId);
+    const urlCol = table.dataset.urlCol === undefined ? -1 : parseInt(table.dataset.urlCol, 10);
+    const linkCol = table.dataset.linkCol === undefined ? -1 : parseInt(table.dataset.linkCol, 10);
+    const tbody = table.querySelector('tbody');
+    const pager = document.getElementById(tableId + 'Pager');
+    const info = pager.querySelector('.lazy-pager-info');
+    const searchIndex = rows.map(row => row.join(' ').toLowerCase());
+    let visible = rows.map((row, i) => i);
+    let page = 0;
+    function buildCell(value, colIndex) {
+        const td = document.createElement('td');
+        const text = value === null || value === undefined ? '' : String(value);
+        if (colIndex === linkCol && text && !/^[a-z][a-z0-9+.-]*:/i.test(text)) {
+            const link = document.createElement('a');
+            link.href = text;
+            link.target = '_blank';
+            link.textContent = 'Buka laporan';
+            td.appendChild(link);
+        } else if (colIndex === urlCol) {
+            td.className = 'url-cell';
+            const display = text.length > 100 ? text.slice(0, 100) + '...' : text;
+            if (/^https?:/i.test(text)) {
+                const link = document.createElement('a');
+                link.href = text;
+                link.target = '_blank';
+                link.title = text;
+                link.textContent = display;
+                td.appendChild(link);
+            } else {
+                td.textContent = display;
+            }
+        } else {
+            td.textContent = text;
+        }
+        return td;
+    }
+    function render() {
+        const pageCount = Math.max(1, Math.ceil(visible.length / pageSize));
+        page = Math.min(page, pageCount - 1);
+        const fragment = document.createDocumentFragment();
+        visible.slice(page * pageSize, (page + 1) * pageSize).forEach(rowIndex => {
+            const tr = document.createElement('tr');
+            rows[rowIndex].forEach((value, colIndex) => tr.appendChild(buildCell(value, colIndex)));
+            fragment.appendChild(tr);
+        });
+        tbody.replaceChildren(fragment);
+        info.textContent = `Halaman ${page + 1} dari ${pageCount} (${visible.length} dari ${rows.length} baris)`;
+        pager.querySelector('[data-page-step="-1"]').disabled = page === 0;
+        pager.querySelector('[data-page-step="1"]').disabled = page >= pageCount - 1;
+    }
+    pager.querySelectorAll('button[data-page-step]').forEach(button => {
+        button.addEventListener('click', () => { page += parseInt(button.dataset.pageStep, 10); render(); });
+    });
+    const filterInput = document.querySelector(`[data-lazy-table-id="${tableId}"]`);
+    if (filterInput) {
+        filterInput.addEventListener('keyup', () => {
+            const filterValue = filterInput.value.toLowerCase();
+            visible = [];
+            searchIndex.forEach((text, i) => { if (text.includes(filterValue)) visible.push(i); });
+            page = 0;
+            render();
+        });
+    }
+    table.querySelectorAll('thead th[data-sort-col]').forEach(header => {
+        let ascending = false;
+        header.addEventListener('click', () => {
+            const colIndex = parseInt(header.dataset.sortCol, 10);
+            const isNumber = header.dataset.sortType === 'number';
+            ascending = !ascending;
+            table.querySelectorAll('thead th').forEach(th => th.classList.remove('sort-asc', 'sort-desc'));
+            header.classList.add(ascending ? 'sort-asc' : 'sort-desc');
+            visible.sort((a, b) => {
+                let valA = rows[a][colIndex], valB = rows[b][colIndex];
+                if (isNumber) {
+                    valA = parseFloat(valA); valB = parseFloat(valB);
+                    if (isNaN(valA)) valA = ascending ? Infinity : -Infinity;
+                    if (isNaN(valB)) valB = ascending ? Infinity : -Infinity;
+                } else {
+                    valA = String(valA).toLowerCase(); valB = String(valB).toLowerCase();
+                }
+                if (valA < valB) return ascending ? -1 : 1;
+                if (valA > valB) return ascending ? 1 : -1;
+                return 0;
+            });
+            page = 0;
+            render();
+        });
+    });
+    render();
+}
+// Pemberitahuan di pager jika data tabel tidak bisa ditampilkan; data-fallback-file pada elemen data
+// (file JSON pendamping tanpa kompresi) ditautkan agar data tetap bisa dibuka
+function showLazyTableNotice(tableId, message) {
+    const pager = document.getElementById(tableId + 'Pager');
+    if (!pager) return;
+    pager.querySelectorAll('button[data-page-step]').forEach(button => { button.disabled = true; });
+    const info = pager.querySelector('.lazy-pager-info');
+    info.textContent = message;
+    const fallbackFile = document.getElementById(tableId + 'Data').dataset.fallbackFile;
+    if (fallbackFile) {
+        const link = document.createElement('a');
+        link.href = fallbackFile;
+        link.target = '_blank';
+        link.textContent = fallbackFile;
+        info.append(' Data lengkap (JSON): ', link);
+    }
+}
+async function initLazyTable(tableId) {
+    const dataElement = document.getElementById(tableId + 'Data');
+    if (!dataElement) return false;
+    if (!canDecodeDataIsland(dataElement)) {
+        showLazyTableNotice(tableId, 'Browser ini tidak mendukung DecompressionStream, sehingga data tabel terkompresi tidak dapat ditampilkan. Buka laporan di browser yang lebih baru.');
+        return true;
+    }
+    try {
+        const rows = await loadDataIsland(tableId + 'Data');
+        createLazyTable(tableId, rows, parseInt(dataElement.dataset.pageSize, 10) || 100);
+    } catch (error) {
+        showLazyTableNotice(tableId, 'Gagal memuat data tabel: ' + error);
+    }
+    return true;
+}
@@ -0,0 +1,21 @@
+# tests/conftest.py
+import os
+import sys
+import pytest
+
+# Tambahkan path root proyek ke sys.path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+import config
+
+@pytest.fixture(autouse=True, scope="session")
+def template_cache_in_tmp(tmp_path_factory):
+    """Cache bytecode template selama tes ditulis ke direktori sementara, bukan output/.template_cache di work tree."""
+    from core.report_generator import clear_template_environments
+    original = config.REPORT_TEMPLATE_CACHE_DIR
+    config.REPORT_TEMPLATE_CACHE_DIR = str(tmp_path_factory.mktemp("template_cache"))
+    clear_template_environments()
+    yield
+    config.REPORT_TEMPLATE_CACHE_DIR = original
+    clear_template_environments()
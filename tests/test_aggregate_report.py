@@ -0,0 +1,97 @@
+# tests/test_aggregate_report.py
+import os
+import sys
+import json
+import pytest
+
+# Tambahkan path root proyek ke sys.path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from core.aggregate_report import AggregateReportBuilder, summarize_analysis, intel_verdict
+from core.report_generator import clear_template_environments
+
+def make_analysis(target, domains, harmful_exts=(), js_functions=(), intel=()):
+    return {
+        "target_url": target,
+        "analysis_timestamp": "2025-01-01 00:00:00",
+        "extracted_iocs": {
+            "unique_domains": list(domains),
+            "potentially_harmful_urls": [{"url": f"http://{domains[0]}/f{ext}", "extension": ext} for ext in harmful_exts],
+            "rule_matches": [],
+        },
+        "dynamic_js_calls": [{"function_name": name} for name in js_functions],
+        "virustotal_reports": list(intel),
+        "network_events": [{"type": "request", "url": "http://x"}] * 1000,
+    }
+
+@pytest.fixture(autouse=True)
+def fresh_templates():
+    clear_template_environments()
+    yield
+    clear_template_environments()
+
+def test_intel_verdict_severity():
+    assert intel_verdict({"malicious": 2, "suspicious": 1}) == "malicious"
+    assert intel_verdict({"malicious": 0, "suspicious": 1}) == "suspicious"
+    assert intel_verdict({"malicious": 0}) == "clean"
+    assert intel_verdict({"error": "HTTP 429"}) == "error"
+
+def test_summarize_analysis_is_compact():
+    summary = summarize_analysis(make_analysis(
+        "http://a.test", ["cdn.example.com", "10.0.0.1"], harmful_exts=(".exe", ".exe", ".js"),
+        js_functions=("eval", "eval", "Function"), intel=[{"domain": "cdn.example.com", "malicious": 3}]
+    ), "/reports/a.html")
+    assert summary["domains"] == ["cdn.example.com"]
+    assert summary["ips"] == ["10.0.0.1"]
+    assert summary["harmful_extensions"] == {".exe": 2, ".js": 1}
+    assert summary["dynamic_js"] == {"eval": 2, "Function": 1}
+    assert summary["intel_verdicts"]["cdn.example.com"]["verdict"] == "malicious"
+    assert "network_events" not in summary
+    assert len(json.dumps(summary)) < 1000
+
+def test_builder_indexes_and_drilldown_links(tmp_path):
+    builder = AggregateReportBuilder(output_dir=str(tmp_path), top_n=2, max_links=2)
+    for index in range(3):
+        builder.add_analysis(summarize_analysis(
+            make_analysis(f"http://site{index}.test", ["shared.example.com", f"only{index}.example.com"], harmful_exts=(".exe",)),
+            str(tmp_path / "reports" / f"site{index}.html")
+        ))
+    builder.add_analysis({"target_url": "http://broken.test", "error": "timeout"})
+
+    view = builder.build_view()
+    assert view["counts"]["analyses"] == 4
+    assert view["counts"]["failed"] == 1
+    domains = next(section for section in view["sections"] if section["key"] == "domains")
+    assert domains["total"] == 4
+    assert len(domains["rows"]) == 2
+    top = domains["rows"][0]
+    assert (top["value"], top["analyses"]) == ("shared.example.com", 3)
+    assert [link["href"] for link in top["links"]] == ["reports/site0.html", "reports/site1.html"]
+    harmful = next(section for section in view["sections"] if section["key"] == "harmful_extensions")
+    assert harmful["rows"][0]["hits"] == 3
+
+def test_builder_intel_keeps_most_severe_verdict(tmp_path):
+    builder = AggregateReportBuilder(output_dir=str(tmp_path))
+    builder.add_analysis(summarize_analysis(make_analysis("http://a.test", ["evil.test"], intel=[{"domain": "evil.test", "suspicious": 1}])))
+    builder.add_analysis(summarize_analysis(make_analysis("http://b.test", ["evil.test"], intel=[{"domain": "evil.test", "malicious": 4}])))
+    builder.add_analysis(summarize_analysis(make_analysis("http://c.test", ["good.test"], intel=[{"domain": "good.test", "malicious": 0}])))
+    view = builder.build_view()
+    intel = next(section for section in view["sections"] if section["key"] == "intel_indicators")
+    assert [row["value"] for row in intel["rows"]] == ["evil.test"]
+    assert intel["rows"][0]["intel"]["verdict"] == "malicious"
+    assert view["verdict_totals"] == {"suspicious": 1, "malicious": 1, "clean": 1}
+    assert view["counts"]["analyses_with_malicious"] == 1
+
+def test_write_renders_dashboard(tmp_path):
+    builder = AggregateReportBuilder(output_dir=str(tmp_path))
+    builder.add_analysis(summarize_analysis(
+        make_analysis("http://site.test", ["evil.example.com"], harmful_exts=(".exe",)), str(tmp_path / "site.html")
+    ))
+    path = builder.write(str(tmp_path / "dashboard.html"))
+    assert path == str(tmp_path / "dashboard.html")
+    html = open(path, encoding="utf-8").read()
+    assert "evil.example.com" in html
+    assert 'href="site.html"' in html
+    assert 'id="analysesTableData"' in html
+    assert "function createLazyTable" in html
@@ -215,3 +215,61 @@ def test_analyze_page_handles_goto_timeout(bai, mock_playwright_browser, mock_pl
     if bai.browser_instance:
          bai.browser_instance.close.assert_called_once()
     pm_mock.stop.assert_called_once()
+
+def test_handlers_notify_event_listener(bai):
+    """Event listener menerima setiap request/response segera setelah dicatat."""
+    received = []
+    bai.event_listener = received.append
+    request = mock.Mock(url="http://testurl.com/a.js", method="GET", headers={}, resource_type="script")
+    response = mock.Mock(url="http://testurl.com/a.js", status=200, status_text="OK", headers={})
+    bai._handle_request(request)
+    bai._handle_response(response)
+    assert [e["type"] for e in received] == ["request", "response"]
+    assert received == bai.network_data
+
+def test_failing_event_listener_does_not_break_capture(bai):
+    bai.event_listener = mock.Mock(side_effect=RuntimeError("boom"))
+    request = mock.Mock(url="http://testurl.com/", method="GET", headers={}, resource_type="document")
+    bai._handle_request(request)
+    assert len(bai.network_data) == 1
+
+def test_file_hashes_flow_from_capture_to_intel_indicators(bai, tmp_path):
+    """sha256 body skrip dan berkas unduhan sampai ke indikator hash threat intel lewat extractor."""
+    import hashlib
+    from core.ioc_extractor import IncrementalIOCExtractor
+    from core.intel_providers import collect_indicators, IOC_TYPE_HASH
+    extractor = IncrementalIOCExtractor()
+    bai.event_listener = extractor
+    script = mock.Mock(url="http://testurl.com/a.js", status=200, status_text="OK", headers={},
+                       request=mock.Mock(resource_type="script"), body=mock.Mock(return_value=b"alert(1)"))
+    image = mock.Mock(url="http://testurl.com/logo.png", status=200, status_text="OK", headers={},
+                      request=mock.Mock(resource_type="image"), body=mock.Mock(return_value=b"png"))
+    payload = tmp_path / "payload.exe"
+    payload.write_bytes(b"MZ payload")
+    download = mock.Mock(url="http://testurl.com/payload.exe", suggested_filename="payload.exe",
+                         path=mock.Mock(return_value=str(payload)))
+    bai._handle_response(script)
+    bai._handle_response(image)
+    bai._handle_download(download)
+
+    image.body.assert_not_called() # Hanya tipe resource berkas yang body-nya diambil
+    expected = [hashlib.sha256(b"alert(1)").hexdigest(), hashlib.sha256(b"MZ payload").hexdigest()]
+    assert [e.get("sha256") for e in bai.network_data] == [expected[0], None, expected[1]]
+    iocs = extractor.finalize()
+    assert iocs["file_hashes"] == expected
+    assert collect_indicators(iocs)[IOC_TYPE_HASH] == expected
+
+def test_response_hash_skips_unavailable_or_large_bodies(bai, monkeypatch):
+    monkeypatch.setattr(config, "RESPONSE_HASH_MAX_BYTES", 4)
+    redirect = mock.Mock(url="http://testurl.com/r.js", status=302, headers={}, request=mock.Mock(resource_type="script"))
+    large = mock.Mock(url="http://testurl.com/big.js", status=200, headers={"content-length": "100"},
+                      request=mock.Mock(resource_type="script"))
+    missing = mock.Mock(url="http://testurl.com/gone.js", status=200, headers={}, request=mock.Mock(resource_type="script"),
+                        body=mock.Mock(side_effect=PlaywrightError("body tidak tersedia")))
+    attachment = mock.Mock(url="http://testurl.com/doc", status=200, headers={"content-disposition": "attachment; filename=a.bin"},
+                           request=mock.Mock(resource_type="document"), body=mock.Mock(return_value=b"abc"))
+    for response in (redirect, large, missing):
+        assert bai._response_sha256(response, response.headers) is None
+    redirect.body.assert_not_called()
+    large.body.assert_not_called()
+    assert bai._response_sha256(attachment, attachment.headers) is not None
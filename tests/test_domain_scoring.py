@@ -0,0 +1,52 @@
+# tests/test_domain_scoring.py
+import os
+import sys
+import pytest
+from unittest import mock
+
+# Tambahkan path root proyek ke sys.path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from core.domain_scoring import DomainRiskScorer, score_domains, annotate_domain_risk, prioritize_by_risk
+
+BENIGN = ["google.com", "www.facebook.com", "en.wikipedia.org", "www.tokopedia.com", "fonts.googleapis.com"]
+DGA_LIKE = ["xjk3q9zt7v.com", "kq2p9xv7l3m4n8.ru", "mnbvcxzlkjhgf.biz", "3f9a1c7e5b2d4a6c.cloudfront.net"]
+
+def test_features_are_vectorized_and_correct():
+    features = DomainRiskScorer().features(["aabb.com", "www.abc123.co.uk"])
+    assert list(features["length"]) == [4, 6] # public suffix dan 'www' diabaikan
+    assert features["entropy"][0] == pytest.approx(1.0)
+    assert features["digit_ratio"][1] == pytest.approx(0.5)
+    assert features["consonant_ratio"][0] == pytest.approx(0.5)
+
+def test_random_looking_domains_score_higher_than_benign():
+    scores, _ = DomainRiskScorer().score(BENIGN + DGA_LIKE)
+    benign_scores, dga_scores = scores[:len(BENIGN)], scores[len(BENIGN):]
+    assert benign_scores.max() < 0.5
+    assert dga_scores.min() > benign_scores.max()
+
+def test_score_domains_skips_ips_and_deduplicates():
+    results = score_domains(["10.0.0.1", "google.com", "google.com", "::1", ""])
+    assert list(results) == ["google.com"]
+    assert results["google.com"]["level"] == "low"
+    assert 0.0 <= results["google.com"]["score"] <= 1.0
+
+def test_annotate_batch_scores_each_analysis():
+    first = {"unique_domains": ["google.com", "xjk3q9zt7v.com"]}
+    second = {"unique_domains": ["xjk3q9zt7v.com", "10.0.0.1"]}
+    scorer = DomainRiskScorer()
+    with mock.patch.object(scorer, "score", wraps=scorer.score) as score:
+        scores = annotate_domain_risk([first, second, None], scorer=scorer)
+    score.assert_called_once() # Satu panggilan tervektorisasi untuk seluruh batch
+    assert set(scores) == {"google.com", "xjk3q9zt7v.com"}
+    assert set(first["domain_risk_scores"]) == {"google.com", "xjk3q9zt7v.com"}
+    assert set(second["domain_risk_scores"]) == {"xjk3q9zt7v.com"}
+
+def test_prioritize_by_risk_orders_and_filters():
+    risk = {"a.com": {"score": 0.1}, "b.com": {"score": 0.9}, "x.a.com": {"score": 0.95}}
+    assert prioritize_by_risk(["a.com", "b.com", "c.com"], risk, min_score=0.0) == ["c.com", "b.com", "a.com"]
+    assert prioritize_by_risk(["a.com", "b.com"], risk, min_score=0.5) == ["b.com"]
+    # Per eTLD+1: skor tertinggi dari host-nya dipakai
+    assert prioritize_by_risk(["a.com", "b.com"], risk, min_score=0.0,
+                              registrable_map={"x.a.com": "a.com"}) == ["a.com", "b.com"]
@@ -0,0 +1,87 @@
+# tests/test_event_store.py
+import os
+import sys
+import pytest
+from unittest import mock
+
+# Tambahkan path root proyek ke sys.path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+import core.event_store as event_store
+from core.event_store import (
+    EventStore, network_request_rows, resolve_backend,
+    TABLE_NETWORK, TABLE_DYNAMIC_JS, TABLE_COOKIES, BACKEND_COLUMNS, BACKEND_PARQUET,
+)
+
+def make_events(host, response_delay=0.2, method="GET"):
+    return [
+        {"type": "request", "url": f"http://{host}/a", "method": method, "resource_type": "xhr", "timestamp": 100.0,
+         "post_data": {"k": "v"} if method == "POST" else None},
+        {"type": "request", "url": f"http://{host}/a", "method": "GET", "resource_type": "xhr", "timestamp": 101.0},
+        {"type": "response", "url": f"http://{host}/a", "status": 200, "timestamp": 100.0 + response_delay},
+    ]
+
+@pytest.fixture
+def store(tmp_path):
+    return EventStore(str(tmp_path / "events"), backend=BACKEND_COLUMNS)
+
+def test_network_request_rows_pair_first_response():
+    rows = network_request_rows(make_events("10.0.0.5", method="POST"))
+    assert len(rows) == 2
+    assert rows[0]["status"] == 200
+    assert rows[0]["response_time_ms"] == pytest.approx(200.0)
+    assert rows[0]["is_direct_ip"] is True and rows[0]["has_post_data"] is True
+    assert rows[1]["status"] is None
+
+def test_append_and_query_selected_columns(store):
+    run_id = store.append_run(
+        "http://site.test", analyzed_at="2025-03-01 10:00:00", network_events=make_events("cdn.example.com"),
+        dynamic_js_calls=[{"function_name": "eval", "arguments": "x" * 10, "timestamp": 1}],
+        cookies=[{"name": "sid", "value": "1", "domain": ".site.test", "httpOnly": True}]
+    )
+    # Kolom yang tidak diminta tidak perlu dibaca sama sekali
+    partition = store.partitions(TABLE_NETWORK)[0]
+    chunk_dir = os.path.join(partition, os.listdir(partition)[0])
+    os.remove(os.path.join(chunk_dir, "resource_type.json.gz"))
+    data = store.query(TABLE_NETWORK, ["domain", "status"])
+    assert data == {"domain": ["cdn.example.com"] * 2, "status": [200, None]}
+    assert store.query(TABLE_DYNAMIC_JS, ["run_id", "function_name"]) == {"run_id": [run_id], "function_name": ["eval"]}
+    assert store.query(TABLE_COOKIES, ["name", "http_only"]) == {"name": ["sid"], "http_only": [True]}
+
+def test_query_prunes_date_partitions_and_filters(store):
+    store.append_run("http://a.test", analyzed_at="2025-03-01 10:00:00", network_events=make_events("10.0.0.1", method="POST"))
+    store.append_run("http://b.test", analyzed_at="2025-03-08 10:00:00", network_events=make_events("b.example.com", method="POST"))
+    assert len(store.partitions(TABLE_NETWORK)) == 2
+    assert len(store.partitions(TABLE_NETWORK, start_date="2025-03-05")) == 1
+
+    direct_ip_posts = store.query(TABLE_NETWORK, ["url", "target_url"], where={"method": "POST", "is_direct_ip": True})
+    assert direct_ip_posts == {"url": ["http://10.0.0.1/a"], "target_url": ["http://a.test"]}
+    last_week = store.query(TABLE_NETWORK, ["domain"], start_date="2025-03-05", where={"status": lambda s: s is not None})
+    assert last_week == {"domain": ["b.example.com"]}
+
+def test_percentile_by_domain(store):
+    for delay in (0.1, 0.2, 0.3, 0.4):
+        store.append_run("http://a.test", analyzed_at="2025-03-01 10:00:00", network_events=make_events("cdn.example.com", delay))
+    p95 = store.percentile_by(TABLE_NETWORK, "domain", "response_time_ms", q=95)
+    assert p95["cdn.example.com"] == pytest.approx(385.0)
+
+def test_partial_chunks_are_ignored(store):
+    store.append_run("http://a.test", analyzed_at="2025-03-01 10:00:00", network_events=make_events("x.example.com"))
+    os.makedirs(os.path.join(store.partitions(TABLE_NETWORK)[0], "half.columns.tmp"))
+    assert len(store.query(TABLE_NETWORK, ["url"])["url"]) == 2
+
+def test_backend_resolution_without_pyarrow():
+    with mock.patch.object(event_store, "pyarrow", None):
+        assert resolve_backend("auto") == BACKEND_COLUMNS
+        assert resolve_backend("parquet") == BACKEND_COLUMNS
+    with pytest.raises(ValueError):
+        resolve_backend("csv")
+    with pytest.raises(ValueError):
+        EventStore(backend=BACKEND_COLUMNS).query("unknown")
+
+def test_parquet_roundtrip(tmp_path):
+    pytest.importorskip("pyarrow")
+    store = EventStore(str(tmp_path / "events"), backend=BACKEND_PARQUET)
+    store.append_run("http://a.test", analyzed_at="2025-03-01 10:00:00", network_events=make_events("p.example.com"))
+    assert store.query(TABLE_NETWORK, ["domain"]) == {"domain": ["p.example.com"] * 2}
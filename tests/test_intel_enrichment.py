@@ -0,0 +1,126 @@
+# tests/test_intel_enrichment.py
+import os
+import sys
+import json
+import pytest
+from unittest import mock
+
+# Tambahkan path root proyek ke sys.path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from core.intel_enrichment import BackgroundIntelEnricher, get_intel_json_path
+import config
+
+# --- Tes untuk BackgroundIntelEnricher ---
+
+@pytest.fixture
+def report_path(tmp_path):
+    return str(tmp_path / f"example_com_20240101-000000_{config.DEFAULT_HTML_REPORT_FILENAME}")
+
+@pytest.fixture
+def analysis_data():
+    return {
+        'target_url': "http://example.com",
+        'extracted_iocs': {"unique_domains": ["a.com", "b.com", "c.com"]},
+        'virustotal_reports': [],
+    }
+
+def test_get_intel_json_path(report_path):
+    """Path JSON threat intel harus berdampingan dan berbagi prefix dengan laporan HTML."""
+    expected = report_path[:-len(config.DEFAULT_HTML_REPORT_FILENAME)] + config.DEFAULT_THREAT_INTEL_FILENAME
+    assert get_intel_json_path(report_path) == expected
+
+def test_enricher_marks_domains_pending_on_init(report_path, analysis_data):
+    enricher = BackgroundIntelEnricher([("domain", "a.com"), ("ip", "10.0.0.1")], lambda t, v: None, mock.MagicMock(),
+                                       analysis_data, report_path, request_delay=0)
+    assert analysis_data['intel_pending_indicators'] == ["a.com", "10.0.0.1"]
+    assert enricher.pending_indicators == ["a.com", "10.0.0.1"]
+
+def test_enricher_rerenders_after_each_result(report_path, analysis_data):
+    """Tanpa jeda render, setiap hasil memicu render ulang ke path yang sama, lalu satu render final."""
+    generator = mock.MagicMock()
+    pending_seen = []
+    generator.generate_report.side_effect = lambda data, report_filepath=None, rerender=False: pending_seen.append(list(data['intel_pending_indicators']))
+    lookup = lambda ioc_type, domain: {"domain": domain, "malicious": 1 if domain == "b.com" else 0}
+
+    enricher = BackgroundIntelEnricher([("domain", "a.com"), ("domain", "b.com"), ("domain", "c.com")], lookup, generator,
+                                       analysis_data, report_path, request_delay=0, rerender_interval=0).start()
+    assert enricher.wait(timeout=5)
+
+    assert pending_seen == [["b.com", "c.com"], ["c.com"], [], []]
+    for call_obj in generator.generate_report.call_args_list:
+        assert call_obj.kwargs["report_filepath"] == report_path
+        assert call_obj.kwargs["rerender"] is True
+    assert [r["domain"] for r in analysis_data['virustotal_reports']] == ["a.com", "b.com", "c.com"]
+
+    with open(get_intel_json_path(report_path)) as f:
+        intel_json = json.load(f)
+    assert intel_json["status"] == "complete"
+    assert intel_json["pending_indicators"] == []
+    assert analysis_data['intel_status'] == "complete"
+    assert len(intel_json["virustotal_reports"]) == 3
+
+def test_enricher_records_lookup_exception_as_error(report_path, analysis_data):
+    def failing_lookup(ioc_type, domain):
+        raise RuntimeError("boom")
+    enricher = BackgroundIntelEnricher([("domain", "a.com")], failing_lookup, mock.MagicMock(),
+                                       analysis_data, report_path, request_delay=0).start()
+    assert enricher.wait(timeout=5)
+    assert analysis_data['virustotal_reports'][0]["error"] == "Processing Error"
+    assert "boom" in analysis_data['virustotal_reports'][0]["message"]
+    assert analysis_data['virustotal_reports'][0]["domain"] == "a.com"
+
+def test_enricher_looks_up_all_indicator_types(report_path, analysis_data):
+    """URL dan hash ikut diperiksa di latar belakang, masing-masing dengan tipenya sendiri."""
+    indicators = [("domain", "a.com"), ("ip", "10.0.0.1"), ("url", "http://a.com/x.exe"), ("hash", "d41d8cd98f00b204e9800998ecf8427e")]
+    lookup = mock.Mock(side_effect=lambda ioc_type, value: {"indicator": value, "indicator_type": ioc_type, "malicious": 0})
+    enricher = BackgroundIntelEnricher(indicators, lookup, mock.MagicMock(), analysis_data, report_path, request_delay=0).start()
+    assert enricher.wait(timeout=5)
+    assert [c.args for c in lookup.call_args_list] == indicators
+    assert [r["indicator_type"] for r in analysis_data['virustotal_reports']] == ["domain", "ip", "url", "hash"]
+
+def test_enricher_coalesces_rerenders(report_path, analysis_data):
+    """Hasil yang masuk dalam jeda render ulang digabung; render final selalu dilakukan."""
+    generator = mock.MagicMock()
+    indicators = [("domain", f"{n}.com") for n in range(20)]
+    enricher = BackgroundIntelEnricher(indicators, lambda t, v: {"domain": v}, generator,
+                                       analysis_data, report_path, request_delay=0, rerender_interval=60).start()
+    assert enricher.wait(timeout=5)
+    assert generator.generate_report.call_count == 1
+    assert generator.generate_report.call_args.args[0]['intel_pending_indicators'] == []
+    assert len(analysis_data['virustotal_reports']) == 20
+
+def test_enricher_stop_interrupts_delay(report_path, analysis_data):
+    """stop() harus memotong jeda antar permintaan sehingga domain sisanya tidak diperiksa."""
+    lookup = mock.MagicMock(return_value=None)
+    enricher = BackgroundIntelEnricher([("domain", "a.com"), ("domain", "b.com")], lookup, mock.MagicMock(),
+                                       analysis_data, report_path, request_delay=60).start()
+    enricher.stop()
+    assert enricher.wait(timeout=5)
+    assert lookup.call_count <= 1
+    # Indikator yang belum diperiksa tetap tercantum dan status tidak dilaporkan "complete"
+    assert "b.com" in analysis_data['intel_pending_indicators']
+    assert analysis_data['intel_status'] == "stopped"
+    with open(get_intel_json_path(report_path)) as f:
+        intel_json = json.load(f)
+    assert intel_json["status"] == "stopped"
+    assert "b.com" in intel_json["pending_indicators"]
+
+def test_early_intel_lookup_reuses_started_lookups():
+    from core.intel_enrichment import EarlyIntelLookup
+    aggregator = mock.Mock()
+    aggregator.lookup.side_effect = lambda ioc_type, value: {"indicator": value, "indicator_type": ioc_type, "malicious": 1}
+    aggregator.lookup_indicators.side_effect = lambda indicators: [
+        {"indicator": v, "indicator_type": t, "malicious": 0} for t, values in indicators.items() for v in values
+    ]
+    early = EarlyIntelLookup(aggregator, classify_fn=lambda host: "domain", max_workers=2)
+    early("a.com")
+    early("a.com") # duplikat diabaikan
+    results = early.collect({"domain": ["a.com", "b.com"], "url": ["http://a.com/x.exe"]})
+    early.shutdown()
+
+    assert early.submitted_count == 1
+    aggregator.lookup.assert_called_once_with("domain", "a.com")
+    aggregator.lookup_indicators.assert_called_once_with({"domain": ["b.com"], "url": ["http://a.com/x.exe"]})
+    assert [(r["indicator"], r["malicious"]) for r in results] == [("a.com", 1), ("b.com", 0), ("http://a.com/x.exe", 0)]
@@ -0,0 +1,186 @@
+# tests/test_intel_providers.py
+import os
+import sys
+import json
+import time
+import pytest
+from unittest import mock
+
+# Tambahkan path root proyek ke sys.path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from core.intel_providers import (
+    PROVIDER_REGISTRY, ThreatIntelProvider, ThreatIntelAggregator, LocalFileIntelProvider,
+    RateLimiter, TTLCache, register_provider, create_provider, build_intel_aggregator,
+    collect_indicators, merge_records,
+)
+import config
+
+# --- Fixture ---
+
+@pytest.fixture
+def local_intel_file(tmp_path):
+    path = tmp_path / "local_intel.json"
+    path.write_text(json.dumps({
+        "domain": {"Evil.com": {"malicious": 7, "suspicious": 1, "note": "phishing kit"}},
+        "ip": {"10.0.0.1": {"malicious": 2}},
+        "url": {"http://evil.com/payload.exe": {"malicious": 9}},
+        "hash": {"ABCDEF": "known dropper"},
+    }))
+    return str(path)
+
+class CountingProvider(ThreatIntelProvider):
+    """Provider tiruan untuk menghitung panggilan _lookup."""
+    name = "counting"
+    supported_types = ("domain",)
+
+    def __init__(self, verdicts, **kwargs):
+        super().__init__(**kwargs)
+        self.verdicts = verdicts
+        self.calls = []
+
+    def _lookup(self, ioc_type, value):
+        self.calls.append(value)
+        return self.verdicts.get(value)
+
+# --- Registry ---
+
+def test_builtin_providers_registered():
+    assert "virustotal" in PROVIDER_REGISTRY
+    assert "local_file" in PROVIDER_REGISTRY
+
+def test_provider_base_requires_lookup():
+    with pytest.raises(TypeError):
+        ThreatIntelProvider()
+
+def test_register_and_create_custom_provider():
+    @register_provider("dummy_test_provider")
+    class DummyProvider(ThreatIntelProvider):
+        supported_types = ("domain",)
+        def _lookup(self, ioc_type, value):
+            return {"malicious": 0}
+    try:
+        provider = create_provider("dummy_test_provider")
+        assert provider.name == "dummy_test_provider"
+        assert provider.lookup("domain", "x.com")["provider"] == "dummy_test_provider"
+    finally:
+        PROVIDER_REGISTRY.pop("dummy_test_provider", None)
+
+def test_create_unknown_provider_raises():
+    with pytest.raises(ValueError):
+        create_provider("does-not-exist")
+
+# --- Provider dasar: cache dan tipe ---
+
+def test_provider_caches_successful_lookups():
+    provider = CountingProvider({"a.com": {"malicious": 1}})
+    first = provider.lookup("domain", "a.com")
+    second = provider.lookup("domain", "a.com")
+    assert first == second
+    assert provider.calls == ["a.com"]
+
+def test_provider_does_not_cache_errors():
+    provider = CountingProvider({"a.com": {"error": "HTTP Error: 429"}})
+    provider.lookup("domain", "a.com")
+    provider.lookup("domain", "a.com")
+    assert provider.calls == ["a.com", "a.com"]
+
+def test_provider_ignores_unsupported_types():
+    provider = CountingProvider({})
+    assert provider.lookup("hash", "abc") is None
+    assert provider.calls == []
+
+def test_ttl_cache_expiry_and_eviction():
+    cache = TTLCache(ttl=60, max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a") # "a" jadi paling baru dipakai
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    with mock.patch('core.intel_providers.time.monotonic', return_value=time.monotonic() + 120):
+        assert cache.get("a") is None
+
+def test_rate_limiter_spaces_calls():
+    limiter = RateLimiter(min_interval=0.05)
+    start = time.monotonic()
+    for _ in range(3):
+        limiter.wait()
+    assert time.monotonic() - start >= 0.1
+
+# --- LocalFileIntelProvider ---
+
+def test_local_file_provider_lookup(local_intel_file):
+    provider = LocalFileIntelProvider(path=local_intel_file)
+    assert provider.is_available()
+    record = provider.lookup("domain", "evil.com")
+    assert record["malicious"] == 7
+    assert record["domain"] == "evil.com"
+    assert record["note"] == "phishing kit"
+    assert record["provider"] == "local_file"
+    assert provider.lookup("hash", "abcdef")["malicious"] == 1
+    assert provider.lookup("domain", "clean.com") is None
+
+def test_local_file_provider_missing_file_is_unavailable(tmp_path):
+    provider = LocalFileIntelProvider(path=str(tmp_path / "missing.json"))
+    assert not provider.is_available()
+
+# --- Penggabungan dan fan-out ---
+
+def test_merge_records_takes_max_verdicts():
+    merged = merge_records("domain", "x.com", [
+        {"provider": "a", "malicious": 1, "harmless": 50, "total_engines": 60, "link_to_report": "http://a"},
+        {"provider": "b", "malicious": 4, "harmless": 0, "total_engines": 1},
+        {"provider": "c", "error": "Connection Error"},
+    ])
+    assert merged["domain"] == "x.com"
+    assert merged["malicious"] == 4
+    assert merged["harmless"] == 50
+    assert merged["sources"] == ["a", "b", "c"]
+    assert merged["link_to_report"] == "http://a"
+    assert "error" not in merged
+
+def test_merge_records_all_errors():
+    merged = merge_records("url", "http://x", [{"provider": "a", "error": "HTTP Error: 404", "message": "Not Found"}])
+    assert merged["error"] == "HTTP Error: 404"
+    assert "domain" not in merged
+
+def test_aggregator_fans_out_and_merges(local_intel_file):
+    counting = CountingProvider({"evil.com": {"malicious": 1, "harmless": 3}})
+    aggregator = ThreatIntelAggregator([counting, LocalFileIntelProvider(path=local_intel_file)], max_workers=4)
+    results = aggregator.lookup_indicators({
+        "domain": ["evil.com", "clean.com"],
+        "url": ["http://evil.com/payload.exe"],
+    })
+    by_indicator = {r["indicator"]: r for r in results}
+    assert set(by_indicator) == {"evil.com", "http://evil.com/payload.exe"}
+    assert by_indicator["evil.com"]["malicious"] == 7
+    assert sorted(by_indicator["evil.com"]["sources"]) == ["counting", "local_file"]
+    assert by_indicator["http://evil.com/payload.exe"]["sources"] == ["local_file"]
+    assert sorted(counting.calls) == ["clean.com", "evil.com"]
+
+def test_aggregator_survives_provider_exception():
+    class BrokenProvider(CountingProvider):
+        def _lookup(self, ioc_type, value):
+            raise RuntimeError("boom")
+    aggregator = ThreatIntelAggregator([BrokenProvider({})])
+    record = aggregator.lookup("domain", "x.com")
+    assert record["error"] == "Processing Error"
+
+def test_collect_indicators_splits_ips_and_domains():
+    indicators = collect_indicators({
+        "unique_domains": ["example.com", "10.0.0.1", "::1"],
+        "potentially_harmful_urls": [{"url": "http://example.com/a.exe"}, {"url": "http://example.com/a.exe"}],
+    })
+    assert indicators["domain"] == ["example.com"]
+    assert indicators["ip"] == ["10.0.0.1", "::1"]
+    assert indicators["url"] == ["http://example.com/a.exe"]
+    assert indicators["hash"] == []
+
+def test_build_intel_aggregator_skips_unavailable(local_intel_file):
+    with mock.patch.object(config, 'VIRUSTOTAL_API_KEY', ""), \
+         mock.patch.object(config, 'LOCAL_INTEL_FILE', local_intel_file):
+        aggregator = build_intel_aggregator(["virustotal", "local_file", "unknown"])
+        assert aggregator.provider_names == ["local_file"]
+        assert build_intel_aggregator(["virustotal"]) is None
@@ -111,3 +111,42 @@ def test_extract_with_sample_events():
 
     assert len(iocs["direct_ip_requests"]) == 1
     assert iocs["direct_ip_requests"][0]["url"] == "http://123.45.67.89/beacon.php"
+
+def test_extract_reuses_cached_url_facts():
+    """URL yang berulang hanya di-parse sekali berkat cache LRU."""
+    from core.ioc_extractor import _parse_url_facts
+    _parse_url_facts.cache_clear()
+    repeated_url = "http://10.0.0.5/payload%20v2.exe"
+    events = [{"type": "request", "url": repeated_url, "method": "GET", "timestamp": i} for i in range(50)]
+    iocs = IOCExtractor(events).extract()
+    assert iocs["unique_domains"] == ["10.0.0.5"]
+    assert len(iocs["potentially_harmful_urls"]) == 50
+    assert len(iocs["direct_ip_requests"]) == 50
+    cache_info = _parse_url_facts.cache_info()
+    assert cache_info.misses == 1
+    assert cache_info.hits == 49
+
+def test_incremental_extractor_matches_batch_extract():
+    """Hasil IncrementalIOCExtractor sama dengan extract() dan callback dipanggil sekali per domain."""
+    from core.ioc_extractor import IncrementalIOCExtractor
+    events = [
+        {"timestamp": 1, "type": "request", "method": "GET", "url": "http://example.com/a.exe"},
+        {"timestamp": 2, "type": "request", "method": "POST", "url": "http://10.0.0.9/api", "post_data": "x=1"},
+        {"timestamp": 3, "type": "response", "url": "http://example.com/a.exe", "status": 200},
+        {"timestamp": 4, "type": "request", "method": "GET", "url": "http://example.com/b.js"},
+    ]
+    new_domains = []
+    incremental = IncrementalIOCExtractor(on_new_domain=new_domains.append)
+    for event in events:
+        incremental(event)
+    assert new_domains == ["example.com", "10.0.0.9"]
+    assert incremental.finalize() == IOCExtractor(events).extract()
+    assert incremental.events_processed == len(events)
+
+def test_incremental_extractor_survives_callback_error():
+    from core.ioc_extractor import IncrementalIOCExtractor
+    def failing_callback(domain):
+        raise RuntimeError("boom")
+    incremental = IncrementalIOCExtractor(on_new_domain=failing_callback)
+    incremental({"type": "request", "method": "GET", "url": "http://example.com/"})
+    assert incremental.finalize()["unique_domains"] == ["example.com"]
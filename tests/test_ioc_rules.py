@@ -0,0 +1,138 @@
+# tests/test_ioc_rules.py
+import os
+import sys
+import json
+import time
+import pytest
+
+# Tambahkan path root proyek ke sys.path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from core.ioc_rules import (
+    AhoCorasickAutomaton, DomainSuffixTrie, IOCRuleEngine, get_default_rule_engine,
+)
+from core.ioc_extractor import IOCExtractor
+
+SAMPLE_RULES = [
+    {"id": "url-shell", "target": "url", "severity": "high", "patterns": ["/shell.php", "cmd="]},
+    {"id": "url-exact", "target": "url", "match": "exact", "patterns": ["http://exact.example/x"]},
+    {"id": "dom-ngrok", "target": "domain", "patterns": ["ngrok.io", ".tk"]},
+    {"id": "hdr-server", "target": "header", "header": "server", "patterns": ["evilginx"]},
+    {"id": "hdr-ctype", "target": "header", "match": "exact", "header": "content-type", "patterns": ["application/x-msdownload"]},
+    {"id": "res-ws", "target": "resource_type", "severity": "low", "patterns": ["websocket"]},
+    {"id": "post-pass", "target": "post_body", "severity": "critical", "patterns": ["password"]},
+]
+
+@pytest.fixture
+def engine():
+    return IOCRuleEngine(SAMPLE_RULES)
+
+# --- Matcher dasar ---
+
+def test_aho_corasick_finds_overlapping_patterns():
+    automaton = AhoCorasickAutomaton()
+    for index, pattern in enumerate(["he", "she", "his", "hers"]):
+        automaton.add(pattern, index)
+    automaton.compile()
+    found = sorted(automaton.search("ushers"))
+    assert found == [(0, "he"), (1, "she"), (3, "hers")]
+    assert automaton.search("xyz") == []
+
+def test_domain_suffix_trie_respects_label_boundaries():
+    trie = DomainSuffixTrie()
+    trie.add("evil.com", "a")
+    trie.add(".tk", "b")
+    assert trie.search("evil.com") == [("a", "evil.com")]
+    assert trie.search("cdn.EVIL.com") == [("a", "evil.com")]
+    assert trie.search("notevil.com") == []
+    assert trie.search("phish.tk") == [("b", "tk")]
+
+# --- Engine ---
+
+def test_engine_matches_every_target(engine):
+    request = {
+        "type": "request", "url": "http://x.ngrok.io/shell.php?cmd=id", "method": "POST",
+        "resource_type": "websocket", "post_data": {"user": "a", "password": "b"},
+        "headers": {"Server": "nginx"}, "timestamp": 1,
+    }
+    hits = {(engine.rules[i]["id"], matched) for i, _, matched in engine.match_event(request, domain="x.ngrok.io")}
+    assert ("url-shell", "/shell.php") in hits
+    assert ("url-shell", "cmd=") in hits
+    assert ("dom-ngrok", "ngrok.io") in hits
+    assert ("res-ws", "websocket") in hits
+    assert ("post-pass", "password") in hits
+
+    response = {"type": "response", "url": "http://a.com/", "headers": {"Server": "EvilGinx/3", "Content-Type": "application/x-msdownload", "X-Other": "evilginx"}}
+    hits = {(engine.rules[i]["id"], matched) for i, _, matched in engine.match_event(response)}
+    assert hits == {("hdr-server", "server: evilginx"), ("hdr-ctype", "content-type: application/x-msdownload")}
+
+def test_engine_decodes_hex_buffer_post_body(engine):
+    """Body raw/multipart disimpan sebagai hex oleh browser_operations dan harus didekode sebelum dicocokkan."""
+    body = b'--b\r\nContent-Disposition: form-data; name="password"\r\n\r\nrahasia\r\n--b--'
+    request = {"type": "request", "url": "http://b.com/upload", "method": "POST",
+               "post_data": body.hex(), "post_data_format": "hex_buffer", "timestamp": 1}
+    hits = {(engine.rules[i]["id"], matched) for i, _, matched in engine.match_event(request)}
+    assert ("post-pass", "password") in hits
+    # Tanpa penanda format, string hex dicocokkan apa adanya dan tidak memicu aturan
+    del request["post_data_format"]
+    assert not any(engine.rules[i]["id"] == "post-pass" for i, _, _ in engine.match_event(request))
+
+def test_evaluate_deduplicates_and_sorts_by_severity(engine):
+    events = [
+        {"type": "request", "url": "http://a.tk/shell.php", "timestamp": 1},
+        {"type": "request", "url": "http://a.tk/shell.php", "timestamp": 2},
+        {"type": "request", "url": "http://b.com/login", "method": "POST", "post_data": "password=x", "timestamp": 3},
+    ]
+    findings = engine.evaluate(events, domain_resolver=lambda url: url.split("/")[2])
+    assert [f["rule_id"] for f in findings] == ["post-pass", "url-shell", "dom-ngrok"]
+    shell = findings[1]
+    assert shell["count"] == 2
+    assert shell["timestamp"] == 1
+
+def test_invalid_rules_raise():
+    with pytest.raises(ValueError):
+        IOCRuleEngine([{"id": "x", "target": "nope", "patterns": ["a"]}])
+    with pytest.raises(ValueError):
+        IOCRuleEngine([{"id": "x", "target": "resource_type", "match": "substring", "patterns": ["a"]}])
+    with pytest.raises(ValueError):
+        IOCRuleEngine([{"id": "x", "target": "url", "severity": "extreme", "patterns": ["a"]}])
+
+def test_evaluation_cost_independent_of_rule_count():
+    """Ribuan pola tidak boleh membuat evaluasi URL jauh lebih lambat (automaton, bukan loop per aturan)."""
+    urls = [f"http://host{i}.example.com/path/{i}/index.html?q={i}" for i in range(2000)]
+    small = IOCRuleEngine([{"id": "r0", "target": "url", "patterns": ["/never-matches-0/"]}])
+    large = IOCRuleEngine([{"id": f"r{i}", "target": "url", "patterns": [f"/never-matches-{i}/"]} for i in range(5000)])
+
+    def measure(rule_engine):
+        start = time.perf_counter()
+        for url in urls:
+            rule_engine._match_url(url)
+        return time.perf_counter() - start
+
+    measure(small) # pemanasan
+    assert measure(large) < measure(small) * 5 + 0.05
+
+# --- File aturan bawaan dan integrasi extractor ---
+
+def test_default_rules_file_compiles():
+    engine = get_default_rule_engine()
+    assert engine is not None
+    assert len(engine.rules) > 0
+
+def test_default_rule_engine_missing_file(tmp_path):
+    assert get_default_rule_engine(str(tmp_path / "missing.json")) is None
+
+def test_rule_engine_from_file(tmp_path):
+    rules_path = tmp_path / "rules.json"
+    rules_path.write_text(json.dumps({"rules": SAMPLE_RULES}))
+    assert len(get_default_rule_engine(str(rules_path)).rules) == len(SAMPLE_RULES)
+
+def test_extractor_populates_rule_matches(engine):
+    events = [
+        {"type": "request", "url": "http://c2.ngrok.io/shell.php", "method": "GET", "timestamp": 1},
+        {"type": "response", "url": "http://c2.ngrok.io/shell.php", "headers": {"server": "evilginx"}, "timestamp": 2},
+    ]
+    iocs = IOCExtractor(events, rule_engine=engine).extract()
+    rule_ids = {f["rule_id"] for f in iocs["rule_matches"]}
+    assert rule_ids == {"url-shell", "dom-ngrok", "hdr-server"}
@@ -0,0 +1,84 @@
+# tests/test_ioc_store.py
+import os
+import sys
+import pytest
+
+# Tambahkan path root proyek ke sys.path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from core.ioc_store import IOCStore, collect_store_indicators, IOC_TYPE_REGISTRABLE_DOMAIN
+from core.intel_providers import IOC_TYPE_DOMAIN, IOC_TYPE_IP, IOC_TYPE_URL
+
+def make_iocs(domains, harmful_urls=()):
+    return {
+        "unique_domains": list(domains),
+        "potentially_harmful_urls": [{"url": u, "method": "GET", "timestamp": 1} for u in harmful_urls],
+        "post_requests": [],
+        "direct_ip_requests": [],
+        "registrable_domains": [{"domain": "example.com", "request_count": 3}],
+    }
+
+@pytest.fixture
+def store(tmp_path):
+    ioc_store = IOCStore(str(tmp_path / "ioc.sqlite3"))
+    yield ioc_store
+    ioc_store.close()
+
+def test_collect_store_indicators_types_and_counts():
+    events = [
+        {"type": "request", "url": "http://a.example.com/x"},
+        {"type": "request", "url": "http://a.example.com/x"},
+        {"type": "response", "url": "http://a.example.com/x"},
+    ]
+    counts = collect_store_indicators(make_iocs(["A.Example.com", "10.0.0.1"]), events)
+    assert counts[(IOC_TYPE_DOMAIN, "a.example.com")] == 1
+    assert counts[(IOC_TYPE_IP, "10.0.0.1")] == 1
+    assert counts[(IOC_TYPE_REGISTRABLE_DOMAIN, "example.com")] == 3
+    assert counts[(IOC_TYPE_URL, "http://a.example.com/x")] == 2
+
+def test_prior_sightings_counts_distinct_analyses(store):
+    first = make_iocs(["evil.example.com", "cdn.example.com"], ["http://evil.example.com/a.exe"])
+    store.record_analysis("http://site-a.test", first)
+    store.record_analysis("http://site-b.test", make_iocs(["evil.example.com"]))
+
+    current = make_iocs(["EVIL.example.com", "new.example.com"], ["http://evil.example.com/a.exe"])
+    history = store.prior_sightings(current)
+    assert history == {"evil.example.com": 2, "http://evil.example.com/a.exe": 1}
+
+def test_count_analyses_excludes_current(store):
+    analysis_id = store.record_analysis("http://site.test", make_iocs(["x.example.com"]))
+    assert store.count_analyses(IOC_TYPE_DOMAIN, ["x.example.com"]) == {"x.example.com": 1}
+    assert store.count_analyses(IOC_TYPE_DOMAIN, ["x.example.com"], exclude_analysis_id=analysis_id) == {}
+
+def test_find_analyses_newest_first_and_case_insensitive(store):
+    store.record_analysis("http://one.test", make_iocs(["shared.example.com"]), report_path="r1.html")
+    store.record_analysis("http://two.test", make_iocs(["shared.example.com"]), report_path="r2.html")
+
+    matches = store.find_analyses("Shared.Example.com")
+    assert [m["target_url"] for m in matches] == ["http://two.test", "http://one.test"]
+    assert matches[0]["report_path"] == "r2.html"
+    assert matches[0]["ioc_type"] == IOC_TYPE_DOMAIN
+    assert store.find_analyses("example.com", ioc_type=IOC_TYPE_REGISTRABLE_DOMAIN)[0]["hit_count"] == 3
+    assert store.find_analyses("unknown.test") == []
+    assert store.stats()["analyses"] == 2
+
+def test_find_analyses_counts_host_that_is_its_own_registrable_domain_once(store, capsys, monkeypatch):
+    store.record_analysis("http://example.com", make_iocs(["example.com"]))
+    matches = store.find_analyses("example.com")
+    assert len(matches) == 1
+    assert matches[0]["ioc_type"] == f"{IOC_TYPE_DOMAIN}, {IOC_TYPE_REGISTRABLE_DOMAIN}"
+    assert matches[0]["hit_count"] == 3
+
+    import main
+    monkeypatch.setattr("core.ioc_store.IOCStore", lambda: store)
+    monkeypatch.setattr(store, "close", lambda: None)
+    assert main.query_ioc_history("example.com") == 0
+    assert "terlihat di 1 analisis" in capsys.readouterr().out
+
+def test_store_persists_across_connections(tmp_path):
+    db_path = str(tmp_path / "ioc.sqlite3")
+    with IOCStore(db_path) as ioc_store:
+        ioc_store.record_analysis("http://site.test", make_iocs(["persist.example.com"]))
+    with IOCStore(db_path) as ioc_store:
+        assert ioc_store.prior_sightings(make_iocs(["persist.example.com"])) == {"persist.example.com": 1}
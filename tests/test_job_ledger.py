@@ -0,0 +1,115 @@
+# tests/test_job_ledger.py
+import os
+import sys
+import pytest
+from unittest import mock
+
+# Tambahkan path root proyek ke sys.path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+import config
+from core.job_ledger import JobLedger, batch_id_for_file, STATE_DONE, STATE_FAILED, STATE_PENDING, INTERRUPTED_ERROR
+from core.report_generator import clear_template_environments
+
+URLS = ["http://a.test/", "http://b.test/", "http://c.test/"]
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "ledger.sqlite3")
+
+@pytest.fixture
+def batch_file(tmp_path):
+    path = tmp_path / "urls.txt"
+    path.write_text("\n".join(URLS) + "\n", encoding="utf-8")
+    return str(path)
+
+def test_start_batch_queues_urls_in_order(db_path, batch_file):
+    with JobLedger(db_path) as ledger:
+        batch_id = ledger.start_batch(batch_file, URLS + [URLS[0]]) # Duplikat diabaikan
+        assert ledger.runnable(batch_id) == URLS
+        assert ledger.counts(batch_id) == {STATE_PENDING: 3}
+
+def test_progress_survives_reopen(db_path, batch_file):
+    with JobLedger(db_path) as ledger:
+        batch_id = ledger.start_batch(batch_file, URLS)
+        ledger.mark_running(batch_id, URLS[0])
+        ledger.mark_done(batch_id, URLS[0], {"html_report_path": "/r/a.html", "summary": {"domains": ["x.test"]}})
+        ledger.mark_running(batch_id, URLS[1]) # Proses "crash" saat URL ini berjalan
+    with JobLedger(db_path) as ledger:
+        batch_id = ledger.start_batch(batch_file, URLS)
+        assert ledger.runnable(batch_id) == URLS[1:]
+        results = {job["target_url"]: job for job in ledger.results(batch_id)}
+        assert results[URLS[0]]["summary"] == {"domains": ["x.test"]}
+        assert results[URLS[0]]["html_report_path"] == "/r/a.html"
+        assert results[URLS[1]]["attempts"] == 1 # Percobaan yang terhenti tetap dihitung
+
+def test_failures_retry_until_budget_exhausted(db_path, batch_file):
+    with JobLedger(db_path, max_attempts=2) as ledger:
+        batch_id = ledger.start_batch(batch_file, URLS[:1])
+        for attempt in range(2):
+            assert ledger.runnable(batch_id) == URLS[:1]
+            ledger.mark_running(batch_id, URLS[0])
+            ledger.mark_failed(batch_id, URLS[0], f"timeout {attempt}")
+        assert ledger.runnable(batch_id) == []
+        job = ledger.results(batch_id)[0]
+        assert (job["state"], job["attempts"], job["last_error"]) == (STATE_FAILED, 2, "timeout 1")
+
+def test_crashed_job_is_not_retried_beyond_budget(db_path, batch_file):
+    """Job yang membuat proses crash (tetap "running") memakai jatah percobaan yang sama dengan kegagalan biasa."""
+    for run in range(5):
+        with JobLedger(db_path, max_attempts=2) as ledger:
+            batch_id = ledger.start_batch(batch_file, URLS[:1])
+            if ledger.runnable(batch_id):
+                ledger.mark_running(batch_id, URLS[0]) # Proses "crash" sebelum mark_done/mark_failed
+    with JobLedger(db_path, max_attempts=2) as ledger:
+        batch_id = ledger.start_batch(batch_file, URLS[:1])
+        assert ledger.runnable(batch_id) == []
+        job = ledger.results(batch_id)[0]
+        assert (job["state"], job["attempts"]) == (STATE_FAILED, 2)
+        assert job["last_error"] == INTERRUPTED_ERROR
+
+def test_resync_and_restart(db_path, batch_file):
+    with JobLedger(db_path) as ledger:
+        batch_id = ledger.start_batch(batch_file, URLS)
+        ledger.mark_done(batch_id, URLS[0], {})
+        ledger.start_batch(batch_file, [URLS[0], URLS[2], "http://d.test/"])
+        assert [job["target_url"] for job in ledger.results(batch_id)] == [URLS[0], URLS[2], "http://d.test/"]
+        assert ledger.runnable(batch_id) == [URLS[2], "http://d.test/"]
+        ledger.start_batch(batch_file, URLS, restart=True)
+        assert ledger.runnable(batch_id) == URLS
+
+def test_run_batch_resumes_only_unfinished_urls(tmp_path, monkeypatch, batch_file):
+    import main
+    monkeypatch.setattr(config, "HTML_REPORT_DIR", str(tmp_path / "reports"))
+    monkeypatch.setattr(config, "NETWORK_LOG_DIR", str(tmp_path / "logs"))
+    monkeypatch.setattr(config, "AGGREGATE_REPORT_DIR", str(tmp_path / "reports"))
+    monkeypatch.setattr(config, "BATCH_LEDGER_PATH", str(tmp_path / "ledger.sqlite3"))
+    monkeypatch.setattr(config, "RESULT_CACHE_ENABLED", False)
+    clear_template_environments()
+    events = [{"type": "request", "url": "http://cdn.example.net/app.js", "method": "GET", "timestamp": 1}]
+    visited = []
+    flaky = {"fail": True}
+
+    def automation(target_url, **kwargs):
+        visited.append(target_url)
+        browser = mock.Mock()
+        if target_url == URLS[1] and flaky["fail"]:
+            browser.analyze_page.side_effect = RuntimeError("browser crash")
+        else:
+            browser.analyze_page.return_value = (None, events, {}, {}, [], [])
+        return browser
+
+    def batch():
+        return main.run_batch(batch_file, "chromium", True, False, ioc_store_enabled=False, event_store_enabled=False)
+    with mock.patch("core.browser_operations.BrowserAutomation", automation):
+        batch()
+        assert sorted(visited) == URLS
+        visited.clear()
+        flaky["fail"] = False
+        dashboard = batch()
+        assert visited == [URLS[1]]
+    html = open(dashboard, encoding="utf-8").read()
+    assert "Dashboard Batch" in html and "cdn.example.net" in html
+    with JobLedger() as ledger:
+        assert ledger.counts(batch_id_for_file(batch_file)) == {STATE_DONE: 3}
@@ -0,0 +1,237 @@
+# tests/test_job_queue.py
+import os
+import sys
+import time
+import threading
+import multiprocessing
+import pytest
+from unittest import mock
+
+# Tambahkan path root proyek ke sys.path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+import config
+from core.job_queue import SQLiteJobQueue, QueueWorker, STATE_DONE, STATE_DEAD, STATE_QUEUED, STATE_LEASED
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+@pytest.fixture
+def job_queue(tmp_path, clock):
+    with SQLiteJobQueue(str(tmp_path / "queue.sqlite3"), clock=clock) as queue:
+        yield queue
+
+def test_lease_hides_job_until_ack(job_queue):
+    job_id = job_queue.enqueue({"target_url": "http://a.test/"}, max_attempts=3)
+    job = job_queue.lease("host-a", lease_seconds=60)
+    assert (job["id"], job["payload"], job["attempts"]) == (job_id, {"target_url": "http://a.test/"}, 1)
+    assert job_queue.lease("host-b", lease_seconds=60) is None
+    assert job_queue.ack(job, {"html_report_path": "/r.html"})
+    assert job_queue.result(job_id) == {"state": STATE_DONE, "result": {"html_report_path": "/r.html"}, "last_error": None}
+    assert job_queue.stats() == {STATE_DONE: 1}
+
+def test_expired_lease_becomes_visible_and_stale_ack_is_rejected(job_queue, clock):
+    job_queue.enqueue({"n": 1}, max_attempts=3)
+    stale = job_queue.lease("host-a", lease_seconds=60)
+    clock.now += 30
+    assert job_queue.extend_lease(stale, lease_seconds=60) # Heartbeat: berlaku sampai +90
+    clock.now += 45
+    assert job_queue.lease("host-b", lease_seconds=60) is None
+    clock.now += 20
+    taken = job_queue.lease("host-b", lease_seconds=60)
+    assert taken["attempts"] == 2
+    assert not job_queue.ack(stale, {"from": "host-a"})
+    assert not job_queue.extend_lease(stale)
+    assert job_queue.ack(taken, {"from": "host-b"})
+
+def test_failures_back_off_then_dead_letter(job_queue, clock, monkeypatch):
+    monkeypatch.setattr(config, "JOB_QUEUE_RETRY_BACKOFF_SECONDS", 10)
+    job_id = job_queue.enqueue({"n": 1}, max_attempts=2)
+    job_queue.fail(job_queue.lease("w", 60), "timeout")
+    assert job_queue.lease("w", 60) is None # Belum lewat backoff
+    clock.now += 10
+    job_queue.fail(job_queue.lease("w", 60), "timeout lagi")
+    assert job_queue.stats() == {STATE_DEAD: 1}
+    dead = job_queue.dead_letters()
+    assert [(job["id"], job["attempts"], job["last_error"]) for job in dead] == [(job_id, 2, "timeout lagi")]
+    assert job_queue.requeue_dead() == 1
+    assert job_queue.lease("w", 60)["attempts"] == 1
+
+def test_expired_lease_on_last_attempt_is_dead_lettered(job_queue, clock):
+    job_queue.enqueue({"n": 1}, max_attempts=1)
+    job_queue.lease("host-a", lease_seconds=60)
+    clock.now += 61
+    assert job_queue.lease("host-b", lease_seconds=60) is None
+    assert "host-a" in job_queue.dead_letters()[0]["last_error"]
+
+def test_worker_retries_failed_handler(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "JOB_QUEUE_RETRY_BACKOFF_SECONDS", 0)
+    calls = []
+
+    def handler(payload):
+        calls.append(payload["n"])
+        if len(calls) == 1:
+            raise RuntimeError("browser crash")
+        return {"ok": payload["n"]}
+    with SQLiteJobQueue(str(tmp_path / "queue.sqlite3")) as job_queue:
+        job_id = job_queue.enqueue({"n": 7}, max_attempts=3)
+        worker = QueueWorker(job_queue, handler, worker_id="w1", poll_seconds=0)
+        assert worker.run(drain=True) == 2
+        assert (worker.processed, worker.failed) == (1, 1)
+        assert job_queue.result(job_id)["result"] == {"ok": 7}
+
+def test_heartbeat_keeps_long_job_leased(tmp_path):
+    path = str(tmp_path / "queue.sqlite3")
+    stolen = []
+    with SQLiteJobQueue(path) as job_queue, SQLiteJobQueue(path) as other_host:
+        job_queue.enqueue({"n": 1})
+
+        def slow_handler(payload):
+            for _ in range(5):
+                time.sleep(0.1)
+                stolen.append(other_host.lease("host-b", lease_seconds=0.3))
+            return {}
+        QueueWorker(job_queue, slow_handler, worker_id="host-a", lease_seconds=0.3, poll_seconds=0).process_one()
+        assert stolen == [None] * 5
+        assert job_queue.stats() == {STATE_DONE: 1}
+
+def _drain_worker(path, out_path):
+    processed = []
+    with SQLiteJobQueue(path) as job_queue:
+        QueueWorker(job_queue, lambda payload: processed.append(payload["n"]) or {}, poll_seconds=0).run(drain=True)
+    with open(out_path, "w") as f:
+        f.write("\n".join(map(str, processed)))
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="Membutuhkan start method fork")
+def test_concurrent_workers_process_each_job_once(tmp_path):
+    path = str(tmp_path / "queue.sqlite3")
+    with SQLiteJobQueue(path) as job_queue:
+        job_queue.enqueue_many({"n": n} for n in range(200))
+    context = multiprocessing.get_context("fork")
+    processes = [context.Process(target=_drain_worker, args=(path, str(tmp_path / f"out{i}.txt"))) for i in range(4)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(timeout=60)
+        assert process.exitcode == 0
+    seen = []
+    for i in range(4):
+        content = (tmp_path / f"out{i}.txt").read_text()
+        seen += [int(n) for n in content.split()] if content else []
+    assert sorted(seen) == list(range(200))
+    with SQLiteJobQueue(path) as job_queue:
+        assert job_queue.stats() == {STATE_DONE: 200}
+
+def test_enqueue_batch_and_run_workers(tmp_path, monkeypatch):
+    import main
+    monkeypatch.setattr(config, "JOB_QUEUE_PATH", str(tmp_path / "queue.sqlite3"))
+    monkeypatch.setattr(config, "JOB_QUEUE_POLL_SECONDS", 0)
+    batch_file = tmp_path / "urls.txt"
+    batch_file.write_text("a.test\nhttp://b.test/\n", encoding="utf-8")
+    assert main.enqueue_batch(str(batch_file), {"browser": "firefox", "headless": True, "threat_intel": False}) == 2
+    pipeline = mock.Mock(side_effect=lambda **kwargs: {"html_report_path": f"/r/{kwargs['target_url'].split('//')[1][0]}.html"})
+    with mock.patch("main.run_analysis_pipeline", pipeline):
+        assert main.run_queue_workers(threads=2, drain=True) == (2, 0)
+    assert sorted(call.kwargs["target_url"] for call in pipeline.call_args_list) == ["http://b.test/", "https://a.test"]
+    assert {call.kwargs["browser_type"] for call in pipeline.call_args_list} == {"firefox"}
+
+def test_urgent_lane_and_submitters_take_turns(job_queue):
+    for n in range(3):
+        job_queue.enqueue({"target_url": f"http://bulk{n}.test/"}, submitter="alice")
+    job_queue.enqueue({"target_url": "http://bob.test/"}, submitter="bob")
+    job_queue.enqueue({"target_url": "http://urgent.test/"}, lane="urgent", submitter="alice")
+    order = [job_queue.lease("w", 60)["payload"]["target_url"] for _ in range(5)]
+    assert order == ["http://urgent.test/", "http://bob.test/", "http://bulk0.test/", "http://bulk1.test/", "http://bulk2.test/"]
+    with pytest.raises(ValueError):
+        job_queue.enqueue({}, lane="segera")
+
+def test_hosts_take_turns_within_submitter(job_queue, clock):
+    job_queue.enqueue_many([{"target_url": f"http://a.test/{n}"} for n in range(3)] + [{"target_url": "http://b.test/"}])
+    order = []
+    for _ in range(4):
+        job = job_queue.lease("w", 60)
+        order.append(job["payload"]["target_url"])
+        job_queue.ack(job)
+        clock.now += config.SCHEDULER_MIN_INTERVAL_SECONDS
+    assert order == ["http://a.test/0", "http://b.test/", "http://a.test/1", "http://a.test/2"]
+
+def test_host_cap_and_interval_apply_across_workers(tmp_path, clock):
+    path = str(tmp_path / "queue.sqlite3")
+    with SQLiteJobQueue(path, clock=clock, max_per_host=1, min_interval_seconds=10) as host_a, \
+            SQLiteJobQueue(path, clock=clock, max_per_host=1, min_interval_seconds=10) as host_b:
+        host_a.enqueue_many([{"target_url": "http://a.test/1"}, {"target_url": "http://a.test/2"}])
+        first = host_a.lease("host-a", 300)
+        clock.now += 60
+        assert host_b.lease("host-b", 300) is None # a.test masih dikunjungi host-a
+        assert host_b.ready() == 1
+        host_a.ack(first)
+        clock.now += 5
+        assert host_b.lease("host-b", 300) is None # Jeda dihitung dari selesainya kunjungan
+        clock.now += 5
+        assert host_b.lease("host-b", 300)["payload"]["target_url"] == "http://a.test/2"
+
+def test_drain_waits_for_jobs_held_by_host_limits(tmp_path):
+    calls = []
+    with SQLiteJobQueue(str(tmp_path / "queue.sqlite3"), max_per_host=1, min_interval_seconds=0.1) as job_queue:
+        job_queue.enqueue_many([{"target_url": "http://a.test/1"}, {"target_url": "http://a.test/2"}])
+        worker = QueueWorker(job_queue, lambda payload: calls.append(payload["target_url"]) or {}, poll_seconds=0.02)
+        assert worker.run(drain=True) == 2
+    assert calls == ["http://a.test/1", "http://a.test/2"]
+
+def test_queue_file_from_before_scheduling_is_migrated(tmp_path):
+    import sqlite3
+    path = str(tmp_path / "queue.sqlite3")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE jobs (id INTEGER PRIMARY KEY, queue TEXT NOT NULL, payload TEXT NOT NULL, state TEXT NOT NULL, "
+                 "attempts INTEGER NOT NULL DEFAULT 0, max_attempts INTEGER NOT NULL, available_at REAL NOT NULL, lease_token TEXT, "
+                 "lease_expires_at REAL, worker_id TEXT, last_error TEXT, result TEXT, created_at REAL NOT NULL, updated_at REAL NOT NULL)")
+    conn.execute("INSERT INTO jobs(queue, payload, state, max_attempts, available_at, created_at, updated_at) "
+                 "VALUES ('analysis', '{\"target_url\": \"http://a.test/\"}', 'queued', 3, 0, 0, 0)")
+    conn.commit()
+    conn.close()
+    with SQLiteJobQueue(path, max_per_host=1) as job_queue:
+        job_queue.enqueue({"target_url": "http://a.test/2"})
+        assert job_queue.lease("w", 60)["payload"] == {"target_url": "http://a.test/"}
+        assert job_queue.lease("w", 60) is None # Job lama ikut dikenai batas per host
+
+def test_job_queue_interface_is_abstract():
+    from core.job_queue import JobQueue
+    with pytest.raises(TypeError):
+        JobQueue()
+
+def test_worker_survives_queue_errors_on_ack_and_fail(tmp_path):
+    import sqlite3
+    with SQLiteJobQueue(str(tmp_path / "queue.sqlite3")) as job_queue:
+        job_queue.enqueue_many([{"n": 1}, {"n": 2}])
+        locked = sqlite3.OperationalError("database is locked")
+        handler = mock.Mock(side_effect=[{}, RuntimeError("browser crash")])
+        worker = QueueWorker(job_queue, handler, worker_id="w1", lease_seconds=60, poll_seconds=0)
+        with mock.patch.object(job_queue, "ack", side_effect=locked), mock.patch.object(job_queue, "fail", side_effect=locked):
+            assert worker.run(max_jobs=2) == 2
+        assert (worker.processed, worker.failed) == (1, 1)
+        assert job_queue.stats() == {STATE_LEASED: 2} # Lease dibiarkan kedaluwarsa, lalu job diulang
+
+def test_worker_keeps_polling_when_queue_is_unavailable(tmp_path):
+    import sqlite3
+    with SQLiteJobQueue(str(tmp_path / "queue.sqlite3")) as job_queue:
+        job_queue.enqueue({"n": 1})
+        worker = QueueWorker(job_queue, lambda payload: {}, worker_id="w1", poll_seconds=0)
+        real_lease = job_queue.lease
+        leases = iter([sqlite3.OperationalError("database is locked")])
+
+        def flaky_lease(*args):
+            for error in leases:
+                raise error
+            return real_lease(*args)
+        with mock.patch.object(job_queue, "lease", side_effect=flaky_lease):
+            assert worker.run(drain=True) == 1
+        assert job_queue.stats() == {STATE_DONE: 1}
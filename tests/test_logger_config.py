@@ -0,0 +1,101 @@
+# tests/test_logger_config.py
+import os
+import sys
+import json
+import logging
+import threading
+import multiprocessing
+import pytest
+
+# Tambahkan path root proyek ke sys.path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+import config
+from utils.logger_config import (
+    setup_logger, get_queued_handler, log_context, ColoredFormatter, JsonLinesFormatter, QueuedLogHandler
+)
+
+def make_record(level=logging.WARNING, msg="pesan %s", args=("uji",)):
+    return logging.LogRecord("uji.logger", level, __file__, 1, msg, args, None)
+
+def read_lines(path):
+    with open(path, encoding="utf-8") as f:
+        return f.read().splitlines()
+
+@pytest.fixture
+def log_file(tmp_path):
+    path = str(tmp_path / "app.log")
+    yield path
+    get_queued_handler(path).stop()
+
+def test_colored_formatter_does_not_mutate_record():
+    record = make_record()
+    output = ColoredFormatter(config.LOG_FORMAT).format(record)
+    assert "pesan uji" in output
+    assert record.levelname == "WARNING"
+    assert logging.Formatter(config.LOG_FORMAT).format(record).endswith(" - WARNING - pesan uji")
+
+def test_json_formatter_includes_job_id():
+    record = make_record()
+    record.job_id = "job-1"
+    entry = json.loads(JsonLinesFormatter().format(record))
+    assert entry["message"] == "pesan uji"
+    assert entry["level"] == "WARNING"
+    assert entry["job_id"] == "job-1"
+
+def test_setup_logger_is_idempotent(log_file):
+    first = setup_logger("uji.idempoten", "INFO", log_file)
+    handler = first.handlers[0]
+    second = setup_logger("uji.idempoten", "DEBUG", log_file)
+    other = setup_logger("uji.lain", "INFO", log_file)
+    assert first is second
+    assert second.handlers == [handler] and other.handlers == [handler]
+    assert isinstance(handler, QueuedLogHandler)
+    assert second.level == logging.DEBUG
+
+def test_queued_records_reach_file_after_stop(log_file):
+    logger = setup_logger("uji.antrean", "INFO", log_file)
+    items = ["awal"]
+    logger.info("isi %s", items)
+    items.append("berubah") # Pesan dirender saat dicatat, bukan saat listener menulis
+    try:
+        raise ValueError("gagal")
+    except ValueError:
+        logger.error("terjadi kesalahan", exc_info=True)
+    get_queued_handler(log_file).stop()
+    lines = read_lines(log_file)
+    assert lines[0].endswith("INFO - isi ['awal']")
+    assert any("ValueError: gagal" in line for line in lines)
+
+def test_json_file_format_carries_job_ids_per_thread(log_file, monkeypatch):
+    monkeypatch.setattr(config, "LOG_FILE_FORMAT", "json")
+    logger = setup_logger("uji.json", "INFO", log_file)
+
+    def work(job_id):
+        with log_context(job_id):
+            logger.info(f"memproses {job_id}")
+    threads = [threading.Thread(target=work, args=(f"job-{i}",)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    logger.info("di luar job")
+    get_queued_handler(log_file).stop()
+
+    entries = [json.loads(line) for line in read_lines(log_file)]
+    assert {entry["message"]: entry["job_id"] for entry in entries} == {
+        **{f"memproses job-{i}": f"job-{i}" for i in range(4)}, "di luar job": None
+    }
+
+def _log_in_child(logger_name, log_file):
+    setup_logger(logger_name, "INFO", log_file).info("dari proses anak")
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="Membutuhkan start method fork")
+def test_forked_worker_writes_directly(log_file):
+    setup_logger("uji.fork", "INFO", log_file)
+    process = multiprocessing.get_context("fork").Process(target=_log_in_child, args=("uji.fork", log_file))
+    process.start()
+    process.join(timeout=10)
+    assert process.exitcode == 0
+    assert read_lines(log_file)[-1].endswith("INFO - dari proses anak")
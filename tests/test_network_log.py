@@ -0,0 +1,79 @@
+# tests/test_network_log.py
+import os
+import sys
+import gzip
+import json
+import pytest
+from unittest import mock
+
+# Tambahkan path root proyek ke sys.path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+import config
+import core.network_log as network_log
+from core.network_log import (
+    NetworkLogWriter, write_network_log, iter_network_log, read_network_log,
+    network_log_filename, match_network_log_suffix, resolve_compression,
+)
+
+EVENTS = [
+    {"type": "request", "url": "http://example.com/", "method": "GET", "timestamp": 1.5, "headers": {"a": "ü"}},
+    {"type": "response", "url": "http://example.com/", "status": 200, "timestamp": 2},
+]
+
+def test_ndjson_writes_one_event_per_line(tmp_path):
+    path = str(tmp_path / network_log_filename("site_", compression=""))
+    assert write_network_log(EVENTS, path) == 2
+    lines = open(path, encoding="utf-8").read().splitlines()
+    assert [json.loads(line) for line in lines] == EVENTS
+    assert read_network_log(path) == EVENTS
+
+def test_gzip_roundtrip_and_filename(tmp_path):
+    filename = network_log_filename("site_", compression="gzip")
+    assert filename == f"site_{config.DEFAULT_NETWORK_LOG_FILENAME}.gz"
+    path = str(tmp_path / filename)
+    write_network_log(EVENTS, path)
+    assert gzip.decompress(open(path, "rb").read()).count(b"\n") == 2
+    assert list(iter_network_log(path)) == EVENTS
+
+def test_zstd_falls_back_to_gzip_without_package():
+    with mock.patch.object(network_log, "zstandard", None):
+        assert resolve_compression("zstd") == "gzip"
+    with pytest.raises(ValueError):
+        resolve_compression("brotli")
+
+def test_zstd_roundtrip(tmp_path):
+    pytest.importorskip("zstandard")
+    path = str(tmp_path / network_log_filename("site_", compression="zstd"))
+    assert path.endswith(".zst")
+    write_network_log(EVENTS, path)
+    assert read_network_log(path) == EVENTS
+
+def test_debug_json_format_and_legacy_reader(tmp_path):
+    path = str(tmp_path / network_log_filename("site_", log_format="json"))
+    assert path.endswith(config.NETWORK_LOG_DEBUG_FILENAME)
+    write_network_log(EVENTS, path, log_format="json")
+    assert "\n    {" in open(path, encoding="utf-8").read()
+    assert read_network_log(path) == EVENTS
+
+def test_writer_streams_in_batches_without_orjson(tmp_path):
+    path = str(tmp_path / "events.ndjson")
+    with mock.patch.object(network_log, "orjson", None):
+        with NetworkLogWriter(path, batch_size=2) as writer:
+            for index in range(5):
+                writer.write({"index": index})
+                assert len(writer._pending) == (index + 1) % 2
+        assert writer.count == 5
+        assert [event["index"] for event in iter_network_log(path)] == list(range(5))
+
+def test_invalid_line_reports_line_number(tmp_path):
+    path = tmp_path / "broken.ndjson"
+    path.write_text('{"a": 1}\n\n{not json\n')
+    with pytest.raises(ValueError, match="Baris 3"):
+        read_network_log(str(path))
+
+def test_match_network_log_suffix():
+    assert match_network_log_suffix(f"x_{config.DEFAULT_NETWORK_LOG_FILENAME}.gz") == f"{config.DEFAULT_NETWORK_LOG_FILENAME}.gz"
+    assert match_network_log_suffix(f"x_{config.NETWORK_LOG_DEBUG_FILENAME}") == config.NETWORK_LOG_DEBUG_FILENAME
+    assert match_network_log_suffix("notes.txt") is None
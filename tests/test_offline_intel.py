@@ -0,0 +1,172 @@
+# tests/test_offline_intel.py
+import os
+import sys
+import gc
+import gzip
+import pickle
+import pytest
+from concurrent.futures import ProcessPoolExecutor
+
+# Tambahkan path root proyek ke sys.path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from core.offline_intel import (
+    OfflineIntelIndex, compile_feed, guess_ioc_type, normalize_indicator, open_offline_index, main as offline_intel_main,
+)
+from core.intel_providers import OfflineIndexProvider
+
+FEED_LINES = [
+    "# feed contoh",
+    "domain,Evil.COM.,phishing",
+    "url,http://bad.example/dl.exe,malware",
+    "ip,10.1.2.3,c2",
+    "hash,D41D8CD98F00B204E9800998ECF8427E,dropper",
+    "plain-domain.net",
+    "44d88612fea8a8f36de82e1278abb02f",
+    "http://no-type.example/a,b",
+    "domain,evil.com,duplicate-label",
+    "",
+]
+
+@pytest.fixture
+def compiled_index(tmp_path):
+    feed = tmp_path / "feed.csv"
+    feed.write_text("\n".join(FEED_LINES))
+    index_path = str(tmp_path / "intel.idx")
+    # chunk_size kecil memaksa beberapa run sehingga jalur external merge ikut teruji
+    count = compile_feed([str(feed)], index_path, chunk_size=2)
+    return index_path, count
+
+def _lookup_in_subprocess(index, ioc_type, value):
+    return index.lookup(ioc_type, value)
+
+# --- Helper ---
+
+@pytest.mark.parametrize("value, expected_type", [
+    ("http://x.com/a", "url"),
+    ("d41d8cd98f00b204e9800998ecf8427e", "hash"),
+    ("10.0.0.1", "ip"),
+    ("::1", "ip"),
+    ("example.com", "domain"),
+])
+def test_guess_ioc_type(value, expected_type):
+    assert guess_ioc_type(value) == expected_type
+
+def test_normalize_indicator():
+    assert normalize_indicator("domain", " Example.COM. ") == "example.com"
+    assert normalize_indicator("hash", "ABC") == "abc"
+    assert normalize_indicator("ip", "[::1]") == "::1"
+    assert normalize_indicator("ip", "not-an-ip") is None
+    assert normalize_indicator("url", "  ") is None
+
+# --- Kompilasi dan lookup ---
+
+def test_compile_deduplicates_entries(compiled_index):
+    index_path, count = compiled_index
+    assert count == 7 # duplikat evil.com dibuang
+    with OfflineIntelIndex(index_path) as index:
+        assert len(index) == 7
+
+def test_lookup_all_types(compiled_index):
+    index_path, _ = compiled_index
+    with OfflineIntelIndex(index_path) as index:
+        assert index.lookup("domain", "EVIL.com")["label"] == "phishing"
+        assert index.lookup("url", "http://bad.example/dl.exe")["label"] == "malware"
+        assert index.lookup("ip", "10.1.2.3")["label"] == "c2"
+        assert index.lookup("hash", "d41d8cd98f00b204e9800998ecf8427e")["label"] == "dropper"
+        assert index.lookup("domain", "plain-domain.net") is not None
+        assert index.lookup("hash", "44D88612FEA8A8F36DE82E1278ABB02F") is not None
+        assert index.lookup("url", "http://no-type.example/a,b") is not None
+        assert ("domain", "evil.com") in index
+
+def test_lookup_misses(compiled_index):
+    index_path, _ = compiled_index
+    with OfflineIntelIndex(index_path) as index:
+        assert index.lookup("domain", "clean.com") is None
+        assert index.lookup("ip", "evil.com") is None # tipe berbeda
+        assert index.lookup("unknown", "evil.com") is None
+
+def test_compile_gzip_feed_and_empty_feed(tmp_path):
+    gz_feed = tmp_path / "feed.txt.gz"
+    with gzip.open(gz_feed, "wt") as f:
+        f.write("evil.org\n")
+    index_path = str(tmp_path / "gz.idx")
+    assert compile_feed(str(gz_feed), index_path) == 1
+    with OfflineIntelIndex(index_path) as index:
+        assert index.lookup("domain", "evil.org") is not None
+
+    empty_feed = tmp_path / "empty.txt"
+    empty_feed.write_text("# kosong\n")
+    empty_index = str(tmp_path / "empty.idx")
+    assert compile_feed(str(empty_feed), empty_index) == 0
+    with OfflineIntelIndex(empty_index) as index:
+        assert index.lookup("domain", "evil.org") is None
+
+def test_invalid_index_file_raises(tmp_path):
+    bad = tmp_path / "bad.idx"
+    bad.write_bytes(b"not an index at all, definitely not" * 2)
+    with pytest.raises(ValueError):
+        OfflineIntelIndex(str(bad))
+
+# --- Berbagi antar proses ---
+
+def test_index_pickles_by_path(compiled_index):
+    index_path, _ = compiled_index
+    with OfflineIntelIndex(index_path) as index:
+        payload = pickle.dumps(index)
+        assert len(payload) < 500 # hanya path, bukan isi indeks
+    clone = pickle.loads(payload)
+    try:
+        assert clone.lookup("domain", "evil.com") is not None
+    finally:
+        clone.close()
+
+def test_index_usable_from_worker_process(compiled_index):
+    index_path, _ = compiled_index
+    with OfflineIntelIndex(index_path) as index, ProcessPoolExecutor(max_workers=2) as executor:
+        results = list(executor.map(_lookup_in_subprocess, [index, index], ["domain", "ip"], ["evil.com", "10.1.2.3"]))
+    assert [r["label"] for r in results] == ["phishing", "c2"]
+
+def test_open_offline_index_reuses_instance(compiled_index):
+    index_path, _ = compiled_index
+    assert open_offline_index(index_path) is open_offline_index(index_path)
+
+def test_open_offline_index_releases_replaced_instance(compiled_index, tmp_path):
+    index_path, _ = compiled_index
+    old_index = open_offline_index(index_path)
+    old_mm, old_file = old_index._mm, old_index._file
+    feed = tmp_path / "feed2.txt"
+    feed.write_text("domain,new-evil.com,phishing\n")
+    compile_feed(str(feed), index_path)
+    stat = os.stat(index_path)
+    os.utime(index_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    new_index = open_offline_index(index_path)
+    assert new_index is not old_index
+    assert new_index.lookup("domain", "new-evil.com") is not None
+    assert old_index.lookup("domain", "evil.com") is not None # Pemakai lama tetap bisa membaca
+    del old_index
+    gc.collect()
+    assert old_mm.closed and old_file.closed
+
+# --- Provider dan CLI ---
+
+def test_offline_index_provider(compiled_index):
+    index_path, _ = compiled_index
+    provider = OfflineIndexProvider(path=index_path)
+    assert provider.is_available()
+    record = provider.lookup("domain", "evil.com")
+    assert record["malicious"] == 1
+    assert record["label"] == "phishing"
+    assert record["domain"] == "evil.com"
+    assert record["provider"] == "offline_index"
+    assert provider.lookup("domain", "clean.com") is None
+
+def test_cli_compile_and_lookup(tmp_path, capsys):
+    feed = tmp_path / "feed.txt"
+    feed.write_text("domain,cli-evil.com,scam\n")
+    index_path = str(tmp_path / "cli.idx")
+    assert offline_intel_main(["compile", str(feed), "-o", index_path]) == 0
+    assert offline_intel_main(["lookup", "cli-evil.com", "-i", index_path]) == 0
+    assert "scam" in capsys.readouterr().out
+    assert offline_intel_main(["lookup", "other.com", "-i", index_path]) == 1
@@ -0,0 +1,219 @@
+# tests/test_pipeline.py
+import os
+import sys
+import time
+import threading
+import pytest
+from unittest import mock
+
+# Tambahkan path root proyek ke sys.path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+import config
+from core.pipeline import StagedPipeline, PipelineStage, AnalysisStages, reserve_report_path
+from core.report_generator import clear_template_environments
+
+def tag(name, delay=0.0):
+    def stage(job):
+        time.sleep(delay)
+        job.setdefault("trail", []).append(name)
+        return job
+    return stage
+
+def test_all_jobs_pass_through_every_stage():
+    pipeline = StagedPipeline([PipelineStage("a", tag("a"), 2), PipelineStage("b", tag("b"), 3)], queue_size=2)
+    results = list(pipeline.run({"id": i} for i in range(20)))
+    assert sorted(job["id"] for job in results) == list(range(20))
+    assert all(job["trail"] == ["a", "b"] for job in results)
+    assert pipeline.stats["b"]["processed"] == 20
+
+def test_backpressure_bounds_jobs_in_flight():
+    lock = threading.Lock()
+    in_flight = {"now": 0, "max": 0}
+    def start(job):
+        with lock:
+            in_flight["now"] += 1
+            in_flight["max"] = max(in_flight["max"], in_flight["now"])
+        return job
+    stages = [PipelineStage("capture", start, 1), PipelineStage("render", tag("render", 0.01), 1)]
+    for job in StagedPipeline(stages, queue_size=1).run({"id": i} for i in range(30)):
+        with lock:
+            in_flight["now"] -= 1
+    # Batas: worker per tahap + kapasitas setiap antrean (termasuk antrean keluaran)
+    assert in_flight["max"] <= 2 + 3 * 1 + 1
+
+def test_capture_does_not_wait_for_slow_render():
+    captured = []
+    def capture(job):
+        captured.append(time.perf_counter())
+        return job
+    stages = [PipelineStage("capture", capture, 1), PipelineStage("render", tag("render", 0.05), 1)]
+    finished = [time.perf_counter() for _ in StagedPipeline(stages, queue_size=8).run({"id": i} for i in range(5))]
+    assert max(captured) < finished[1]
+
+def test_failed_job_skips_remaining_stages():
+    def explode(job):
+        if job["id"] == 1:
+            raise RuntimeError("boom")
+        return job
+    later = mock.Mock(side_effect=lambda job: job)
+    pipeline = StagedPipeline([PipelineStage("extract", explode), PipelineStage("render", later)])
+    results = {job["id"]: job for job in pipeline.run({"id": i} for i in range(3))}
+    assert results[1]["error"] == "extract: boom"
+    assert later.call_count == 2
+    assert pipeline.stats["extract"]["failed"] == 1
+
+def test_batch_stage_receives_queued_jobs_together():
+    release = threading.Event()
+    def gate(job):
+        release.wait(timeout=2)
+        return job
+    batches = []
+    def score(jobs):
+        batches.append(len(jobs))
+        if any(job["id"] == 2 for job in jobs):
+            jobs[0]["error"] = "score: gagal" # Fungsi batch menandai sendiri job yang gagal
+        return jobs
+    pipeline = StagedPipeline([PipelineStage("capture", gate, 1), PipelineStage("score", score, 1, batch_size=4)], queue_size=8)
+    jobs = pipeline.run({"id": i} for i in range(6))
+    threading.Timer(0.1, release.set).start()
+    results = list(jobs)
+    assert sorted(job["id"] for job in results) == list(range(6))
+    assert sum(batches) == 6 and max(batches) <= 4
+    assert pipeline.stats["score"]["processed"] == 6 and pipeline.stats["score"]["failed"] == 1
+    with pytest.raises(ValueError):
+        PipelineStage("score", score, 1, batch_size=0)
+
+def test_stopping_early_shuts_down_workers():
+    pipeline = StagedPipeline([PipelineStage("slow", tag("slow", 0.01), 2)], queue_size=1)
+    start = time.perf_counter()
+    for job in pipeline.run({"id": i} for i in range(10000)):
+        break
+    assert time.perf_counter() - start < 2
+    assert not [t for t in threading.enumerate() if t.name.startswith("pipeline-") and t.is_alive()]
+
+def test_reserve_report_path_is_unique(tmp_path):
+    paths = {reserve_report_path("http://same.example.com/a", str(tmp_path)) for _ in range(3)}
+    assert len(paths) == 3
+    assert all(os.path.exists(path) for path in paths)
+
+def test_analysis_stages_end_to_end(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "HTML_REPORT_DIR", str(tmp_path / "reports"))
+    monkeypatch.setattr(config, "NETWORK_LOG_DIR", str(tmp_path / "logs"))
+    monkeypatch.setattr(config, "EVENT_STORE_DIR", str(tmp_path / "events"))
+    clear_template_environments()
+    events = [
+        {"type": "request", "url": "http://evil.example.net/payload.exe", "method": "GET", "resource_type": "other", "timestamp": 1},
+        {"type": "response", "url": "http://evil.example.net/payload.exe", "status": 200, "timestamp": 2},
+    ]
+    automation = mock.Mock()
+    automation.return_value.analyze_page.return_value = (None, events, {}, {}, [], [])
+    stages = AnalysisStages("chromium", True, ioc_store_enabled=False, summarize=lambda job: {"domains": job["extracted_iocs"]["unique_domains"]})
+    with mock.patch("core.browser_operations.BrowserAutomation", automation):
+        results = list(StagedPipeline(stages.build()).run({"target_url": "http://site.test/"} for _ in range(3)))
+    assert [result["error"] for result in results] == [None] * 3
+    assert len({result["html_report_path"] for result in results}) == 3
+    assert len({result["network_log_path"] for result in results}) == 3
+    assert results[0]["summary"] == {"domains": ["evil.example.net"]}
+    assert "network_events" not in results[0]
+    assert "payload.exe" in open(results[0]["html_report_path"], encoding="utf-8").read()
+
+def listening_automation(events):
+    """BrowserAutomation palsu yang meneruskan setiap event ke event_listener seperti capture sungguhan."""
+    def automation(target_url, event_listener=None, **kwargs):
+        def analyze_page():
+            for event in events:
+                event_listener(event)
+            return (None, list(events), {}, {}, [], [])
+        return mock.Mock(analyze_page=analyze_page)
+    return automation
+
+def fake_aggregator():
+    aggregator = mock.Mock(provider_names=["palsu"])
+    aggregator.lookup.side_effect = lambda ioc_type, value: {"indicator": value, "indicator_type": ioc_type, "domain": value, "malicious": 0}
+    aggregator.lookup_indicators.side_effect = lambda indicators: [
+        {"indicator": v, "indicator_type": t, "malicious": 0} for t, values in indicators.items() for v in values
+    ]
+    return aggregator
+
+def test_batch_stages_use_incremental_extractor_and_early_intel(tmp_path, monkeypatch):
+    """Batch memakai alur yang sama dengan analisis tunggal: IOC inkremental, lookup awal, per eTLD+1."""
+    monkeypatch.setattr(config, "HTML_REPORT_DIR", str(tmp_path / "reports"))
+    monkeypatch.setattr(config, "NETWORK_LOG_DIR", str(tmp_path / "logs"))
+    monkeypatch.setattr(config, "THREAT_INTEL_EARLY_LOOKUP", True)
+    monkeypatch.setattr(config, "DOMAIN_SCORING_ENABLED", False)
+    clear_template_environments()
+    events = [{"type": "request", "url": f"http://{host}/", "method": "GET", "timestamp": 1}
+              for host in ("a.evil.co.uk", "b.evil.co.uk", "10.0.0.7")]
+    aggregator = fake_aggregator()
+    with mock.patch("core.intel_providers.build_intel_aggregator", return_value=aggregator):
+        stages = AnalysisStages("chromium", True, threat_intel_enabled=True, per_registrable_domain=True,
+                                ioc_store_enabled=False, event_store_enabled=False)
+    with mock.patch("core.browser_operations.BrowserAutomation", listening_automation(events)):
+        job = stages.capture({"target_url": "http://site.test/"})
+        assert job["_ioc_extractor"].events_processed == 3 # Diekstrak selama capture
+        job = stages.render(stages.enrich(stages.extract(job)))
+    assert sorted(c.args for c in aggregator.lookup.call_args_list) == [("domain", "evil.co.uk"), ("ip", "10.0.0.7")]
+    aggregator.lookup_indicators.assert_called_once_with({"domain": [], "url": [], "ip": [], "hash": []})
+    assert "_early_intel" not in job and "_ioc_extractor" not in job
+    assert job["html_report_path"] and job["intel_enricher"] is None
+
+def test_extract_batch_scores_domains_once_per_batch(monkeypatch):
+    monkeypatch.setattr(config, "DOMAIN_SCORING_ENABLED", True)
+    stages = AnalysisStages("chromium", True, ioc_store_enabled=False, event_store_enabled=False)
+    jobs = [
+        {"target_url": "http://a.test/", "network_events": [{"type": "request", "url": "http://xjk3q9zt7v.com/", "timestamp": 1}]},
+        {"target_url": "http://b.test/", "network_events": [{"type": "request", "url": "http://google.com/", "timestamp": 1}]},
+        {"target_url": "http://c.test/", "network_events": None},
+        {"target_url": "http://d.test/", "network_events": 42}, # Event rusak: hanya job ini yang gagal
+    ]
+    from core import domain_scoring
+    with mock.patch.object(domain_scoring, "annotate_domain_risk", wraps=domain_scoring.annotate_domain_risk) as annotate:
+        results = stages.extract_batch(jobs)
+    annotate.assert_called_once()
+    assert len(annotate.call_args.args[0]) == 2
+    assert set(results[0]["extracted_iocs"]["domain_risk_scores"]) == {"xjk3q9zt7v.com"}
+    assert set(results[1]["extracted_iocs"]["domain_risk_scores"]) == {"google.com"}
+    assert results[2]["extracted_iocs"] == {} and "error" not in results[2]
+    assert results[3]["error"].startswith("extract:")
+
+def test_run_analysis_pipeline_runs_shared_stages(tmp_path, monkeypatch):
+    import main
+    monkeypatch.setattr(config, "HTML_REPORT_DIR", str(tmp_path / "reports"))
+    monkeypatch.setattr(config, "NETWORK_LOG_DIR", str(tmp_path / "logs"))
+    clear_template_environments()
+    events = [{"type": "request", "url": "http://evil.example.net/a.exe", "method": "GET", "timestamp": 1}]
+    aggregator = fake_aggregator()
+    with mock.patch("core.intel_providers.build_intel_aggregator", return_value=aggregator), \
+            mock.patch("core.browser_operations.BrowserAutomation", listening_automation(events)):
+        results = main.run_analysis_pipeline("http://site.test/", "chromium", True, True, str(tmp_path),
+                                             deferred_intel=True, ioc_store_enabled=False, event_store_enabled=False)
+        assert results["intel_enricher"].wait(timeout=5)
+    assert results["html_report_path"].startswith(str(tmp_path / "reports"))
+    assert results["network_log_path"].startswith(str(tmp_path / "logs"))
+    assert sorted(c.args for c in aggregator.lookup.call_args_list) == [("domain", "evil.example.net"), ("url", "http://evil.example.net/a.exe")]
+    with open(results["threat_intel_path"], encoding="utf-8") as f:
+        assert '"status": "complete"' in f.read()
+
+def test_low_risk_host_is_not_looked_up_early(tmp_path, monkeypatch):
+    """Hanya host berisiko (dan IP) yang di-lookup selama capture; host jinak menunggu antrean setelah capture."""
+    monkeypatch.setattr(config, "HTML_REPORT_DIR", str(tmp_path / "reports"))
+    monkeypatch.setattr(config, "THREAT_INTEL_EARLY_LOOKUP", True)
+    monkeypatch.setattr(config, "DOMAIN_SCORING_ENABLED", True)
+    monkeypatch.setattr(config, "THREAT_INTEL_MIN_DOMAIN_RISK", 0.0)
+    monkeypatch.setattr(config, "THREAT_INTEL_EARLY_MIN_DOMAIN_RISK", 0.5)
+    clear_template_environments()
+    events = [{"type": "request", "url": f"http://{host}/", "method": "GET", "timestamp": 1}
+              for host in ("www.google.com", "xjk3q9zt7v.com", "10.0.0.7")]
+    aggregator = fake_aggregator()
+    with mock.patch("core.intel_providers.build_intel_aggregator", return_value=aggregator):
+        stages = AnalysisStages("chromium", True, threat_intel_enabled=True, ioc_store_enabled=False, event_store_enabled=False)
+    with mock.patch("core.browser_operations.BrowserAutomation", listening_automation(events)):
+        job = stages.enrich(stages.extract(stages.capture({"target_url": "http://site.test/"})))
+    early_lookups = sorted(c.args for c in aggregator.lookup.call_args_list) # lookup() hanya dipakai lookup awal
+    assert ("domain", "www.google.com") not in early_lookups
+    assert early_lookups == [("domain", "xjk3q9zt7v.com"), ("ip", "10.0.0.7")]
+    # Host jinak tetap diperiksa setelah capture, di antrean prioritas
+    aggregator.lookup_indicators.assert_called_once_with({"domain": ["www.google.com"], "url": [], "ip": [], "hash": []})
+    assert {r["indicator"] for r in job["virustotal_reports"]} == {"www.google.com", "xjk3q9zt7v.com", "10.0.0.7"}
@@ -0,0 +1,75 @@
+# tests/test_post_data_scanner.py
+import os
+import sys
+import json
+import base64
+import pytest
+from unittest import mock
+
+# Tambahkan path root proyek ke sys.path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from core.post_data_scanner import PostDataScanner, summarize_findings
+from core.ioc_extractor import IOCExtractor
+import config
+
+@pytest.fixture
+def scanner():
+    return PostDataScanner(max_bytes=65536, time_budget_ms=1000)
+
+def _categories(result):
+    return sorted((f["category"], f["field"]) for f in result["findings"])
+
+def test_scan_json_payload(scanner):
+    result = scanner.scan({"user": "victim@example.com", "password": "hunter2", "card": "4111 1111 1111 1111"})
+    assert _categories(result) == [("card_number", "card"), ("credential", "password"), ("email", "user")]
+    samples = {f["category"]: f["sample"] for f in result["findings"]}
+    assert samples["card_number"] == "**** 1111"
+    assert "hunter2" not in samples["credential"]
+
+def test_scan_form_payload_with_luhn_check(scanner):
+    result = scanner.scan("email=john%40evil.com&pwd=abc&cc=4111111111111111&order=1234567890123")
+    assert _categories(result) == [("card_number", "cc"), ("credential", "pwd"), ("email", "email")]
+    assert result["decoded_as"] == ["form"]
+
+def test_scan_nested_base64_json(scanner):
+    blob = base64.b64encode(json.dumps({"canvas_fp": "abc", "mail": "x@y.org"}).encode()).decode()
+    result = scanner.scan(f"d={blob}")
+    assert _categories(result) == [("email", "mail"), ("fingerprint", "canvas_fp")]
+    assert result["decoded_as"] == ["form", "base64", "json"]
+
+def test_scan_hex_buffer(scanner):
+    result = scanner.scan("username=joe&passwd=secret".encode().hex(), post_data_format="hex_buffer")
+    assert _categories(result) == [("credential", "passwd")]
+    assert result["decoded_as"][0] == "hex"
+
+def test_scan_respects_byte_budget():
+    result = PostDataScanner(max_bytes=1024, time_budget_ms=1000).scan("A" * 10_000_000 + " victim@example.com")
+    assert result["truncated"] is True
+    assert result["bytes_scanned"] == 1024
+    assert result["findings"] == []
+
+def test_scan_respects_time_budget():
+    payload = {f"field{i}": f"user{i}@example.com" for i in range(1000)}
+    result = PostDataScanner(time_budget_ms=0).scan(payload)
+    assert result["timed_out"] is True
+    assert len(result["findings"]) < 1000
+
+def test_summarize_findings(scanner):
+    result = scanner.scan({"a": "x@y.org", "b": "z@y.org", "token": "abc"})
+    assert summarize_findings(result) == {"email": 2, "credential": 1}
+
+def test_extractor_attaches_post_findings():
+    events = [{"type": "request", "method": "POST", "url": "http://phish.example/login",
+               "post_data": {"email": "v@example.com", "password": "x"}, "timestamp": 1}]
+    post = IOCExtractor(events).extract()["post_requests"][0]
+    assert post["post_data_summary"] == "Available"
+    assert {f["category"] for f in post["post_data_findings"]} == {"email", "credential"}
+    assert post["post_data_scan"]["timed_out"] is False
+
+def test_extractor_scanner_can_be_disabled():
+    events = [{"type": "request", "method": "POST", "url": "http://a.example/", "post_data": {"password": "x"}}]
+    with mock.patch.object(config, 'POST_SCAN_ENABLED', False):
+        post = IOCExtractor(events).extract()["post_requests"][0]
+    assert "post_data_findings" not in post
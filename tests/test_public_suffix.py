@@ -0,0 +1,64 @@
+# tests/test_public_suffix.py
+import os
+import sys
+import pytest
+
+# Tambahkan path root proyek ke sys.path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from core.public_suffix import PublicSuffixIndex, get_public_suffix_index, registrable_domain
+from core.ioc_extractor import IOCExtractor
+from core.intel_providers import collect_indicators
+
+SAMPLE_RULES = ["com", "uk", "co.uk", "*.ck", "!www.ck", "github.io", "рф"]
+
+@pytest.fixture
+def index():
+    return PublicSuffixIndex(SAMPLE_RULES)
+
+@pytest.mark.parametrize("host, expected", [
+    ("example.com", "example.com"),
+    ("a.b.example.com", "example.com"),
+    ("shop.example.co.uk", "example.co.uk"),
+    ("co.uk", None),
+    ("a.b.ck", "a.b.ck"),
+    ("www.ck", "www.ck"),
+    ("user.github.io", "user.github.io"),
+    ("cdn.user.github.io", "user.github.io"),
+    ("sub.xn--80adxhks.xn--p1ai", "xn--80adxhks.xn--p1ai"), # aturan IDN dicocokkan dalam bentuk punycode
+    ("Example.COM.", "example.com"),
+    ("10.0.0.1", "10.0.0.1"),
+    ("::1", "::1"),
+    ("", None),
+])
+def test_registrable_domain_rules(index, host, expected):
+    assert index.registrable_domain(host) == expected
+
+def test_bundled_list_loads_and_handles_private_section():
+    bundled = get_public_suffix_index()
+    assert bundled is not None
+    assert bundled.rule_count > 1000
+    assert bundled.registrable_domain("tracker.ads.example.co.uk") == "example.co.uk"
+    assert bundled.registrable_domain("foo.bar.github.io") == "bar.github.io"
+    assert registrable_domain("x1.y2.example.org") == "example.org"
+
+def test_missing_list_returns_none(tmp_path):
+    assert get_public_suffix_index(str(tmp_path / "missing.dat")) is None
+
+def test_extractor_rollups_and_registrable_intel_indicators():
+    events = [{"type": "request", "method": "GET", "url": f"http://r{i}.track.example.com/p.gif"} for i in range(5)]
+    events.append({"type": "request", "method": "GET", "url": "http://example.com/"})
+    events.append({"type": "request", "method": "GET", "url": "http://10.0.0.1/"})
+    iocs = IOCExtractor(events).extract()
+
+    rollup = iocs["registrable_domains"][0]
+    assert rollup["domain"] == "example.com"
+    assert rollup["host_count"] == 6
+    assert rollup["request_count"] == 6
+    assert iocs["registrable_domain_map"]["r3.track.example.com"] == "example.com"
+
+    assert len(collect_indicators(iocs)["domain"]) == 6
+    per_registrable = collect_indicators(iocs, per_registrable_domain=True)
+    assert per_registrable["domain"] == ["example.com"]
+    assert per_registrable["ip"] == ["10.0.0.1"]
@@ -1,7 +1,10 @@
 # tests/test_report_generator.py
 import os
 import sys
+import gzip
+import json
 import time
+import base64
 import pytest
 from unittest import mock
 from jinja2 import exceptions as JinjaExceptions # Impor yang benar untuk JinjaExceptions
@@ -11,14 +14,15 @@ project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 sys.path.insert(0, project_root)
 
 # Impor kelas yang akan diuji dan konfigurasi
-from core.report_generator import HTMLReportGenerator
+from core.report_generator import HTMLReportGenerator, encode_data_island, get_template_environment, clear_template_environments
 import config
 
 # --- Tes untuk HTMLReportGenerator ---
 
 @pytest.fixture
-def report_generator_instance():
-    """Fixture untuk membuat instance HTMLReportGenerator."""
+def report_generator_instance(tmp_path, monkeypatch):
+    """Fixture untuk membuat instance HTMLReportGenerator (cache bytecode template di tmp_path)."""
+    monkeypatch.setattr(config, 'REPORT_TEMPLATE_CACHE_DIR', str(tmp_path / "template_cache"))
     template_dir_path = os.path.join(project_root, "templates")
     if not os.path.exists(template_dir_path):
         os.makedirs(template_dir_path)
@@ -36,6 +40,8 @@ def report_generator_instance():
                     "{% if extracted_iocs %}IOCs: {{ extracted_iocs.unique_domains | length }}{% endif %}"
                     "{% if virustotal_reports %}VT Reports: {{ virustotal_reports | length }}{% endif %}"
                     "</body></html>")
+    # Environment dibagi per proses; dibuang agar template hasil open() yang di-mock tidak terbawa ke tes lain
+    clear_template_environments()
     return HTMLReportGenerator(template_dir="templates")
 
 @pytest.fixture
@@ -95,11 +101,12 @@ def test_unixtimestampformat_filter(report_generator_instance, timestamp_input,
         assert report_generator_instance.unixtimestampformat(timestamp_input) == expected_output
 
 
+@mock.patch('core.report_generator.os.replace')
 @mock.patch('core.report_generator.os.makedirs')
 @mock.patch('core.report_generator.os.path.exists')
 @mock.patch('core.report_generator.shutil.copy2')
 @mock.patch('builtins.open', new_callable=mock.mock_open) 
-def test_generate_report_success(mock_open_file, mock_shutil_copy, mock_os_path_exists, mock_os_makedirs,
+def test_generate_report_success(mock_open_file, mock_shutil_copy, mock_os_path_exists, mock_os_makedirs, mock_os_replace,
                                  report_generator_instance, dummy_analysis_data, dummy_screenshot_file_path):
     """Tes generate_report untuk kasus sukses."""
     
@@ -125,16 +132,18 @@ def test_generate_report_success(mock_open_file, mock_shutil_copy, mock_os_path_
     mock_shutil_copy.assert_called_once() 
     
     # Cek apakah file HTML ditulis dengan path yang benar
-    # Panggilan terakhir ke open harusnya untuk menulis file laporan
-    assert mock_open_file.call_args_list[-1] == mock.call(report_path, 'w', encoding='utf-8')
+    # Panggilan terakhir ke open harusnya untuk menulis file sementara, yang lalu di-rename ke path laporan
+    assert mock_open_file.call_args_list[-1] == mock.call(report_path + ".tmp", 'w', encoding='utf-8')
     mock_open_file().write.assert_called()
+    mock_os_replace.assert_called_with(report_path + ".tmp", report_path)
 
 
+@mock.patch('core.report_generator.os.replace')
 @mock.patch('core.report_generator.os.makedirs')
 @mock.patch('core.report_generator.os.path.exists', return_value=False) # Screenshot tidak ditemukan
 @mock.patch('core.report_generator.shutil.copy2')
 @mock.patch('builtins.open', new_callable=mock.mock_open)
-def test_generate_report_no_screenshot_file(mock_open_file, mock_shutil_copy, mock_os_path_exists_false, mock_os_makedirs,
+def test_generate_report_no_screenshot_file(mock_open_file, mock_shutil_copy, mock_os_path_exists_false, mock_os_makedirs, mock_os_replace,
                                           report_generator_instance, dummy_analysis_data):
     """Tes generate_report ketika file screenshot asli tidak ditemukan."""
     dummy_analysis_data_no_ss = dummy_analysis_data.copy()
@@ -151,10 +160,11 @@ def test_generate_report_no_screenshot_file(mock_open_file, mock_shutil_copy, mo
     # Kita cek apakah ada panggilan 'open' dalam mode 'w' yang path-nya ada di config.HTML_REPORT_DIR
     for call_obj in mock_open_file.call_args_list:
         args, kwargs = call_obj
-        if len(args) >= 2 and args[1] == 'w' and config.HTML_REPORT_DIR in args[0] and args[0].endswith(config.DEFAULT_HTML_REPORT_FILENAME):
+        if len(args) >= 2 and args[1] == 'w' and config.HTML_REPORT_DIR in args[0] and args[0].endswith(config.DEFAULT_HTML_REPORT_FILENAME + ".tmp"):
             found_write_call_to_report = True
             break
     assert found_write_call_to_report, "Expected 'open' to be called in write mode for the HTML report file."
+    mock_os_replace.assert_called_with(report_path + ".tmp", report_path)
 
 
 def test_generate_report_template_not_found(report_generator_instance, dummy_analysis_data):
@@ -162,3 +172,198 @@ def test_generate_report_template_not_found(report_generator_instance, dummy_ana
     with mock.patch.object(report_generator_instance.env, 'get_template', side_effect=JinjaExceptions.TemplateNotFound("non_existent_template.html")):
         report_path = report_generator_instance.generate_report(dummy_analysis_data)
         assert report_path is None
+
+
+def test_generate_report_rerender_uses_given_path(report_generator_instance, dummy_analysis_data, tmp_path):
+    """Render ulang dengan report_filepath harus menulis ke path yang sama dan menampilkan penanda pending."""
+    report_path = str(tmp_path / f"test_example_com_20240101-000000_{config.DEFAULT_HTML_REPORT_FILENAME}")
+    dummy_analysis_data['network_events'] = [{"timestamp": time.time(), "type": "request", "method": "GET", "url": "http://test-example.com/resource"}]
+    dummy_analysis_data['intel_pending_indicators'] = ["test-example.com"]
+
+    with mock.patch('core.report_generator.logger') as report_logger:
+        first_path = report_generator_instance.generate_report(dummy_analysis_data, report_filepath=report_path)
+    assert first_path == report_path
+    # Render pertama ke path yang sudah dipesan tetap dicatat sebagai laporan baru
+    assert any("berhasil dibuat" in c.args[0] for c in report_logger.info.call_args_list)
+    with open(report_path, encoding='utf-8') as f:
+        html = f.read()
+    assert "menunggu hasil" in html
+    assert os.path.exists(str(tmp_path / "test_example_com_20240101-000000_dummy_screenshot_for_test.png"))
+
+    dummy_analysis_data['intel_pending_indicators'] = []
+    with mock.patch('core.report_generator.logger') as report_logger:
+        second_path = report_generator_instance.generate_report(dummy_analysis_data, report_filepath=report_path, rerender=True)
+    assert any("dirender ulang" in c.args[0] for c in report_logger.debug.call_args_list)
+    assert second_path == report_path
+    with open(report_path, encoding='utf-8') as f:
+        assert "menunggu hasil" not in f.read()
+
+    # Enrichment dihentikan: indikator sisa tetap ditampilkan tanpa muat ulang otomatis
+    dummy_analysis_data.update(intel_pending_indicators=["test-example.com"], intel_status="stopped")
+    report_generator_instance.generate_report(dummy_analysis_data, report_filepath=report_path)
+    with open(report_path, encoding='utf-8') as f:
+        html = f.read()
+    assert "1 indikator belum diperiksa" in html
+    assert "menunggu hasil" not in html and 'http-equiv="refresh"' not in html
+
+
+def test_rerender_failure_keeps_previous_report(report_generator_instance, dummy_analysis_data, tmp_path):
+    """Laporan ditulis lewat file sementara + os.replace: render yang gagal tidak merusak laporan sebelumnya."""
+    report_path = str(tmp_path / f"atomic_20240101-000000_{config.DEFAULT_HTML_REPORT_FILENAME}")
+    assert report_generator_instance.generate_report(dummy_analysis_data, report_filepath=report_path) == report_path
+    with open(report_path, encoding='utf-8') as f:
+        previous_html = f.read()
+
+    def failing_stream(chunks, f):
+        f.write("<html>setengah")
+        raise RuntimeError("render gagal")
+    with mock.patch.object(report_generator_instance, '_write_stream', side_effect=failing_stream):
+        assert report_generator_instance.generate_report(dummy_analysis_data, report_filepath=report_path) is None
+    with open(report_path, encoding='utf-8') as f:
+        assert f.read() == previous_html
+    assert not os.path.exists(report_path + ".tmp")
+
+
+def test_build_view_model_joins_with_indexes():
+    """View model harus menggabungkan respons, intel dan riwayat IOC tanpa logika di template."""
+    long_url = "http://a.example.com/" + "x" * 120
+    template_data = {
+        'network_events': [
+            {"type": "request", "url": "http://a.example.com/1", "method": "GET", "timestamp": 1},
+            {"type": "response", "url": "http://a.example.com/1", "status": 404, "timestamp": 2},
+            {"type": "response", "url": "http://a.example.com/1", "status": 200, "timestamp": 3},
+            {"type": "request", "url": long_url, "method": "POST", "timestamp": 4},
+        ],
+        'extracted_iocs': {
+            "unique_domains": ["a.example.com", "b.example.com", "c.example.com"],
+            "registrable_domain_map": {"b.example.com": "example.com", "c.example.com": "example.com"},
+            "potentially_harmful_urls": [{"url": "http://a.example.com/x.exe", "extension": ".exe"}],
+        },
+        'virustotal_reports': [
+            {"domain": "a.example.com", "malicious": 1, "sources": ["virustotal", "local_file"]},
+            {"domain": "example.com", "malicious": 0},
+            {"indicator": "http://a.example.com/x.exe", "malicious": 7},
+        ],
+        'intel_pending_indicators': ["c.example.com"],
+        'ioc_history': {"a.example.com": 3, "http://a.example.com/x.exe": 2},
+        'cookies': [{"error": "gagal"}],
+        'local_storage': {"error": "gagal"},
+    }
+    view = HTMLReportGenerator.build_view_model(template_data)
+
+    rows = view['network_rows']
+    assert [row['index'] for row in rows] == [1, 2]
+    assert rows[0]['status'] == 404 # respons pertama untuk URL tersebut
+    assert rows[0]['domain'] == "a.example.com"
+    assert rows[1]['status'] == 'N/A'
+    assert rows[1]['url_display'].endswith("...") and len(rows[1]['url_display']) == 103
+
+    domains = {row['domain']: row for row in view['domain_rows']}
+    assert domains["a.example.com"]['intel_label'] == "virustotal, local_file"
+    assert domains["a.example.com"]['seen_before'] == 3
+    assert domains["b.example.com"]['intel']['domain'] == "example.com" # fallback ke domain terdaftar
+    assert domains["c.example.com"]['intel_pending'] is False # sudah ada hasil intel via domain terdaftar
+
+    assert view['harmful_url_rows'][0]['intel']['malicious'] == 7
+    assert view['harmful_url_rows'][0]['seen_before'] == 2
+    assert view['cookies_error'] == "gagal"
+    assert view['counts']['cookies'] == 0
+    assert view['counts']['local_storage'] == 0
+    assert view['counts']['requests'] == 2
+
+
+def test_generate_report_caps_rows_and_writes_overflow_first(report_generator_instance, tmp_path):
+    """Baris di atas batas ditulis ke file pendamping sebelum laporan, dan laporan menautkannya."""
+    events = [{"type": "request", "url": f"http://a.example.com/{i}", "method": "GET", "timestamp": i + 1} for i in range(12)]
+    report_path = str(tmp_path / f"big_20240101-000000_{config.DEFAULT_HTML_REPORT_FILENAME}")
+    written = []
+    real_open = open
+    def tracking_open(path, *args, **kwargs):
+        written.append(os.path.basename(str(path)))
+        return real_open(path, *args, **kwargs)
+
+    with mock.patch.object(config, 'REPORT_MAX_ROWS_PER_SECTION', 5), mock.patch('builtins.open', side_effect=tracking_open):
+        result = report_generator_instance.generate_report({'target_url': "http://a.example.com", 'network_events': events}, report_filepath=report_path)
+    assert result == report_path
+
+    overflow_name = f"big_20240101-000000_network_rows{config.REPORT_OVERFLOW_FILE_SUFFIX}"
+    assert written.index(overflow_name) < written.index(os.path.basename(report_path) + ".tmp")
+    with open(tmp_path / overflow_name, encoding='utf-8') as f:
+        assert len(json.load(f)) == 12
+    with open(report_path, encoding='utf-8') as f:
+        html = f.read()
+    assert "Menampilkan 5 dari 12 baris" in html
+    assert "http://a.example.com/4" in html and "http://a.example.com/5\"" not in html
+
+
+def test_build_view_model_caps_rows_while_building(tmp_path):
+    """Baris di atas batas tidak ditampung di view; file pendamping tetap berisi semua baris."""
+    template_data = {
+        'extracted_iocs': {"unique_domains": [f"d{i}.example.com" for i in range(7)], "post_requests": [{"url": "http://a/"}]},
+    }
+    view = HTMLReportGenerator.build_view_model(template_data, str(tmp_path), "p_", max_rows=3)
+    assert [row['domain'] for row in view['domain_rows']] == ["d0.example.com", "d1.example.com", "d2.example.com"]
+    assert view['counts']['unique_domains'] == 7
+    overflow = view['overflow']['domain_rows']
+    assert overflow == {'total': 7, 'shown': 3, 'file': f"p_domain_rows{config.REPORT_OVERFLOW_FILE_SUFFIX}"}
+    with open(tmp_path / overflow['file'], encoding='utf-8') as f:
+        assert [row['domain'] for row in json.load(f)] == [f"d{i}.example.com" for i in range(7)]
+    assert list(view['overflow']) == ['domain_rows'] and len(os.listdir(tmp_path)) == 1
+
+
+def test_write_stream_buffers_chunks():
+    file_obj = mock.Mock()
+    HTMLReportGenerator._write_stream(iter(["ab", "cd", "ef", "g"]), file_obj, buffer_chars=4)
+    assert [c.args[0] for c in file_obj.write.call_args_list] == ["abcd", "efg"]
+
+
+def test_encode_data_island_roundtrip_and_script_safe():
+    rows = [[1, "GET", "http://a.example.com/</script><b>x</b>"]]
+    island = encode_data_island(rows, compress=True)
+    assert island['encoding'] == 'gzip+base64'
+    assert json.loads(gzip.decompress(base64.b64decode(island['payload']))) == rows
+    plain = encode_data_island(rows, compress=False)
+    assert "</script>" not in plain['payload']
+    assert json.loads(plain['payload']) == rows
+
+
+def test_large_network_table_is_embedded_as_data_island(report_generator_instance, tmp_path):
+    events = [{"type": "request", "url": f"http://a.example.com/{i}", "method": "GET", "timestamp": i + 1} for i in range(30)]
+    report_path = str(tmp_path / f"lazy_20240101-000000_{config.DEFAULT_HTML_REPORT_FILENAME}")
+    with mock.patch.object(config, 'REPORT_LAZY_TABLE_MIN_ROWS', 10):
+        report_generator_instance.generate_report({'target_url': "http://a.example.com", 'network_events': events}, report_filepath=report_path)
+    with open(report_path, encoding='utf-8') as f:
+        html = f.read()
+    assert 'id="networkEventsTableData"' in html
+    assert 'title="http://a.example.com/7"' not in html # baris tidak dirender sebagai <tr>
+    payload = html.split('id="networkEventsTableData"', 1)[1].split('>', 1)[1].split('</script>', 1)[0]
+    rows = json.loads(gzip.decompress(base64.b64decode(payload)))
+    assert len(rows) == 30
+    assert rows[0][0] == 1 and rows[0][3] == "http://a.example.com/0"
+    assert 'data-fallback-file="' not in html # Tidak ada file pendamping tanpa overflow
+
+
+def test_lazy_table_links_overflow_file_as_fallback(report_generator_instance, tmp_path):
+    """Browser tanpa DecompressionStream diarahkan ke file JSON pendamping jika ada."""
+    events = [{"type": "request", "url": f"http://a.example.com/{i}", "method": "GET", "timestamp": i + 1} for i in range(30)]
+    report_path = str(tmp_path / f"lazy_20240101-000000_{config.DEFAULT_HTML_REPORT_FILENAME}")
+    with mock.patch.object(config, 'REPORT_LAZY_TABLE_MIN_ROWS', 10), mock.patch.object(config, 'REPORT_LAZY_TABLE_MAX_ROWS', 20):
+        report_generator_instance.generate_report({'target_url': "http://a.example.com", 'network_events': events}, report_filepath=report_path)
+    with open(report_path, encoding='utf-8') as f:
+        html = f.read()
+    assert f'data-fallback-file="lazy_20240101-000000_network_rows{config.REPORT_OVERFLOW_FILE_SUFFIX}"' in html
+    assert "'DecompressionStream' in window" in html
+
+
+def test_template_environment_is_shared_and_cached(tmp_path):
+    """Environment dibagi lintas generator dan bytecode template disimpan ke cache di disk."""
+    clear_template_environments()
+    with mock.patch.object(config, 'REPORT_TEMPLATE_CACHE_DIR', str(tmp_path / "cache")):
+        first = HTMLReportGenerator()
+        second = HTMLReportGenerator()
+        assert first.env is second.env
+        assert first.env.auto_reload is config.REPORT_TEMPLATE_AUTO_RELOAD
+        first.env.get_template("report_template.html")
+        assert os.listdir(tmp_path / "cache")
+    assert get_template_environment(os.path.join(project_root, "templates")) is first.env
+    clear_template_environments()
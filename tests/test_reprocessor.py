@@ -0,0 +1,142 @@
+# tests/test_reprocessor.py
+import os
+import sys
+import json
+import pytest
+from unittest import mock
+
+# Tambahkan path root proyek ke sys.path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+import config
+from core.network_log import write_network_log
+from core.report_generator import HTMLReportGenerator
+from core.reprocessor import (
+    iter_network_logs, infer_target_url, reprocess_log, reprocess_directory, run_reprocess, _analysis_timestamp,
+)
+
+SAMPLE_EVENTS = [
+    {"type": "request", "url": "http://cdn.example.com/app.js", "method": "GET", "resource_type": "script", "timestamp": 1},
+    {"type": "request", "url": "http://victim.example.com/", "method": "GET", "resource_type": "document", "timestamp": 2},
+    {"type": "request", "url": "http://evil.example.net/payload.exe", "method": "GET", "resource_type": "other", "timestamp": 3},
+    {"type": "response", "url": "http://evil.example.net/payload.exe", "status": 200, "timestamp": 4},
+]
+
+def write_log(directory, name, events=SAMPLE_EVENTS):
+    path = directory / f"{name}_20250102-030405_{config.DEFAULT_NETWORK_LOG_FILENAME}"
+    write_network_log(events, str(path))
+    return str(path)
+
+def test_iter_network_logs_filters_by_suffix(tmp_path):
+    write_log(tmp_path, "a")
+    write_log(tmp_path, "b")
+    (tmp_path / "notes.txt").write_text("x")
+    assert sorted(os.path.basename(p) for p in iter_network_logs(str(tmp_path))) == sorted([
+        f"a_20250102-030405_{config.DEFAULT_NETWORK_LOG_FILENAME}", f"b_20250102-030405_{config.DEFAULT_NETWORK_LOG_FILENAME}"
+    ])
+    assert list(iter_network_logs(str(tmp_path / "missing"))) == []
+
+def test_iter_network_logs_accepts_compressed_and_legacy_logs(tmp_path):
+    write_network_log(SAMPLE_EVENTS, str(tmp_path / f"gz_20250102-030405_{config.DEFAULT_NETWORK_LOG_FILENAME}.gz"))
+    (tmp_path / f"old_20250102-030405_{config.NETWORK_LOG_DEBUG_FILENAME}").write_text(json.dumps(SAMPLE_EVENTS, indent=4))
+    paths = sorted(iter_network_logs(str(tmp_path)))
+    assert len(paths) == 2
+    for path in paths:
+        assert reprocess_log(path, generate_report=False)["event_count"] == 4
+    assert _analysis_timestamp(paths[0]) == "2025-01-02 03:04:05"
+
+def test_infer_target_url_prefers_document_request():
+    assert infer_target_url(SAMPLE_EVENTS) == "http://victim.example.com/"
+    assert infer_target_url(SAMPLE_EVENTS[:1]) == "http://cdn.example.com/app.js"
+    assert infer_target_url([]) is None
+
+def test_analysis_timestamp_from_filename(tmp_path):
+    assert _analysis_timestamp(write_log(tmp_path, "site")) == "2025-01-02 03:04:05"
+
+def test_reprocess_log_writes_report(tmp_path):
+    log_path = write_log(tmp_path, "victim_example_com")
+    report_dir = tmp_path / "reports"
+    summary = reprocess_log(log_path, report_dir=str(report_dir))
+    assert summary["error"] is None
+    assert summary["target_url"] == "http://victim.example.com/"
+    assert summary["event_count"] == 4
+    assert summary["unique_domains"] == 3
+    assert summary["html_report_path"] == str(report_dir / f"victim_example_com_20250102-030405_{config.DEFAULT_HTML_REPORT_FILENAME}")
+    assert "payload.exe" in open(summary["html_report_path"], encoding="utf-8").read()
+
+def test_reprocess_log_reports_invalid_file(tmp_path):
+    log_path = tmp_path / f"broken_{config.DEFAULT_NETWORK_LOG_FILENAME}"
+    log_path.write_text("{not json")
+    summary = reprocess_log(str(log_path), generate_report=False)
+    assert summary["error"].startswith("Gagal membaca log")
+
+def test_reprocess_directory_uses_threat_intel_when_enabled(tmp_path):
+    write_log(tmp_path, "one")
+    aggregator = mock.Mock()
+    aggregator.lookup_indicators.return_value = [{"domain": "evil.example.net", "malicious": 3}]
+    with mock.patch("core.reprocessor._get_worker_aggregator", return_value=aggregator):
+        results = list(reprocess_directory(str(tmp_path), threat_intel_enabled=True, generate_report=False, max_workers=1))
+    assert len(results) == 1
+    aggregator.lookup_indicators.assert_called_once()
+
+def test_reprocess_directory_parallel_matches_serial(tmp_path):
+    for index in range(5):
+        write_log(tmp_path, f"site{index}")
+    serial = list(reprocess_directory(str(tmp_path), generate_report=False, max_workers=1))
+    parallel = list(reprocess_directory(str(tmp_path), generate_report=False, max_workers=2))
+    key = lambda summary: summary["log_path"]
+    assert sorted(serial, key=key) == sorted(parallel, key=key)
+
+def test_reprocess_directory_scores_domains_per_chunk(tmp_path, monkeypatch):
+    for index in range(5):
+        write_log(tmp_path, f"site{index}")
+    (tmp_path / f"broken_{config.DEFAULT_NETWORK_LOG_FILENAME}").write_text("{not json")
+    monkeypatch.setattr(config, "REPROCESS_BATCH_SIZE", 4)
+    with mock.patch("core.reprocessor.annotate_domain_risk") as annotate:
+        results = list(reprocess_directory(str(tmp_path), generate_report=False, max_workers=1))
+    assert len(results) == 6 and sum(1 for summary in results if summary["error"]) == 1
+    # 6 log dalam kelompok berisi 4: dua panggilan skor tervektorisasi, log rusak tidak ikut dinilai
+    assert annotate.call_count == 2
+    assert sum(len(c.args[0]) for c in annotate.call_args_list) == 5
+
+def test_reprocess_intel_uses_registrable_domain_option(tmp_path, monkeypatch):
+    write_log(tmp_path, "one")
+    monkeypatch.setattr(config, "THREAT_INTEL_PER_REGISTRABLE_DOMAIN", True)
+    aggregator = mock.Mock()
+    aggregator.lookup_indicators.return_value = []
+    with mock.patch("core.reprocessor._get_worker_aggregator", return_value=aggregator):
+        list(reprocess_directory(str(tmp_path), threat_intel_enabled=True, generate_report=False, max_workers=1))
+    assert sorted(aggregator.lookup_indicators.call_args.args[0]["domain"]) == ["example.com", "example.net"]
+
+def test_run_reprocess_survives_unexpected_worker_error(tmp_path):
+    log_dir = tmp_path / "logs"
+    log_dir.mkdir()
+    write_log(log_dir, "good")
+    write_log(log_dir, "bad")
+    (log_dir / f"corrupt_{config.DEFAULT_NETWORK_LOG_FILENAME}.zst").write_bytes(b"bukan zstd")
+    real_generate = HTMLReportGenerator.generate_report
+    def generate(self, analysis_data, report_filepath=None):
+        if "bad_" in os.path.basename(report_filepath):
+            raise RuntimeError("template rusak")
+        return real_generate(self, analysis_data, report_filepath=report_filepath)
+    report_dir = tmp_path / "reports"
+    with mock.patch.object(HTMLReportGenerator, "generate_report", generate):
+        results = {os.path.basename(r["log_path"]).split("_")[0]: r for r in run_reprocess(str(log_dir), report_dir=str(report_dir), max_workers=1)}
+    assert results["good"]["error"] is None
+    assert "template rusak" in results["bad"]["error"]
+    assert results["corrupt"]["error"].startswith("Gagal membaca log")
+    assert any(name.endswith(config.AGGREGATE_REPORT_FILENAME) for name in os.listdir(report_dir))
+
+def test_run_reprocess_writes_batch_dashboard(tmp_path):
+    log_dir = tmp_path / "logs"
+    log_dir.mkdir()
+    write_log(log_dir, "victim_example_com")
+    report_dir = tmp_path / "reports"
+    results = run_reprocess(str(log_dir), report_dir=str(report_dir), max_workers=1)
+    assert "aggregate" not in results[0]
+    dashboards = [name for name in os.listdir(report_dir) if name.endswith(config.AGGREGATE_REPORT_FILENAME)]
+    assert len(dashboards) == 1
+    html = (report_dir / dashboards[0]).read_text(encoding="utf-8")
+    assert "evil.example.net" in html
+    assert 'href="victim_example_com_20250102-030405_' in html
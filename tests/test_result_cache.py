@@ -0,0 +1,93 @@
+# tests/test_result_cache.py
+import os
+import sys
+import pytest
+from unittest import mock
+
+# Tambahkan path root proyek ke sys.path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+import config
+from core.result_cache import ResultCache, normalize_url, analysis_options, cache_key
+from core.report_generator import clear_template_environments
+
+OPTIONS = analysis_options("chromium", True, False, False)
+
+@pytest.fixture
+def report(tmp_path):
+    path = tmp_path / "report.html"
+    path.write_text("<html></html>", encoding="utf-8")
+    return str(path)
+
+@pytest.fixture
+def cache(tmp_path):
+    with ResultCache(str(tmp_path / "cache.sqlite3"), ttl_seconds=60, max_entries=3) as result_cache:
+        yield result_cache
+
+def test_normalize_url():
+    assert normalize_url("HTTP://Example.COM:80") == "http://example.com/"
+    assert normalize_url("https://example.com:8443/a?b=2&a=1#frag") == "https://example.com:8443/a?a=1&b=2"
+    assert normalize_url("http://user:pw@[::1]:80/x") == "http://user:pw@[::1]/x"
+    assert normalize_url("http://example.com/Path") != normalize_url("http://example.com/path")
+
+def test_cache_key_depends_on_options():
+    assert cache_key("http://example.com", OPTIONS) == cache_key("HTTP://EXAMPLE.com/", dict(OPTIONS))
+    assert cache_key("http://example.com", OPTIONS) != cache_key("http://example.com", analysis_options("firefox", True, False, False))
+
+def test_hit_returns_stored_result(cache, report):
+    cache.put("http://example.com", OPTIONS, {"html_report_path": report, "summary": {"domains": ["a.test"]}}, now=1000)
+    hit = cache.get("http://EXAMPLE.com/", OPTIONS, now=1010)
+    assert hit["html_report_path"] == report
+    assert hit["summary"] == {"domains": ["a.test"]}
+    assert (hit["age_seconds"], hit["hit_count"]) == (10, 1)
+    assert cache.get("http://example.com", OPTIONS, now=1011)["hit_count"] == 2
+    assert cache.get("http://example.com", dict(OPTIONS, headless=False), now=1011) is None
+
+def test_expired_entry_is_dropped(cache, report):
+    cache.put("http://example.com", OPTIONS, {"html_report_path": report}, now=1000)
+    assert cache.get("http://example.com", OPTIONS, now=1061) is None
+    assert cache.count() == 0
+
+def test_missing_report_invalidates_entry(cache, report):
+    cache.put("http://example.com", OPTIONS, {"html_report_path": report}, now=1000)
+    os.remove(report)
+    assert cache.get("http://example.com", OPTIONS, now=1001) is None
+
+def test_lru_eviction_keeps_recently_used(cache, report):
+    for index in range(3):
+        cache.put(f"http://site{index}.test", OPTIONS, {"html_report_path": report}, now=1000 + index)
+    cache.get("http://site0.test", OPTIONS, now=1010) # site0 kini paling baru diakses
+    cache.put("http://site3.test", OPTIONS, {"html_report_path": report}, now=1011)
+    assert cache.count() == 3
+    assert cache.get("http://site1.test", OPTIONS, now=1012) is None
+    assert cache.get("http://site0.test", OPTIONS, now=1012) is not None
+
+def test_run_batch_reuses_cached_results(tmp_path, monkeypatch):
+    import main
+    monkeypatch.setattr(config, "HTML_REPORT_DIR", str(tmp_path / "reports"))
+    monkeypatch.setattr(config, "NETWORK_LOG_DIR", str(tmp_path / "logs"))
+    monkeypatch.setattr(config, "AGGREGATE_REPORT_DIR", str(tmp_path / "reports"))
+    monkeypatch.setattr(config, "RESULT_CACHE_PATH", str(tmp_path / "cache.sqlite3"))
+    monkeypatch.setattr(config, "BATCH_LEDGER_PATH", str(tmp_path / "ledger.sqlite3"))
+    clear_template_environments()
+    events = [{"type": "request", "url": "http://cdn.example.net/app.js", "method": "GET", "timestamp": 1}]
+    automation = mock.Mock()
+    automation.return_value.analyze_page.return_value = (None, events, {}, {}, [], [])
+
+    def batch(name, force=False):
+        # File batch berbeda: ledger tidak berbagi progres, jadi yang diuji di sini hanya cache
+        batch_file = tmp_path / name
+        batch_file.write_text("http://a.test/\nhttp://b.test/\n", encoding="utf-8")
+        return main.run_batch(str(batch_file), "chromium", True, False, ioc_store_enabled=False,
+                              event_store_enabled=False, force=force)
+    with mock.patch("core.browser_operations.BrowserAutomation", automation):
+        first = batch("first.txt")
+        assert automation.return_value.analyze_page.call_count == 2
+        second = batch("second.txt")
+        assert automation.return_value.analyze_page.call_count == 2 # Semua dari cache
+        batch("third.txt", force=True)
+        assert automation.return_value.analyze_page.call_count == 4
+    for dashboard in (first, second):
+        html = open(dashboard, encoding="utf-8").read()
+        assert "cdn.example.net" in html
@@ -0,0 +1,128 @@
+# tests/test_scheduler.py
+import os
+import sys
+import time
+import threading
+import pytest
+from unittest import mock
+
+# Tambahkan path root proyek ke sys.path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+import config
+from core.scheduler import HostScheduler, host_key, lane_rank, LANE_URGENT, LANE_BULK
+from core.report_generator import clear_template_environments
+
+def submit_all(scheduler, urls):
+    for url in urls:
+        scheduler.submit({"target_url": url})
+    scheduler.close()
+
+def test_host_key_and_lanes():
+    assert host_key("https://WWW.Example.com.:8443/a") == "www.example.com"
+    assert host_key("bukan url") is None
+    assert lane_rank(LANE_URGENT) < lane_rank(LANE_BULK)
+    with pytest.raises(ValueError):
+        lane_rank("segera")
+
+def test_hosts_are_served_round_robin():
+    scheduler = HostScheduler(max_per_host=10, min_interval_seconds=0)
+    submit_all(scheduler, ["http://a.test/1", "http://a.test/2", "http://a.test/3", "http://b.test/1", "http://c.test/1"])
+    order = []
+    for job in scheduler:
+        order.append(job["target_url"])
+        scheduler.release(job)
+    assert order == ["http://a.test/1", "http://b.test/1", "http://c.test/1", "http://a.test/2", "http://a.test/3"]
+
+def test_host_cap_blocks_until_release():
+    scheduler = HostScheduler(max_per_host=1, min_interval_seconds=0)
+    submit_all(scheduler, ["http://a.test/1", "http://a.test/2", "http://b.test/1"])
+    first = scheduler.acquire()
+    assert scheduler.acquire()["target_url"] == "http://b.test/1" # Host lain tetap jalan
+    assert scheduler.acquire(timeout=0.05) is None
+    scheduler.release(first)
+    assert scheduler.acquire(timeout=0.05)["target_url"] == "http://a.test/2"
+
+def test_min_interval_between_visits_to_same_host():
+    scheduler = HostScheduler(max_per_host=2, min_interval_seconds=0.2)
+    submit_all(scheduler, ["http://a.test/1", "http://a.test/2"])
+    start = time.monotonic()
+    scheduler.acquire()
+    assert scheduler.acquire(timeout=0.05) is None
+    scheduler.acquire()
+    assert time.monotonic() - start >= 0.2
+
+def test_cancel_wakes_waiting_acquire():
+    scheduler = HostScheduler(max_per_host=1, min_interval_seconds=0)
+    submit_all(scheduler, ["http://a.test/1", "http://a.test/2"])
+    scheduler.acquire()
+    results = []
+    waiter = threading.Thread(target=lambda: results.append(scheduler.acquire()))
+    waiter.start()
+    time.sleep(0.05)
+    scheduler.cancel()
+    waiter.join(timeout=2)
+    assert results == [None] and scheduler.pending() == 0
+
+def test_run_batch_limits_concurrent_visits_per_host(tmp_path, monkeypatch):
+    import main
+    monkeypatch.setattr(config, "HTML_REPORT_DIR", str(tmp_path / "reports"))
+    monkeypatch.setattr(config, "NETWORK_LOG_DIR", str(tmp_path / "logs"))
+    monkeypatch.setattr(config, "AGGREGATE_REPORT_DIR", str(tmp_path / "reports"))
+    monkeypatch.setattr(config, "BATCH_LEDGER_PATH", str(tmp_path / "ledger.sqlite3"))
+    monkeypatch.setattr(config, "RESULT_CACHE_ENABLED", False)
+    monkeypatch.setattr(config, "PIPELINE_CAPTURE_WORKERS", 4)
+    monkeypatch.setattr(config, "SCHEDULER_MAX_PER_HOST", 1)
+    monkeypatch.setattr(config, "SCHEDULER_MIN_INTERVAL_SECONDS", 0)
+    clear_template_environments()
+    urls = [f"http://a.test/{n}" for n in range(4)] + ["http://b.test/", "http://c.test/"]
+    batch_file = tmp_path / "urls.txt"
+    batch_file.write_text("\n".join(urls) + "\n", encoding="utf-8")
+    lock = threading.Lock()
+    active, peak, visited = {}, {}, []
+
+    def automation(target_url, **kwargs):
+        host = host_key(target_url)
+
+        def analyze_page():
+            with lock:
+                active[host] = active.get(host, 0) + 1
+                peak[host] = max(peak.get(host, 0), active[host])
+                visited.append(target_url)
+            time.sleep(0.02)
+            with lock:
+                active[host] -= 1
+            return (None, [], {}, {}, [], [])
+        return mock.Mock(analyze_page=analyze_page)
+    with mock.patch("core.browser_operations.BrowserAutomation", automation):
+        assert main.run_batch(str(batch_file), "chromium", True, False, ioc_store_enabled=False, event_store_enabled=False)
+    assert sorted(visited) == sorted(urls)
+    assert peak == {"a.test": 1, "b.test": 1, "c.test": 1}
+    assert visited.index("http://c.test/") < visited.index("http://a.test/1") # Host lain tidak menunggu antrean a.test
+
+def test_urgent_lane_is_served_before_bulk():
+    scheduler = HostScheduler(max_per_host=1, min_interval_seconds=0)
+    scheduler.submit({"target_url": "http://a.test/1"})
+    scheduler.submit({"target_url": "http://b.test/1"}, lane=LANE_BULK)
+    scheduler.submit({"target_url": "http://b.test/2"}, lane=LANE_URGENT)
+    scheduler.submit({"target_url": "http://a.test/2"}, lane=LANE_URGENT)
+    scheduler.close()
+    first = scheduler.acquire()
+    second = scheduler.acquire()
+    assert [first["target_url"], second["target_url"]] == ["http://b.test/2", "http://a.test/2"]
+    assert scheduler.acquire(timeout=0.05) is None # Batas per host tetap berlaku lintas jalur
+    scheduler.release(first)
+    assert scheduler.acquire(timeout=0.05)["target_url"] == "http://b.test/1"
+    with pytest.raises(ValueError):
+        scheduler.submit({"target_url": "http://c.test/"}, lane="segera")
+
+def test_batch_file_lanes(tmp_path):
+    import main
+    batch_file = tmp_path / "urls.txt"
+    batch_file.write_text("# komentar\nhttp://a.test/\nhttp://b.test/ urgent\nhttp://c.test/ segera\n", encoding="utf-8")
+    assert list(main.iter_batch_entries(str(batch_file))) == [
+        ("http://a.test/", LANE_BULK), ("http://b.test/", LANE_URGENT), ("http://c.test/", LANE_BULK)
+    ]
+    assert list(main.iter_batch_entries(str(batch_file), LANE_URGENT))[0] == ("http://a.test/", LANE_URGENT)
+    assert list(main.iter_batch_urls(str(batch_file))) == ["http://a.test/", "http://b.test/", "http://c.test/"]
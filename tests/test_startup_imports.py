@@ -0,0 +1,50 @@
+# tests/test_startup_imports.py
+import os
+import sys
+import subprocess
+
+# Tambahkan path root proyek ke sys.path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+HEAVY_MODULES = ("playwright", "jinja2", "requests", "numpy")
+
+def run_probe(code, cwd):
+    """Menjalankan kode di interpreter baru (sys.modules bersih) dengan root proyek di PYTHONPATH."""
+    env = dict(os.environ, PYTHONPATH=project_root)
+    result = subprocess.run([sys.executable, "-c", code], cwd=cwd, env=env, capture_output=True, text=True, check=True)
+    return result.stdout.strip()
+
+def loaded_heavy_modules(module, cwd):
+    code = f"import sys, {module}; print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    return [name for name in run_probe(code, cwd).split(",") if name]
+
+def test_import_main_skips_heavy_modules(tmp_path):
+    assert loaded_heavy_modules("main", str(tmp_path)) == []
+
+def test_import_ioc_store_skips_requests(tmp_path):
+    # --query-ioc hanya butuh IOCStore; provider VirusTotal memuat requests saat dibuat
+    assert loaded_heavy_modules("core.ioc_store", str(tmp_path)) == []
+
+def test_import_does_not_create_log_file(tmp_path):
+    log_file = os.path.join(str(tmp_path), "startup.log")
+    code = ("import config; config.LOG_FILE = " + repr(log_file) + "\n"
+            "from utils.logger_config import setup_logger\n"
+            "setup_logger('startup_probe', 'INFO', config.LOG_FILE)\n"
+            "import main\n"
+            "import os; print(os.path.exists(config.LOG_FILE))")
+    assert run_probe(code, str(tmp_path)) == "False"
+
+def test_help_does_not_load_heavy_modules(tmp_path):
+    code = ("import sys, runpy\n"
+            "sys.argv = ['main.py', '--help']\n"
+            "try:\n"
+            "    runpy.run_path(" + repr(os.path.join(project_root, "main.py")) + ", run_name='__main__')\n"
+            "except SystemExit:\n"
+            "    pass\n"
+            "print('HEAVY=' + ','.join(m for m in " + repr(HEAVY_MODULES) + " if m in sys.modules))")
+    assert run_probe(code, str(tmp_path)).splitlines()[-1] == "HEAVY="
+
+def test_import_pipeline_skips_heavy_modules(tmp_path):
+    # --batch mengimpor pipeline; Playwright/Jinja2/numpy baru dimuat saat tahapnya berjalan
+    assert loaded_heavy_modules("core.pipeline", str(tmp_path)) == []
@@ -9,7 +9,7 @@ project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 sys.path.insert(0, project_root)
 
 # Impor kelas yang akan diuji dan konfigurasi
-from core.threat_intelligence import VirusTotalAnalyzer, VIRUSTOTAL_API_URL_DOMAIN_REPORT
+from core.threat_intelligence import VirusTotalAnalyzer, VIRUSTOTAL_API_URL_DOMAIN_REPORT, VIRUSTOTAL_API_URL_URL_REPORT
 import config # Untuk mengakses config.VIRUSTOTAL_API_KEY saat inisialisasi
 
 # --- Tes untuk VirusTotalAnalyzer ---
@@ -187,3 +187,29 @@ def test_get_domain_report_unexpected_json_structure(mock_requests_get, vt_analy
     # Anda bisa menambahkan assert lain untuk memeriksa bagaimana error parsing ditangani
     # atau apakah ia mengembalikan error spesifik jika parsing gagal total.
     # Saat ini, ia akan mencoba mengambil field dan default ke 0/None jika tidak ada.
+
+@mock.patch('core.threat_intelligence.requests.get')
+def test_get_url_report_uses_base64url_id(mock_requests_get, vt_analyzer_with_key):
+    """Tes get_url_report memakai ID base64url tanpa padding dan mengembalikan key indicator."""
+    mock_requests_get.return_value = MockResponse(MOCK_VT_SUCCESS_MALICIOUS, 200)
+
+    url = "http://evil.example/payload.exe"
+    report = vt_analyzer_with_key.get_url_report(url)
+
+    called_url = mock_requests_get.call_args[0][0]
+    assert called_url.startswith(VIRUSTOTAL_API_URL_URL_REPORT)
+    assert not called_url.endswith("=")
+    assert report["indicator"] == url
+    assert report["indicator_type"] == "url"
+    assert report["malicious"] == 55
+    assert "domain" not in report
+
+@mock.patch('core.threat_intelligence.requests.get')
+def test_get_ip_report_error_keeps_indicator(mock_requests_get, vt_analyzer_with_key):
+    """Tes error pada get_ip_report tetap menyertakan indikator."""
+    mock_requests_get.return_value = MockResponse({"error": {"message": "Not Found"}}, 404)
+
+    report = vt_analyzer_with_key.get_ip_report("10.0.0.1")
+
+    assert report["indicator"] == "10.0.0.1"
+    assert report["error"] == "HTTP Error: 404"
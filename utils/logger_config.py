@@ -1,7 +1,16 @@
 # utils/logger_config.py
-import logging
-import sys
 import os
+import sys
+import copy
+import json
+import queue
+import atexit
+import logging
+import logging.handlers
+import threading
+import contextlib
+import contextvars
+from datetime import datetime
 # Impor konfigurasi dari file config.py di root project
 try:
     import config
@@ -50,6 +59,7 @@ class ANSIColors:
 class ColoredFormatter(logging.Formatter):
     """
     Formatter kustom untuk menambahkan warna ke output log berdasarkan level.
+    Record tidak diubah, sehingga handler lain (file, JSON) tetap menerima levelname polos.
     """
     LOG_LEVEL_COLORS = {
         logging.DEBUG: ANSIColors.BRIGHT_BLUE,
@@ -60,127 +70,217 @@ class ColoredFormatter(logging.Formatter):
     }
 
     def format(self, record):
-        # Dapatkan warna berdasarkan level log
         log_color = self.LOG_LEVEL_COLORS.get(record.levelno, ANSIColors.RESET)
-        
-        # Format pesan log asli
-        # Kita bisa mewarnai seluruh baris atau hanya bagian tertentu (misalnya, levelname)
-        # Untuk contoh ini, kita warnai levelname dan pesan
-        
-        # Simpan format asli
-        original_fmt = self._style._fmt
-        
-        # Warnai levelname
-        record.levelname = f"{log_color}{record.levelname}{ANSIColors.RESET}"
-        
-        # Kita bisa juga mewarnai pesan jika mau, tapi hati-hati jika pesan mengandung format lain
-        # record.msg = f"{log_color}{record.msg}{ANSIColors.RESET}" # Contoh mewarnai pesan
-
-        # Format pesan dengan levelname yang sudah berwarna
-        formatted_message = super().format(record)
-        
-        # Kembalikan format asli untuk penggunaan selanjutnya (penting jika formatter digunakan oleh handler lain)
-        self._style._fmt = original_fmt
-        
-        # Tambahkan warna pada seluruh pesan jika diinginkan, atau hanya pada bagian tertentu
-        # Untuk output yang lebih elegan, kita bisa mewarnai timestamp, nama logger, dll. secara berbeda
-        # Contoh sederhana: mewarnai seluruh baris berdasarkan level
-        # return f"{log_color}{formatted_message}{ANSIColors.RESET}"
-        
-        # Untuk saat ini, kita hanya mewarnai levelname seperti di atas.
-        # Jika ingin mewarnai lebih banyak, kita perlu memodifikasi format string atau
-        # mem-parse dan mewarnai setiap bagian secara terpisah.
-
-        # Untuk membuat lebih elegan, mari kita format ulang dengan warna pada bagian-bagian tertentu.
-        log_fmt_parts = {
-            'asctime': f"{ANSIColors.BRIGHT_BLACK}{record.asctime}{ANSIColors.RESET}",
-            'name': f"{ANSIColors.CYAN}{record.name}{ANSIColors.RESET}",
-            'levelname_colored': record.levelname, # Sudah diwarnai di atas
-            'message': f"{log_color if record.levelno >= logging.WARNING else ANSIColors.RESET}{record.getMessage()}{ANSIColors.RESET}",
-        }
-        
-        # Format string yang lebih elegan
-        # Anda bisa menyesuaikan ini sesuai selera
-        # Contoh: "2023-10-27 10:00:00,123 - my_logger - INFO - Ini pesan info"
-        # Kita akan gunakan format default dari config, tapi dengan bagian yang diwarnai
-        
-        # Menggunakan format string yang mirip dengan config.LOG_FORMAT
-        # tapi dengan placeholder yang sudah diwarnai
-        # Ini agak rumit jika formatnya sangat dinamis.
-        # Cara yang lebih mudah adalah dengan memodifikasi record sebelum diformat oleh super().format(record)
-        
-        # Kita akan tetap pada pendekatan mewarnai levelname dan pesan utama untuk kesederhanaan implementasi awal
-        # dan mengembalikan formatted_message yang sudah dimodifikasi oleh super().format(record)
-        # dengan record.levelname yang sudah berwarna.
-
-        # Jika ingin mewarnai seluruh baris:
-        # return f"{log_color}{super().format(record)}{ANSIColors.RESET}"
-        
-        # Untuk mewarnai bagian tertentu, kita perlu memodifikasi record sebelum super().format
-        # atau membuat string format secara manual.
-
-        # Mari kita coba pendekatan yang lebih terkontrol untuk format output:
-        # Format dasar: '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-        
-        # Dapatkan pesan asli tanpa warna tambahan dari record.getMessage()
-        message_original = record.getMessage()
-        
-        # Tentukan warna pesan utama berdasarkan level
         message_color = log_color if record.levelno >= logging.WARNING else "" # Hanya warnai pesan untuk WARNING ke atas
-        
-        # Buat output yang diformat
-        # Ini adalah contoh, Anda bisa menyesuaikan format dan warna sesuai keinginan
-        output = (
+        return (
             f"{ANSIColors.BRIGHT_BLACK}{self.formatTime(record, self.datefmt)}{ANSIColors.RESET} - "
             f"{ANSIColors.CYAN}{record.name}{ANSIColors.RESET} - "
             f"{log_color}{record.levelname:<8}{ANSIColors.RESET} - " # <8 untuk padding
-            f"{message_color}{message_original}{ANSIColors.RESET}"
+            f"{message_color}{record.getMessage()}{ANSIColors.RESET}"
         )
-        return output
 
 # --- AKHIR BAGIAN BARU ---
 
 
-def setup_logger(logger_name='web_sandbox', level=config.LOG_LEVEL, log_file=config.LOG_FILE):
+class JsonLinesFormatter(logging.Formatter):
+    """Satu objek JSON per baris, termasuk job_id, proses dan thread, agar log multi-worker bisa difilter per job."""
+
+    def format(self, record):
+        entry = {
+            "time": datetime.fromtimestamp(record.created).astimezone().isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "job_id": getattr(record, "job_id", None),
+            "process": record.process,
+            "thread": record.threadName,
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+# job_id aktif untuk thread/konteks saat ini; dicap ke setiap record oleh JobContextFilter
+_current_job_id = contextvars.ContextVar("log_job_id", default=None)
+
+
+@contextlib.contextmanager
+def log_context(job_id):
+    """Menandai semua record log di dalam blok ini (thread/konteks yang sama) dengan job_id."""
+    token = _current_job_id.set(job_id)
+    try:
+        yield
+    finally:
+        _current_job_id.reset(token)
+
+
+class JobContextFilter(logging.Filter):
+    """Mengisi record.job_id dari log_context (kecuali sudah diberikan lewat extra=)."""
+
+    def filter(self, record):
+        if getattr(record, "job_id", None) is None:
+            record.job_id = _current_job_id.get()
+        return True
+
+
+class _StdoutHandler(logging.StreamHandler):
+    """StreamHandler yang selalu menulis ke sys.stdout saat ini (mis. saat stdout diganti oleh test runner)."""
+
+    @property
+    def stream(self):
+        return sys.stdout
+
+    @stream.setter
+    def stream(self, value):
+        pass
+
+
+class QueuedLogHandler(logging.handlers.QueueHandler):
     """
-    Menyiapkan dan mengkonfigurasi logger.
+    Handler bersama untuk semua logger yang menulis ke file log yang sama. Record hanya dimasukkan ke antrean;
+    thread QueueListener yang menulis ke konsol dan file, sehingga jalur panas tidak pernah menunggu disk.
+    Tanpa listener (proses worker multiprocessing, atau setelah stop()) record ditulis langsung.
     """
-    logger = logging.getLogger(logger_name)
-    
-    # Hindari duplikasi handler jika logger sudah diinisialisasi sebelumnya
-    if logger.hasHandlers():
-        logger.handlers.clear()
-        
-    logger.setLevel(getattr(logging, level.upper(), logging.INFO)) 
 
-    # --- PERUBAHAN: Gunakan ColoredFormatter untuk console_handler ---
-    # Formatter untuk konsol (berwarna)
-    console_formatter = ColoredFormatter(config.LOG_FORMAT) # config.LOG_FORMAT mungkin tidak sepenuhnya digunakan jika kita override format di ColoredFormatter
-    
-    # Formatter untuk file (teks biasa, tanpa warna)
-    file_formatter = logging.Formatter(config.LOG_FORMAT)
-    # --- AKHIR PERUBAHAN ---
+    def __init__(self, target_handlers):
+        super().__init__(queue.SimpleQueue())
+        self.target_handlers = tuple(target_handlers)
+        self.listener = None
+        self.addFilter(JobContextFilter())
+
+    def start(self):
+        if self.listener is None:
+            self.listener = logging.handlers.QueueListener(self.queue, *self.target_handlers, respect_handler_level=True)
+            self.listener.start()
+
+    def stop(self):
+        """Menghentikan listener setelah antrean dikosongkan; record berikutnya ditulis langsung."""
+        listener, self.listener = self.listener, None
+        if listener is not None:
+            listener.stop()
+
+    def prepare(self, record):
+        # Pesan dirender di thread pemanggil (argumen bisa berubah setelahnya); traceback disimpan di exc_text
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            record.exc_text = record.exc_text or _TRACEBACK_FORMATTER.formatException(record.exc_info)
+            record.exc_info = None
+        return record
 
-    # Handler untuk output ke konsol
-    console_handler = logging.StreamHandler(sys.stdout)
-    console_handler.setFormatter(console_formatter) # Menggunakan formatter berwarna
-    logger.addHandler(console_handler)
+    def emit(self, record):
+        if self.listener is not None:
+            super().emit(record)
+            return
+        for handler in self.target_handlers:
+            if record.levelno >= handler.level:
+                handler.handle(record)
 
-    log_dir = os.path.dirname(log_file)
+
+_TRACEBACK_FORMATTER = logging.Formatter()
+_queued_handlers = {} # log_file -> QueuedLogHandler; satu set handler output per file log per proses
+_setup_lock = threading.Lock()
+
+
+def _in_worker_process():
+    """True di proses anak multiprocessing (thread listener tidak ikut, dan atexit tidak dijalankan di sana)."""
+    multiprocessing = sys.modules.get("multiprocessing")
+    return multiprocessing is not None and multiprocessing.parent_process() is not None
+
+
+def _build_output_handlers(log_file):
+    # Handler untuk output ke konsol (berwarna)
+    console_handler = _StdoutHandler()
+    console_handler.setFormatter(ColoredFormatter(config.LOG_FORMAT))
+    handlers = [console_handler]
+
+    log_dir = os.path.dirname(log_file) if log_file else ""
     if log_dir and not os.path.exists(log_dir):
         try:
             os.makedirs(log_dir)
         except OSError as e:
             print(f"Error creating log directory {log_dir}: {e}", file=sys.stderr)
-    
+
     if log_file and (not log_dir or os.path.exists(log_dir)):
         try:
-            file_handler = logging.FileHandler(log_file, mode='a') 
-            file_handler.setFormatter(file_formatter) # Menggunakan formatter teks biasa
-            logger.addHandler(file_handler)
+            file_handler = logging.FileHandler(log_file, mode='a', delay=True) # File baru dibuka saat record pertama ditulis
+            if config.LOG_FILE_FORMAT == "json":
+                file_handler.setFormatter(JsonLinesFormatter())
+            else:
+                file_handler.setFormatter(logging.Formatter(config.LOG_FORMAT)) # Teks biasa, tanpa warna
+            handlers.append(file_handler)
         except Exception as e:
             print(f"Error creating file handler for {log_file}: {e}", file=sys.stderr)
+    return handlers
+
+
+def get_queued_handler(log_file=config.LOG_FILE):
+    """Handler antrean bersama untuk log_file; dibuat (dan listener-nya dijalankan) sekali per proses."""
+    with _setup_lock:
+        handler = _queued_handlers.get(log_file)
+        if handler is None:
+            handler = QueuedLogHandler(_build_output_handlers(log_file))
+            if not _in_worker_process():
+                handler.start()
+            _queued_handlers[log_file] = handler
+        return handler
+
+
+def shutdown_logging():
+    """Menghentikan semua listener setelah antreannya dikosongkan (dipanggil otomatis saat proses keluar)."""
+    with _setup_lock:
+        handlers = list(_queued_handlers.values())
+    for handler in handlers:
+        handler.stop()
+
+
+_fork_locked_handlers = []
+
 
+def _before_fork():
+    # Listener tidak boleh sedang menulis saat fork, agar lock stream (stdout/file) tidak terbawa terkunci ke anak
+    _fork_locked_handlers[:] = [target for handler in list(_queued_handlers.values()) for target in handler.target_handlers]
+    for target in _fork_locked_handlers:
+        target.acquire()
+
+
+def _after_fork_in_parent():
+    for target in reversed(_fork_locked_handlers):
+        target.release()
+    _fork_locked_handlers.clear()
+
+
+def _reset_after_fork():
+    # Lock handler sudah diinisialisasi ulang oleh modul logging. Thread listener tidak ikut ter-fork:
+    # proses anak menulis langsung ke handler output
+    global _setup_lock
+    _setup_lock = threading.Lock()
+    for handler in _queued_handlers.values():
+        handler.listener = None
+        handler.queue = queue.SimpleQueue()
+
+
+atexit.register(shutdown_logging) # Terdaftar setelah logging.shutdown, jadi dijalankan lebih dulu
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(before=_before_fork, after_in_parent=_after_fork_in_parent, after_in_child=_reset_after_fork)
+
+
+def setup_logger(logger_name='web_sandbox', level=config.LOG_LEVEL, log_file=config.LOG_FILE):
+    """
+    Menyiapkan dan mengkonfigurasi logger.
+    Aman dipanggil berulang kali: semua logger berbagi satu QueuedLogHandler per file log,
+    sehingga handler dan file log hanya disiapkan sekali per proses.
+    """
+    logger = logging.getLogger(logger_name)
+    logger.setLevel(getattr(logging, level.upper(), logging.INFO))
+    handler = get_queued_handler(log_file)
+    if logger.handlers != [handler]:
+        logger.handlers.clear()
+        logger.addHandler(handler)
     logger.propagate = False
     return logger
 